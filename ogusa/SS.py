@@ -10,6 +10,7 @@ This py-file calls the following other file(s):
             household.py
             firm.py
             utils.py
+            records.py
             OUTPUT/SS/ss_vars.pkl
 
 This py-file creates the following other file(s):
@@ -25,6 +26,8 @@ import cPickle as pickle
 
 from . import tax
 from . import household
+from . import kernels
+from . import records
 from . import aggregates as aggr
 import firm
 import utils
@@ -36,17 +39,73 @@ Set minimizer tolerance
 '''
 MINIMIZER_TOL = 1e-13
 
+'''
+Set the loosest minimizer tolerance and the minimizer tolerance relative
+to the distance in the outer loop, while the outer loop has not converged
+'''
+MINIMIZER_TOL_MAX = 1e-6
+MINIMIZER_TOL_SCALE = 1e-3
+
+'''
+Set number of processes used to compute the Jacobian in the root finder
+for the outer loop (if 1, use scipy.optimize.fsolve)
+'''
+FSOLVE_NUM_WORKERS = 1
+
+'''
+Set largest Euler error for which the household solutions from one
+evaluation of the outer loop residuals are used to start the next
+'''
+HOUSEHOLD_STATE_TOL = 1e-6
+
 '''
 Set flag for enforcement of solution check
 '''
 ENFORCE_SOLUTION_CHECKS = True
 
+'''
+Set wall-clock budget in seconds and budget of evaluations of the outer
+loop residuals (None for no limit), after which run_SS returns its best
+iterate so far, flagged as not converged
+'''
+MAX_SECONDS = None
+MAX_EVALS = None
+
 '''
 ------------------------------------------------------------------------
     Define Functions
 ------------------------------------------------------------------------
 '''
 
+def get_solver_config(**kwargs):
+    '''
+    Collects the settings of the SS solvers in one record, which is
+    passed to run_SS() and the functions it calls in place of the module
+    constants above.  Settings that are not given are read from the
+    module constants when this function is called.
+
+    Inputs:
+        kwargs = settings to change, by field name of records.SolverConfig
+
+    Functions called: None
+
+    Objects in function:
+        solver_config = records.SolverConfig, settings of the solvers
+                        (household_solver is only used in TPI)
+
+    Returns: solver_config
+    '''
+    solver_config = records.SolverConfig(
+        enforce_solution_checks=ENFORCE_SOLUTION_CHECKS,
+        minimizer_tol=MINIMIZER_TOL, minimizer_tol_max=MINIMIZER_TOL_MAX,
+        minimizer_tol_scale=MINIMIZER_TOL_SCALE,
+        fsolve_num_workers=FSOLVE_NUM_WORKERS, household_solver='fsolve',
+        household_state_tol=HOUSEHOLD_STATE_TOL, max_seconds=MAX_SECONDS,
+        max_evals=MAX_EVALS)
+
+    return solver_config._replace(**kwargs)
+
+
 def create_steady_state_parameters(**sim_params):
     '''
     --------------------------------------------------------------------
@@ -112,8 +171,20 @@ def create_steady_state_parameters(**sim_params):
     # Put income tax parameters in a tuple
     # Assumption here is that tax parameters of last year of budget
     # window continue forever and so will be SS values
-    income_tax_params = (sim_params['analytical_mtrs'], sim_params['etr_params'][:,-1,:],
-                         sim_params['mtrx_params'][:,-1,:],sim_params['mtry_params'][:,-1,:])
+    etr_year_params = tax.get_year_params(sim_params['etr_params'])
+    mtrx_year_params = tax.get_year_params(sim_params['mtrx_params'])
+    mtry_year_params = tax.get_year_params(sim_params['mtry_params'])
+    if (etr_year_params is not None and mtrx_year_params is not None and
+            mtry_year_params is not None):
+        # Tax functions do not vary by age, so use a single set of
+        # parameters that broadcasts across ages rather than S copies
+        income_tax_params = records.IncomeTaxParams(
+            sim_params['analytical_mtrs'], etr_year_params[-1,:],
+            mtrx_year_params[-1,:], mtry_year_params[-1,:])
+    else:
+        income_tax_params = records.IncomeTaxParams(
+            sim_params['analytical_mtrs'], sim_params['etr_params'][:,-1,:],
+            sim_params['mtrx_params'][:,-1,:],sim_params['mtry_params'][:,-1,:])
 
     # Make a vector of all one dimensional parameters, to be used in the
     # following functions
@@ -123,7 +194,7 @@ def create_steady_state_parameters(**sim_params):
     if sim_params['budget_balance']:
         sim_params['debt_ratio_ss'] = 0.0
 
-    ss_params = [sim_params['J'], sim_params['S'], sim_params['T'], sim_params['BW'],
+    ss_params = records.SSParams._make([sim_params['J'], sim_params['S'], sim_params['T'], sim_params['BW'],
                   sim_params['beta'], sim_params['sigma'], sim_params['alpha'],
                   sim_params['gamma'], sim_params['epsilon'],
                   sim_params['Z'], sim_params['delta'], sim_params['ltilde'],
@@ -132,14 +203,14 @@ def create_steady_state_parameters(**sim_params):
                   sim_params['budget_balance'], sim_params['alpha_T'], sim_params['debt_ratio_ss'],
                   sim_params['tau_b'], sim_params['delta_tau'],
                   sim_params['lambdas'], sim_params['imm_rates'][-1,:], sim_params['e'], sim_params['retire'], sim_params['mean_income_data']] + \
-                  wealth_tax_params + ellipse_params
-    iterative_params = [sim_params['maxiter'], sim_params['mindist_SS']]
-    chi_params = (sim_params['chi_b_guess'], sim_params['chi_n_guess'])
-    small_open_params = [sim_params['small_open'], sim_params['ss_firm_r'], sim_params['ss_hh_r']]
+                  wealth_tax_params + ellipse_params)
+    iterative_params = records.SSIterativeParams(sim_params['maxiter'], sim_params['mindist_SS'])
+    chi_params = records.ChiParams(sim_params['chi_b_guess'], sim_params['chi_n_guess'])
+    small_open_params = records.SSSmallOpenParams(sim_params['small_open'], sim_params['ss_firm_r'], sim_params['ss_hh_r'])
     return (income_tax_params, ss_params, iterative_params, chi_params, small_open_params)
 
 
-def euler_equation_solver(guesses, params):
+def euler_equation_solver(guesses, params, workspace=None):
     '''
     --------------------------------------------------------------------
     Finds the euler errors for certain b and n, one ability type at a time.
@@ -168,10 +239,15 @@ def euler_equation_solver(guesses, params):
                        labor income function
     mtry_params     = [S,BW,#tax params] array, parameters for marginal tax rate on
                        capital income function
+    workspace = dictionary, arrays from household.get_workspace for
+                ability type j, filled in place, if None they are
+                allocated here
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+    household.get_workspace()
     aggr.get_BQ()
     tax.replacement_rate_vals()
+    kernels.lifetime_euler_errors() (if kernels.enabled())
     household.FOC_savings()
     household.FOC_labor()
     tax.total_taxes()
@@ -189,8 +265,12 @@ def euler_equation_solver(guesses, params):
     error2 = [S,] vector, errors from FOC for labor supply
     tax1 = [S,] vector, total income taxes paid
     cons = [S,] vector, household consumption
+    prices = [4,] vector, r, w, BQ and T_H for kernels.lifetime_euler_errors
+    scalars = [15,] vector, scalar parameters for
+              kernels.lifetime_euler_errors
+    cons_splus1 = [S,] vector, household consumption one period ahead
 
-    RETURNS: 2Sx1 list of euler errors
+    RETURNS: [2S,] vector of euler errors
 
     OUTPUT: None
     --------------------------------------------------------------------
@@ -203,23 +283,49 @@ def euler_equation_solver(guesses, params):
                   analytical_mtrs, etr_params, mtrx_params,\
                   mtry_params = params
 
-    b_guess = np.array(guesses[:S])
-    n_guess = np.array(guesses[S:])
-    b_s = np.array([0] + list(b_guess[:-1]))
+    if workspace is None:
+        workspace = household.get_workspace(e[:, j], etr_params, mtry_params)
+    guesses = np.asarray(guesses, dtype=float)
+    b_guess = guesses[:S]
+    n_guess = guesses[S:]
+    b_s = workspace['b_s']
+    b_s[1:] = b_guess[:-1]
     b_splus1 = b_guess
-    b_splus2 = np.array(list(b_guess[1:]) + [0])
+    b_splus2 = workspace['b_splus2']
+    b_splus2[:-1] = b_guess[1:]
 
     BQ_params = (omega_SS, lambdas[j], rho, g_n_ss, 'SS')
     BQ = aggr.get_BQ(r, b_splus1, BQ_params)
     theta_params = (e[:,j], S, retire)
     theta = tax.replacement_rate_vals(n_guess, w, factor, theta_params)
 
-    foc_save_parms = (e[:, j], sigma, beta, g_y, chi_b[j], theta, tau_bq[j], rho, lambdas[j], J, S,
-                           analytical_mtrs, etr_params, mtry_params, h_wealth, p_wealth, m_wealth, tau_payroll, retire, 'SS')
-    error1 = household.FOC_savings(r, w, b_s, b_splus1, b_splus2, n_guess, BQ, factor, T_H, foc_save_parms)
-    foc_labor_params = (e[:, j], sigma, g_y, theta, b_ellipse, upsilon, chi_n, ltilde, tau_bq[j], lambdas[j], J, S,
-                            analytical_mtrs, etr_params, mtrx_params, h_wealth, p_wealth, m_wealth, tau_payroll, retire, 'SS')
-    error2 = household.FOC_labor(r, w, b_s, b_splus1, n_guess, BQ, factor, T_H, foc_labor_params)
+    if kernels.enabled() and etr_params.ndim < 3:
+        # compute the Euler errors in one compiled loop over ages
+        prices = np.array([r, w, BQ, T_H], dtype=float)
+        scalars = np.array([factor, sigma, beta, g_y, chi_b[j], float(theta), tau_bq[j], lambdas[j],
+                            tau_payroll, h_wealth, p_wealth, m_wealth, b_ellipse, upsilon, ltilde])
+        num_params = etr_params.shape[-1]
+        workspace['n_splus1'][:-1] = n_guess[1:]
+        error1, error2, cons, cons_splus1 = kernels.lifetime_euler_errors(
+            prices[0:1], prices[1:2], prices[2:3], prices[3:4], prices[0:1], prices[1:2], prices[2:3],
+            prices[3:4], b_s, b_splus1, b_splus2, n_guess, workspace['n_splus1'], e[:, j],
+            workspace['e_splus1'], rho, chi_n, etr_params.reshape(-1, num_params),
+            mtrx_params.reshape(-1, num_params), workspace['etr_params_splus1'].reshape(-1, num_params),
+            workspace['mtry_params_splus1'].reshape(-1, num_params), analytical_mtrs, retire, retire - 1,
+            scalars)
+    else:
+        foc_save_parms = (e[:, j], sigma, beta, g_y, chi_b[j], theta, tau_bq[j], rho, lambdas[j], J, S,
+                               analytical_mtrs, etr_params, mtry_params, h_wealth, p_wealth, m_wealth, tau_payroll, retire, 'SS')
+        error1 = household.FOC_savings(r, w, b_s, b_splus1, b_splus2, n_guess, BQ, factor, T_H, foc_save_parms,
+                                       workspace)
+        foc_labor_params = (e[:, j], sigma, g_y, theta, b_ellipse, upsilon, chi_n, ltilde, tau_bq[j], lambdas[j], J, S,
+                                analytical_mtrs, etr_params, mtrx_params, h_wealth, p_wealth, m_wealth, tau_payroll, retire, 'SS')
+        error2 = household.FOC_labor(r, w, b_s, b_splus1, n_guess, BQ, factor, T_H, foc_labor_params)
+        tax1_params = (e[:, j], lambdas[j], 'SS', retire, etr_params, h_wealth, p_wealth,
+                       m_wealth, tau_payroll, theta, tau_bq[j], J, S)
+        tax1 = tax.total_taxes(r, w, b_s, n_guess, BQ, factor, T_H, None, False, tax1_params)
+        cons_params = (e[:, j], lambdas[j], g_y)
+        cons = household.get_cons(r, w, b_s, b_splus1, n_guess, BQ, tax1, cons_params)
 
     # Put in constraints for consumption and savings.
     # According to the euler equations, they can be negative.  When
@@ -237,18 +343,14 @@ def euler_equation_solver(guesses, params):
     error1[mask5] = 1e14
     error2[mask4] = 1e14
 
-    tax1_params = (e[:, j], lambdas[j], 'SS', retire, etr_params, h_wealth, p_wealth,
-                   m_wealth, tau_payroll, theta, tau_bq[j], J, S)
-    tax1 = tax.total_taxes(r, w, b_s, n_guess, BQ, factor, T_H, None, False, tax1_params)
-    cons_params = (e[:, j], lambdas[j], g_y)
-    cons = household.get_cons(r, w, b_s, b_splus1, n_guess, BQ, tax1, cons_params)
     mask6 = cons < 0
     error1[mask6] = 1e14
 
-    return list(error1.flatten()) + list(error2.flatten())
+    return np.concatenate((error1, error2))
 
 
-def inner_loop(outer_loop_vars, params, baseline, baseline_spending=False):
+def inner_loop(outer_loop_vars, params, baseline, baseline_spending=False, xtol=None, warm_start=False,
+               solver_config=None):
     '''
     This function solves for the inner loop of
     the SS.  That is, given the guesses of the
@@ -264,18 +366,20 @@ def inner_loop(outer_loop_vars, params, baseline, baseline_spending=False):
         BQ         = [T,J] vector,  bequest amounts
         factor     = scalar, model income scaling factor
         Y        = [T,] vector, lump sum transfer amount(s)
+        xtol       = scalar, tolerance for the household problems, if
+                     None use the minimizer_tol of solver_config
+        warm_start = boolean, =True if b and n are the solutions at
+                     nearby outer loop variables, so each ability type
+                     starts from its own b and n
+        solver_config = records.SolverConfig, settings of the solvers,
+                     if None use get_solver_config()
 
 
     Functions called:
+        get_solver_config()
+        household.get_workspace()
         euler_equation_solver()
-        aggr.get_K()
-        aggr.get_L()
-        firm.get_Y()
-        firm.get_r()
-        firm.get_w()
-        aggr.get_BQ()
-        tax.replacement_rate_vals()
-        aggr.revenue()
+        update_outer_vars()
 
     Objects in function:
 
@@ -303,24 +407,32 @@ def inner_loop(outer_loop_vars, params, baseline, baseline_spending=False):
         bssmat, nssmat, r, w, Y, T_H, factor = outer_loop_vars
 
     euler_errors = np.zeros((2*S,J))
-
+    if solver_config is None:
+        solver_config = get_solver_config()
+    if xtol is None:
+        xtol = solver_config.minimizer_tol
 
 
     for j in xrange(J):
         # Solve the euler equations
-        if j == 0:
+        if warm_start:
             guesses = np.append(bssmat[:, j], nssmat[:, j])
         else:
-            guesses = np.append(bssmat[:, j-1], nssmat[:, j-1])
+            if j == 0:
+                guesses = np.append(bssmat[:, j], nssmat[:, j])
+            else:
+                guesses = np.append(bssmat[:, j-1], nssmat[:, j-1])
+            guesses = guesses * .9
         euler_params = [r, w, T_H, factor, j, J, S, beta, sigma, ltilde, g_y,\
                   g_n_ss, tau_payroll, retire, mean_income_data,\
                   h_wealth, p_wealth, m_wealth, b_ellipse, upsilon,\
                   j, chi_b, chi_n, tau_bq, rho, lambdas, omega_SS, e,\
                   analytical_mtrs, etr_params, mtrx_params,\
                   mtry_params]
+        workspace = household.get_workspace(e[:, j], etr_params, mtry_params)
 
-        [solutions, infodict, ier, message] = opt.fsolve(euler_equation_solver, guesses * .9,
-                                   args=euler_params, xtol=MINIMIZER_TOL, full_output=True)
+        [solutions, infodict, ier, message] = opt.fsolve(euler_equation_solver, guesses,
+                                   args=(euler_params, workspace), xtol=xtol, full_output=True)
 
         euler_errors[:,j] = infodict['fvec']
       #  print 'Max Euler errors: ', np.absolute(euler_errors[:,j]).max()
@@ -328,6 +440,67 @@ def inner_loop(outer_loop_vars, params, baseline, baseline_spending=False):
         bssmat[:, j] = solutions[:S]
         nssmat[:, j] = solutions[S:]
 
+    new_r, new_w, new_T_H, new_Y, new_factor, new_BQ, \
+         average_income_model = update_outer_vars(bssmat, nssmat, outer_loop_vars, params, baseline, baseline_spending)
+    print 'inner factor prices: ', new_r, new_w
+
+    return euler_errors, bssmat, nssmat, new_r, new_w, \
+         new_T_H, new_Y, new_factor, new_BQ, average_income_model
+
+
+def update_outer_vars(bssmat, nssmat, outer_loop_vars, params, baseline, baseline_spending=False):
+    '''
+    Given the households' savings and labor supply, finds the values of
+    the outer loop variables (r, w, T_H, Y, factor) that they imply.
+    This is the second half of inner_loop, and is also used to evaluate
+    the market clearing conditions in SS_sensitivity.
+
+    Inputs:
+        bssmat          = [S,J] array, savings
+        nssmat          = [S,J] array, labor supply
+        outer_loop_vars = tuple, guesses of the outer loop variables, as
+                          in inner_loop (bssmat and nssmat in it are
+                          not used)
+        params          = length 4 tuple, (ss_params, income_tax_params,
+                          chi_params, small_open_params)
+        baseline        = boolean, =True if baseline (factor is updated)
+        baseline_spending = boolean, =True if transfers are fixed at
+                            the baseline level
+
+    Functions called:
+        aggr.get_K()
+        aggr.get_L()
+        firm.get_K()
+        firm.get_Y()
+        firm.get_r()
+        firm.get_w()
+        aggr.get_BQ()
+        tax.replacement_rate_vals()
+        aggr.revenue()
+
+    Objects in function:
+        L = scalar, aggregate labor
+        K = scalar, aggregate capital
+        b_s = [S,J] array, wealth entering each period
+
+    Returns: new_r, new_w, new_T_H, new_Y, new_factor, new_BQ,
+             average_income_model
+    '''
+    ss_params, income_tax_params, chi_params, small_open_params = params
+    J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
+                  g_n_ss, tau_payroll, tau_bq, rho, omega_SS, budget_balance, \
+                  alpha_T, debt_ratio_ss, tau_b, delta_tau,\
+                  lambdas, imm_rates, e, retire, mean_income_data,\
+                  h_wealth, p_wealth, m_wealth, b_ellipse, upsilon = ss_params
+
+    analytical_mtrs, etr_params, mtrx_params, mtry_params = income_tax_params
+
+    small_open, ss_firm_r, ss_hh_r = small_open_params
+    if budget_balance:
+        _, _, r, w, T_H, factor = outer_loop_vars
+    else:
+        _, _, r, w, Y, T_H, factor = outer_loop_vars
+
     L_params = (e, omega_SS.reshape(S, 1), lambdas.reshape(1, J), 'SS')
     L = aggr.get_L(nssmat, L_params)
     if small_open == False:
@@ -353,7 +526,6 @@ def inner_loop(outer_loop_vars, params, baseline, baseline_spending=False):
         new_r = ss_hh_r
     w_params = (Z, gamma, epsilon)
     new_w = firm.get_w(Y, L, w_params)
-    print 'inner factor prices: ', new_r, new_w
 
     b_s = np.array(list(np.zeros(J).reshape(1, J)) + list(bssmat[:-1, :]))
     average_income_model = ((new_r * b_s + new_w * e * nssmat) *
@@ -378,11 +550,11 @@ def inner_loop(outer_loop_vars, params, baseline, baseline_spending=False):
     else:
         new_T_H = alpha_T*new_Y
 
-    return euler_errors, bssmat, nssmat, new_r, new_w, \
-         new_T_H, new_Y, new_factor, new_BQ, average_income_model
+    return new_r, new_w, new_T_H, new_Y, new_factor, new_BQ, average_income_model
 
 
-def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, params, baseline, fsolve_flag=False, baseline_spending=False):
+def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, params, baseline, fsolve_flag=False, baseline_spending=False,
+              solver_config=None):
     '''
     --------------------------------------------------------------------
     Solves for the steady state distribution of capital, labor, as well as
@@ -406,9 +578,12 @@ def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, param
     lambdas = [J,] vector, fraction of population with each ability type
     omega = [S,] vector, stationary population weights
     e =  [S,J] array, effective labor units by age and ability type
+    solver_config = records.SolverConfig, settings of the solvers, if None
+                    use get_solver_config()
 
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+    get_solver_config()
     euler_equation_solver()
     aggr.get_K()
     aggr.get_L()
@@ -477,13 +652,25 @@ def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, param
     dist = 10
     iteration = 0
     dist_vec = np.zeros(maxiter)
+    if solver_config is None:
+        solver_config = get_solver_config()
+    xtol = solver_config.minimizer_tol
 
     if fsolve_flag == True:
         maxiter = 1
 
-    while (dist > mindist_SS) and (iteration < maxiter):
+    # Keep iterating until the distance is within mindist_SS with the
+    # household problems solved to the final tolerance
+    while ((dist > mindist_SS) or (xtol > solver_config.minimizer_tol)) and (iteration < maxiter):
         # Solve for the steady state levels of b and n, given w, r, Y and
-        # factor
+        # factor, with a looser tolerance while far from the solution
+        if fsolve_flag == True:
+            xtol = solver_config.minimizer_tol
+        else:
+            xtol = utils.inner_tol(dist, mindist_SS,
+                                   solver_config.minimizer_tol,
+                                   solver_config.minimizer_tol_max,
+                                   solver_config.minimizer_tol_scale)
         if budget_balance:
             outer_loop_vars = (bssmat, nssmat, r, w, T_H, factor)
         else:
@@ -491,7 +678,8 @@ def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, param
         inner_loop_params = (ss_params, income_tax_params, chi_params, small_open_params)
 
         euler_errors, bssmat, nssmat, new_r, new_w, \
-             new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline, baseline_spending)
+             new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline, baseline_spending, xtol,
+                                                                   solver_config=solver_config)
 
         r = utils.convex_combo(new_r, r, nu)
         w = utils.convex_combo(new_w, w, nu)
@@ -598,8 +786,13 @@ def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, param
         Gss = revenue_ss + new_borrowing - (T_Hss + debt_service_ss)
 
     # solve resource constraint
-    etr_params_3D = np.tile(np.reshape(etr_params,(S,1,etr_params.shape[1])),(1,J,1))
-    mtrx_params_3D = np.tile(np.reshape(mtrx_params,(S,1,mtrx_params.shape[1])),(1,J,1))
+    if etr_params.ndim == 1:
+        # age invariant tax functions broadcast over [S,J] without tiling
+        etr_params_3D = etr_params
+        mtrx_params_3D = mtrx_params
+    else:
+        etr_params_3D = np.tile(np.reshape(etr_params,(S,1,etr_params.shape[1])),(1,J,1))
+        mtrx_params_3D = np.tile(np.reshape(mtrx_params,(S,1,mtrx_params.shape[1])),(1,J,1))
 
     '''
     ------------------------------------------------------------------------
@@ -651,7 +844,7 @@ def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, param
     if Gss < 0:
         print 'Steady state government spending is negative to satisfy budget'
 
-    if ENFORCE_SOLUTION_CHECKS and np.absolute(resource_constraint) > mindist_SS:
+    if solver_config.enforce_solution_checks and np.absolute(resource_constraint) > mindist_SS:
         print 'Resource Constraint Difference:', resource_constraint
         err = "Steady state aggregate resource constraint not satisfied"
         raise RuntimeError(err)
@@ -678,6 +871,78 @@ def SS_solver(b_guess_init, n_guess_init, rss, wss, T_Hss, factor_ss, Yss, param
 
 
 
+def init_household_state(bssmat, nssmat):
+    '''
+    Creates the state carried across evaluations of the outer loop
+    residuals (SS_fsolve, SS_fsolve_reform,
+    SS_fsolve_reform_baselinespend), so each evaluation starts the
+    household problems from the last solutions that converged.
+
+    Inputs:
+        bssmat = [S,J] array, initial guesses for savings
+        nssmat = [S,J] array, initial guesses for labor supply
+
+    Functions called: None
+
+    Objects in function:
+        household_state = dictionary, the last household solutions that
+                          converged (bssmat, nssmat), the initial guesses
+                          (bssmat_init, nssmat_init), whether bssmat and
+                          nssmat are solutions (warm), and the number of
+                          times the state was reset (num_resets)
+
+    Returns: household_state
+    '''
+    household_state = {'bssmat': np.array(bssmat, dtype=float),
+                       'nssmat': np.array(nssmat, dtype=float),
+                       'bssmat_init': np.array(bssmat, dtype=float),
+                       'nssmat_init': np.array(nssmat, dtype=float),
+                       'warm': False, 'num_resets': 0}
+
+    return household_state
+
+
+def update_household_state(household_state, euler_errors, bssmat, nssmat, tol=None):
+    '''
+    Keeps the household solutions from an evaluation of the outer loop
+    residuals to start the next evaluation from, if they solve the
+    household problems.  Otherwise, the next evaluation starts from the
+    initial guesses.
+
+    Inputs:
+        household_state = dictionary, from init_household_state
+        euler_errors    = [2S,J] array, Euler errors of the solutions
+        bssmat          = [S,J] array, savings
+        nssmat          = [S,J] array, labor supply
+        tol             = scalar, largest Euler error for which the
+                          solutions are kept, if None use
+                          HOUSEHOLD_STATE_TOL
+
+    Functions called: None
+
+    Objects in function:
+        converged = boolean, =True if the solutions are finite and the
+                    Euler errors are within tol
+
+    Returns: N/A, household_state is updated in place
+    '''
+    if tol is None:
+        tol = HOUSEHOLD_STATE_TOL
+    converged = (np.all(np.isfinite(bssmat)) and
+                 np.all(np.isfinite(nssmat)) and
+                 np.all(np.isfinite(euler_errors)) and
+                 np.absolute(euler_errors).max() <= tol)
+    if converged:
+        household_state['bssmat'] = bssmat.copy()
+        household_state['nssmat'] = nssmat.copy()
+        household_state['warm'] = True
+    else:
+        household_state['bssmat'] = household_state['bssmat_init'].copy()
+        household_state['nssmat'] = household_state['nssmat_init'].copy()
+        household_state['warm'] = False
+        household_state['num_resets'] += 1
+
+
 def SS_fsolve(guesses, params):
     '''
     Solves for the steady state distribution of capital, labor, as well as
@@ -691,7 +956,9 @@ def SS_fsolve(guesses, params):
         factorguess = guess for scaling factor to dollars (scalar)
         chi_n = chi^n_s (Sx1 array)
         chi_b = chi^b_j (Jx1 array)
-        params = list of parameters (list)
+        params = list of parameters, starting with household_state from
+                 init_household_state and ending with solver_config
+                 from get_solver_config (list)
         iterative_params = list of parameters that determine the convergence
                            of the while loop (list)
         tau_bq = bequest tax rate (Jx1 array)
@@ -704,7 +971,7 @@ def SS_fsolve(guesses, params):
                     T_H ((2*S*J+4)x1 array)
     '''
 
-    bssmat, nssmat, chi_params, ss_params, income_tax_params, iterative_params, small_open_params = params
+    household_state, chi_params, ss_params, income_tax_params, iterative_params, small_open_params, solver_config = params
     J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
                   g_n_ss, tau_payroll, tau_bq, rho, omega_SS, budget_balance,\
                   alpha_T, debt_ratio_ss, tau_b, delta_tau,\
@@ -728,7 +995,9 @@ def SS_fsolve(guesses, params):
     print 'r, w at outset: ', r, w
 
     # Solve for the steady state levels of b and n, given w, r, T_H and
-    # factor
+    # factor, starting from the last solutions that converged
+    bssmat = household_state['bssmat'].copy()
+    nssmat = household_state['nssmat'].copy()
     if budget_balance:
         outer_loop_vars = (bssmat, nssmat, r, w, T_H, factor)
     else:
@@ -736,7 +1005,11 @@ def SS_fsolve(guesses, params):
         outer_loop_vars = (bssmat, nssmat, r, w, Y, T_H, factor)
     inner_loop_params = (ss_params, income_tax_params, chi_params, small_open_params)
     euler_errors, bssmat, nssmat, new_r, new_w, \
-         new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline)
+         new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline,
+                                                                               warm_start=household_state['warm'],
+                                                                              solver_config=solver_config)
+    update_household_state(household_state, euler_errors, bssmat, nssmat,
+                           solver_config.household_state_tol)
 
     error1 = new_r - r
     error2 = new_w - w
@@ -787,7 +1060,9 @@ def SS_fsolve_reform(guesses, params):
         factor = scaling factor to dollars (scalar)
         chi_n = chi^n_s (Sx1 array)
         chi_b = chi^b_j (Jx1 array)
-        params = list of parameters (list)
+        params = list of parameters, starting with household_state from
+                 init_household_state and ending with solver_config
+                 from get_solver_config (list)
         iterative_params = list of parameters that determine the convergence
                            of the while loop (list)
         tau_bq = bequest tax rate (Jx1 array)
@@ -799,7 +1074,7 @@ def SS_fsolve_reform(guesses, params):
         solutions = steady state values of b, n, w, r, factor,
                     T_H ((2*S*J+4)x1 array)
     '''
-    bssmat, nssmat, chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params = params
+    household_state, chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params, solver_config = params
     J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
                   g_n_ss, tau_payroll, tau_bq, rho, omega_SS, budget_balance,\
                   alpha_T, debt_ratio_ss, tau_b, delta_tau,\
@@ -820,7 +1095,9 @@ def SS_fsolve_reform(guesses, params):
     T_H = guesses[2]
 
     # Solve for the steady state levels of b and n, given w, r, T_H and
-    # factor
+    # factor, starting from the last solutions that converged
+    bssmat = household_state['bssmat'].copy()
+    nssmat = household_state['nssmat'].copy()
     if budget_balance:
         outer_loop_vars = (bssmat, nssmat, r, w, T_H, factor)
     else:
@@ -829,7 +1106,11 @@ def SS_fsolve_reform(guesses, params):
     inner_loop_params = (ss_params, income_tax_params, chi_params, small_open_params)
 
     euler_errors, bssmat, nssmat, new_r, new_w, \
-        new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline, False)
+        new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline, False,
+                                                                              warm_start=household_state['warm'],
+                                                                              solver_config=solver_config)
+    update_household_state(household_state, euler_errors, bssmat, nssmat,
+                           solver_config.household_state_tol)
 
     error1 = new_r - r
     error2 = new_w - w
@@ -867,7 +1148,9 @@ def SS_fsolve_reform_baselinespend(guesses, params):
         factor = scaling factor to dollars (scalar)
         chi_n = chi^n_s (Sx1 array)
         chi_b = chi^b_j (Jx1 array)
-        params = list of parameters (list)
+        params = list of parameters, starting with household_state from
+                 init_household_state and ending with solver_config
+                 from get_solver_config (list)
         iterative_params = list of parameters that determine the convergence
                            of the while loop (list)
         tau_bq = bequest tax rate (Jx1 array)
@@ -879,7 +1162,7 @@ def SS_fsolve_reform_baselinespend(guesses, params):
         solutions = steady state values of b, n, w, r, factor,
                     T_H ((2*S*J+4)x1 array)
     '''
-    bssmat, nssmat, T_Hss, chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params = params
+    household_state, T_Hss, chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params, solver_config = params
     J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
                   g_n_ss, tau_payroll, tau_bq, rho, omega_SS, budget_balance,\
                   alpha_T, debt_ratio_ss, tau_b, delta_tau,\
@@ -900,13 +1183,19 @@ def SS_fsolve_reform_baselinespend(guesses, params):
     Y = guesses[2]
 
     # Solve for the steady state levels of b and n, given w, r, T_H and
-    # factor
+    # factor, starting from the last solutions that converged
+    bssmat = household_state['bssmat'].copy()
+    nssmat = household_state['nssmat'].copy()
     T_H = T_Hss
     outer_loop_vars = (bssmat, nssmat, r, w, Y, T_H, factor)
     inner_loop_params = (ss_params, income_tax_params, chi_params, small_open_params)
 
     euler_errors, bssmat, nssmat, new_r, new_w, \
-        new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline, True)
+        new_T_H, new_Y, new_factor, new_BQ, average_income_model = inner_loop(outer_loop_vars, inner_loop_params, baseline, True,
+                                                                              warm_start=household_state['warm'],
+                                                                              solver_config=solver_config)
+    update_household_state(household_state, euler_errors, bssmat, nssmat,
+                           solver_config.household_state_tol)
 
     error1 = new_r - r
     error2 = new_w - w
@@ -926,8 +1215,111 @@ def SS_fsolve_reform_baselinespend(guesses, params):
     return [error1, error2, error3]
 
 
+def interp_coarse_guesses(ss_coarse, S):
+    '''
+    --------------------------------------------------------------------
+    Interpolates the SS solved with fewer, longer periods (a coarser
+    grid of ages) onto a grid of S ages, to be used as the initial
+    guesses in run_SS.
+    --------------------------------------------------------------------
+
+    INPUTS:
+    ss_coarse = dictionary, SS output on the coarse grid
+    S         = integer, number of age groups on the new grid
 
-def run_SS(income_tax_params, ss_params, iterative_params, chi_params, small_open_params, baseline=True, baseline_spending=False, baseline_dir="./OUTPUT"):
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+    utils.interp_periods()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    S_coarse     = integer, number of age groups on the coarse grid
+    init_guesses = dictionary, initial guesses for bssmat_splus1,
+                   nssmat, rss, wss, T_Hss, and factor_ss
+
+    RETURNS: init_guesses
+    --------------------------------------------------------------------
+    '''
+    S_coarse = ss_coarse['nssmat'].shape[0]
+    init_guesses = {'bssmat_splus1': utils.interp_periods(ss_coarse['bssmat_splus1'], S),
+                    'nssmat': utils.interp_periods(ss_coarse['nssmat'], S),
+                    # interest rates are per period, so compound down to
+                    # the shorter periods
+                    'rss': (1 + ss_coarse['rss']) ** (float(S_coarse) / S) - 1,
+                    'wss': ss_coarse['wss'], 'T_Hss': ss_coarse['T_Hss'],
+                    'factor_ss': ss_coarse['factor_ss']}
+
+    return init_guesses
+
+
+def outer_fsolve(func, guesses, params, xtol, num_workers=None, budget=None):
+    '''
+    --------------------------------------------------------------------
+    Finds the root of the outer loop of the SS (SS_fsolve,
+    SS_fsolve_reform, or SS_fsolve_reform_baselinespend), evaluating the
+    columns of the Jacobian in num_workers parallel processes if more
+    than one.
+    --------------------------------------------------------------------
+
+    INPUTS:
+    func    = function, residuals of the outer loop
+    guesses = list, initial guesses for the outer loop variables
+    params  = list, parameters passed to func, the household_state in
+              params is only updated by the evaluations of func in this
+              process
+    xtol    = scalar, tolerance for the outer loop variables
+    num_workers = integer, number of processes, if None use
+                  FSOLVE_NUM_WORKERS
+    budget  = dictionary, from utils.init_budget(), if not None the
+              evaluations of func are counted against it, and when it
+              runs out the guesses with the smallest residuals so far
+              are returned with ier = 0
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+    utils.budgeted_residual()
+    utils.fsolve_parallel()
+    opt.fsolve()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    args      = tuple, arguments of the residual function passed to the
+                root finder
+    solutions = vector, solution for the outer loop variables
+    infodict  = dictionary, information on the solution
+    ier       = integer, =1 if solution found, =0 if the budget ran out
+    message   = string, description of the outcome
+
+    RETURNS: solutions, infodict, ier, message
+    --------------------------------------------------------------------
+    '''
+    if num_workers is None:
+        num_workers = FSOLVE_NUM_WORKERS
+    args = params
+    if budget is not None:
+        args = (func, budget, params)
+        func = utils.budgeted_residual
+    try:
+        if num_workers > 1:
+            [solutions, infodict, ier, message] = utils.fsolve_parallel(
+                func, guesses, args=args, xtol=xtol,
+                num_workers=num_workers)
+        else:
+            [solutions, infodict, ier, message] = opt.fsolve(
+                func, guesses, args=args, xtol=xtol, full_output=True)
+    except utils.BudgetExhausted as e:
+        # Return the best guesses so far, or the initial guesses if
+        # none were evaluated
+        print e
+        if budget['best_x'] is None:
+            solutions = np.array(guesses, dtype=float)
+        else:
+            solutions = budget['best_x'].copy()
+        infodict = {'nfev': budget['num_evals']}
+        ier = 0
+        message = str(e)
+
+    return solutions, infodict, ier, message
+
+
+def run_SS(income_tax_params, ss_params, iterative_params, chi_params, small_open_params, baseline=True, baseline_spending=False, baseline_dir="./OUTPUT", init_guesses=None,
+           solver_config=None):
     '''
     --------------------------------------------------------------------
     Solve for SS of OG-USA.
@@ -944,23 +1336,49 @@ def run_SS(income_tax_params, ss_params, iterative_params, chi_params, small_ope
     calibrate_model = boolean, =True if run calibration of chi parameters
     output_dir = string, path to save output from current model run
     baseline_dir = string, path where baseline results located
+    init_guesses = dictionary, initial guesses for bssmat_splus1, nssmat,
+                   rss, wss, T_Hss, and factor_ss (e.g., SS solution
+                   from a coarser grid interpolated to this one), if None
+                   use flat guesses for b and n
+    solver_config = records.SolverConfig, settings of the solvers, if None
+                    use get_solver_config(), so that several solves with
+                    different settings can run in one process.  If its
+                    max_seconds or max_evals budget runs out, the best
+                    iterate so far is returned without the solution
+                    checks
 
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+    get_solver_config()
+    utils.init_budget()
+    init_household_state()
+    outer_fsolve()
     SS_fsolve()
     SS_fsolve_reform()
     SS_solver
 
     OBJECTS CREATED WITHIN FUNCTION:
+    budget = dictionary, wall-clock and evaluation budgets of the outer
+             loop, with the distances of its evaluations
     chi_params = [J+S,] vector, chi_b and chi_n stacked together
     b_guess = [S,J] array, initial guess at savings
     n_guess = [S,J] array, initial guess at labor supply
+    household_state = dictionary, household solutions carried across
+                      evaluations of the outer loop residuals
+    b_guess_ss = [S,J] array, savings from the last evaluation that
+                 solved the household problems, initial guess for SS_solver
+    n_guess_ss = [S,J] array, labor supply from the last evaluation that
+                 solved the household problems, initial guess for SS_solver
     wguess = scalar, initial guess at SS real wage rate
     rguess = scalar, initial guess at SS real interest rate
     T_Hguess = scalar, initial guess at SS lump sum transfers
     factorguess = scalar, initial guess at SS factor adjustment (to scale model units to dollars)
 
-    output
+    output = dictionary, SS solution, with whether the outer loop
+             converged (converged), the largest absolute residual of
+             each evaluation (dist_history), and whether the budget ran
+             out ('time' or 'evaluations', None if it did not)
+             (budget_exhausted)
 
 
     RETURNS: output
@@ -981,27 +1399,50 @@ def run_SS(income_tax_params, ss_params, iterative_params, chi_params, small_ope
 
     maxiter, mindist_SS = iterative_params
 
-    b_guess = np.ones((S, J)).flatten() * 0.05
-    n_guess = np.ones((S, J)).flatten() * .4 * ltilde
+    if solver_config is None:
+        solver_config = get_solver_config()
+    budget = utils.init_budget(solver_config.max_seconds, solver_config.max_evals)
+
+    if init_guesses is None:
+        b_guess = np.ones((S, J)).flatten() * 0.05
+        n_guess = np.ones((S, J)).flatten() * .4 * ltilde
+    else:
+        b_guess = np.array(init_guesses['bssmat_splus1'], dtype=float).flatten()
+        n_guess = np.array(init_guesses['nssmat'], dtype=float).flatten()
     # For initial guesses of w, r, T_H, and factor, we use values that are close
     # to some steady state values.
     if baseline:
-        rguess = 0.04#0.01 + delta
-        wguess = 1.2
-        T_Hguess = 0.12
-        factorguess = 70000
+        if init_guesses is None:
+            rguess = 0.04#0.01 + delta
+            wguess = 1.2
+            T_Hguess = 0.12
+            factorguess = 70000
+        else:
+            rguess = init_guesses['rss']
+            wguess = init_guesses['wss']
+            T_Hguess = init_guesses['T_Hss']
+            factorguess = init_guesses['factor_ss']
 
-        ss_params_baseline = [b_guess.reshape(S, J), n_guess.reshape(S, J), chi_params, ss_params, income_tax_params, iterative_params, small_open_params]
+        household_state = init_household_state(b_guess.reshape(S, J), n_guess.reshape(S, J))
+        ss_params_baseline = [household_state, chi_params, ss_params, income_tax_params, iterative_params, small_open_params, solver_config]
         guesses = [rguess, wguess, T_Hguess, factorguess]
-        [solutions_fsolve, infodict, ier, message] = opt.fsolve(SS_fsolve, guesses, args=ss_params_baseline, xtol=mindist_SS, full_output=True)
-        if ENFORCE_SOLUTION_CHECKS and not ier == 1:
-            raise RuntimeError("Steady state equilibrium not found")
+        [solutions_fsolve, infodict, ier, message] = outer_fsolve(SS_fsolve, guesses, ss_params_baseline, mindist_SS,
+                                                                num_workers=solver_config.fsolve_num_workers,
+                                                                budget=budget)
+        if solver_config.enforce_solution_checks and not ier == 1:
+            if budget['exhausted'] is None:
+                raise RuntimeError("Steady state equilibrium not found")
+            # Return the best iterate rather than checking it as a solution
+            solver_config = solver_config._replace(enforce_solution_checks=False)
         [rss, wss, T_Hss, factor_ss] = solutions_fsolve
         Yss = T_Hss/alpha_T #may not be right - if budget_balance = True, but that's ok - will be fixed in SS_solver
         fsolve_flag = True
         # Return SS values of variables
-        solution_params= [b_guess.reshape(S, J), n_guess.reshape(S, J), chi_params, ss_params, income_tax_params, iterative_params, small_open_params]
-        output = SS_solver(b_guess.reshape(S, J), n_guess.reshape(S, J), rss, wss, T_Hss, factor_ss, Yss, solution_params, baseline, fsolve_flag, baseline_spending)
+        b_guess_ss = household_state['bssmat'].copy()
+        n_guess_ss = household_state['nssmat'].copy()
+        solution_params= [b_guess_ss, n_guess_ss, chi_params, ss_params, income_tax_params, iterative_params, small_open_params]
+        output = SS_solver(b_guess_ss, n_guess_ss, rss, wss, T_Hss, factor_ss, Yss, solution_params, baseline, fsolve_flag, baseline_spending,
+                           solver_config=solver_config)
         # print "solved output", wss, rss, T_Hss, factor_ss
      #   print 'analytical mtrs in SS: ', analytical_mtrs
     else:
@@ -1009,23 +1450,41 @@ def run_SS(income_tax_params, ss_params, iterative_params, chi_params, small_ope
             baseline_dir, "SS/SS_vars.pkl")
         ss_solutions = pickle.load(open(baseline_ss_dir, "rb"))
         [rguess, wguess, T_Hguess, Yguess, factor] = [ss_solutions['rss'], ss_solutions['wss'], ss_solutions['T_Hss'], ss_solutions['Yss'], ss_solutions['factor_ss']]
+        household_state = init_household_state(b_guess.reshape(S, J), n_guess.reshape(S, J))
         if baseline_spending:
             T_Hss = T_Hguess
-            ss_params_reform = [b_guess.reshape(S, J), n_guess.reshape(S, J), T_Hss, chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params]
+            ss_params_reform = [household_state, T_Hss, chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params, solver_config]
             guesses = [rguess, wguess, Yguess]
-            [solutions_fsolve, infodict, ier, message] = opt.fsolve(SS_fsolve_reform_baselinespend, guesses, args=ss_params_reform, xtol=mindist_SS, full_output=True)
+            [solutions_fsolve, infodict, ier, message] = outer_fsolve(SS_fsolve_reform_baselinespend, guesses, ss_params_reform, mindist_SS,
+                                                                    num_workers=solver_config.fsolve_num_workers,
+                                                                    budget=budget)
             [rss, wss, Yss] = solutions_fsolve
         else:
-            ss_params_reform = [b_guess.reshape(S, J), n_guess.reshape(S, J), chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params]
+            ss_params_reform = [household_state, chi_params, ss_params, income_tax_params, iterative_params, factor, small_open_params, solver_config]
             guesses = [rguess, wguess, T_Hguess]
-            [solutions_fsolve, infodict, ier, message] = opt.fsolve(SS_fsolve_reform, guesses, args=ss_params_reform, xtol=mindist_SS, full_output=True)
+            [solutions_fsolve, infodict, ier, message] = outer_fsolve(SS_fsolve_reform, guesses, ss_params_reform, mindist_SS,
+                                                                    num_workers=solver_config.fsolve_num_workers,
+                                                                    budget=budget)
             [rss, wss, T_Hss] = solutions_fsolve
             Yss = T_Hss/alpha_T #may not be right - if budget_balance = True, but that's ok - will be fixed in SS_solver
-        if ENFORCE_SOLUTION_CHECKS and not ier == 1:
-            raise RuntimeError("Steady state equilibrium not found")
+        if solver_config.enforce_solution_checks and not ier == 1:
+            if budget['exhausted'] is None:
+                raise RuntimeError("Steady state equilibrium not found")
+            # Return the best iterate rather than checking it as a solution
+            solver_config = solver_config._replace(enforce_solution_checks=False)
         # Return SS values of variables
         fsolve_flag = True
         # Return SS values of variables
-        solution_params= [b_guess.reshape(S, J), n_guess.reshape(S, J), chi_params, ss_params, income_tax_params, iterative_params, small_open_params]
-        output = SS_solver(b_guess.reshape(S, J), n_guess.reshape(S, J), rss, wss, T_Hss, factor, Yss, solution_params, baseline, fsolve_flag, baseline_spending)
+        b_guess_ss = household_state['bssmat'].copy()
+        n_guess_ss = household_state['nssmat'].copy()
+        solution_params= [b_guess_ss, n_guess_ss, chi_params, ss_params, income_tax_params, iterative_params, small_open_params]
+        output = SS_solver(b_guess_ss, n_guess_ss, rss, wss, T_Hss, factor, Yss, solution_params, baseline, fsolve_flag, baseline_spending,
+                           solver_config=solver_config)
+
+    # Flag whether the outer loop converged, with the distances of its
+    # evaluations, so a run whose budget ran out can be rescheduled
+    output['converged'] = (ier == 1)
+    output['dist_history'] = np.array(budget['dist_history'])
+    output['budget_exhausted'] = budget['exhausted']
+
     return output
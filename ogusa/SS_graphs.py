@@ -7,6 +7,7 @@ Creates graphs for steady state output.
 This py-file calls the following other file(s):
             firm.py
             household.py
+            inequality.py
             SSinit/ss_init_vars.pkl
             SS/ss_vars.pkl
             OUTPUT/Saved_moments/params_given.pkl
@@ -31,6 +32,7 @@ import os
 
 import firm
 import household
+import inequality
 
 import parameters
 parameters.DATASET = 'REAL'
@@ -45,7 +47,7 @@ parameters.DATASET = 'REAL'
 
 def the_inequalizer(dist, pop_weights, ability_weights, S, J):
     '''
-    Generates three measures of inequality.
+    Generates five measures of inequality.
 
     Inputs:
         dist            = [S,J] array, distribution of endogenous variables over age and lifetime income group
@@ -55,41 +57,36 @@ def the_inequalizer(dist, pop_weights, ability_weights, S, J):
         S               = integer, number of economically active periods in lifetime
         J               = integer, number of ability types 
 
-    Functions called: None
+    Functions called:
+        inequality.weighted_sort()
+        inequality.gini()
+        inequality.var_log()
+        inequality.percentiles()
+        inequality.top_shares()
 
     Objects in function:
         weights           = [S,J] array, fraction of population for each age and lifetime income group
-        flattened_dist    = [S*J,] vector, vectorized dist
-        flattened_weights = [S*J,] vector, vectorized weights
         sort_dist         = [S*J,] vector, ascending order vector of dist
-        loc_90th          = integer, index of 90th percentile
-        loc_10th          = integer, index of 10th percentile
-        loc_99th          = integer, index of 99th percentile
+        sort_weights      = [S*J,] vector, weights in the order of sort_dist
+        pct_10, pct_90    = scalars, 10th and 90th percentiles of dist
 
     Returns: N/A
     '''
 
-    weights = np.tile(pop_weights.reshape(S, 1), (1, J)) * \
-        ability_weights.reshape(1, J)
-    flattened_dist = dist.flatten()
-    flattened_weights = weights.flatten()
-    idx = np.argsort(flattened_dist)
-    sort_dist = flattened_dist[idx]
-    sort_weights = flattened_weights[idx]
-    cum_weights = np.cumsum(sort_weights)
+    weights = pop_weights.reshape(S, 1) * ability_weights.reshape(1, J)
+    sort_dist, sort_weights = inequality.weighted_sort(dist.flatten(),
+                                                       weights.flatten())
+    # gini
+    print inequality.gini(sort_dist, sort_weights, presorted=True)
     # variance
-    print np.var(np.log(dist * weights))
+    print inequality.var_log(sort_dist, sort_weights)
     # 90/10 ratio
-    loc_90th = np.argmin(np.abs(cum_weights - .9))
-    loc_10th = np.argmin(np.abs(cum_weights - .1))
-    print sort_dist[loc_90th] / sort_dist[loc_10th]
-    # 10% ratio
-    print (sort_dist[loc_90th:] * sort_weights[loc_90th:]
-           ).sum() / (sort_dist * sort_weights).sum()
-    # 1% ratio
-    loc_99th = np.argmin(np.abs(cum_weights - .99))
-    print (sort_dist[loc_99th:] * sort_weights[loc_99th:]
-           ).sum() / (sort_dist * sort_weights).sum()
+    pct_10, pct_90 = inequality.percentiles(sort_dist, [.1, .9],
+                                            sort_weights, presorted=True)
+    print pct_90 / pct_10
+    # 10% and 1% ratios
+    print inequality.top_shares(sort_dist, sort_weights, [.1, .01],
+                                presorted=True)
 
 '''
 ------------------------------------------------------------------------
@@ -0,0 +1,708 @@
+'''
+------------------------------------------------------------------------
+Computes the sensitivity of the steady state to the model parameters.
+
+At a solved steady state, the stacked household Euler equations (from
+SS.euler_equation_solver, one block of 2S equations for each lifetime
+income group) and the market clearing conditions of the outer loop
+(as in SS.SS_fsolve) are all zero.  Writing these as F(z, p) = 0, where
+z stacks the savings and labor supply of each group with the outer loop
+variables (r, w, T_H or Y, and factor in the baseline), the implicit
+function theorem gives the response of the steady state to a parameter
+p as
+
+    dz/dp = -F_z^{-1} F_p
+
+The Jacobians are found by finite differences, one income group at a
+time for the household blocks.  The derivatives of the aggregates
+(Yss, Kss, Lss, revenue_ss, ...) then follow from a directional finite
+difference along (dz/dp, 1), so no steady state needs to be solved
+again.
+
+This py-file calls the following other file(s):
+            SS.py
+            records.py
+            tax.py
+            firm.py
+            aggregates.py
+            elliptical_u_est.py
+------------------------------------------------------------------------
+'''
+
+# Packages
+import numpy as np
+
+import tax
+import firm
+import aggregates as aggr
+import elliptical_u_est as ellip
+import records
+import SS
+
+
+'''
+Set relative step size for finite difference derivatives
+'''
+FD_STEP = 1e-6
+
+
+'''
+Set relative step size for parameters that are mapped into model
+parameters through a numerical estimation (e.g. frisch), which is only
+solved to a loose tolerance
+'''
+DERIVED_FD_STEP = 1e-3
+
+
+'''
+------------------------------------------------------------------------
+    Parameter names, in the order they are unpacked from the tuples
+    passed to SS.run_SS
+------------------------------------------------------------------------
+'''
+SS_PARAM_NAMES = records.SS_PARAM_NAMES
+INCOME_TAX_PARAM_NAMES = records.INCOME_TAX_PARAM_NAMES
+CHI_PARAM_NAMES = records.CHI_PARAM_NAMES
+SMALL_OPEN_PARAM_NAMES = records.SS_SMALL_OPEN_PARAM_NAMES
+
+OUTPUT_NAMES = ['Yss', 'Kss', 'Lss', 'rss', 'wss', 'revenue_ss', 'T_Hss',
+                'factor_ss', 'BQss', 'bssmat_splus1', 'nssmat']
+
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+def frisch_params(frisch, run_params):
+    '''
+    Maps the Frisch elasticity into the parameters of the elliptical
+    utility function, as in execute.runner.
+
+    Inputs:
+        frisch     = scalar, Frisch elasticity of labor supply
+        run_params = dictionary, parameters from parameters.get_parameters
+
+    Functions called:
+        ellip.estimation()
+
+    Objects in function:
+        b_ellipse = scalar, scale parameter of elliptical utility
+        upsilon   = scalar, curvature parameter of elliptical utility
+
+    Returns: dictionary of model parameters
+    '''
+    b_ellipse, upsilon = ellip.estimation(frisch, run_params['ltilde'])
+    return {'b_ellipse': b_ellipse, 'upsilon': upsilon}
+
+
+def g_y_annual_params(g_y_annual, run_params):
+    '''
+    Maps the annual growth rate of technology into its model period
+    value, as in parameters.get_parameters.
+
+    Inputs:
+        g_y_annual = scalar, annual growth rate of technology
+        run_params = dictionary, parameters from parameters.get_parameters
+
+    Functions called: None
+
+    Objects in function:
+        g_y = scalar, growth rate of technology for a model period
+
+    Returns: dictionary of model parameters
+    '''
+    g_y = ((1 + g_y_annual) **
+           (float(run_params['ending_age'] - run_params['starting_age']) /
+            run_params['S']) - 1)
+    return {'g_y': g_y}
+
+
+'''
+Parameters that are not passed to SS.run_SS directly, with the function
+mapping them into those that are
+'''
+DERIVED_PARAMS = {'frisch': frisch_params,
+                  'g_y_annual': g_y_annual_params}
+
+
+def get_param(params, name):
+    '''
+    Finds a parameter by name in the parameters passed to SS.inner_loop.
+
+    Inputs:
+        params = length 4 tuple, (ss_params, income_tax_params,
+                 chi_params, small_open_params)
+        name   = string, name of the parameter
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: value of the parameter
+    '''
+    for names, group in zip((SS_PARAM_NAMES, INCOME_TAX_PARAM_NAMES,
+                             CHI_PARAM_NAMES, SMALL_OPEN_PARAM_NAMES),
+                            params):
+        if name in names:
+            return group[names.index(name)]
+    err = "Unknown steady state parameter: " + str(name)
+    raise RuntimeError(err)
+
+
+def set_params(params, updates):
+    '''
+    Gives a copy of the parameters passed to SS.inner_loop, with some of
+    them changed.
+
+    Inputs:
+        params  = length 4 tuple, (ss_params, income_tax_params,
+                  chi_params, small_open_params)
+        updates = dictionary, new values of parameters, by name
+
+    Functions called: None
+
+    Objects in function:
+        new_params = list of lists, copy of params
+
+    Returns: length 4 tuple of parameters, of the same types as params
+             (lists, tuples or records)
+    '''
+    new_params = [list(group) for group in params]
+    for name, value in updates.iteritems():
+        get_param(params, name)
+        for i, names in enumerate((SS_PARAM_NAMES, INCOME_TAX_PARAM_NAMES,
+                                   CHI_PARAM_NAMES,
+                                   SMALL_OPEN_PARAM_NAMES)):
+            if name in names:
+                new_params[i][names.index(name)] = value
+
+    return tuple(group._make(new_group) if hasattr(group, '_make')
+                 else type(group)(new_group)
+                 for group, new_group in zip(params, new_params))
+
+
+def perturb_params(params, spec, h, run_params=None):
+    '''
+    Moves one parameter of the model.  A parameter is given by its name,
+    or by a tuple (name, index) to move only some elements of an array
+    of parameters (e.g. ('etr_params', (Ellipsis, 0)) for the first
+    coefficient of the tax function at all ages).  All selected
+    elements are moved by the same amount.
+
+    Inputs:
+        params     = length 4 tuple, (ss_params, income_tax_params,
+                     chi_params, small_open_params)
+        spec       = string or tuple, parameter to move
+        h          = scalar, change in the parameter
+        run_params = dictionary, parameters from parameters.get_parameters,
+                     only needed for the parameters in DERIVED_PARAMS
+
+    Functions called:
+        get_param()
+        set_params()
+
+    Objects in function:
+        value = scalar or array, new value of the parameter
+
+    Returns: length 4 tuple of parameters
+    '''
+    name, index = spec if isinstance(spec, tuple) else (spec, None)
+    if name in DERIVED_PARAMS:
+        if run_params is None:
+            err = ("run_params are needed for the sensitivity to " +
+                   name)
+            raise RuntimeError(err)
+        return set_params(params, DERIVED_PARAMS[name](run_params[name] + h,
+                                                        run_params))
+
+    value = np.array(get_param(params, name), dtype=float)
+    if index is None:
+        value = value + h
+    else:
+        value[index] += h
+    if value.ndim == 0:
+        value = float(value)
+
+    return set_params(params, {name: value})
+
+
+def get_param_step(params, spec, run_params=None):
+    '''
+    Gives the step size used for finite differences in a parameter.
+
+    Inputs:
+        params     = length 4 tuple, (ss_params, income_tax_params,
+                     chi_params, small_open_params)
+        spec       = string or tuple, parameter, as in perturb_params
+        run_params = dictionary, parameters from parameters.get_parameters
+
+    Functions called:
+        get_param()
+
+    Objects in function:
+        base = scalar, size of the parameter
+
+    Returns: h, scalar step size
+    '''
+    name, index = spec if isinstance(spec, tuple) else (spec, None)
+    if name in DERIVED_PARAMS:
+        return DERIVED_FD_STEP * max(abs(run_params[name]), 1e-2)
+    value = np.array(get_param(params, name), dtype=float)
+    if index is not None:
+        value = value[index]
+    base = np.absolute(value).mean()
+
+    return FD_STEP * max(base, 1e-2)
+
+
+def stack_ss(ss_output, baseline, baseline_spending):
+    '''
+    Stacks the steady state into the unknowns of the steady state
+    system, z.
+
+    Inputs:
+        ss_output         = dictionary, output of SS.run_SS
+        baseline          = boolean, =True if baseline (factor is one of
+                            the unknowns)
+        baseline_spending = boolean, =True if transfers are fixed at the
+                            baseline level (Y is solved for instead of
+                            T_H)
+
+    Functions called: None
+
+    Objects in function:
+        outer = list, outer loop variables
+
+    Returns: z, [2SJ+3,] or [2SJ+4,] vector
+    '''
+    hh_vars = np.append(ss_output['bssmat_splus1'], ss_output['nssmat'],
+                        axis=0).T.flatten()
+    outer = [ss_output['rss'], ss_output['wss']]
+    if baseline_spending:
+        outer.append(ss_output['Yss'])
+    else:
+        outer.append(ss_output['T_Hss'])
+    if baseline:
+        outer.append(ss_output['factor_ss'])
+
+    return np.append(hh_vars, outer)
+
+
+def unstack_ss(z, fixed, params, baseline, baseline_spending):
+    '''
+    Unpacks the unknowns of the steady state system.
+
+    Inputs:
+        z                 = [2SJ+3,] or [2SJ+4,] vector, unknowns
+        fixed             = length 2 tuple, (T_H, factor) when these are
+                            not unknowns
+        params            = length 4 tuple, (ss_params,
+                            income_tax_params, chi_params,
+                            small_open_params)
+        baseline          = boolean, =True if baseline
+        baseline_spending = boolean, =True if transfers are fixed at the
+                            baseline level
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars
+    '''
+    ss_params = params[0]
+    J, S = ss_params[0], ss_params[1]
+    budget_balance, alpha_T = ss_params[19], ss_params[20]
+    hh_vars = z[:2 * S * J].reshape(J, 2 * S)
+    bssmat = hh_vars[:, :S].T.copy()
+    nssmat = hh_vars[:, S:].T.copy()
+    r, w = z[2 * S * J], z[2 * S * J + 1]
+    T_H, factor = fixed
+    if baseline_spending:
+        Y = z[2 * S * J + 2]
+    else:
+        T_H = z[2 * S * J + 2]
+        Y = T_H / alpha_T
+    if baseline:
+        factor = z[2 * S * J + 3]
+
+    if budget_balance:
+        outer_loop_vars = (bssmat, nssmat, r, w, T_H, factor)
+    else:
+        outer_loop_vars = (bssmat, nssmat, r, w, Y, T_H, factor)
+
+    return bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars
+
+
+def household_errors(hh_vars_j, r, w, T_H, factor, j, params):
+    '''
+    Gives the Euler errors of lifetime income group j, as in
+    SS.inner_loop.
+
+    Inputs:
+        hh_vars_j = [2S,] vector, savings and labor supply of group j
+        r         = scalar, interest rate
+        w         = scalar, wage rate
+        T_H       = scalar, lump sum transfer
+        factor    = scalar, scaling factor converting model units to
+                    dollars
+        j         = integer, lifetime income group
+        params    = length 4 tuple, (ss_params, income_tax_params,
+                    chi_params, small_open_params)
+
+    Functions called:
+        SS.euler_equation_solver()
+
+    Objects in function:
+        euler_params = list, parameters of SS.euler_equation_solver
+
+    Returns: [2S,] vector of Euler errors
+    '''
+    ss_params, income_tax_params, chi_params, small_open_params = params
+    J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
+                  g_n_ss, tau_payroll, tau_bq, rho, omega_SS, budget_balance, \
+                  alpha_T, debt_ratio_ss, tau_b, delta_tau,\
+                  lambdas, imm_rates, e, retire, mean_income_data,\
+                  h_wealth, p_wealth, m_wealth, b_ellipse, upsilon = ss_params
+    analytical_mtrs, etr_params, mtrx_params, mtry_params = income_tax_params
+    chi_b, chi_n = chi_params
+
+    euler_params = [r, w, T_H, factor, j, J, S, beta, sigma, ltilde, g_y,\
+                  g_n_ss, tau_payroll, retire, mean_income_data,\
+                  h_wealth, p_wealth, m_wealth, b_ellipse, upsilon,\
+                  j, chi_b, chi_n, tau_bq, rho, lambdas, omega_SS, e,\
+                  analytical_mtrs, etr_params, mtrx_params,\
+                  mtry_params]
+
+    return np.array(SS.euler_equation_solver(hh_vars_j, euler_params))
+
+
+def market_errors(z, fixed, params, baseline, baseline_spending):
+    '''
+    Gives the errors in the market clearing conditions of the outer
+    loop, as in SS.SS_fsolve, SS.SS_fsolve_reform, and
+    SS.SS_fsolve_reform_baselinespend.
+
+    Inputs:
+        z                 = [2SJ+3,] or [2SJ+4,] vector, unknowns
+        fixed             = length 2 tuple, (T_H, factor) when these are
+                            not unknowns
+        params            = length 4 tuple, (ss_params,
+                            income_tax_params, chi_params,
+                            small_open_params)
+        baseline          = boolean, =True if baseline
+        baseline_spending = boolean, =True if transfers are fixed at the
+                            baseline level
+
+    Functions called:
+        unstack_ss()
+        SS.update_outer_vars()
+
+    Objects in function:
+        errors = list, errors in r, w, T_H (or Y), and factor
+
+    Returns: [3,] or [4,] vector of errors
+    '''
+    budget_balance = params[0][19]
+    bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars = \
+        unstack_ss(z, fixed, params, baseline, baseline_spending)
+    new_r, new_w, new_T_H, new_Y, new_factor, new_BQ, average_income_model = \
+        SS.update_outer_vars(bssmat, nssmat, outer_loop_vars, params,
+                             baseline, baseline_spending)
+
+    errors = [new_r - r, new_w - w]
+    if budget_balance:
+        errors.append(new_T_H - T_H)
+    else:
+        errors.append(new_Y - Y)
+    if baseline:
+        errors.append(new_factor / 1000000 - factor / 1000000)
+
+    return np.array(errors)
+
+
+def ss_residuals(z, fixed, params, baseline, baseline_spending):
+    '''
+    Gives the errors in the stacked steady state system, F(z, p): the
+    Euler errors of each lifetime income group, followed by the market
+    clearing errors.
+
+    Inputs:
+        z                 = [2SJ+3,] or [2SJ+4,] vector, unknowns
+        fixed             = length 2 tuple, (T_H, factor) when these are
+                            not unknowns
+        params            = length 4 tuple, (ss_params,
+                            income_tax_params, chi_params,
+                            small_open_params)
+        baseline          = boolean, =True if baseline
+        baseline_spending = boolean, =True if transfers are fixed at the
+                            baseline level
+
+    Functions called:
+        unstack_ss()
+        household_errors()
+        market_errors()
+
+    Objects in function:
+        errors = [2SJ+3,] or [2SJ+4,] vector, errors
+
+    Returns: errors
+    '''
+    J, S = params[0][0], params[0][1]
+    bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars = \
+        unstack_ss(z, fixed, params, baseline, baseline_spending)
+    errors = np.zeros(z.shape[0])
+    for j in xrange(J):
+        errors[2 * S * j:2 * S * (j + 1)] = \
+            household_errors(z[2 * S * j:2 * S * (j + 1)], r, w, T_H,
+                             factor, j, params)
+    errors[2 * S * J:] = market_errors(z, fixed, params, baseline,
+                                       baseline_spending)
+
+    return errors
+
+
+def get_residual_jacobian(z, fixed, params, baseline, baseline_spending):
+    '''
+    Computes the Jacobian of the stacked steady state system with
+    respect to its unknowns, F_z, by central finite differences.  The
+    Euler errors of group j only depend on the savings and labor supply
+    of group j and on the outer loop variables, so their Jacobian is
+    computed one group at a time.
+
+    Inputs:
+        z                 = [N,] vector, unknowns at the steady state
+        fixed             = length 2 tuple, (T_H, factor) when these are
+                            not unknowns
+        params            = length 4 tuple, (ss_params,
+                            income_tax_params, chi_params,
+                            small_open_params)
+        baseline          = boolean, =True if baseline
+        baseline_spending = boolean, =True if transfers are fixed at the
+                            baseline level
+
+    Functions called:
+        unstack_ss()
+        household_errors()
+        market_errors()
+
+    Objects in function:
+        N       = integer, number of unknowns
+        num_hh  = integer, number of household unknowns (2SJ)
+        h       = [N,] vector, step sizes
+        jac     = [N,N] array, Jacobian of the system
+
+    Returns: jac
+    '''
+    J, S = params[0][0], params[0][1]
+    N = z.shape[0]
+    num_hh = 2 * S * J
+    h = FD_STEP * np.maximum(np.absolute(z), 1e-2)
+    jac = np.zeros((N, N))
+
+    def hh_errors_j(z_pert, j):
+        bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars = \
+            unstack_ss(z_pert, fixed, params, baseline, baseline_spending)
+        return household_errors(z_pert[2 * S * j:2 * S * (j + 1)], r, w,
+                                T_H, factor, j, params)
+
+    for j in xrange(J):
+        rows = slice(2 * S * j, 2 * S * (j + 1))
+        for i in range(2 * S * j, 2 * S * (j + 1)) + range(num_hh, N):
+            z_up = z.copy()
+            z_up[i] += h[i]
+            z_down = z.copy()
+            z_down[i] -= h[i]
+            jac[rows, i] = (hh_errors_j(z_up, j) -
+                            hh_errors_j(z_down, j)) / (2 * h[i])
+
+    for i in xrange(N):
+        z_up = z.copy()
+        z_up[i] += h[i]
+        z_down = z.copy()
+        z_down[i] -= h[i]
+        jac[num_hh:, i] = (market_errors(z_up, fixed, params, baseline,
+                                         baseline_spending) -
+                           market_errors(z_down, fixed, params, baseline,
+                                         baseline_spending)) / (2 * h[i])
+
+    return jac
+
+
+def get_ss_outputs(z, fixed, params, baseline, baseline_spending):
+    '''
+    Computes the steady state aggregates implied by the unknowns of the
+    steady state system, as in SS.SS_solver.
+
+    Inputs:
+        z                 = [N,] vector, unknowns
+        fixed             = length 2 tuple, (T_H, factor) when these are
+                            not unknowns
+        params            = length 4 tuple, (ss_params,
+                            income_tax_params, chi_params,
+                            small_open_params)
+        baseline          = boolean, =True if baseline
+        baseline_spending = boolean, =True if transfers are fixed at the
+                            baseline level
+
+    Functions called:
+        unstack_ss()
+        SS.update_outer_vars()
+        aggr.get_L()
+        aggr.get_K()
+        firm.get_K()
+        firm.get_Y()
+        tax.replacement_rate_vals()
+        aggr.revenue()
+
+    Objects in function:
+        b_s = [S,J] array, wealth entering each period
+
+    Returns: dictionary with the variables in OUTPUT_NAMES
+    '''
+    ss_params, income_tax_params, chi_params, small_open_params = params
+    J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
+                  g_n_ss, tau_payroll, tau_bq, rho, omega_SS, budget_balance, \
+                  alpha_T, debt_ratio_ss, tau_b, delta_tau,\
+                  lambdas, imm_rates, e, retire, mean_income_data,\
+                  h_wealth, p_wealth, m_wealth, b_ellipse, upsilon = ss_params
+    analytical_mtrs, etr_params, mtrx_params, mtry_params = income_tax_params
+    small_open, ss_firm_r, ss_hh_r = small_open_params
+
+    bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars = \
+        unstack_ss(z, fixed, params, baseline, baseline_spending)
+    new_r, new_w, new_T_H, new_Y, new_factor, new_BQ, average_income_model = \
+        SS.update_outer_vars(bssmat, nssmat, outer_loop_vars, params,
+                             baseline, baseline_spending)
+
+    Lss_params = (e, omega_SS.reshape(S, 1), lambdas, 'SS')
+    Lss = aggr.get_L(nssmat, Lss_params)
+    if small_open == False:
+        Kss_params = (omega_SS.reshape(S, 1), lambdas, imm_rates, g_n_ss, 'SS')
+        Bss = aggr.get_K(bssmat, Kss_params)
+        if budget_balance:
+            Kss = Bss
+        else:
+            Kss = Bss - debt_ratio_ss * Y
+    else:
+        Kss_params = (Z, gamma, epsilon, delta, tau_b, delta_tau)
+        Kss = firm.get_K(Lss, ss_firm_r, Kss_params)
+    Yss_params = (Z, gamma, epsilon)
+    Yss = firm.get_Y(Kss, Lss, Yss_params)
+
+    theta_params = (e, S, retire)
+    theta = tax.replacement_rate_vals(nssmat, w, factor, theta_params)
+    b_s = np.array(list(np.zeros(J).reshape(1, J)) + list(bssmat[:-1, :]))
+    lump_sum_params = (e, lambdas.reshape(1, J), omega_SS.reshape(S, 1), 'SS', etr_params, theta, tau_bq,
+                      tau_payroll, h_wealth, p_wealth, m_wealth, retire, T, S, J, tau_b, delta_tau)
+    revenue_ss = aggr.revenue(new_r, new_w, b_s, nssmat, new_BQ, Yss, Lss, Kss, factor, lump_sum_params)
+
+    return {'Yss': Yss, 'Kss': Kss, 'Lss': Lss, 'rss': r, 'wss': w,
+            'revenue_ss': revenue_ss, 'T_Hss': T_H, 'factor_ss': factor,
+            'BQss': new_BQ, 'bssmat_splus1': bssmat, 'nssmat': nssmat}
+
+
+def get_ss_sensitivities(ss_output, param_specs, income_tax_params, ss_params, chi_params, small_open_params, baseline=True, baseline_spending=False, run_params=None):
+    '''
+    Computes the derivatives of the steady state with respect to a set
+    of parameters, using the implicit function theorem on the stacked
+    household Euler equations and market clearing conditions.
+
+    Inputs:
+        ss_output         = dictionary, output of SS.run_SS
+        param_specs       = list, parameters to compute the derivatives
+                            for, each a name (e.g. 'tau_payroll',
+                            'frisch', 'g_y_annual') or a tuple (name,
+                            index), as in perturb_params
+        income_tax_params = length 4 tuple, (analytical_mtrs,
+                            etr_params, mtrx_params, mtry_params)
+        ss_params         = length 34 tuple, parameters as passed to
+                            SS.run_SS
+        chi_params        = length 2 tuple, (chi_b, chi_n)
+        small_open_params = length 3 tuple, small open economy
+                            parameters
+        baseline          = boolean, =True if the baseline steady state
+        baseline_spending = boolean, =True if transfers are fixed at the
+                            baseline level
+        run_params        = dictionary, parameters from
+                            parameters.get_parameters, needed for the
+                            parameters in DERIVED_PARAMS
+
+    Functions called:
+        stack_ss()
+        get_residual_jacobian()
+        ss_residuals()
+        get_ss_outputs()
+        perturb_params()
+        get_param_step()
+
+    Objects in function:
+        z     = [N,] vector, unknowns at the steady state
+        fixed = length 2 tuple, (T_Hss, factor_ss), used for the
+                unknowns that are held fixed in a reform
+        F_z   = [N,N] array, Jacobian of the system w.r.t. the unknowns
+        F_p   = [N,P] array, Jacobian of the system w.r.t. the parameters
+        dz    = [N,P] array, derivatives of the unknowns
+
+    Returns: sensitivities, dictionary with a dictionary of the
+             derivatives of the variables in OUTPUT_NAMES for each
+             parameter in param_specs
+    '''
+    params = (ss_params, income_tax_params, chi_params, small_open_params)
+    z = stack_ss(ss_output, baseline, baseline_spending)
+    fixed = (ss_output['T_Hss'], ss_output['factor_ss'])
+
+    F_z = get_residual_jacobian(z, fixed, params, baseline,
+                                baseline_spending)
+    steps = [get_param_step(params, spec, run_params)
+             for spec in param_specs]
+    F_p = np.zeros((z.shape[0], len(param_specs)))
+    for k, spec in enumerate(param_specs):
+        h = steps[k]
+        F_p[:, k] = (ss_residuals(z, fixed, perturb_params(params, spec, h, run_params),
+                                  baseline, baseline_spending) -
+                     ss_residuals(z, fixed, perturb_params(params, spec, -h, run_params),
+                                  baseline, baseline_spending)) / (2 * h)
+    dz = -np.linalg.solve(F_z, F_p)
+
+    sensitivities = {}
+    for k, spec in enumerate(param_specs):
+        h = steps[k]
+        outputs_up = get_ss_outputs(z + h * dz[:, k], fixed,
+                                    perturb_params(params, spec, h, run_params),
+                                    baseline, baseline_spending)
+        outputs_down = get_ss_outputs(z - h * dz[:, k], fixed,
+                                      perturb_params(params, spec, -h, run_params),
+                                      baseline, baseline_spending)
+        sensitivities[spec] = dict((name, (np.asarray(outputs_up[name]) -
+                                           np.asarray(outputs_down[name])) / (2 * h))
+                                   for name in OUTPUT_NAMES)
+
+    return sensitivities
+
+
+def approx_ss(ss_output, sensitivities, changes):
+    '''
+    Gives a first order approximation of the steady state after changes
+    in the parameters.
+
+    Inputs:
+        ss_output     = dictionary, output of SS.run_SS
+        sensitivities = dictionary, output of get_ss_sensitivities
+        changes       = dictionary, change in each parameter, with the
+                        same keys as sensitivities
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: dictionary with the variables in OUTPUT_NAMES
+    '''
+    approx = dict((name, np.array(ss_output[name], dtype=float))
+                  for name in OUTPUT_NAMES)
+    for spec, change in changes.iteritems():
+        for name in OUTPUT_NAMES:
+            approx[name] = approx[name] + change * sensitivities[spec][name]
+
+    return approx
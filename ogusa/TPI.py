@@ -11,6 +11,7 @@ This py-file calls the following other file(s):
             utils.py
             household.py
             firm.py
+            records.py
             OUTPUT/SS/ss_vars.pkl
             OUTPUT/Saved_moments/params_given.pkl
             OUTPUT/Saved_moments/params_changed.pkl
@@ -20,6 +21,7 @@ This py-file creates the following other file(s):
     (make sure that an OUTPUT folder exists)
             OUTPUT/TPIinit/TPIinit_vars.pkl
             OUTPUT/TPI/TPI_vars.pkl
+            OUTPUT/TPI/TPI_checkpoint.pkl (until the path converges)
 ------------------------------------------------------------------------
 '''
 
@@ -33,11 +35,14 @@ import scipy.optimize as opt
 import tax
 import utils
 import household
+import kernels
+import records
 import firm
 import fiscal
 import aggregates as aggr
 import os
 import csv
+import time
 
 
 '''
@@ -45,11 +50,90 @@ Set minimizer tolerance
 '''
 MINIMIZER_TOL = 1e-13
 
+'''
+Set the loosest minimizer tolerance and the minimizer tolerance relative
+to the distance in the outer loop, while the outer loop has not converged
+'''
+MINIMIZER_TOL_MAX = 1e-6
+MINIMIZER_TOL_SCALE = 1e-3
+
+'''
+Set solver for the lifetimes of the household problems, 'fsolve' to
+solve each lifetime's Euler equations as one dense system, or 'banded'
+for Newton steps that use the banded structure of the Euler equations
+(see solve_lifetime)
+'''
+HOUSEHOLD_SOLVER = 'fsolve'
+
+'''
+Set number of bands of the Jacobian of the Euler equations of a
+lifetime on each side of the diagonal, with the savings and labor
+supply of each age next to each other (see solve_lifetime)
+'''
+EULER_BANDS = 3
+
 '''
 Set flag for enforcement of solution check
 '''
 ENFORCE_SOLUTION_CHECKS = True
 
+'''
+Set wall-clock budget in seconds and budget of iterations of the outer
+loop (None for no limit), after which run_TPI returns its best iterate so
+far, flagged as not converged
+'''
+MAX_SECONDS = None
+MAX_EVALS = None
+
+'''
+Set how often the state of the outer loop is saved, so a run that is
+stopped can be resumed: every CHECKPOINT_ITERS iterations or
+CHECKPOINT_MINUTES minutes (None to not use that criterion), and when
+the loop stops.  The checkpoint is removed once the path has converged
+and is saved in TPI_vars.pkl
+'''
+CHECKPOINT_ITERS = 10
+CHECKPOINT_MINUTES = 30.0
+CHECKPOINT_FILE = "TPI_checkpoint.pkl"
+
+'''
+Set largest ratio (and smallest inverse ratio) of steady state values on
+this model's grid and on a coarse grid by which the coarse transition
+path is scaled (see interp_coarse_guesses); a coarse value near zero or
+of the other sign gives a ratio outside that range, and the path is then
+shifted instead
+'''
+COARSE_SS_MAX_RATIO = 10.0
+
+
+def get_solver_config(**kwargs):
+    '''
+    Collects the settings of the TPI solvers in one record, which is
+    passed to run_TPI() and inner_loop() in place of the module constants
+    above.  Settings that are not given are read from the module
+    constants when this function is called.
+
+    Inputs:
+        kwargs = settings to change, by field name of records.SolverConfig
+
+    Functions called: None
+
+    Objects in function:
+        solver_config = records.SolverConfig, settings of the solvers
+                        (fsolve_num_workers and household_state_tol are
+                        only used in the SS)
+
+    Returns: solver_config
+    '''
+    solver_config = records.SolverConfig(
+        enforce_solution_checks=ENFORCE_SOLUTION_CHECKS,
+        minimizer_tol=MINIMIZER_TOL, minimizer_tol_max=MINIMIZER_TOL_MAX,
+        minimizer_tol_scale=MINIMIZER_TOL_SCALE, fsolve_num_workers=1,
+        household_solver=HOUSEHOLD_SOLVER, household_state_tol=None, max_seconds=MAX_SECONDS,
+        max_evals=MAX_EVALS)
+
+    return solver_config._replace(**kwargs)
+
 
 '''
 ------------------------------------------------------------------------
@@ -101,16 +185,16 @@ def create_tpi_params(**sim_params):
 
 
 
-    tpi_params = [sim_params['J'], sim_params['S'], sim_params['T'], sim_params['BW'],
+    tpi_params = records.TPIParams._make([sim_params['J'], sim_params['S'], sim_params['T'], sim_params['BW'],
                   sim_params['beta'], sim_params['sigma'], sim_params['alpha'],
                   sim_params['gamma'], sim_params['epsilon'],
                   sim_params['Z'], sim_params['delta'], sim_params['ltilde'],
                   sim_params['nu'], sim_params['g_y'], sim_params['g_n_vector'],
                   sim_params['tau_payroll'], sim_params['tau_bq'], sim_params['rho'], sim_params['omega'], N_tilde,
                   sim_params['lambdas'], sim_params['imm_rates'], sim_params['e'], sim_params['retire'], sim_params['mean_income_data'], factor] + \
-                  wealth_tax_params + ellipse_params + chi_params + [theta]
-    iterative_params = [sim_params['maxiter'], sim_params['mindist_SS'], sim_params['mindist_TPI']]
-    small_open_params = [sim_params['small_open'], sim_params['tpi_firm_r'], sim_params['tpi_hh_r']]
+                  wealth_tax_params + ellipse_params + chi_params + [theta])
+    iterative_params = records.TPIIterativeParams(sim_params['maxiter'], sim_params['mindist_SS'], sim_params['mindist_TPI'])
+    small_open_params = records.TPISmallOpenParams(sim_params['small_open'], sim_params['tpi_firm_r'], sim_params['tpi_hh_r'])
 
 
     J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
@@ -119,19 +203,40 @@ def create_tpi_params(**sim_params):
 
     ## Assumption for tax functions is that policy in last year of BW is
     # extended permanently
-    etr_params_TP = np.zeros((S,T+S,sim_params['etr_params'].shape[2]))
-    etr_params_TP[:,:BW,:] = sim_params['etr_params']
-    etr_params_TP[:,BW:,:] = np.reshape(sim_params['etr_params'][:,BW-1,:],(S,1,sim_params['etr_params'].shape[2]))
+    etr_year_params = tax.get_year_params(sim_params['etr_params'])
+    mtrx_year_params = tax.get_year_params(sim_params['mtrx_params'])
+    mtry_year_params = tax.get_year_params(sim_params['mtry_params'])
+    if (etr_year_params is not None and mtrx_year_params is not None and
+            mtry_year_params is not None):
+        # Tax functions do not vary by age, so keep [T+S,#tax params]
+        # tables by year rather than [S,T+S,#tax params] arrays
+        etr_params_TP = np.zeros((T+S,etr_year_params.shape[1]))
+        etr_params_TP[:BW,:] = etr_year_params
+        etr_params_TP[BW:,:] = etr_year_params[BW-1,:]
+
+        mtrx_params_TP = np.zeros((T+S,mtrx_year_params.shape[1]))
+        mtrx_params_TP[:BW,:] = mtrx_year_params
+        mtrx_params_TP[BW:,:] = mtrx_year_params[BW-1,:]
+
+        mtry_params_TP = np.zeros((T+S,mtry_year_params.shape[1]))
+        mtry_params_TP[:BW,:] = mtry_year_params
+        mtry_params_TP[BW:,:] = mtry_year_params[BW-1,:]
+
+        income_tax_params = records.IncomeTaxParams(sim_params['analytical_mtrs'], etr_params_TP, mtrx_params_TP, mtry_params_TP)
+    else:
+        etr_params_TP = np.zeros((S,T+S,sim_params['etr_params'].shape[2]))
+        etr_params_TP[:,:BW,:] = sim_params['etr_params']
+        etr_params_TP[:,BW:,:] = np.reshape(sim_params['etr_params'][:,BW-1,:],(S,1,sim_params['etr_params'].shape[2]))
 
-    mtrx_params_TP = np.zeros((S,T+S,sim_params['mtrx_params'].shape[2]))
-    mtrx_params_TP[:,:BW,:] = sim_params['mtrx_params']
-    mtrx_params_TP[:,BW:,:] = np.reshape(sim_params['mtrx_params'][:,BW-1,:],(S,1,sim_params['mtrx_params'].shape[2]))
+        mtrx_params_TP = np.zeros((S,T+S,sim_params['mtrx_params'].shape[2]))
+        mtrx_params_TP[:,:BW,:] = sim_params['mtrx_params']
+        mtrx_params_TP[:,BW:,:] = np.reshape(sim_params['mtrx_params'][:,BW-1,:],(S,1,sim_params['mtrx_params'].shape[2]))
 
-    mtry_params_TP = np.zeros((S,T+S,sim_params['mtry_params'].shape[2]))
-    mtry_params_TP[:,:BW,:] = sim_params['mtry_params']
-    mtry_params_TP[:,BW:,:] = np.reshape(sim_params['mtry_params'][:,BW-1,:],(S,1,sim_params['mtry_params'].shape[2]))
+        mtry_params_TP = np.zeros((S,T+S,sim_params['mtry_params'].shape[2]))
+        mtry_params_TP[:,:BW,:] = sim_params['mtry_params']
+        mtry_params_TP[:,BW:,:] = np.reshape(sim_params['mtry_params'][:,BW-1,:],(S,1,sim_params['mtry_params'].shape[2]))
 
-    income_tax_params = (sim_params['analytical_mtrs'], etr_params_TP, mtrx_params_TP, mtry_params_TP)
+        income_tax_params = records.IncomeTaxParams(sim_params['analytical_mtrs'], etr_params_TP, mtrx_params_TP, mtry_params_TP)
 
     '''
     ------------------------------------------------------------------------
@@ -159,7 +264,7 @@ def create_tpi_params(**sim_params):
     '''
     tau_b = sim_params['tau_b']
     delta_tau = sim_params['delta_tau']
-    biz_tax_params  = (tau_b, delta_tau)
+    biz_tax_params  = records.BizTaxParams(tau_b, delta_tau)
 
     initial_debt  = sim_params['initial_debt']
 
@@ -177,7 +282,7 @@ def create_tpi_params(**sim_params):
     b_sinit = np.array(list(np.zeros(J).reshape(1, J)) + list(initial_b[:-1]))
     b_splus1init = initial_b
 
-    initial_values = (B0, b_sinit, b_splus1init, factor, initial_b, initial_n, omega_S_preTP, initial_debt)
+    initial_values = records.InitialValues(B0, b_sinit, b_splus1init, factor, initial_b, initial_n, omega_S_preTP, initial_debt)
 
     return (income_tax_params, tpi_params, iterative_params, small_open_params, initial_values, SS_values, fiscal_params, biz_tax_params)
 
@@ -215,8 +320,16 @@ def firstdoughnutring(guesses, r, w, b, BQ, T_H, j, params):
     n = float(guesses[1])
     b_s = float(initial_b[-2, j])
 
+    # tax function parameters for the oldest age in the first period
+    if etr_params.ndim == 2:
+        etr_params_0 = etr_params[0,:]
+        mtrx_params_0 = mtrx_params[0,:]
+    else:
+        etr_params_0 = etr_params[-1,0,:]
+        mtrx_params_0 = mtrx_params[-1,0,:]
+
     # Euler 1 equations
-    tax1_params = (e[-1, j], lambdas[j], 'TPI_scalar', retire, etr_params[-1,0,:], h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
+    tax1_params = (e[-1, j], lambdas[j], 'TPI_scalar', retire, etr_params_0, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
     tax1 = tax.total_taxes(r, w, b_s, n, BQ, factor, T_H, j, False, tax1_params)
 
     cons_params = (e[-1, j], lambdas[j], g_y)
@@ -229,7 +342,7 @@ def firstdoughnutring(guesses, r, w, b, BQ, T_H, j, params):
     # Euler 2 equations
     income2 = (r * b_s + w * e[-1, j] * n) * factor
 
-    mtr_labor_params = (e[-1, j], etr_params[-1,0,:], mtrx_params[-1,0,:], analytical_mtrs)
+    mtr_labor_params = (e[-1, j], etr_params_0, mtrx_params_0, analytical_mtrs)
     deriv2 = 1 - tau_payroll - tax.MTR_labor(r, w, b_s, n, factor, mtr_labor_params)
 
     mu_labor_params = (b_ellipse, upsilon, ltilde, chi_n[-1])
@@ -256,7 +369,7 @@ def firstdoughnutring(guesses, r, w, b, BQ, T_H, j, params):
     return [error1] + [error2]
 
 
-def twist_doughnut(guesses, r, w, BQ, T_H, j, s, t, params):
+def twist_doughnut(guesses, r, w, BQ, T_H, j, s, t, params, workspace=None):
     '''
     Parameters:
         guesses = distribution of capital and labor (various length list)
@@ -277,8 +390,11 @@ def twist_doughnut(guesses, r, w, BQ, T_H, j, s, t, params):
         initial_b = capital stock distribution in period 0 (SxJ array)
         chi_b = chi^b_j (Jx1 array)
         chi_n = chi^n_s (Sx1 array)
+        workspace = arrays from household.get_workspace for this cohort,
+                    filled in place, if None they are allocated here
+                    (dictionary)
     Output:
-        Value of Euler error (various length list)
+        Value of Euler error (various length vector)
     '''
 
     income_tax_params, tpi_params, initial_b = params
@@ -288,73 +404,94 @@ def twist_doughnut(guesses, r, w, BQ, T_H, j, s, t, params):
                   factor, h_wealth, p_wealth, m_wealth, b_ellipse, upsilon, chi_b, chi_n, theta = tpi_params
 
     length = len(guesses) / 2
-    b_guess = np.array(guesses[:length])
-    n_guess = np.array(guesses[length:])
+    guesses = np.asarray(guesses, dtype=float)
+    b_guess = guesses[:length]
+    n_guess = guesses[length:]
 
-    if length == S:
-        b_s = np.array([0] + list(b_guess[:-1]))
-    else:
-        b_s = np.array([(initial_b[-(s + 3), j])] + list(b_guess[:-1]))
+    if workspace is None:
+        if length == S:
+            b_first = 0.0
+        else:
+            b_first = initial_b[-(s + 3), j]
+        workspace = household.get_workspace(e[-length:, j], etr_params,
+                                            mtry_params, b_first)
 
+    b_s = workspace['b_s']
+    b_s[1:] = b_guess[:-1]
     b_splus1 = b_guess
-    b_splus2 = np.array(list(b_guess[1:]) + [0])
+    b_splus2 = workspace['b_splus2']
+    b_splus2[:-1] = b_guess[1:]
     w_s = w[t:t + length]
     w_splus1 = w[t + 1:t + length + 1]
     r_s = r[t:t + length]
     r_splus1 = r[t + 1:t + length + 1]
     n_s = n_guess
-    n_extended = np.array(list(n_guess[1:]) + [0])
+    n_extended = workspace['n_splus1']
+    n_extended[:-1] = n_guess[1:]
     e_s = e[-length:, j]
-    e_extended = np.array(list(e[-length + 1:, j]) + [0])
+    e_extended = workspace['e_splus1']
     BQ_s = BQ[t:t + length]
     BQ_splus1 = BQ[t + 1:t + length + 1]
     T_H_s = T_H[t:t + length]
     T_H_splus1 = T_H[t + 1:t + length + 1]
 
 
-    # Savings euler equations
-    tax_s_params = (e_s, lambdas[j], 'TPI', retire, etr_params, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
+    if kernels.enabled():
+        # compute the Euler errors in one compiled loop over ages
+        scalars = np.array([factor, sigma, beta, g_y, chi_b[j], theta[j], tau_bq[j], lambdas[j],
+                            tau_payroll, h_wealth, p_wealth, m_wealth, b_ellipse, upsilon, ltilde])
+        num_params = etr_params.shape[-1]
+        error1, error2, cons_s, cons_splus1 = kernels.lifetime_euler_errors(
+            r_s, w_s, BQ_s, T_H_s, r_splus1, w_splus1, BQ_splus1, T_H_splus1, b_s, b_splus1,
+            b_splus2, n_s, n_extended, e_s, e_extended, rho[-length:], chi_n[-length:],
+            etr_params.reshape(-1, num_params), mtrx_params.reshape(-1, num_params),
+            workspace['etr_params_splus1'].reshape(-1, num_params),
+            workspace['mtry_params_splus1'].reshape(-1, num_params), analytical_mtrs,
+            max(length + retire - S, 0), max(length + retire - 1 - S, 0), scalars)
+    else:
+        # Savings euler equations
+        tax_s_params = (e_s, lambdas[j], 'TPI', retire, etr_params, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
 
-    tax_s = tax.total_taxes(r_s, w_s, b_s, n_s, BQ_s, factor, T_H_s, j, False, tax_s_params)
+        tax_s = tax.total_taxes(r_s, w_s, b_s, n_s, BQ_s, factor, T_H_s, j, False, tax_s_params)
 
-    etr_params_sp1 = np.append(etr_params,np.reshape(etr_params[-1,:],(1,etr_params.shape[1])),axis=0)[1:,:]
-    taxsp1_params = (e_extended, lambdas[j], 'TPI', retire, etr_params_sp1, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
-    tax_splus1 = tax.total_taxes(r_splus1, w_splus1, b_splus1, n_extended, BQ_splus1, factor, T_H_splus1, j, True, taxsp1_params)
+        etr_params_sp1 = workspace['etr_params_splus1']
+        taxsp1_params = (e_extended, lambdas[j], 'TPI', retire, etr_params_sp1, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
+        tax_splus1 = tax.total_taxes(r_splus1, w_splus1, b_splus1, n_extended, BQ_splus1, factor, T_H_splus1, j, True, taxsp1_params)
 
 
-    cons_s_params = (e_s, lambdas[j], g_y)
-    cons_s = household.get_cons(r_s, w_s, b_s, b_splus1, n_s,
-                   BQ_s, tax_s, cons_s_params)
+        cons_s_params = (e_s, lambdas[j], g_y)
+        cons_s = household.get_cons(r_s, w_s, b_s, b_splus1, n_s,
+                       BQ_s, tax_s, cons_s_params)
 
-    cons_sp1_params = (e_extended, lambdas[j], g_y)
-    cons_splus1 = household.get_cons(r_splus1, w_splus1, b_splus1, b_splus2, n_extended,
-                   BQ_splus1, tax_splus1, cons_sp1_params)
+        cons_sp1_params = (e_extended, lambdas[j], g_y)
+        cons_splus1 = household.get_cons(r_splus1, w_splus1, b_splus1, b_splus2, n_extended,
+                       BQ_splus1, tax_splus1, cons_sp1_params)
 
-    income_splus1 = (r_splus1 * b_splus1 + w_splus1 *
-                     e_extended * n_extended) * factor
-    savings_ut = rho[-(length):] * np.exp(-sigma * g_y) * \
-        chi_b[j] * b_splus1 ** (-sigma)
+        income_splus1 = (r_splus1 * b_splus1 + w_splus1 *
+                         e_extended * n_extended) * factor
+        savings_ut = rho[-(length):] * np.exp(-sigma * g_y) * \
+            chi_b[j] * b_splus1 ** (-sigma)
 
-    mtry_params_sp1 = np.append(mtry_params,np.reshape(mtry_params[-1,:],(1,mtry_params.shape[1])),axis=0)[1:,:]
-    mtr_capital_params = (e_extended, etr_params_sp1, mtry_params_sp1, analytical_mtrs)
-    deriv_savings = 1 + r_splus1 * (1 - tax.MTR_capital(r_splus1, w_splus1, b_splus1, n_extended, factor, mtr_capital_params))
+        mtry_params_sp1 = workspace['mtry_params_splus1']
+        mtr_capital_params = (e_extended, etr_params_sp1, mtry_params_sp1, analytical_mtrs)
+        deriv_savings = 1 + r_splus1 * (1 - tax.MTR_capital(r_splus1, w_splus1, b_splus1, n_extended, factor, mtr_capital_params))
 
-    #Note equation below accounts for savings in last period because here rho=1 - so second term drops out.  Which means tax rates after last
-    # period of life don't matter
-    error1= household.marg_ut_cons(cons_s, sigma) - beta * (1 - rho[-(length):]) * np.exp(-sigma * g_y) * deriv_savings * household.marg_ut_cons(
-        cons_splus1, sigma) - savings_ut
+        #Note equation below accounts for savings in last period because here rho=1 - so second term drops out.  Which means tax rates after last
+        # period of life don't matter
+        error1= household.marg_ut_cons(cons_s, sigma) - beta * (1 - rho[-(length):]) * np.exp(-sigma * g_y) * deriv_savings * household.marg_ut_cons(
+            cons_splus1, sigma) - savings_ut
 
 
-    # Labor leisure euler equations
-    income_s = (r_s * b_s + w_s * e_s * n_s) * factor
+        # Labor leisure euler equations
+        income_s = (r_s * b_s + w_s * e_s * n_s) * factor
 
 
-    mtr_labor_params = (e_s, etr_params, mtrx_params, analytical_mtrs)
-    deriv_laborleisure = 1 - tau_payroll - tax.MTR_labor(r_s, w_s, b_s, n_s, factor, mtr_labor_params)
+        mtr_labor_params = (e_s, etr_params, mtrx_params, analytical_mtrs)
+        deriv_laborleisure = 1 - tau_payroll - tax.MTR_labor(r_s, w_s, b_s, n_s, factor, mtr_labor_params)
 
-    mu_labor_params = (b_ellipse, upsilon, ltilde, chi_n[-length:])
-    error2 = household.marg_ut_cons(cons_s, sigma) * w_s * e[-(
-        length):, j] * deriv_laborleisure - household.marg_ut_labor(n_s, mu_labor_params)
+        mu_labor_params = (b_ellipse, upsilon, ltilde, chi_n[-length:])
+        error2 = household.marg_ut_cons(cons_s, sigma) * w_s * e[-(
+            length):, j] * deriv_laborleisure - household.marg_ut_labor(n_s, mu_labor_params)
     # Check and punish constraint violations
     mask1 = n_guess < 0
     error2[mask1] += 1e12
@@ -367,10 +504,67 @@ def twist_doughnut(guesses, r, w, BQ, T_H, j, s, t, params):
     mask5 = cons_splus1 < 0
     mask5[-1] = b_splus1[-1] < 0
     error2[mask5] += 1e12
-    return list(error1.flatten()) + list(error2.flatten())
+    return np.concatenate((error1, error2))
+
+
+def solve_lifetime(guesses, args, xtol, household_solver):
+    '''
+    Solves the Euler equations of one lifetime (see twist_doughnut()).
+    Savings at s enter the Euler equations of ages s-1 through s+1 only,
+    so, with the savings and labor supply of each age next to each other,
+    the Jacobian of the Euler equations has EULER_BANDS bands on each
+    side of the diagonal.  The 'banded' solver uses this to take Newton
+    steps whose cost grows with the number of ages rather than its cube.
+    If it does not converge, the lifetime is solved with fsolve from its
+    last iterate.
+
+    Inputs:
+        guesses          = [2*length,] vector, savings then labor supply
+        args             = tuple, other arguments to twist_doughnut()
+        xtol             = scalar, tolerance for the solution
+        household_solver = string, 'fsolve' or 'banded'
 
+    Functions called:
+        twist_doughnut()
+        utils.fsolve_banded()
+
+    Objects in function:
+        order     = [2*length,] vector, index of the guesses with the
+                    savings and labor supply of each age next to each
+                    other
+        solutions = [2*length,] vector, savings then labor supply
+        fvec      = [2*length,] vector, Euler errors at the solutions
 
-def inner_loop(guesses, outer_loop_vars, params):
+    Returns: solutions, fvec
+    '''
+    guesses = np.asarray(guesses, dtype=float)
+    if household_solver == 'banded':
+        length = len(guesses) / 2
+        order = np.arange(2 * length).reshape(2, length).T.flatten()
+
+        def interleaved_errors(x):
+            unordered = np.empty_like(x)
+            unordered[order] = x
+            return twist_doughnut(unordered, *args)[order]
+
+        x, infodict, ier, message = utils.fsolve_banded(
+            interleaved_errors, guesses[order], EULER_BANDS, EULER_BANDS,
+            xtol=xtol)
+        guesses = np.empty_like(x)
+        guesses[order] = x
+        if ier == 1:
+            fvec = np.empty_like(x)
+            fvec[order] = infodict['fvec']
+            return guesses, fvec
+    elif household_solver != 'fsolve':
+        raise RuntimeError('Unknown household solver ' + str(household_solver))
+    [solutions, infodict, ier, message] = opt.fsolve(
+        twist_doughnut, guesses, args=args, xtol=xtol, full_output=True)
+
+    return solutions, infodict['fvec']
+
+
+def inner_loop(guesses, outer_loop_vars, params, xtol=None, solver_config=None):
     '''
     Solves inner loop of TPI.  Given path of economic aggregates and factor prices, solves
     household problem
@@ -383,11 +577,17 @@ def inner_loop(guesses, outer_loop_vars, params):
         BQ         = [T,J] vector,  bequest amounts
         factor     = scalar, model income scaling factor
         T_H        = [T,] vector, lump sum transfer amount(s)
+        xtol       = scalar, tolerance for the household problems, if
+                     None use the minimizer_tol of solver_config
+        solver_config = records.SolverConfig, settings of the solvers,
+                     if None use get_solver_config()
 
 
     Functions called:
+        get_solver_config()
         firstdoughnutring()
-        twist_doughnut()
+        household.get_workspace()
+        solve_lifetime()
 
     Objects in function:
 
@@ -410,12 +610,16 @@ def inner_loop(guesses, outer_loop_vars, params):
     b_mat = np.zeros((T + S, S, J))
     n_mat = np.zeros((T + S, S, J))
     euler_errors = np.zeros((T, 2 * S, J))
+    if solver_config is None:
+        solver_config = get_solver_config()
+    if xtol is None:
+        xtol = solver_config.minimizer_tol
 
     for j in xrange(J):
             first_doughnut_params = (income_tax_params, tpi_params, initial_b)
             b_mat[0, -1, j], n_mat[0, -1, j] = np.array(opt.fsolve(firstdoughnutring, [guesses_b[0, -1, j], guesses_n[0, -1, j]],
                                                                    args=(r[0], w[0], initial_b, BQ[0, j], T_H[0], j,
-                                                                   first_doughnut_params), xtol=MINIMIZER_TOL))
+                                                                   first_doughnut_params), xtol=xtol))
 
             for s in xrange(S - 2):  # Upper triangle
                 ind2 = np.arange(s + 2)
@@ -423,23 +627,34 @@ def inner_loop(guesses, outer_loop_vars, params):
                     guesses_b[:S, :, j], S - (s + 2))
                 n_guesses_to_use = np.diag(guesses_n[:S, :, j], S - (s + 2))
 
-                # initialize array of diagonal elements
-                length_diag = (np.diag(np.transpose(etr_params[:,:S,0]),S-(s+2))).shape[0]
-                etr_params_to_use = np.zeros((length_diag,etr_params.shape[2]))
-                mtrx_params_to_use = np.zeros((length_diag,mtrx_params.shape[2]))
-                mtry_params_to_use = np.zeros((length_diag,mtry_params.shape[2]))
-                for i in range(etr_params.shape[2]):
-                    etr_params_to_use[:,i] = np.diag(np.transpose(etr_params[:,:S,i]),S-(s+2))
-                    mtrx_params_to_use[:,i] = np.diag(np.transpose(mtrx_params[:,:S,i]),S-(s+2))
-                    mtry_params_to_use[:,i] = np.diag(np.transpose(mtry_params[:,:S,i]),S-(s+2))
+                if etr_params.ndim == 2:
+                    # tax functions vary by year only, so the diagonal
+                    # is just the first s+2 years
+                    etr_params_to_use = etr_params[:s+2,:]
+                    mtrx_params_to_use = mtrx_params[:s+2,:]
+                    mtry_params_to_use = mtry_params[:s+2,:]
+                else:
+                    # initialize array of diagonal elements
+                    length_diag = (np.diag(np.transpose(etr_params[:,:S,0]),S-(s+2))).shape[0]
+                    etr_params_to_use = np.zeros((length_diag,etr_params.shape[2]))
+                    mtrx_params_to_use = np.zeros((length_diag,mtrx_params.shape[2]))
+                    mtry_params_to_use = np.zeros((length_diag,mtry_params.shape[2]))
+                    for i in range(etr_params.shape[2]):
+                        etr_params_to_use[:,i] = np.diag(np.transpose(etr_params[:,:S,i]),S-(s+2))
+                        mtrx_params_to_use[:,i] = np.diag(np.transpose(mtrx_params[:,:S,i]),S-(s+2))
+                        mtry_params_to_use[:,i] = np.diag(np.transpose(mtry_params[:,:S,i]),S-(s+2))
 
 
                 inc_tax_params_upper = (analytical_mtrs, etr_params_to_use, mtrx_params_to_use, mtry_params_to_use)
 
                 TPI_solver_params = (inc_tax_params_upper, tpi_params, initial_b)
-                solutions = opt.fsolve(twist_doughnut, list(
-                    b_guesses_to_use) + list(n_guesses_to_use), args=(
-                    r, w, BQ[:, j], T_H, j, s, 0, TPI_solver_params), xtol=MINIMIZER_TOL)
+                workspace = household.get_workspace(
+                    e[-(s + 2):, j], etr_params_to_use, mtry_params_to_use,
+                    initial_b[-(s + 3), j])
+                solutions, fvec = solve_lifetime(list(
+                    b_guesses_to_use) + list(n_guesses_to_use), (
+                    r, w, BQ[:, j], T_H, j, s, 0, TPI_solver_params,
+                    workspace), xtol, solver_config.household_solver)
 
                 b_vec = solutions[:len(solutions) / 2]
                 b_mat[ind2, S - (s + 2) + ind2, j] = b_vec
@@ -454,24 +669,33 @@ def inner_loop(guesses, outer_loop_vars, params):
                     np.diag(guesses_b[t:t + S, :, j])
                 n_guesses_to_use = np.diag(guesses_n[t:t + S, :, j])
 
-                # initialize array of diagonal elements
-                length_diag = (np.diag(np.transpose(etr_params[:,t:t+S,0]))).shape[0]
-                etr_params_to_use = np.zeros((length_diag,etr_params.shape[2]))
-                mtrx_params_to_use = np.zeros((length_diag,mtrx_params.shape[2]))
-                mtry_params_to_use = np.zeros((length_diag,mtry_params.shape[2]))
-                for i in range(etr_params.shape[2]):
-                    etr_params_to_use[:,i] = np.diag(np.transpose(etr_params[:,t:t+S,i]))
-                    mtrx_params_to_use[:,i] = np.diag(np.transpose(mtrx_params[:,t:t+S,i]))
-                    mtry_params_to_use[:,i] = np.diag(np.transpose(mtry_params[:,t:t+S,i]))
+                if etr_params.ndim == 2:
+                    # tax functions vary by year only, so the cohort's
+                    # parameters are just the years t through t+S-1
+                    etr_params_to_use = etr_params[t:t+S,:]
+                    mtrx_params_to_use = mtrx_params[t:t+S,:]
+                    mtry_params_to_use = mtry_params[t:t+S,:]
+                else:
+                    # initialize array of diagonal elements
+                    length_diag = (np.diag(np.transpose(etr_params[:,t:t+S,0]))).shape[0]
+                    etr_params_to_use = np.zeros((length_diag,etr_params.shape[2]))
+                    mtrx_params_to_use = np.zeros((length_diag,mtrx_params.shape[2]))
+                    mtry_params_to_use = np.zeros((length_diag,mtry_params.shape[2]))
+                    for i in range(etr_params.shape[2]):
+                        etr_params_to_use[:,i] = np.diag(np.transpose(etr_params[:,t:t+S,i]))
+                        mtrx_params_to_use[:,i] = np.diag(np.transpose(mtrx_params[:,t:t+S,i]))
+                        mtry_params_to_use[:,i] = np.diag(np.transpose(mtry_params[:,t:t+S,i]))
 
                 inc_tax_params_TP = (analytical_mtrs, etr_params_to_use, mtrx_params_to_use, mtry_params_to_use)
 
 
                 TPI_solver_params = (inc_tax_params_TP, tpi_params, None)
-                [solutions, infodict, ier, message] = opt.fsolve(twist_doughnut, list(
-                    b_guesses_to_use) + list(n_guesses_to_use), args=(
-                    r, w, BQ[:, j], T_H, j, None, t, TPI_solver_params), xtol=MINIMIZER_TOL, full_output=True)
-                euler_errors[t, :, j] = infodict['fvec']
+                workspace = household.get_workspace(
+                    e[:, j], etr_params_to_use, mtry_params_to_use)
+                solutions, euler_errors[t, :, j] = solve_lifetime(list(
+                    b_guesses_to_use) + list(n_guesses_to_use), (
+                    r, w, BQ[:, j], T_H, j, None, t, TPI_solver_params,
+                    workspace), xtol, solver_config.household_solver)
 
                 b_vec = solutions[:S]
                 b_mat[t + ind, ind, j] = b_vec
@@ -503,7 +727,274 @@ def initial_GDP_level(y_guess, gamma, epsilon, Z, initial_debt, B, L):
     return error
 
 
-def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params, initial_values, SS_values, fiscal_params, biz_tax_params, output_dir="./OUTPUT", baseline_spending=False):
+def warm_start_path(x_prior, x_ss, T, S):
+    '''
+    Shifts a previously solved time path (e.g., from the baseline or a
+    similar reform) so that it ends at a new steady state value.  The
+    shift grows linearly from zero in the first period, where the initial
+    distribution is the same, to the full change in the steady state in
+    period T-1, after which the path is held at the new steady state.
+
+    Inputs:
+        x_prior = [T,...] array, previously solved time path (any
+                  periods beyond T are ignored)
+        x_ss    = scalar or array, new steady state value
+        T       = integer, number of periods in the transition path
+        S       = integer, number of age groups
+
+    Functions called: None
+
+    Objects in function:
+        ramp   = [T,...] array, weight on the change in steady state
+        x_tail = [S,...] array, new steady state values for periods T
+                 through T+S-1
+        x_path = [T+S,...] array, rescaled time path
+
+    Returns: x_path
+    '''
+    x_prior = np.asarray(x_prior, dtype=float)[:T]
+    ramp = np.linspace(0, 1, T).reshape((T,) + (1,) * (x_prior.ndim - 1))
+    x_path = x_prior + ramp * (x_ss - x_prior[-1])
+    x_tail = np.ones((S,) + x_prior.shape[1:]) * x_ss
+    x_path = np.append(x_path, x_tail, axis=0)
+
+    return x_path
+
+
+def get_warm_start(warm_start_dir, SS_values, T, S, J):
+    '''
+    Loads the time paths from a previously solved TPI and rescales them
+    to the new steady state, to be used as the initial guesses for TPI.
+
+    Inputs:
+        warm_start_dir = string, directory with TPI/TPI_vars.pkl from the
+                         previously solved transition path
+        SS_values      = length 12 tuple, steady state values
+        T              = integer, number of periods in the transition path
+        S              = integer, number of age groups
+        J              = integer, number of lifetime income groups
+
+    Functions called:
+        rescale_warm_start()
+
+    Objects in function:
+        prior_tpi = string, path to previously solved TPI output
+        tpi_prior = dictionary, previously solved TPI output
+
+    Returns: r, w, BQ, T_H, Y, guesses_b, guesses_n
+    '''
+    prior_tpi = os.path.join(warm_start_dir, "TPI/TPI_vars.pkl")
+    tpi_prior = pickle.load(open(prior_tpi, "rb"))
+
+    return rescale_warm_start(tpi_prior, SS_values, T, S, J)
+
+
+def rescale_warm_start(tpi_prior, SS_values, T, S, J):
+    '''
+    Rescales time paths from a previously solved TPI (or from a TPI solved
+    on a coarser grid and interpolated to this one) to the new steady
+    state, to be used as the initial guesses for TPI.
+
+    Inputs:
+        tpi_prior = dictionary, time paths for r, w, BQ, T_H, Y, b_mat,
+                    and n_mat, as in TPI_vars.pkl
+        SS_values = length 12 tuple, steady state values
+        T         = integer, number of periods in the transition path
+        S         = integer, number of age groups
+        J         = integer, number of lifetime income groups
+
+    Functions called:
+        warm_start_path()
+
+    Objects in function:
+        r         = [T+S,] vector, interest rates
+        w         = [T+S,] vector, wage rates
+        BQ        = [T+S,J] array, bequests
+        T_H       = [T+S,] vector, lump sum transfers
+        Y         = [T+S,] vector, output
+        guesses_b = [T+S,S,J] array, savings
+        guesses_n = [T+S,S,J] array, labor supply
+
+    Returns: r, w, BQ, T_H, Y, guesses_b, guesses_n
+    '''
+    Kss, Bss, Lss, rss, wss, BQss, T_Hss, revenue_ss, bssmat_splus1, nssmat, Yss, Gss = SS_values
+
+    if (tpi_prior['b_mat'].shape[0] < T or
+            tpi_prior['b_mat'].shape[1:] != (S, J) or
+            len(tpi_prior['Y']) < T):
+        err = ("Warm start time paths are not compatible with T, S, "
+               "and J of this model")
+        raise RuntimeError(err)
+
+    r = warm_start_path(tpi_prior['r'], rss, T, S)
+    w = warm_start_path(tpi_prior['w'], wss, T, S)
+    BQ = warm_start_path(tpi_prior['BQ'], BQss, T, S)
+    T_H = warm_start_path(tpi_prior['T_H'], T_Hss, T, S)
+    Y = warm_start_path(tpi_prior['Y'], Yss, T, S)
+    guesses_b = warm_start_path(tpi_prior['b_mat'], bssmat_splus1, T, S)
+    guesses_n = warm_start_path(tpi_prior['n_mat'], nssmat, T, S)
+
+    return r, w, BQ, T_H, Y, guesses_b, guesses_n
+
+
+def interp_coarse_guesses(tpi_coarse, ss_coarse, ss_fine, T, S):
+    '''
+    Interpolates a transition path solved with fewer, longer periods
+    (a coarser grid of ages S, and so of years T) onto this model's
+    grid.  Since per period quantities depend on the length of a period,
+    each aggregate is also scaled by the ratio of its steady state value
+    on this grid to that on the coarse grid, or shifted by their
+    difference where that ratio blows up (see scale_coarse_path).
+    Savings and labor supply are near zero at the first and last ages,
+    so they are always shifted by the difference of their steady states.
+
+    Inputs:
+        tpi_coarse = dictionary, TPI output on the coarse grid
+        ss_coarse  = dictionary, SS output on the coarse grid
+        ss_fine    = dictionary, SS output on this model's grid
+        T          = integer, number of periods in the transition path
+        S          = integer, number of age groups
+
+    Functions called:
+        utils.interp_periods()
+        scale_coarse_path()
+
+    Objects in function:
+        T_coarse   = integer, number of periods in the coarse transition
+                     path
+        bss_coarse = [S,J] array, coarse SS savings on this age grid
+        nss_coarse = [S,J] array, coarse SS labor supply on this age grid
+        b_mat      = [T,S,J] array, interpolated savings
+        n_mat      = [T,S,J] array, interpolated labor supply
+        tpi_guess  = dictionary, time paths for r, w, BQ, T_H, Y, b_mat,
+                     and n_mat on this model's grid
+
+    Returns: tpi_guess
+    '''
+    # Only the first T_coarse periods are fully solved (the rest of
+    # b_mat and n_mat is not filled in), so interpolate those onto the
+    # first T periods and leave the rest to the steady state
+    T_coarse = len(tpi_coarse['Y'])
+    bss_coarse = utils.interp_periods(ss_coarse['bssmat_splus1'], S)
+    nss_coarse = utils.interp_periods(ss_coarse['nssmat'], S)
+    b_mat = utils.interp_periods(utils.interp_periods(
+        tpi_coarse['b_mat'][:T_coarse], S, axis=1), T)
+    n_mat = utils.interp_periods(utils.interp_periods(
+        tpi_coarse['n_mat'][:T_coarse], S, axis=1), T)
+
+    tpi_guess = {'b_mat': b_mat + (ss_fine['bssmat_splus1'] - bss_coarse),
+                 'n_mat': n_mat + (ss_fine['nssmat'] - nss_coarse)}
+    for var, ss_var in (('r', 'rss'), ('w', 'wss'), ('BQ', 'BQss'),
+                        ('T_H', 'T_Hss'), ('Y', 'Yss')):
+        tpi_guess[var] = scale_coarse_path(
+            utils.interp_periods(tpi_coarse[var][:T_coarse], T),
+            ss_coarse[ss_var], ss_fine[ss_var])
+
+    return tpi_guess
+
+
+def scale_coarse_path(path, ss_coarse, ss_fine):
+    '''
+    Scales a time path interpolated from a coarse grid by the ratio of
+    its steady state value on this model's grid to that on the coarse
+    grid.  Where that ratio is outside [1/COARSE_SS_MAX_RATIO,
+    COARSE_SS_MAX_RATIO], as when the coarse value is near zero or of
+    the other sign, the path is shifted by the difference of the steady
+    states instead, so it still ends at the steady state of this grid.
+
+    Inputs:
+        path      = [T,] or [T,J] array, time path on this model's grid
+        ss_coarse = scalar or [J,] array, SS value on the coarse grid
+        ss_fine   = scalar or [J,] array, SS value on this model's grid
+
+    Functions called: None
+
+    Objects in function:
+        ratio = scalar or [J,] array, ratio of SS values
+        scale = boolean scalar or [J,] array, whether the path is
+                scaled rather than shifted
+
+    Returns: scaled or shifted path
+    '''
+    ss_coarse = np.asarray(ss_coarse, dtype=float)
+    ss_fine = np.asarray(ss_fine, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = ss_fine / ss_coarse
+    scale = ((ratio >= 1.0 / COARSE_SS_MAX_RATIO) &
+             (ratio <= COARSE_SS_MAX_RATIO))
+    return np.where(scale, path * np.where(scale, ratio, 1.0),
+                    path + (ss_fine - ss_coarse))
+
+
+def save_checkpoint(checkpoint, output_dir):
+    '''
+    Saves the state of the outer loop of TPI.  The file is replaced
+    atomically, so a run stopped while saving leaves the last complete
+    checkpoint.
+
+    Inputs:
+        checkpoint = dictionary, state of the outer loop (see run_TPI)
+        output_dir = string, directory of the output of the run
+
+    Functions called:
+        utils.atomic_pickle_dump()
+
+    Objects in function: None
+
+    Returns: N/A
+    '''
+    utils.atomic_pickle_dump(checkpoint, os.path.join(output_dir, "TPI",
+                                                      CHECKPOINT_FILE))
+
+
+def load_checkpoint(output_dir, config_hash):
+    '''
+    Loads the state of the outer loop of TPI saved by a previous run
+    with the same parameters.
+
+    Inputs:
+        output_dir  = string, directory of the output of the run
+        config_hash = string, fingerprint of the parameters of the run
+
+    Functions called: None
+
+    Objects in function:
+        path = string, path of the checkpoint
+
+    Returns: checkpoint (dictionary), or None if there is no checkpoint
+             or it was saved with different parameters
+    '''
+    path = os.path.join(output_dir, "TPI", CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        print 'No TPI checkpoint found in ', path
+        return None
+    checkpoint = pickle.load(open(path, "rb"))
+    if checkpoint.get('config_hash') != config_hash:
+        print 'TPI checkpoint in ', path, ' was saved with different parameters, not resuming'
+        return None
+
+    return checkpoint
+
+
+def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params, initial_values, SS_values, fiscal_params, biz_tax_params, output_dir="./OUTPUT", baseline_spending=False, warm_start_dir=None, init_guesses=None,
+            solver_config=None, checkpoint=True, resume=False):
+
+    # settings of the solvers, passed to inner_loop() rather than read
+    # from the module constants, so several runs can share a process
+    if solver_config is None:
+        solver_config = get_solver_config()
+    # wall-clock and iteration budgets of this call, after which the
+    # best iterate so far is returned
+    budget = utils.init_budget(solver_config.max_seconds, solver_config.max_evals)
+    best_state = None
+
+    # fingerprint of the parameters that determine the transition path,
+    # so a run is only resumed from its own checkpoints (the maximum
+    # number of iterations and tolerances are left out, so a run can be
+    # resumed with more iterations)
+    config_hash = utils.fingerprint(income_tax_params, tpi_params, small_open_params,
+                                    initial_values, SS_values, fiscal_params,
+                                    biz_tax_params, baseline_spending)
 
     # unpack tuples of parameters
     analytical_mtrs, etr_params, mtrx_params, mtry_params = income_tax_params
@@ -598,15 +1089,39 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
         G   = Gbaseline
         G_0 = Gbaseline[0]
 
+    if warm_start_dir is not None or init_guesses is not None:
+        # Start from a previously solved transition path rather than
+        # the linear interpolation between the initial state and the SS
+        if warm_start_dir is not None:
+            print 'Warm starting TPI from ', warm_start_dir
+            r_warm, w_warm, BQ_warm, T_H_warm, Y_warm, guesses_b, guesses_n = \
+                get_warm_start(warm_start_dir, SS_values, T, S, J)
+        else:
+            r_warm, w_warm, BQ_warm, T_H_warm, Y_warm, guesses_b, guesses_n = \
+                rescale_warm_start(init_guesses, SS_values, T, S, J)
+        if small_open == False:
+            r = r_warm
+        w = w_warm
+        BQ = BQ_warm
+        Y = Y_warm
+        if baseline_spending == False:
+            T_H = T_H_warm
+        b_mat = guesses_b
+        n_mat = guesses_n
+
     # Initialize some inputs
     # D = np.zeros(T + S)
     D = debt_ratio_ss*Y
     omega_shift = np.append(omega_S_preTP.reshape(1,S),omega[:T-1,:],axis=0)
     BQ_params = (omega_shift.reshape(T, S, 1), lambdas.reshape(1, 1, J), rho.reshape(1, S, 1),
                      g_n_vector[:T].reshape(T, 1), 'TPI')
-    tax_params = np.zeros((T,S,J,etr_params.shape[2]))
-    for i in range(etr_params.shape[2]):
-        tax_params[:,:,:,i] = np.tile(np.reshape(np.transpose(etr_params[:,:T,i]),(T,S,1)),(1,1,J))
+    if etr_params.ndim == 2:
+        # tax functions vary by year only, revenue broadcasts the table
+        tax_params = etr_params[:T,:]
+    else:
+        tax_params = np.zeros((T,S,J,etr_params.shape[2]))
+        for i in range(etr_params.shape[2]):
+            tax_params[:,:,:,i] = np.tile(np.reshape(np.transpose(etr_params[:,:T,i]),(T,S,1)),(1,1,J))
     REVENUE_params = (np.tile(e.reshape(1, S, J),(T,1,1)), lambdas.reshape(1, 1, J), omega[:T].reshape(T, S, 1), 'TPI',
                       tax_params, theta, tau_bq, tau_payroll, h_wealth, p_wealth, m_wealth, retire, T, S, J, tau_b, delta_tau)
 
@@ -626,22 +1141,36 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
     euler_errors = np.zeros((T, 2 * S, J))
     TPIdist_vec = np.zeros(maxiter)
 
+    if resume:
+        # Continue from the last saved state of the outer loop
+        saved = load_checkpoint(output_dir, config_hash)
+        if saved is not None:
+            print 'Resuming TPI from iteration ', saved['TPIiter']
+            r, w, BQ, T_H = saved['r'], saved['w'], saved['BQ'], saved['T_H']
+            Y, D, K, REVENUE = saved['Y'], saved['D'], saved['K'], saved['REVENUE']
+            guesses_b, guesses_n = saved['guesses_b'], saved['guesses_n']
+            TPIiter, TPIdist = saved['TPIiter'], saved['TPIdist']
+            num_saved = min(maxiter, len(saved['TPIdist_vec']))
+            TPIdist_vec[:num_saved] = saved['TPIdist_vec'][:num_saved]
+    checkpoint_time = time.time()
+
     print 'analytical mtrs in tpi = ', analytical_mtrs
 
 
-    while (TPIiter < maxiter) and (TPIdist >= mindist_TPI):
+    while (TPIiter < maxiter) and (TPIdist >= mindist_TPI) and (utils.check_budget(budget) is None):
 
         # Plot TPI for K for each iteration, so we can see if there is a
         # problem
         if PLOT_TPI is True:
             #K_plot = list(K) + list(np.ones(10) * Kss)
             D_plot = list(D) + list(np.ones(10) * Yss * debt_ratio_ss)
-            plt.figure()
-            plt.axhline(
+            fig, ax = plt.subplots()
+            ax.axhline(
                 y=Kss, color='black', linewidth=2, label=r"Steady State $\hat{K}$", ls='--')
-            plt.plot(np.arange(
+            ax.plot(np.arange(
                 T + 10), D_plot[:T + 10], 'b', linewidth=2, label=r"TPI time path $\hat{K}_t$")
-            plt.savefig(os.path.join(TPI_FIG_DIR, "TPI_D"))
+            fig.savefig(os.path.join(TPI_FIG_DIR, "TPI_D"))
+            plt.close(fig)
 
         if report_tG1 is True:
             print '\tAt time tG1-1:'
@@ -655,8 +1184,14 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
         outer_loop_vars = (r, w, K, BQ, T_H)
         inner_loop_params = (income_tax_params, tpi_params, initial_values, ind)
 
-        # Solve HH problem in inner loop
-        euler_errors, b_mat, n_mat = inner_loop(guesses, outer_loop_vars, inner_loop_params)
+        # Solve HH problem in inner loop, with a looser tolerance while
+        # far from the solution (the final pass below uses minimizer_tol)
+        xtol = utils.inner_tol(TPIdist, mindist_TPI,
+                               solver_config.minimizer_tol,
+                               solver_config.minimizer_tol_max,
+                               solver_config.minimizer_tol_scale)
+        euler_errors, b_mat, n_mat = inner_loop(guesses, outer_loop_vars, inner_loop_params, xtol,
+                                                solver_config=solver_config)
 
         bmat_s = np.zeros((T, S, J))
         bmat_s[0, 1:, :] = initial_b[:-1, :]
@@ -784,6 +1319,31 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
         print 'Iteration:', TPIiter
         print '\tDistance:', TPIdist
 
+        # Keep the iterate with the smallest distance, which is returned
+        # if the budget runs out before the loop converges
+        if utils.record_evaluation(budget, TPIdist):
+            best_state = {'TPIdist': TPIdist, 'r': r.copy(), 'w': w.copy(),
+                          'BQ': BQ.copy(), 'T_H': np.array(T_H), 'Y': Y.copy(),
+                          'D': D.copy(), 'K': K.copy(), 'REVENUE': REVENUE.copy(),
+                          'guesses_b': guesses_b.copy(), 'guesses_n': guesses_n.copy()}
+        if TPIdist >= mindist_TPI and utils.check_budget(budget) is not None:
+            print 'TPI ran out of its', budget['exhausted'], 'budget after', budget['num_evals'], 'iterations'
+
+        # Save the state of the outer loop periodically and when the
+        # loop stops, so a run that is stopped can be resumed
+        if checkpoint and ((TPIiter >= maxiter) or (TPIdist < mindist_TPI) or
+                           (budget['exhausted'] is not None) or
+                           (CHECKPOINT_ITERS is not None and TPIiter % CHECKPOINT_ITERS == 0) or
+                           (CHECKPOINT_MINUTES is not None and
+                            time.time() - checkpoint_time >= 60 * CHECKPOINT_MINUTES)):
+            save_checkpoint({'config_hash': config_hash, 'TPIiter': TPIiter,
+                             'TPIdist': TPIdist, 'TPIdist_vec': TPIdist_vec,
+                             'r': r, 'w': w, 'BQ': BQ, 'T_H': T_H, 'Y': Y,
+                             'D': D, 'K': K, 'REVENUE': REVENUE,
+                             'guesses_b': guesses_b, 'guesses_n': guesses_n},
+                            output_dir)
+            checkpoint_time = time.time()
+
         # print 'D/Y:', (D[:T]/Ynew[:T]).max(), (D[:T]/Ynew[:T]).min(), np.median(D[:T]/Ynew[:T])
         # print 'T/Y:', (T_H_new[:T]/Ynew[:T]).max(), (T_H_new[:T]/Ynew[:T]).min(), np.median(T_H_new[:T]/Ynew[:T])
         # print 'G/Y:', (G[:T]/Ynew[:T]).max(), (G[:T]/Ynew[:T]).min(), np.median(G[:T]/Ynew[:T])
@@ -795,6 +1355,15 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
         #
         # print 'deficit: ', REVENUE[:T] - T_H_new[:T] - G[:T]
 
+    if budget['exhausted'] is not None and best_state is not None:
+        # Return the best iterate rather than the last one
+        print 'Returning the TPI iterate with distance', best_state['TPIdist']
+        r, w, BQ, T_H = best_state['r'], best_state['w'], best_state['BQ'], best_state['T_H']
+        Y, D, K, REVENUE = best_state['Y'], best_state['D'], best_state['K'], best_state['REVENUE']
+        guesses_b, guesses_n = best_state['guesses_b'], best_state['guesses_n']
+        TPIdist = best_state['TPIdist']
+    converged = bool(TPIdist < mindist_TPI)
+
     # Loop through years to calculate debt and gov't spending. The re-assignment of G0 & D0 is necessary because Y0 may change in the TPI loop.
     if budget_balance == False:
         D_0    = initial_debt * Y[0]
@@ -808,7 +1377,8 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
     guesses = (guesses_b, guesses_n)
     outer_loop_vars = (r, w, K, BQ, T_H)
     inner_loop_params = (income_tax_params, tpi_params, initial_values, ind)
-    euler_errors, b_mat, n_mat = inner_loop(guesses, outer_loop_vars, inner_loop_params)
+    euler_errors, b_mat, n_mat = inner_loop(guesses, outer_loop_vars, inner_loop_params,
+                                            solver_config=solver_config)
 
     bmat_s = np.zeros((T, S, J))
     bmat_s[0, 1:, :] = initial_b[:-1, :]
@@ -860,9 +1430,12 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
     REVENUE = np.array(list(aggr.revenue(np.tile(rnew[:T].reshape(T, 1, 1),(1,S,J)), np.tile(wnew[:T].reshape(T, 1, 1),(1,S,J)),
            bmat_s, n_mat[:T,:,:], BQnew[:T].reshape(T, 1, J), Ynew[:T], L[:T], K[:T], factor, REVENUE_params)) + [revenue_ss] * S)
 
-    etr_params_path = np.zeros((T,S,J,etr_params.shape[2]))
-    for i in range(etr_params.shape[2]):
-        etr_params_path[:,:,:,i] = np.tile(np.reshape(np.transpose(etr_params[:,:T,i]),(T,S,1)),(1,1,J))
+    if etr_params.ndim == 2:
+        etr_params_path = np.reshape(etr_params[:T,:],(T,1,1,etr_params.shape[1]))
+    else:
+        etr_params_path = np.zeros((T,S,J,etr_params.shape[2]))
+        for i in range(etr_params.shape[2]):
+            etr_params_path[:,:,:,i] = np.tile(np.reshape(np.transpose(etr_params[:,:T,i]),(T,S,1)),(1,1,J))
     tax_path_params = (np.tile(e.reshape(1, S, J),(T,1,1)), lambdas, 'TPI', retire, etr_params_path, h_wealth,
                        p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
     tax_path = tax.total_taxes(np.tile(r[:T].reshape(T, 1, 1),(1,S,J)), np.tile(w[:T].reshape(T, 1, 1),(1,S,J)), bmat_s,
@@ -923,12 +1496,19 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
               'REVENUE': REVENUE, 'T_H': T_H, 'G': G, 'D': D,
               'r': r, 'w': w, 'b_mat': b_mat, 'n_mat': n_mat,
               'c_path': c_path, 'tax_path': tax_path,
-              'eul_savings': eul_savings, 'eul_laborleisure': eul_laborleisure}
+              'eul_savings': eul_savings, 'eul_laborleisure': eul_laborleisure,
+              'converged': converged, 'dist_history': TPIdist_vec[:TPIiter].copy(),
+              'budget_exhausted': budget['exhausted']}
 
     tpi_dir = os.path.join(output_dir, "TPI")
     utils.mkdirs(tpi_dir)
     tpi_vars = os.path.join(tpi_dir, "TPI_vars.pkl")
     pickle.dump(output, open(tpi_vars, "wb"))
+    # the checkpoint is only needed to resume a run that has not
+    # converged, so it is not left beside a converged path
+    checkpoint_file = os.path.join(tpi_dir, CHECKPOINT_FILE)
+    if converged and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
 
     macro_output = {'Y': Y, 'K': K, 'L': L, 'C': C, 'I': I,
                     'BQ': BQ, 'REVENUE': REVENUE, 'T_H': T_H, 'r': r, 'w': w,
@@ -958,16 +1538,21 @@ def run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params,
     if np.any(G) < 0:
         print 'Government spending is negative along transition path to satisfy budget'
 
-    if ((TPIiter >= maxiter) or (np.absolute(TPIdist) > mindist_TPI)) and ENFORCE_SOLUTION_CHECKS :
+    # A run whose budget ran out returns its best iterate, flagged as
+    # not converged, rather than raising an error
+    enforce_solution_checks = (solver_config.enforce_solution_checks and
+                               budget['exhausted'] is None)
+
+    if ((TPIiter >= maxiter) or (np.absolute(TPIdist) > mindist_TPI)) and enforce_solution_checks :
         raise RuntimeError("Transition path equlibrium not found (TPIdist)")
 
     if ((np.any(np.absolute(rc_error) >= mindist_TPI))
-        and ENFORCE_SOLUTION_CHECKS):
+        and enforce_solution_checks):
         raise RuntimeError("Transition path equlibrium not found (rc_error)")
 
     if ((np.any(np.absolute(eul_savings) >= mindist_TPI) or
         (np.any(np.absolute(eul_laborleisure) > mindist_TPI)))
-        and ENFORCE_SOLUTION_CHECKS):
+        and enforce_solution_checks):
         raise RuntimeError("Transition path equlibrium not found (eulers)")
 
     # Non-stationary output
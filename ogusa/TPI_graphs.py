@@ -6,6 +6,7 @@ Creates graphs for TPI values.
 
 This py-file calls the following other file(s):
             firm.py
+            inequality.py
             SSinit/ss_init_vars.pkl
             TPIinit/TPIinit_vars.pkl
             SS/ss_vars.pkl
@@ -28,6 +29,7 @@ from mpl_toolkits.mplot3d import Axes3D
 import cPickle as pickle
 
 import firm
+import inequality
 
 '''
 ------------------------------------------------------------------------
@@ -401,22 +403,7 @@ def gini_cols(path, omega):
     path2 = np.copy(path)
     mask = path2 < 0
     path2[mask] = 0
-    collapseS = path2.sum(1)
-    total = collapseS.sum(1)
-    collapseS /= total.reshape(T, 1)
-    omega1 = omega.sum(1).reshape(T, J)
-    idx = np.argsort(collapseS - omega1, axis=1)
-    collapseS2 = collapseS[:, idx][np.eye(T, T, dtype=bool)]
-    omega_sorted = omega1[:, idx][np.eye(T, T, dtype=bool)]
-    cum_levels = np.cumsum(collapseS2, axis=1)
-    cum_omega = np.cumsum(omega_sorted, axis=1)
-    # plt.figure()
-    # plt.plot(cum_omega[10], cum_levels[10])
-    # plt.plot(cum_omega[10], cum_omega[10])
-    # plt.savefig('gini_test.png')
-    cum_levels[:, 1:] = cum_levels[:, :-1]
-    cum_levels[:, 0] = 0
-    G = 2 * (.5 - (cum_levels * omega_sorted).sum(1))
+    G = inequality.share_gini(path2.sum(1), omega.sum(1), axis=1)
     print G[-1]
     return G
 
@@ -426,18 +413,7 @@ def gini_colj(path, omega):
     path2 = np.copy(path)
     mask = path2 < 0
     path2[mask] = 0
-    collapseJ = path2.sum(2)
-    total = collapseJ.sum(1)
-    collapseJ /= total.reshape(T, 1)
-    omega1 = omega.sum(2).reshape(T, S)
-    idx = np.argsort(collapseJ - omega1, axis=1)
-    collapseJ2 = collapseJ[:, idx][np.eye(T, T, dtype=bool)]
-    omega_sorted = omega1[:, idx][np.eye(T, T, dtype=bool)]
-    cum_levels = np.cumsum(collapseJ2, axis=1)
-    cum_omega = np.cumsum(omega_sorted, axis=1)
-    cum_levels[:, 1:] = cum_levels[:, :-1]
-    cum_levels[:, 0] = 0
-    G = 2 * (.5 - (cum_levels * omega_sorted).sum(1))
+    G = inequality.share_gini(path2.sum(2), omega.sum(2), axis=1)
     print G[-1]
     return G
 
@@ -447,18 +423,8 @@ def gini_nocol(path, omega):
     pathx = np.copy(path)
     mask = pathx < 0
     pathx[mask] = 0
-    pathx = pathx.reshape(T, S * J)
-    total = pathx.sum(1)
-    pathx /= total.reshape(T, 1)
-    omega = omega.reshape(T, S * J)
-    idx = np.argsort(pathx - omega, axis=1)
-    path2 = pathx[:, idx][np.eye(T, T, dtype=bool)]
-    omega_sorted = omega[:, idx][np.eye(T, T, dtype=bool)]
-    cum_levels = np.cumsum(path2, axis=1)
-    cum_omega = np.cumsum(omega_sorted, axis=1)
-    cum_levels[:, 1:] = cum_levels[:, :-1]
-    cum_levels[:, 0] = 0
-    G = 2 * (.5 - (cum_levels * omega_sorted).sum(1))
+    G = inequality.share_gini(pathx.reshape(T, S * J),
+                              omega.reshape(T, S * J), axis=1)
     print G[-1]
     return G
 
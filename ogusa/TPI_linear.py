@@ -0,0 +1,985 @@
+'''
+------------------------------------------------------------------------
+Solves for a first order approximation of the transition path around
+the steady state, using sequence space Jacobians of the household
+problems.
+
+The household problems are linearized once, cohort by cohort, around
+the steady state: by the implicit function theorem, the response of a
+cohort's savings and labor supply to a change in r, w, BQ, or T_H at any
+age is given by the Jacobians of the Euler equations in TPI.twist_doughnut.
+Cohorts alive in the first period solve the same equations from their
+current age on, so their responses come from the lower right blocks of
+the same Jacobians.  Stacking these gives the response of the whole
+distribution at each date to a change in prices at each date.
+
+The aggregate, firm, and fiscal blocks are evaluated with the same
+functions as in TPI.run_TPI.  The Jacobian of the outer loop is chained
+from the Jacobians of each block: the response of aggregate labor,
+savings, bequests, and tax revenue to household decisions, the diagonal
+Jacobians of the blocks in which each date only depends on that date,
+and the Jacobian of the debt recursion.  The transition path is found
+with a single linear solve of the outer loop's fixed point around the
+path implied by steady state prices.
+
+This py-file calls the following other file(s):
+            TPI.py
+            tax.py
+            utils.py
+            household.py
+            firm.py
+            fiscal.py
+            aggregates.py
+------------------------------------------------------------------------
+'''
+
+# Packages
+import numpy as np
+
+import tax
+import utils
+import household
+import firm
+import fiscal
+import aggregates as aggr
+import TPI
+
+
+'''
+Set relative step size for finite difference derivatives
+'''
+FD_STEP = 1e-6
+
+
+'''
+Set position of each price in the household Jacobians
+'''
+PRICE_INDEX = {'r': 0, 'w': 1, 'BQ': 2, 'T_H': 3}
+
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+def get_cohort_tax_params(tax_params, t, S):
+    '''
+    Gives the tax function parameters faced over the lifetime of the
+    cohort born in period t, as in TPI.inner_loop.
+
+    Inputs:
+        tax_params = [T+S,#tax params] array if tax functions vary by
+                     year only, else [S,T+S,#tax params] array
+        t          = integer, period in which cohort is born
+        S          = integer, number of age groups
+
+    Functions called: None
+
+    Objects in function:
+        cohort_params = [S,#tax params] array, tax function parameters
+                        at each age of the cohort
+
+    Returns: cohort_params
+    '''
+    if tax_params.ndim == 2:
+        cohort_params = tax_params[t:t+S, :]
+    else:
+        cohort_params = np.zeros((S, tax_params.shape[2]))
+        for i in range(tax_params.shape[2]):
+            cohort_params[:, i] = np.diag(np.transpose(tax_params[:, t:t+S, i]))
+
+    return cohort_params
+
+
+def get_household_jacobian(j, SS_values, income_tax_params, tpi_params):
+    '''
+    Computes the response of the savings and labor supply of a cohort of
+    lifetime income group j to a change in each price at each age,
+    around the steady state.  Responses are given for cohorts that solve
+    their problem from each age a0 on (a0=0 for cohorts born during the
+    transition), holding their savings coming into age a0 fixed.
+
+    Inputs:
+        j                 = integer, lifetime income group
+        SS_values         = length 12 tuple, steady state values
+        income_tax_params = length 4 tuple, (analytical_mtrs,
+                            etr_params, mtrx_params, mtry_params) for the
+                            transition path
+        tpi_params        = length 34 list, parameters for TPI
+
+    Functions called:
+        get_cohort_tax_params()
+        TPI.twist_doughnut()
+
+    Objects in function:
+        prices_ss = [4,S+1] array, steady state paths of r, w, BQ, and
+                    T_H over the lifetime of a cohort
+        x_ss      = [2S,] vector, steady state savings and labor supply
+        F_x       = [2S,2S] array, Jacobian of the Euler errors with
+                    respect to savings and labor supply
+        F_p       = [2S,4,S+1] array, Jacobian of the Euler errors with
+                    respect to each price at each age
+        hh_jac    = [S,2,S,4,S+1] array, response of savings (index 0)
+                    and labor supply (index 1) at each age to each price
+                    at each age, for cohorts solving from age a0 on
+
+    Returns: hh_jac
+    '''
+    analytical_mtrs, etr_params, mtrx_params, mtry_params = income_tax_params
+    J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
+                  g_n_vector, tau_payroll, tau_bq, rho, omega, N_tilde, lambdas, imm_rates, e, retire, mean_income_data,\
+                  factor, h_wealth, p_wealth, m_wealth, b_ellipse, upsilon, chi_b, chi_n, theta = tpi_params
+    Kss, Bss, Lss, rss, wss, BQss, T_Hss, revenue_ss, bssmat_splus1, nssmat, Yss, Gss = SS_values
+
+    # Tax functions in the last period of the transition path are
+    # those of the steady state
+    inc_tax_params_ss = (analytical_mtrs,
+                         get_cohort_tax_params(etr_params, T, S),
+                         get_cohort_tax_params(mtrx_params, T, S),
+                         get_cohort_tax_params(mtry_params, T, S))
+    solver_params = (inc_tax_params_ss, tpi_params, None)
+
+    prices_ss = np.array([rss, wss, BQss[j], T_Hss]).reshape(4, 1) * np.ones((4, S + 1))
+    x_ss = np.append(bssmat_splus1[:, j], nssmat[:, j])
+
+    def euler_errors(x, prices):
+        return np.array(TPI.twist_doughnut(x, prices[0], prices[1],
+                                           prices[2], prices[3], j, None,
+                                           0, solver_params))
+
+    F_x = np.zeros((2 * S, 2 * S))
+    for i in xrange(2 * S):
+        h = FD_STEP * max(abs(x_ss[i]), 1e-2)
+        x_up = x_ss.copy()
+        x_up[i] += h
+        x_down = x_ss.copy()
+        x_down[i] -= h
+        F_x[:, i] = (euler_errors(x_up, prices_ss) -
+                     euler_errors(x_down, prices_ss)) / (2 * h)
+
+    F_p = np.zeros((2 * S, 4, S + 1))
+    for k in xrange(4):
+        h = FD_STEP * max(abs(prices_ss[k, 0]), 1e-2)
+        for u in xrange(S + 1):
+            prices_up = prices_ss.copy()
+            prices_up[k, u] += h
+            prices_down = prices_ss.copy()
+            prices_down[k, u] -= h
+            F_p[:, k, u] = (euler_errors(x_ss, prices_up) -
+                            euler_errors(x_ss, prices_down)) / (2 * h)
+
+    hh_jac = np.zeros((S, 2, S, 4, S + 1))
+    for a0 in xrange(S):
+        idx = np.append(np.arange(a0, S), S + np.arange(a0, S))
+        resp = -np.linalg.solve(F_x[np.ix_(idx, idx)],
+                                F_p[idx].reshape(idx.shape[0], 4 * (S + 1)))
+        hh_jac[a0, :, a0:, :, :] = resp.reshape(2, S - a0, 4, S + 1)
+
+    return hh_jac
+
+
+def household_response(hh_jacs, k, tau, j_shock, T, S, J):
+    '''
+    Gives the response of savings and labor supply at each date, age,
+    and lifetime income group to a change in one price at one date.
+
+    Inputs:
+        hh_jacs = length J list, household Jacobians from
+                  get_household_jacobian() for each lifetime income group
+        k       = integer, price that changes (0=r, 1=w, 2=BQ, 3=T_H)
+        tau     = integer, date at which the price changes
+        j_shock = integer, lifetime income group whose BQ changes (not
+                  used for other prices)
+        T       = integer, number of periods in the transition path
+        S       = integer, number of age groups
+        J       = integer, number of lifetime income groups
+
+    Functions called: None
+
+    Objects in function:
+        t_grid = [T+S,S] array, dates
+        s_grid = [T+S,S] array, ages
+        a0     = [T+S,S] array, age from which each cohort solves its
+                 problem (age in the first period, or zero)
+        u      = [T+S,S] array, age of each cohort when the price changes
+        valid  = [T+S,S] boolean array, =True if the cohort is alive when
+                 the price changes
+        db     = [T+S,S,J] array, response of savings
+        dn     = [T+S,S,J] array, response of labor supply
+
+    Returns: db, dn
+    '''
+    t_grid, s_grid = np.meshgrid(np.arange(T + S), np.arange(S), indexing='ij')
+    a0 = np.maximum(s_grid - t_grid, 0)
+    u = tau - t_grid + s_grid
+    valid = (u >= 0) & (u <= S)
+    u = np.where(valid, u, 0)
+
+    db = np.zeros((T + S, S, J))
+    dn = np.zeros((T + S, S, J))
+    if k == 2:
+        j_list = [j_shock]
+    else:
+        j_list = range(J)
+    for j in j_list:
+        db[:, :, j] = np.where(valid, hh_jacs[j][a0, 0, s_grid, k, u], 0.0)
+        dn[:, :, j] = np.where(valid, hh_jacs[j][a0, 1, s_grid, k, u], 0.0)
+
+    return db, dn
+
+
+def update_paths(b_mat, n_mat, r, w, BQ, T_H, Y, K, params):
+    '''
+    Computes the time paths of the outer loop variables implied by
+    household decisions and the guesses for those paths, as in an
+    iteration of TPI.run_TPI.
+
+    Inputs:
+        b_mat  = [T+S,S,J] array, savings
+        n_mat  = [T+S,S,J] array, labor supply
+        r      = [T,] vector, interest rates
+        w      = [T,] vector, wage rates
+        BQ     = [T,J] array, bequests
+        T_H    = [T,] vector, lump sum transfers
+        Y      = [T,] vector, output (only used if baseline_spending)
+        K      = [T,] vector, capital (only used for business taxes in
+                 a closed economy without a balanced budget)
+        params = length 10 tuple, parameters from get_update_params()
+
+    Functions called:
+        aggr.get_L()
+        aggr.get_K()
+        aggr.get_BQ()
+        aggr.revenue()
+        fiscal.D_G_path()
+        firm.get_K()
+        firm.get_Y()
+        firm.get_r()
+        firm.get_w()
+
+    Objects in function:
+        bmat_s  = [T,S,J] array, savings coming into each period
+        L       = [T,] vector, aggregate labor
+        B       = [T,] vector, aggregate household wealth
+        REVENUE = [T,] vector, total tax revenue
+        D       = [T+1,] vector, government debt
+        G       = [T,] vector, government spending
+        rnew    = [T,] vector, updated interest rates
+        wnew    = [T,] vector, updated wage rates
+        BQnew   = [T,J] array, updated bequests
+        T_H_new = [T,] vector, updated lump sum transfers
+        Ynew    = [T,] vector, updated output
+        Knew    = [T,] vector, updated capital
+
+    Returns: rnew, wnew, BQnew, T_H_new, Ynew, Knew, L, B, D, G, REVENUE
+    '''
+    (T, S, J, initial_b, B0, initial_debt, L_params, B_params, BQ_params,
+     REVENUE_params, firm_params, fiscal_params, other_params) = params
+    Z, gamma, epsilon, delta, tau_b, delta_tau = firm_params
+    (small_open, tpi_firm_r, budget_balance, baseline_spending, ALPHA_T,
+     ALPHA_G, g_n_vector, g_y, factor) = other_params
+
+    bmat_s = np.zeros((T, S, J))
+    bmat_s[0, 1:, :] = initial_b[:-1, :]
+    bmat_s[1:, 1:, :] = b_mat[:T-1, :-1, :]
+    L = aggr.get_L(n_mat[:T], L_params)
+    B = np.zeros(T)
+    B[0] = B0
+    B[1:T] = aggr.get_K(b_mat[:T-1], B_params)
+
+    if baseline_spending == False and budget_balance == False:
+        Y = T_H / ALPHA_T[:T]
+    D = np.zeros(T + 1)
+    G = np.zeros(T)
+    if small_open == False:
+        if budget_balance:
+            Knew = B
+        else:
+            REVENUE = aggr.revenue(np.tile(r.reshape(T, 1, 1), (1, S, J)),
+                                   np.tile(w.reshape(T, 1, 1), (1, S, J)),
+                                   bmat_s, n_mat[:T], BQ.reshape(T, 1, J), Y,
+                                   L, K, factor, REVENUE_params)
+            D_0 = initial_debt * Y[0]
+            if baseline_spending == False:
+                G_0 = ALPHA_G[0] * Y[0]
+            else:
+                G_0 = fiscal_params[-1][0]
+            D, G = fiscal.D_G_path((Y, REVENUE, T_H, D_0, G_0), fiscal_params,
+                                   (T, r, g_n_vector, g_y),
+                                   baseline_spending=baseline_spending)
+            Knew = B - D[:T]
+    else:
+        Knew = firm.get_K(L, tpi_firm_r[:T], firm_params)
+    Ynew = firm.get_Y(Knew, L, (Z, gamma, epsilon))
+    wnew = firm.get_w(Ynew, L, (Z, gamma, epsilon))
+    if small_open == False:
+        rnew = firm.get_r(Ynew, Knew, firm_params)
+    else:
+        rnew = r.copy()
+
+    b_mat_shift = np.append(np.reshape(initial_b, (1, S, J)), b_mat[:T-1], axis=0)
+    BQnew = aggr.get_BQ(rnew.reshape(T, 1), b_mat_shift, BQ_params)
+    REVENUE = aggr.revenue(np.tile(rnew.reshape(T, 1, 1), (1, S, J)),
+                           np.tile(wnew.reshape(T, 1, 1), (1, S, J)),
+                           bmat_s, n_mat[:T], BQnew.reshape(T, 1, J), Ynew,
+                           L, Knew, factor, REVENUE_params)
+
+    if budget_balance:
+        T_H_new = REVENUE
+    elif baseline_spending == False:
+        T_H_new = ALPHA_T[:T] * Ynew
+    else:
+        T_H_new = T_H
+
+    if small_open == True and budget_balance == False:
+        D_0 = initial_debt * Ynew[0]
+        if baseline_spending == False:
+            G_0 = ALPHA_G[0] * Ynew[0]
+        else:
+            G_0 = fiscal_params[-1][0]
+        D, G = fiscal.D_G_path((Ynew, REVENUE, T_H, D_0, G_0), fiscal_params,
+                               (T, r, g_n_vector, g_y),
+                               baseline_spending=baseline_spending)
+
+    return rnew, wnew, BQnew, T_H_new, Ynew, Knew, L, B, D, G, REVENUE
+
+
+def get_update_params(income_tax_params, tpi_params, small_open_params,
+                      initial_values, fiscal_params, biz_tax_params,
+                      baseline_spending):
+    '''
+    Collects the parameters used by update_paths(), so that the arrays
+    they need are only built once.
+
+    Inputs:
+        income_tax_params = length 4 tuple, tax function parameters
+        tpi_params        = length 34 list, parameters for TPI
+        small_open_params = length 3 tuple, small open economy parameters
+        initial_values    = length 8 tuple, initial values
+        fiscal_params     = tuple, fiscal policy parameters
+        biz_tax_params    = length 2 tuple, business tax parameters
+        baseline_spending = boolean, =True if government spending and
+                            transfers are fixed at the baseline path
+
+    Functions called: None
+
+    Objects in function:
+        tax_params = [T,#tax params] or [T,S,J,#tax params] array, tax
+                     function parameters for revenue
+
+    Returns: params for update_paths()
+    '''
+    analytical_mtrs, etr_params, mtrx_params, mtry_params = income_tax_params
+    J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
+                  g_n_vector, tau_payroll, tau_bq, rho, omega, N_tilde, lambdas, imm_rates, e, retire, mean_income_data,\
+                  factor, h_wealth, p_wealth, m_wealth, b_ellipse, upsilon, chi_b, chi_n, theta = tpi_params
+    small_open, tpi_firm_r, tpi_hh_r = small_open_params
+    B0, b_sinit, b_splus1init, factor, initial_b, initial_n, omega_S_preTP, initial_debt = initial_values
+    tau_b, delta_tau = biz_tax_params
+    budget_balance, ALPHA_T, ALPHA_G = fiscal_params[:3]
+
+    L_params = (e.reshape(1, S, J), omega[:T, :].reshape(T, S, 1), lambdas.reshape(1, 1, J), 'TPI')
+    B_params = (omega[:T-1].reshape(T-1, S, 1), lambdas.reshape(1, 1, J), imm_rates[:T-1].reshape(T-1,S,1), g_n_vector[1:T], 'TPI')
+    omega_shift = np.append(omega_S_preTP.reshape(1,S),omega[:T-1,:],axis=0)
+    BQ_params = (omega_shift.reshape(T, S, 1), lambdas.reshape(1, 1, J), rho.reshape(1, S, 1),
+                 g_n_vector[:T].reshape(T, 1), 'TPI')
+    if etr_params.ndim == 2:
+        tax_params = etr_params[:T,:]
+    else:
+        tax_params = np.zeros((T,S,J,etr_params.shape[2]))
+        for i in range(etr_params.shape[2]):
+            tax_params[:,:,:,i] = np.tile(np.reshape(np.transpose(etr_params[:,:T,i]),(T,S,1)),(1,1,J))
+    REVENUE_params = (np.tile(e.reshape(1, S, J),(T,1,1)), lambdas.reshape(1, 1, J), omega[:T].reshape(T, S, 1), 'TPI',
+                      tax_params, theta, tau_bq, tau_payroll, h_wealth, p_wealth, m_wealth, retire, T, S, J, tau_b, delta_tau)
+    firm_params = (Z, gamma, epsilon, delta, tau_b, delta_tau)
+    other_params = (small_open, tpi_firm_r, budget_balance, baseline_spending,
+                    ALPHA_T, ALPHA_G, g_n_vector, g_y, factor)
+
+    return (T, S, J, initial_b, B0, initial_debt, L_params, B_params,
+            BQ_params, REVENUE_params, firm_params, fiscal_params,
+            other_params)
+
+
+def local_derivative(func, args, i, index=Ellipsis):
+    '''
+    Computes the derivative of a function of time paths whose value at
+    each date (or each date, age, and lifetime income group) only
+    depends on its arguments at that date, with respect to its i-th
+    argument.  The Jacobian of such a function is diagonal, so all of
+    its elements are perturbed at once.
+
+    Inputs:
+        func  = function of time paths
+        args  = tuple, arguments of func
+        i     = integer, argument to differentiate with respect to
+        index = index of the elements of argument i that change
+                (Ellipsis for all of them)
+
+    Functions called:
+        func()
+
+    Objects in function:
+        x         = array, argument i
+        h         = array, step size for each element that changes
+        args_up   = list, arguments with argument i increased by h
+        args_down = list, arguments with argument i decreased by h
+
+    Returns: diagonal of the Jacobian, same shape as the value of func
+    '''
+    x = np.array(args[i], dtype=float)
+    h = FD_STEP * np.maximum(np.abs(x[index]), 1e-2)
+    args_up = list(args)
+    args_up[i] = x.copy()
+    args_up[i][index] += h
+    args_down = list(args)
+    args_down[i] = x.copy()
+    args_down[i][index] -= h
+
+    return (func(*args_up) - func(*args_down)) / (2 * h)
+
+
+def path_jacobian(func, args, i):
+    '''
+    Computes the Jacobian of a function of time paths with respect to
+    its i-th argument one date at a time, for blocks in which the dates
+    are linked.  Each column costs an evaluation of the block, so
+    forward differences are used.
+
+    Inputs:
+        func = function of time paths
+        args = tuple, arguments of func
+        i    = integer, argument to differentiate with respect to
+
+    Functions called:
+        func()
+
+    Objects in function:
+        x       = [T,] vector, argument i
+        value   = array, value of func at args
+        columns = list, derivative with respect to argument i at each
+                  date
+
+    Returns: [T_out,T] array
+    '''
+    x = np.array(args[i], dtype=float)
+    value = func(*args)
+    columns = []
+    for u in xrange(x.shape[0]):
+        h = FD_STEP * max(abs(x[u]), 1e-2)
+        args_up = list(args)
+        args_up[i] = x.copy()
+        args_up[i][u] += h
+        columns.append((func(*args_up) - value) / h)
+
+    return np.array(columns).T
+
+
+def get_tax_derivatives(r, w, bmat_s, n_mat, BQ, factor, REVENUE_params):
+    '''
+    Computes the derivatives of the taxes paid by each household with
+    respect to its savings and labor supply, which give the response of
+    the households' part of aggr.revenue() to their decisions.
+
+    Inputs:
+        r              = [T,] vector, interest rates
+        w              = [T,] vector, wage rates
+        bmat_s         = [T,S,J] array, savings coming into each period
+        n_mat          = [T,S,J] array, labor supply
+        BQ             = [T,J] array, bequests
+        factor         = scalar, model income scaling factor
+        REVENUE_params = length 17 tuple, parameters for aggr.revenue()
+
+    Functions called:
+        local_derivative()
+        tax.total_taxes()
+
+    Objects in function:
+        tax_params = [T,1,1,#tax params] or [T,S,J,#tax params] array,
+                     tax function parameters
+        tax_b      = [T,S,J] array, derivative of taxes with respect to
+                     savings
+        tax_n      = [T,S,J] array, derivative of taxes with respect to
+                     labor supply
+
+    Returns: tax_b, tax_n
+    '''
+    (e, lambdas, omega, method, tax_params, theta, tau_bq, tau_payroll,
+     h_wealth, p_wealth, m_wealth, retire, T, S, J, tau_b, delta_tau) = REVENUE_params
+    if tax_params.ndim == 2:
+        tax_params = tax_params.reshape(T, 1, 1, tax_params.shape[1])
+    total_taxes_params = (e, lambdas, 'TPI', retire, tax_params, h_wealth,
+                          p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
+    r_mat = np.tile(r.reshape(T, 1, 1), (1, S, J))
+    w_mat = np.tile(w.reshape(T, 1, 1), (1, S, J))
+
+    def taxes(b, n):
+        return tax.total_taxes(r_mat, w_mat, b, n, BQ.reshape(T, 1, J), factor,
+                               0.0, None, False, total_taxes_params)
+
+    tax_b = local_derivative(taxes, (bmat_s, n_mat), 0)
+    tax_n = local_derivative(taxes, (bmat_s, n_mat), 1)
+
+    return tax_b, tax_n
+
+
+def get_update_jacobian(b_mat, n_mat, r, w, BQ, T_H, Y, K, hh_jacs, active, params):
+    '''
+    Computes the Jacobian of the outer loop update in update_paths()
+    with respect to the outer loop variables, with household decisions
+    responding as given by the household Jacobians.  The Jacobian is
+    chained from the blocks of update_paths(), for the changes at all
+    dates at once: the response of aggregate labor, savings, bequests,
+    and the households' taxes to household decisions, the diagonal
+    Jacobians of the revenue and firm blocks, and the Jacobian of the
+    debt recursion in fiscal.D_G_path(), one date at a time.
+
+    Inputs:
+        b_mat   = [T+S,S,J] array, savings
+        n_mat   = [T+S,S,J] array, labor supply
+        r       = [T,] vector, interest rates
+        w       = [T,] vector, wage rates
+        BQ      = [T,J] array, bequests
+        T_H     = [T,] vector, lump sum transfers
+        Y       = [T,] vector, output (only used if baseline_spending)
+        K       = [T,] vector, capital
+        hh_jacs = length J list, household Jacobians from
+                  get_household_jacobian()
+        active  = list, outer loop variables that are solved for, as in
+                  run_TPI_linear()
+        params  = length 13 tuple, parameters from get_update_params()
+
+    Functions called:
+        update_paths()
+        household_response()
+        get_tax_derivatives()
+        local_derivative()
+        path_jacobian()
+        aggr.get_L()
+        aggr.get_K()
+        aggr.get_BQ()
+        aggr.revenue()
+        fiscal.D_G_path()
+        firm.get_K()
+        firm.get_Y()
+        firm.get_r()
+        firm.get_w()
+
+    Objects in function:
+        N        = integer, number of active outer loop variables at
+                   all dates
+        d        = dictionary, change in each outer loop variable in
+                   each column of the Jacobian, [T,N] arrays ([T,J,N]
+                   for BQ)
+        dL       = [T,N] array, change in aggregate labor
+        dB       = [T,N] array, change in aggregate household wealth
+        dBQ_hh   = [T,J,N] array, change in bequests from household
+                   savings
+        dREV_hh  = [T,N] array, change in the households' taxes at the
+                   prices the revenue is computed at
+        dY       = [T,N] array, change in output
+        dD       = [T,N] array, change in government debt
+        new      = dictionary, change in each updated outer loop
+                   variable
+
+    Returns: jac, [N,N] array
+    '''
+    (T, S, J, initial_b, B0, initial_debt, L_params, B_params, BQ_params,
+     REVENUE_params, firm_params, fiscal_params, other_params) = params
+    Z, gamma, epsilon, delta, tau_b, delta_tau = firm_params
+    (small_open, tpi_firm_r, budget_balance, baseline_spending, ALPHA_T,
+     ALPHA_G, g_n_vector, g_y, factor) = other_params
+    lambdas, omega = REVENUE_params[1], REVENUE_params[2]
+
+    rnew, wnew, BQnew, T_H_new, Ynew, Knew, L, B, D, G, REVENUE = update_paths(
+        b_mat, n_mat, r, w, BQ, T_H, Y, K, params)
+    bmat_s = np.zeros((T, S, J))
+    bmat_s[0, 1:, :] = initial_b[:-1, :]
+    bmat_s[1:, 1:, :] = b_mat[:T-1, :-1, :]
+    b_mat_shift = np.append(np.reshape(initial_b, (1, S, J)), b_mat[:T-1], axis=0)
+    if baseline_spending == False and budget_balance == False:
+        Y = T_H / ALPHA_T[:T]
+
+    # Change in the outer loop variables in each column
+    N = len(active) * T
+    d = {'r': np.zeros((T, N)), 'w': np.zeros((T, N)),
+         'BQ': np.zeros((T, J, N)), 'T_H': np.zeros((T, N)),
+         'Y': np.zeros((T, N)), 'K': np.zeros((T, N))}
+    for i, name in enumerate(active):
+        if isinstance(name, tuple):
+            d['BQ'][:, name[1], i * T:(i + 1) * T] = np.eye(T)
+        else:
+            d[name][:, i * T:(i + 1) * T] = np.eye(T)
+
+    # Household block
+    tax_b, tax_n = get_tax_derivatives(r, w, bmat_s, n_mat[:T], BQ, factor, REVENUE_params)
+    if budget_balance:
+        tax_b_new, tax_n_new = get_tax_derivatives(rnew, wnew, bmat_s, n_mat[:T], BQnew,
+                                                   factor, REVENUE_params)
+    dL = np.zeros((T, N))
+    dB = np.zeros((T, N))
+    dBQ_hh = np.zeros((T, J, N))
+    dREV_hh = np.zeros((T, N))
+    dREV_hh_new = np.zeros((T, N))
+    for i, name in enumerate(active):
+        price = name[0] if isinstance(name, tuple) else name
+        if price not in PRICE_INDEX:
+            continue
+        j_shock = name[1] if isinstance(name, tuple) else 0
+        for tau in xrange(T):
+            col = i * T + tau
+            db, dn = household_response(hh_jacs, PRICE_INDEX[price], tau, j_shock, T, S, J)
+            dbmat_s = np.zeros((T, S, J))
+            dbmat_s[1:, 1:, :] = db[:T-1, :-1, :]
+            db_shift = np.append(np.zeros((1, S, J)), db[:T-1], axis=0)
+            dL[:, col] = aggr.get_L(dn[:T], L_params)
+            dB[1:, col] = aggr.get_K(db[:T-1], B_params)
+            dBQ_hh[:, :, col] = aggr.get_BQ(rnew.reshape(T, 1), db_shift, BQ_params)
+            dREV_hh[:, col] = (omega * lambdas * (tax_b * dbmat_s + tax_n * dn[:T])).sum(1).sum(1)
+            if budget_balance:
+                dREV_hh_new[:, col] = (omega * lambdas * (tax_b_new * dbmat_s +
+                                                          tax_n_new * dn[:T])).sum(1).sum(1)
+
+    # Revenue block, given the households' taxes
+    def revenue_path(r, w, BQ, Y, L, K):
+        return aggr.revenue(np.tile(r.reshape(T, 1, 1), (1, S, J)),
+                            np.tile(w.reshape(T, 1, 1), (1, S, J)), bmat_s,
+                            n_mat[:T], BQ.reshape(T, 1, J), Y, L, K, factor,
+                            REVENUE_params)
+
+    def revenue_change(args, changes):
+        dREV = np.zeros((T, N))
+        for i in [0, 1, 3, 4, 5]:
+            dREV += local_derivative(revenue_path, args, i).reshape(T, 1) * changes[i]
+        for j in xrange(J):
+            dREV += (local_derivative(revenue_path, args, 2, (slice(None), j)).reshape(T, 1) *
+                     changes[2][:, j, :])
+        return dREV
+
+    if baseline_spending == False and budget_balance == False:
+        dY = d['T_H'] / ALPHA_T[:T].reshape(T, 1)
+    else:
+        dY = d['Y']
+
+    # Fiscal block
+    if small_open == False:
+        if budget_balance:
+            dKnew = dB
+        else:
+            dREV = revenue_change((r, w, BQ, Y, L, K),
+                                  (d['r'], d['w'], d['BQ'], dY, dL, d['K'])) + dREV_hh
+
+            def debt_path(Y, REVENUE, T_H, r):
+                D_0 = initial_debt * Y[0]
+                if baseline_spending == False:
+                    G_0 = ALPHA_G[0] * Y[0]
+                else:
+                    G_0 = fiscal_params[-1][0]
+                D, G = fiscal.D_G_path((Y, REVENUE, T_H, D_0, G_0), fiscal_params,
+                                       (T, r, g_n_vector, g_y),
+                                       baseline_spending=baseline_spending)
+                return D[:T]
+
+            debt_args = (Y, revenue_path(r, w, BQ, Y, L, K), T_H, r)
+            dD = np.zeros((T, N))
+            for i, change in enumerate([dY, dREV, d['T_H'], d['r']]):
+                if np.any(change != 0):
+                    dD += path_jacobian(debt_path, debt_args, i).dot(change)
+            dKnew = dB - dD
+    else:
+        dKnew = local_derivative(lambda L: firm.get_K(L, tpi_firm_r[:T], firm_params),
+                                 (L,), 0).reshape(T, 1) * dL
+
+    # Firm block
+    Y_params = (Z, gamma, epsilon)
+
+    def output_path(K, L):
+        return firm.get_Y(K, L, Y_params)
+
+    def wage_path(Y, L):
+        return firm.get_w(Y, L, Y_params)
+
+    def rate_path(Y, K):
+        return firm.get_r(Y, K, firm_params)
+
+    dYnew = (local_derivative(output_path, (Knew, L), 0).reshape(T, 1) * dKnew +
+             local_derivative(output_path, (Knew, L), 1).reshape(T, 1) * dL)
+    dwnew = (local_derivative(wage_path, (Ynew, L), 0).reshape(T, 1) * dYnew +
+             local_derivative(wage_path, (Ynew, L), 1).reshape(T, 1) * dL)
+    if small_open == False:
+        drnew = (local_derivative(rate_path, (Ynew, Knew), 0).reshape(T, 1) * dYnew +
+                 local_derivative(rate_path, (Ynew, Knew), 1).reshape(T, 1) * dKnew)
+    else:
+        drnew = np.zeros((T, N))
+    dBQnew = (dBQ_hh + aggr.get_BQ(np.zeros((T, 1)), b_mat_shift, BQ_params).reshape(T, J, 1) *
+              drnew.reshape(T, 1, N))
+
+    if budget_balance:
+        dT_H_new = revenue_change((rnew, wnew, BQnew, Ynew, L, Knew),
+                                  (drnew, dwnew, dBQnew, dYnew, dL, dKnew)) + dREV_hh_new
+    elif baseline_spending == False:
+        dT_H_new = ALPHA_T[:T].reshape(T, 1) * dYnew
+    else:
+        dT_H_new = d['T_H']
+
+    new = {'r': drnew, 'w': dwnew, 'BQ': dBQnew, 'T_H': dT_H_new, 'Y': dYnew, 'K': dKnew}
+    jac = np.vstack([new['BQ'][:, name[1], :] if isinstance(name, tuple) else new[name]
+                     for name in active])
+
+    return jac
+
+
+def run_TPI_linear(income_tax_params, tpi_params, iterative_params, small_open_params, initial_values, SS_values, fiscal_params, biz_tax_params, baseline_spending=False):
+    '''
+    Solves for a first order approximation of the transition path
+    around the steady state.  The household problems are solved once at
+    steady state prices (with the initial distribution of wealth and the
+    tax functions along the path), and the outer loop variables are then
+    found with one linear solve, using the sequence space Jacobians of
+    the household problems.
+
+    Inputs:
+        income_tax_params = length 4 tuple, tax function parameters
+        tpi_params        = length 34 list, parameters for TPI
+        iterative_params  = length 3 tuple, (maxiter, mindist_SS,
+                            mindist_TPI)
+        small_open_params = length 3 tuple, small open economy parameters
+        initial_values    = length 8 tuple, initial values
+        SS_values         = length 12 tuple, steady state values
+        fiscal_params     = tuple, fiscal policy parameters
+        biz_tax_params    = length 2 tuple, business tax parameters
+        baseline_spending = boolean, =True if government spending and
+                            transfers are fixed at the baseline path
+
+    Functions called:
+        get_household_jacobian()
+        household_response()
+        get_update_params()
+        update_paths()
+        get_update_jacobian()
+        get_cohort_tax_params()
+        TPI.inner_loop()
+        TPI.twist_doughnut()
+        tax.total_taxes()
+        household.get_cons()
+        aggr.get_C()
+        aggr.get_I()
+        utils.pct_diff_func()
+
+    Objects in function:
+        names     = list, outer loop variables (BQ is one variable for
+                    each lifetime income group)
+        active    = list, outer loop variables that are solved for (r is
+                    fixed in a small open economy, T_H with baseline
+                    spending, Y unless baseline spending, and K is only
+                    solved for in a closed economy without a balanced
+                    budget)
+        x0        = [N,] vector, outer loop variables at steady state
+                    prices, stacked
+        x1        = [N,] vector, outer loop variables implied by the
+                    household decisions at steady state prices
+        jac       = [N,N] array, Jacobian of the outer loop update
+        dx        = [N,] vector, change in outer loop variables
+        hh_jacs   = length J list, household Jacobians
+        TPIdist   = scalar, distance of the linearized path from the
+                    outer loop variables it implies, as in TPI.run_TPI
+        output    = dictionary, same variables as TPI.run_TPI
+        macro_output = dictionary, macro variables as in TPI.run_TPI
+
+    Returns: output, macro_output
+    '''
+    analytical_mtrs, etr_params, mtrx_params, mtry_params = income_tax_params
+    J, S, T, BW, beta, sigma, alpha, gamma, epsilon, Z, delta, ltilde, nu, g_y,\
+                  g_n_vector, tau_payroll, tau_bq, rho, omega, N_tilde, lambdas, imm_rates, e, retire, mean_income_data,\
+                  factor, h_wealth, p_wealth, m_wealth, b_ellipse, upsilon, chi_b, chi_n, theta = tpi_params
+    small_open, tpi_firm_r, tpi_hh_r = small_open_params
+    B0, b_sinit, b_splus1init, factor, initial_b, initial_n, omega_S_preTP, initial_debt = initial_values
+    Kss, Bss, Lss, rss, wss, BQss, T_Hss, revenue_ss, bssmat_splus1, nssmat, Yss, Gss = SS_values
+    maxiter, mindist_SS, mindist_TPI = iterative_params
+    budget_balance, ALPHA_T, ALPHA_G = fiscal_params[:3]
+
+    # Outer loop variables at steady state prices
+    paths = {'r': np.ones(T + S) * rss, 'w': np.ones(T + S) * wss,
+             'BQ': np.ones((T + S, J)) * BQss.reshape(1, J),
+             'T_H': np.ones(T + S) * T_Hss, 'Y': np.ones(T + S) * Yss,
+             'K': np.ones(T + S) * Kss}
+    if small_open:
+        paths['r'] = np.array(tpi_hh_r, dtype=float)
+    if baseline_spending:
+        paths['T_H'] = np.array(fiscal_params[-2], dtype=float)
+
+    names = ['r', 'w'] + [('BQ', j) for j in xrange(J)] + ['T_H', 'Y', 'K']
+    active = [name for name in names if not (
+        (name == 'r' and small_open) or
+        (name == 'T_H' and baseline_spending) or
+        (name == 'Y' and not baseline_spending) or
+        (name == 'K' and (small_open or budget_balance)))]
+
+    def get_path(name):
+        if isinstance(name, tuple):
+            return paths['BQ'][:T, name[1]]
+        return paths[name][:T]
+
+    def stack(updated):
+        return np.concatenate([updated['BQ'][:, name[1]] if isinstance(name, tuple)
+                               else updated[name] for name in active])
+
+    x0 = np.concatenate([get_path(name) for name in active])
+
+    # Solve household problems once at steady state prices
+    guesses_b = np.tile(bssmat_splus1.reshape(1, S, J), (T + S, 1, 1))
+    guesses_n = np.tile(nssmat.reshape(1, S, J), (T + S, 1, 1))
+    outer_loop_vars = (paths['r'], paths['w'], paths['K'], paths['BQ'], paths['T_H'])
+    inner_loop_params = (income_tax_params, tpi_params, initial_values, np.arange(S))
+    euler_errors, b_mat0, n_mat0 = TPI.inner_loop((guesses_b, guesses_n), outer_loop_vars, inner_loop_params)
+
+    update_params = get_update_params(income_tax_params, tpi_params, small_open_params,
+                                      initial_values, fiscal_params, biz_tax_params,
+                                      baseline_spending)
+
+    def update(b_mat, n_mat, path_vals):
+        rnew, wnew, BQnew, T_H_new, Ynew, Knew, L, B, D, G, REVENUE = update_paths(
+            b_mat, n_mat, path_vals['r'], path_vals['w'], path_vals['BQ'],
+            path_vals['T_H'], path_vals['Y'], path_vals['K'], update_params)
+        return {'r': rnew, 'w': wnew, 'BQ': BQnew, 'T_H': T_H_new, 'Y': Ynew,
+                'K': Knew}
+
+    path_vals0 = {'r': paths['r'][:T], 'w': paths['w'][:T], 'BQ': paths['BQ'][:T],
+                  'T_H': paths['T_H'][:T], 'Y': paths['Y'][:T], 'K': paths['K'][:T]}
+    x1 = stack(update(b_mat0, n_mat0, path_vals0))
+
+    # Sequence space Jacobians of the household problems
+    hh_jacs = [get_household_jacobian(j, SS_values, income_tax_params, tpi_params)
+               for j in xrange(J)]
+
+    def column_response(name, tau):
+        # Response of household decisions to a change in one outer loop
+        # variable at date tau
+        if isinstance(name, tuple):
+            return household_response(hh_jacs, PRICE_INDEX['BQ'], tau, name[1], T, S, J)
+        elif name in PRICE_INDEX:
+            return household_response(hh_jacs, PRICE_INDEX[name], tau, 0, T, S, J)
+        return 0.0, 0.0
+
+    # Jacobian of the outer loop update, chained from its blocks
+    N = x0.shape[0]
+    jac = get_update_jacobian(b_mat0, n_mat0, path_vals0['r'], path_vals0['w'],
+                              path_vals0['BQ'], path_vals0['T_H'], path_vals0['Y'],
+                              path_vals0['K'], hh_jacs, active, update_params)
+
+    # Fixed point of the linearized outer loop: x = x1 + jac (x - x0)
+    dx = np.linalg.solve(np.eye(N) - jac, x1 - x0)
+
+    b_mat = b_mat0.copy()
+    n_mat = n_mat0.copy()
+    col = 0
+    for name in active:
+        path = get_path(name).copy()
+        path += dx[col:col + T]
+        if isinstance(name, tuple):
+            paths['BQ'][:T, name[1]] = path
+        else:
+            paths[name][:T] = path
+        for tau in xrange(T):
+            if dx[col] != 0:
+                db, dn = column_response(name, tau)
+                b_mat += dx[col] * db
+                n_mat += dx[col] * dn
+            col += 1
+    r = paths['r']
+    w = paths['w']
+    BQ = paths['BQ']
+    T_H = paths['T_H']
+    if baseline_spending == False and budget_balance == False:
+        paths['Y'][:T] = T_H[:T] / ALPHA_T[:T]
+
+    # Aggregates implied by the linearized household decisions
+    rnew, wnew, BQnew, T_H_new, Ynew, Knew, L, B, D, G, REVENUE = update_paths(
+        b_mat, n_mat, r[:T], w[:T], BQ[:T], T_H[:T], paths['Y'][:T],
+        paths['K'][:T], update_params)
+
+    # Distance of the linearized path from the outer loop variables it
+    # implies, measured as in TPI.run_TPI
+    if baseline_spending == False:
+        if T_H[:T].all() != 0:
+            last_dist = utils.pct_diff_func(T_H_new, T_H[:T])
+        else:
+            last_dist = np.abs(T_H[:T])
+    else:
+        last_dist = utils.pct_diff_func(Ynew, paths['Y'][:T])
+    TPIdist = np.array(list(utils.pct_diff_func(rnew, r[:T])) +
+                       list(utils.pct_diff_func(BQnew, BQ[:T]).flatten()) +
+                       list(utils.pct_diff_func(wnew, w[:T])) +
+                       list(last_dist)).max()
+    Y = Ynew
+    K = np.append(Knew, np.ones(S) * Kss)
+    L = np.append(L, np.ones(S) * Lss)
+    B = np.append(B, np.ones(S) * Bss)
+    REVENUE = np.array(list(REVENUE) + [revenue_ss] * S)
+    if budget_balance == False:
+        D_0 = initial_debt * Y[0]
+        if baseline_spending == False:
+            G_0 = ALPHA_G[0] * Y[0]
+        else:
+            G_0 = fiscal_params[-1][0]
+        D, G = fiscal.D_G_path((Y, REVENUE, T_H, D_0, G_0), fiscal_params,
+                               (T, r, g_n_vector, g_y),
+                               baseline_spending=baseline_spending)
+
+    bmat_s = np.zeros((T, S, J))
+    bmat_s[0, 1:, :] = initial_b[:-1, :]
+    bmat_s[1:, 1:, :] = b_mat[:T-1, :-1, :]
+    bmat_splus1 = b_mat[:T]
+
+    if etr_params.ndim == 2:
+        etr_params_path = np.reshape(etr_params[:T,:],(T,1,1,etr_params.shape[1]))
+    else:
+        etr_params_path = np.zeros((T,S,J,etr_params.shape[2]))
+        for i in range(etr_params.shape[2]):
+            etr_params_path[:,:,:,i] = np.tile(np.reshape(np.transpose(etr_params[:,:T,i]),(T,S,1)),(1,1,J))
+    tax_path_params = (np.tile(e.reshape(1, S, J),(T,1,1)), lambdas, 'TPI', retire, etr_params_path, h_wealth,
+                       p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
+    tax_path = tax.total_taxes(np.tile(r[:T].reshape(T, 1, 1),(1,S,J)), np.tile(w[:T].reshape(T, 1, 1),(1,S,J)), bmat_s,
+                               n_mat[:T,:,:], BQ[:T, :].reshape(T, 1, J), factor, T_H[:T].reshape(T, 1, 1), None, False, tax_path_params)
+    cons_params = (e.reshape(1, S, J), lambdas.reshape(1, 1, J), g_y)
+    c_path = household.get_cons(r[:T].reshape(T, 1, 1), w[:T].reshape(T, 1, 1), bmat_s, bmat_splus1, n_mat[:T,:,:],
+                   BQ[:T].reshape(T, 1, J), tax_path, cons_params)
+    C_params = (omega[:T].reshape(T, S, 1), lambdas, 'TPI')
+    C = aggr.get_C(c_path, C_params)
+
+    if small_open == False:
+        I_params = (delta, g_y, omega[:T].reshape(T, S, 1), lambdas, imm_rates[:T].reshape(T, S, 1), g_n_vector[1:T+1], 'TPI')
+        I = aggr.get_I(bmat_splus1[:T], K[1:T+1], K[:T], I_params)
+    else:
+        I = (1+g_n_vector[:T])*np.exp(g_y)*K[1:T+1] - (1.0 - delta) * K[:T]
+
+    # Euler errors of the linearized decisions of cohorts born during
+    # the transition path
+    ind = np.arange(S)
+    euler_errors = np.zeros((T, 2 * S, J))
+    for t in xrange(T):
+        inc_tax_params_TP = (analytical_mtrs,
+                             get_cohort_tax_params(etr_params, t, S),
+                             get_cohort_tax_params(mtrx_params, t, S),
+                             get_cohort_tax_params(mtry_params, t, S))
+        for j in xrange(J):
+            x = np.append(b_mat[t + ind, ind, j], n_mat[t + ind, ind, j])
+            euler_errors[t, :, j] = TPI.twist_doughnut(
+                x, r, w, BQ[:, j], T_H, j, None, t,
+                (inc_tax_params_TP, tpi_params, None))
+    eul_savings = euler_errors[:, :S, :].max(1).max(1)
+    eul_laborleisure = euler_errors[:, S:, :].max(1).max(1)
+
+    output = {'Y': Y, 'K': K, 'L': L, 'C': C, 'I': I, 'BQ': BQ,
+              'REVENUE': REVENUE, 'T_H': T_H, 'G': G, 'D': D,
+              'r': r, 'w': w, 'b_mat': b_mat, 'n_mat': n_mat,
+              'c_path': c_path, 'tax_path': tax_path,
+              'eul_savings': eul_savings, 'eul_laborleisure': eul_laborleisure,
+              'converged': bool(TPIdist < mindist_TPI),
+              'dist_history': np.array([TPIdist]), 'budget_exhausted': None}
+
+    macro_output = {'Y': Y, 'K': K, 'L': L, 'C': C, 'I': I,
+                    'BQ': BQ, 'REVENUE': REVENUE, 'T_H': T_H, 'r': r, 'w': w,
+                    'tax_path': tax_path}
+
+    return output, macro_output
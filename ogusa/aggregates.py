@@ -218,6 +218,7 @@ def revenue(r, w, b, n, BQ, Y, L, K, factor, params):
         omega       = [T,S] array, population weights by age
         method      = string, 'SS' or 'TPI'
         etr_params  = [T,S,J] array, effective tax rate function parameters
+                      ([T,#tax params] array if they vary by year only)
         theta       = [J,] vector, replacement rate values by lifetime income group
         tau_bq      = scalar, bequest tax rate
         h_wealth    = scalar, wealth tax function parameter
@@ -253,7 +254,12 @@ def revenue(r, w, b, n, BQ, Y, L, K, factor, params):
         for j in xrange(J):
             TI_params = (e[:,j], etr_params)
             T_I[:,j] = tax.tau_income(r, w, b[:,j], n[:,j], factor, TI_params) * I[:,j]
-    if I.ndim == 3:
+    if I.ndim == 3 and etr_params.ndim == 2:
+        # tax functions vary by year only, so the [T,#tax params] table
+        # is broadcast across ages and lifetime income groups
+        TI_params = (e, etr_params.reshape(T, 1, 1, etr_params.shape[1]))
+        T_I = tax.tau_income(r, w, b, n, factor, TI_params) * I
+    elif I.ndim == 3:
         T_I = np.zeros((T,S,J))
         for j in xrange(J):
             if etr_params.ndim == 3:
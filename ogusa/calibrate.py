@@ -38,6 +38,7 @@ import wealth
 import labor
 import SS
 import utils
+import inequality
 
 def chi_estimate(income_tax_params, ss_params, iterative_params, chi_guesses, baseline_dir="./OUTPUT"):
     '''
@@ -300,67 +301,39 @@ def the_inequalizer(dist, pop_weights, ability_weights, factor, S, J):
         S               = integer, number of economically active periods in lifetime
         J               = integer, number of ability types
 
-    Functions called: None
+    Functions called:
+        inequality.weighted_sort()
+        inequality.gini()
+        inequality.var_log()
+        inequality.shares_below()
 
     Objects in function:
         weights           = [S,J] array, fraction of population for each age and lifetime income group
-        flattened_dist    = [S*J,] vector, vectorized dist
-        flattened_weights = [S*J,] vector, vectorized weights
         sort_dist         = [S*J,] vector, ascending order vector of dist
-        loc_90th          = integer, index of 90th percentile
-        loc_10th          = integer, index of 10th percentile
-        loc_99th          = integer, index of 99th percentile
+        sort_weights      = [S*J,] vector, weights in the order of sort_dist
+        dist_sum          = [J,] vector, share of dist held by the population below each cumulative ability weight
+        dist_share        = [J,] vector, share of dist held by each lifetime income group
 
     Returns: measure of inequality
     --------------------------------------------------------------------
     '''
 
-    weights = np.tile(pop_weights.reshape(S, 1), (1, J)) * \
-    ability_weights.reshape(1, J)
-    flattened_dist = dist.flatten()
-    flattened_weights = weights.flatten()
-    idx = np.argsort(flattened_dist)
-    sort_dist = flattened_dist[idx]
-    sort_weights = flattened_weights[idx]
-    cum_weights = np.cumsum(sort_weights)
+    weights = pop_weights.reshape(S, 1) * ability_weights.reshape(1, J)
+    sort_dist, sort_weights = inequality.weighted_sort(dist.flatten(),
+                                                       weights.flatten())
 
     # gini
-    p = cum_weights/cum_weights.sum()
-    nu = np.cumsum(sort_dist*sort_weights)
-    nu = nu/nu[-1]
-    gini_coeff = (nu[1:]*p[:-1]).sum() - (nu[:-1] * p[1:]).sum()
-
+    gini_coeff = inequality.gini(sort_dist, sort_weights, presorted=True)
 
     # variance
-    ln_dist = np.log(sort_dist*factor) # not scale invariant
-    weight_mean = (ln_dist*sort_weights).sum()/sort_weights.sum()
-    var_ln_dist = ((sort_weights*((ln_dist-weight_mean)**2)).sum())*(1./(sort_weights.sum()))
-
-
-    # 90/10 ratio
-    loc_90th = np.argmin(np.abs(cum_weights - .9))
-    loc_10th = np.argmin(np.abs(cum_weights - .1))
-    ratio_90_10 = sort_dist[loc_90th] / sort_dist[loc_10th]
-
-    # top 10% share
-    top_10_share= (sort_dist[loc_90th:] * sort_weights[loc_90th:]
-           ).sum() / (sort_dist * sort_weights).sum()
-
-    # top 1% share
-    loc_99th = np.argmin(np.abs(cum_weights - .99))
-    top_1_share = (sort_dist[loc_99th:] * sort_weights[loc_99th:]
-           ).sum() / (sort_dist * sort_weights).sum()
-
-    # calculate percentile shares (percentiles based on lambdas input)
-    dist_weight = (sort_weights*sort_dist)
-    total_dist_weight = dist_weight.sum()
-    cumsum = np.cumsum(sort_weights)
-    dist_sum = np.zeros((J,))
-    cum_weights = ability_weights.cumsum()
-    for i in range(J):
-        cutoff = sort_weights.sum() / (1./cum_weights[i])
-        dist_sum[i] = ((dist_weight[cumsum < cutoff].sum())/total_dist_weight)
-
+    var_ln_dist = inequality.var_log(sort_dist*factor, sort_weights)
+
+    # calculate percentile shares (percentiles based on lambdas input),
+    # all of dist is held by the whole population
+    dist_sum = np.ones((J,))
+    dist_sum[:-1] = inequality.shares_below(sort_dist, sort_weights,
+                                            ability_weights.cumsum()[:-1],
+                                            presorted=True)
 
     dist_share = np.zeros((J,))
     dist_share[0] = dist_sum[0]
@@ -4,11 +4,16 @@ Functions for generating demographic objects necessary for the OG-USA
 model
 
 This module defines the following function(s):
+    rebin_sub_bins()
     get_fert()
     get_mort()
     pop_rebin()
     get_imm_resid()
+    get_omega()
+    get_omega_SS()
     immsolve()
+    solve_imm_rates()
+    project_pop()
     get_pop_objs()
 ------------------------------------------------------------------------
 '''
@@ -17,6 +22,7 @@ import os
 import numpy as np
 import scipy.optimize as opt
 import scipy.interpolate as si
+import scipy.sparse as sp
 import pandas as pd
 import utils
 import matplotlib
@@ -29,6 +35,40 @@ Define functions
 ------------------------------------------------------------------------
 '''
 
+def rebin_sub_bins(x_sub, len_subbins, totpers, ufunc=np.add):
+    '''
+    --------------------------------------------------------------------
+    This function reduces a vector of data sub-bins to totpers model
+    periods of len_subbins sub-bins each, with the ends of the periods
+    rounded to the nearest sub-bin, in one segment reduction rather than
+    a loop over the model periods
+    --------------------------------------------------------------------
+    INPUTS:
+    x_sub       = (N,) vector, values by data sub-bin
+    len_subbins = scalar >= 1, length of a model period in sub-bins
+    totpers     = integer >= 1, number of model periods
+    ufunc       = NumPy ufunc, reduction over the sub-bins of each
+                  model period, e.g. np.add for sums, np.multiply for
+                  products
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    end_sub_bin = (totpers,) vector, index of ending sub-bin + 1 of each
+                  model period
+    beg_sub_bin = (totpers,) vector, index of beginning sub-bin of each
+                  model period
+
+    RETURNS: (totpers,) vector
+    --------------------------------------------------------------------
+    '''
+    end_sub_bin = np.rint(np.arange(1, totpers + 1) *
+                          np.float64(len_subbins)).astype(int)
+    beg_sub_bin = np.append(0, end_sub_bin[:-1])
+
+    return ufunc.reduceat(x_sub[:end_sub_bin[-1]], beg_sub_bin)
+
+
 def get_fert(totpers, min_yr, max_yr, graph=False):
     '''
     --------------------------------------------------------------------
@@ -91,13 +131,6 @@ def get_fert(totpers, min_yr, max_yr, graph=False):
                      interpolated
     fert_rates     = (totpers,) vector, fertility rates for each model
                      period of life
-    i              = integer >= 0, index of model period being computed
-    beg_sub_bin    = integer >= 0, index of beginning sub-bin for
-                     calculation of average fertility rate of given
-                     model period
-    end_sub_bin    = integer >= 0, index of ending sub-bin + 1 for
-                     calculation of average fertility rate of given
-                     model period
 
     FILES CREATED BY THIS FUNCTION:
         fert_rates.png
@@ -136,14 +169,9 @@ def get_fert(totpers, min_yr, max_yr, graph=False):
     pred_ind = (age_sub > age_midp[0]) * (age_sub < age_midp[-1])
     age_pred = age_sub[pred_ind]
     fert_rates_sub[pred_ind] = np.float64(fert_func(age_pred))
-    fert_rates = np.zeros(totpers)
-    end_sub_bin = 0
-    for i in xrange(totpers):
-        beg_sub_bin = int(end_sub_bin)
-        end_sub_bin = int(np.rint((i + 1) * len_subbins))
-        fert_rates[i] = ((curr_pop_sub[beg_sub_bin:end_sub_bin] *
-            fert_rates_sub[beg_sub_bin:end_sub_bin]).sum() /
-            curr_pop_sub[beg_sub_bin:end_sub_bin].sum())
+    fert_rates = (rebin_sub_bins(curr_pop_sub * fert_rates_sub,
+                                 len_subbins, totpers) /
+                  rebin_sub_bins(curr_pop_sub, len_subbins, totpers))
 
     if graph == True:
         '''
@@ -251,13 +279,6 @@ def get_mort(totpers, min_yr, max_yr, graph=False):
                       sub-bin implied by mort_rates_mxyr
     mort_rates      = (totpers,) vector, mortality rates that correspond
                       to each period of life
-    i               = integer >= 0, index of model period being computed
-    beg_sub_bin     = integer >= 0, index of beginning sub-bin for
-                      calculation of cumulative mortality rate of given
-                      model period
-    end_sub_bin     = integer >= 0, index of ending sub-bin + 1 for
-                      calculation of cumulative mortality rate of given
-                      model period
 
     FILES CREATED BY THIS FUNCTION:
         mort_rates.png
@@ -284,17 +305,11 @@ def get_mort(totpers, min_yr, max_yr, graph=False):
     num_sub_bins = float(100)
     len_subbins = ((np.float64((max_yr - min_yr + 1) * num_sub_bins)) /
                   totpers)
-    mort_rates_sub = np.zeros(num_sub_bins * max_yr, dtype=np.float64)
-    for i in xrange(max_yr):
-        mort_rates_sub[i*num_sub_bins:(i+1)*num_sub_bins] = (1 -
-            ((1 - np.float64(mort_rates_mxyr[i])) ** (1 / num_sub_bins)))
-    mort_rates = np.zeros(totpers)
-    end_sub_bin = 0
-    for i in xrange(totpers):
-        beg_sub_bin = int(end_sub_bin)
-        end_sub_bin = int(np.rint((i + 1) * len_subbins))
-        mort_rates[i] = (1 - (1 -
-            np.float64(mort_rates_sub[beg_sub_bin:end_sub_bin])).prod())
+    mort_rates_sub = np.repeat(1 - ((1 -
+        np.float64(mort_rates_mxyr[:max_yr])) ** (1 / num_sub_bins)),
+        int(num_sub_bins))
+    mort_rates = 1 - rebin_sub_bins(1 - mort_rates_sub, len_subbins,
+                                    totpers, np.multiply)
     mort_rates[-1] = 1 # Mortality rate in last period is set to 1
 
     if graph == True:
@@ -350,16 +365,18 @@ def get_mort(totpers, min_yr, max_yr, graph=False):
 def pop_rebin(curr_pop_dist, totpers_new):
     '''
     --------------------------------------------------------------------
-    For cases in which totpers (E+S) is less than the number of periods
+    For cases in which totpers (E+S) differs from the number of periods
     in the population distribution data, this function calculates a new
     population distribution vector with totpers (E+S) elements.
     --------------------------------------------------------------------
     INPUTS:
     curr_pop_dist = (N,) vector, population distribution over N periods
     totpers_new   = integer >= 4, number of periods to which we are
-                    transforming the population distribution
+                    transforming the population distribution, at most
+                    num_sub_bins times N
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        rebin_sub_bins()
 
     OBJECTS CREATED WITHIN FUNCTION:
     totpers_orig = integer >= 4, number of periods in curr_pop_dist
@@ -369,11 +386,8 @@ def pop_rebin(curr_pop_dist, totpers_new):
     num_sub_bins = integer > 1, an arbitrarily and deliberately large
                    number of sub-bins that each population bin will be
                    broken up into
-    len_subbins  = scalar > 1, number of bins (in terms of sub-bins)
+    len_subbins  = scalar >= 1, number of bins (in terms of sub-bins)
                    that equal the length of one of the new periods
-    i            = integer >= 0, index of new bin number
-    beg_sub_bin  = integer >= 0, index of beginning bin in sum
-    end_sub_bin  = integer >= 0, index of ending bin plus 1 in sum
 
     RETURNS: curr_pop_new
     --------------------------------------------------------------------
@@ -381,19 +395,14 @@ def pop_rebin(curr_pop_dist, totpers_new):
     totpers_orig = len(curr_pop_dist)
     if int(totpers_new) == totpers_orig:
         curr_pop_new = curr_pop_dist
-    elif int(totpers_new) < totpers_orig:
+    else:
         num_sub_bins = float(10000)
         curr_pop_sub = np.repeat(np.float64(curr_pop_dist) /
                        num_sub_bins, num_sub_bins)
         len_subbins = ((np.float64(totpers_orig*num_sub_bins)) /
                       totpers_new)
-        curr_pop_new = np.zeros(totpers_new, dtype=np.float64)
-        end_sub_bin = 0
-        for i in xrange(totpers_new):
-            beg_sub_bin = int(end_sub_bin)
-            end_sub_bin = int(np.rint((i + 1) * len_subbins))
-            curr_pop_new[i] = \
-                curr_pop_sub[beg_sub_bin:end_sub_bin].sum()
+        curr_pop_new = rebin_sub_bins(curr_pop_sub, len_subbins,
+                                      int(totpers_new))
         # Return curr_pop_new to single precision float (float32)
         # datatype
         curr_pop_new = np.float32(curr_pop_new)
@@ -544,6 +553,167 @@ def get_imm_resid(totpers, min_yr, max_yr, graph=True):
     return imm_rates
 
 
+def get_omega(fert_rates, mort_rates, infmort_rate, imm_rates):
+    '''
+    --------------------------------------------------------------------
+    This function generates the transition matrix OMEGA of the law of
+    motion of the population distribution by age, as a sparse matrix:
+    births and immigration in the first row, survival on the
+    subdiagonal and immigration on the diagonal
+    --------------------------------------------------------------------
+    INPUTS:
+    fert_rates   = (totpers,) vector, fertility rates that correspond to
+                   each period of life
+    mort_rates   = (totpers,) vector, mortality rates that correspond to
+                   each period of life
+    infmort_rate = scalar > 0, infant mortality rate from 2015 U.S. CIA
+                   World Factbook
+    imm_rates    = (totpers,) vector, immigration rates that correspond
+                   to each period of life
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    totpers = integer >= 3, number of agent life periods (E+S)
+    first   = (totpers,) vector, first row of OMEGA
+    rows    = (3*totpers-1,) vector, row of each nonzero of OMEGA
+    cols    = (3*totpers-1,) vector, column of each nonzero of OMEGA
+    vals    = (3*totpers-1,) vector, nonzero values of OMEGA, summed
+              where they share a row and column
+
+    RETURNS: OMEGA, (totpers, totpers) sparse CSR matrix
+    --------------------------------------------------------------------
+    '''
+    totpers = len(fert_rates)
+    first = (1 - infmort_rate) * np.asarray(fert_rates, dtype=np.float64)
+    first[0] += imm_rates[0]
+    ages = np.arange(totpers)
+    rows = np.concatenate((np.zeros(totpers, dtype=int), ages[1:],
+                           ages[1:]))
+    cols = np.concatenate((ages, ages[:-1], ages[1:]))
+    vals = np.concatenate((first, 1 - np.asarray(mort_rates[:-1]),
+                           np.asarray(imm_rates[1:])))
+    OMEGA = sp.coo_matrix((vals, (rows, cols)),
+                          shape=(totpers, totpers)).tocsr()
+
+    return OMEGA
+
+
+def get_omega_SS(fert_rates, mort_rates, infmort_rate, imm_rates):
+    '''
+    --------------------------------------------------------------------
+    This function finds the steady-state population growth rate and
+    population distribution, the largest real eigenvalue of OMEGA less
+    one and its eigenvector.  Given an eigenvalue lambda, the
+    eigenvector follows from the subdiagonal rows of OMEGA,
+    v[s] = (1 - mort_rates[s-1]) * v[s-1] / (lambda - imm_rates[s]),
+    and lambda solves the first row, so the eigenvalue larger than all
+    of imm_rates[1:] is found as the root of a scalar function rather
+    than by the dense eigenvalue decomposition of OMEGA.  The first row
+    is split into its positive and negative parts, each times the
+    eigenvector decreasing in lambda, which bounds the largest root; if
+    the root found is not shown to be the largest, the dense
+    decomposition is used.
+    --------------------------------------------------------------------
+    INPUTS:
+    fert_rates   = (totpers,) vector, fertility rates that correspond to
+                   each period of life
+    mort_rates   = (totpers,) vector, mortality rates that correspond to
+                   each period of life
+    infmort_rate = scalar > 0, infant mortality rate from 2015 U.S. CIA
+                   World Factbook
+    imm_rates    = (totpers,) vector, immigration rates that correspond
+                   to each period of life
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_omega()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    first      = (totpers,) vector, first row of OMEGA
+    first_pos  = (totpers,) vector, first row of OMEGA with the
+                 negative elements after the first set to zero
+    first_neg  = (totpers,) vector, first_pos less the first row
+    surv       = (totpers-1,) vector, survival rates, the subdiagonal
+                 of OMEGA
+    eigvec     = function, eigenvector of OMEGA (with first element 1)
+                 implied by an eigenvalue
+    first_row  = function, first row of OMEGA times the eigenvector
+                 less the eigenvalue, zero at an eigenvalue
+    lower      = scalar, largest immigration rate after the first period
+    upper      = scalar, largest absolute column sum of OMEGA, an upper
+                 bound on its eigenvalues
+    grid       = (399,) vector, values of lambda at which the sign of
+                 first_row is checked
+    grid_vals  = (399,) vector, first_row at each value of grid
+    positive   = vector, indices of grid at which first_row is positive
+    eig_SS     = scalar, largest real eigenvalue of OMEGA
+    eig_bound  = scalar, no eigenvalue larger than eig_SS is greater
+                 than eig_bound
+    eigvec_raw = (totpers,) vector, nonnormalized eigenvector
+                 corresponding to eig_SS
+
+    RETURNS: g_n_SS, omega_SS
+    --------------------------------------------------------------------
+    '''
+    first = (1 - infmort_rate) * np.asarray(fert_rates, dtype=np.float64)
+    first[0] += imm_rates[0]
+    surv = 1 - np.asarray(mort_rates[:-1], dtype=np.float64)
+
+    def eigvec(eig):
+        return np.append(1.0, np.cumprod(surv / (eig - imm_rates[1:])))
+
+    def first_row(eig):
+        return np.dot(first, eigvec(eig)) - eig
+
+    first_pos = first.copy()
+    first_pos[1:] = np.maximum(first[1:], 0)
+    first_neg = first_pos - first
+    lower = np.max(imm_rates[1:])
+    upper = abs(get_omega(fert_rates, mort_rates, infmort_rate,
+                          imm_rates)).sum(axis=0).max()
+    # Bracket the largest root by the last sign change of the first row
+    # on a grid between the largest immigration rate and upper
+    grid = np.unique(np.concatenate((
+        np.linspace(lower, upper, 200),
+        lower + (upper - lower) * np.logspace(-12, 0, 200))))[1:]
+    with np.errstate(over='ignore', invalid='ignore'):
+        grid_vals = np.array([first_row(eig) for eig in grid])
+    positive = np.flatnonzero(np.isfinite(grid_vals) & (grid_vals > 0))
+    eig_SS = None
+    if (upper > lower and np.all(surv > 0) and positive.size > 0 and
+            positive[-1] < len(grid) - 1 and
+            grid_vals[positive[-1] + 1] <= 0):
+        eig_SS = opt.brentq(first_row, grid[positive[-1]],
+                            grid[positive[-1] + 1], xtol=1e-15,
+                            rtol=4 * np.finfo(float).eps)
+        # For lambda in (eig_SS, eig_bound], the first row is at most
+        # first_pos.v(eig_SS) - first_neg.v(eig_bound) - lambda, so
+        # there is no larger root above that
+        eig_bound = np.inf
+        for _ in xrange(100):
+            eig_bound = (np.dot(first_pos, eigvec(eig_SS)) -
+                         (np.dot(first_neg, eigvec(eig_bound))
+                          if np.isfinite(eig_bound) else 0.0))
+            if eig_bound <= eig_SS * (1 + 1e-12):
+                break
+        else:
+            eig_SS = None
+    if eig_SS is not None:
+        eigvec_raw = eigvec(eig_SS)
+    else:
+        eigvalues, eigvectors = np.linalg.eig(
+            get_omega(fert_rates, mort_rates, infmort_rate,
+                      imm_rates).toarray())
+        real = np.flatnonzero(np.isreal(eigvalues))
+        eig_ind = real[eigvalues[real].real.argmax()]
+        eig_SS = eigvalues[eig_ind].real
+        eigvec_raw = eigvectors[:, eig_ind].real
+    g_n_SS = eig_SS - 1
+    omega_SS = eigvec_raw / eigvec_raw.sum()
+
+    return g_n_SS, omega_SS
+
+
 def immsolve(imm_rates, *args):
     '''
     --------------------------------------------------------------------
@@ -571,13 +741,13 @@ def immsolve(imm_rates, *args):
     g_n_SS       = scalar, steady-state growth rate from original OMEGA
                    matrix
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_omega()
 
     OBJECTS CREATED WITHIN FUNCTION:
     omega_cur_pct = (totpers,) vector, population distribution (pct) by
                     age in current period
-    totpers       = integer >= 3, number of agent life periods (E+S)
-    OMEGA         = (totpers, totpers) matrix, transition matrix for
+    OMEGA         = (totpers, totpers) sparse matrix, transition matrix for
                     population distribution law of motion
     omega_new     = (totpers,) vector, population distribution (pct) by
                     age in next period
@@ -589,18 +759,85 @@ def immsolve(imm_rates, *args):
     '''
     fert_rates, mort_rates, infmort_rate, omega_cur_lev, g_n_SS = args
     omega_cur_pct = omega_cur_lev / omega_cur_lev.sum()
-    totpers = len(fert_rates)
-    OMEGA = np.zeros((totpers, totpers))
-    OMEGA[0, :] = ((1 - infmort_rate) * fert_rates +
-                  np.hstack((imm_rates[0], np.zeros(totpers-1))))
-    OMEGA[1:, :-1] += np.diag(1-mort_rates[:-1])
-    OMEGA[1:, 1:] += np.diag(imm_rates[1:])
-    omega_new = np.dot(OMEGA, omega_cur_pct) / (1 + g_n_SS)
+    OMEGA = get_omega(fert_rates, mort_rates, infmort_rate, imm_rates)
+    omega_new = OMEGA.dot(omega_cur_pct) / (1 + g_n_SS)
     omega_errs = omega_new - omega_cur_pct
 
     return omega_errs
 
 
+def solve_imm_rates(fert_rates, mort_rates, infmort_rate, omega_cur_lev,
+                    g_n_SS):
+    '''
+    --------------------------------------------------------------------
+    This function solves for the immigration rates that make immsolve()
+    zero.  Immigration in each period of life enters OMEGA only on the
+    diagonal (and in the first row for the first period), so the errors
+    are linear in each immigration rate separately and the rates are
+    found in closed form rather than by a nonlinear solver.
+    --------------------------------------------------------------------
+    INPUTS:
+    fert_rates    = (totpers,) vector, fertility rates that correspond
+                    to each period of life
+    mort_rates    = (totpers,) vector, mortality rates that correspond to
+                    to each period of life
+    infmort_rate  = scalar > 0, infant mortality rate from 2015 U.S. CIA
+                    World Factbook
+    omega_cur_lev = (totpers,) vector, population distribution (levels)
+                    by age in current period
+    g_n_SS        = scalar, steady-state growth rate from original OMEGA
+                    matrix
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_omega()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    omega_cur_pct = (totpers,) vector, population distribution (pct) by
+                    age in current period
+    omega_noimm   = (totpers,) vector, next-period population
+                    distribution without immigration
+
+    RETURNS: imm_rates
+    --------------------------------------------------------------------
+    '''
+    omega_cur_pct = omega_cur_lev / omega_cur_lev.sum()
+    omega_noimm = get_omega(fert_rates, mort_rates, infmort_rate,
+                            np.zeros(len(fert_rates))).dot(omega_cur_pct)
+    imm_rates = ((1 + g_n_SS) * omega_cur_pct - omega_noimm) / omega_cur_pct
+
+    return imm_rates
+
+
+def project_pop(OMEGA, pop_init, num_per):
+    '''
+    --------------------------------------------------------------------
+    This function projects the population distribution num_per - 1
+    periods ahead with the transition matrix OMEGA, one sparse
+    matrix-vector product per period
+    --------------------------------------------------------------------
+    INPUTS:
+    OMEGA    = (totpers, totpers) sparse matrix, transition matrix for
+               population distribution law of motion
+    pop_init = (totpers,) vector, population distribution in the first
+               period
+    num_per  = integer >= 1, number of periods in the projection
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    per = integer >= 1, index for period
+
+    RETURNS: pop_path, (totpers, num_per) matrix
+    --------------------------------------------------------------------
+    '''
+    pop_path = np.zeros((len(pop_init), num_per))
+    pop_path[:, 0] = pop_init
+    for per in xrange(1, num_per):
+        pop_path[:, per] = OMEGA.dot(pop_path[:, per - 1])
+
+    return pop_path
+
+
 def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
     '''
     --------------------------------------------------------------------
@@ -626,8 +863,12 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
         get_fert()
         get_mort()
         get_imm_resid()
+        get_omega()
+        get_omega_SS()
         utils.read_file()
         pop_rebin()
+        project_pop()
+        solve_imm_rates()
         immsolve()
         pop_data.csv
 
@@ -643,18 +884,13 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
                       each economically active model period of life
     imm_rates_orig  = (E+S,) vector, immigration rates by age estimated
                       as residuals from get_imm_resid()
-    OMEGA_orig      = (E+S, E+S) matrix, transition matrix for
+    OMEGA_orig      = (E+S, E+S) sparse matrix, transition matrix for
                       population distribution law of motion
-    eigvalues       = (E+S,) vector, eigenvalues of OMEGA matrix
-    eigvectors      = (E+S, E+S) matrix, matrix of eigenvectors of OMEGA
-                      where each column is the eigenvector that goes
-                      with the corresponding eigenvalue in eigvalues
-    g_n_SS_orig     = scalar, steady-state population growth rate, which
-                      is the largest real part of the eigenvalues
-    eigvec_raw      = (E+S,) vector, nonnormalized eigenvector
-                      corresponding to the largest real-part eigenvalue
+    g_n_SS          = scalar, steady-state population growth rate, the
+                      largest real eigenvalue of OMEGA_orig less one
     omega_SS_orig   = (E+S,) vector, steady-state population
-                      distribution which is normalized eigvec_raw
+                      distribution, the normalized eigenvector of that
+                      eigenvalue
     omega_path_orig = (E+S, T) matrix, time path of the population
                       distribution from the current state to the steady-
                       state
@@ -681,7 +917,6 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
     fixper          = ?
     omega_SSfx      = ?
     imm_objs        = ?
-    imm_fulloutput  = ?
     imm_rates_adj   = ?
     imm_diagdict    = ?
     omega_path_S    = ?
@@ -701,23 +936,16 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
     imm_rates_orig = get_imm_resid(E+S, min_yr, max_yr, graph=False)
     #imm_rates_orig = np.zeros(E+S)
     imm_rates_S = imm_rates_orig[-S:]
-    OMEGA_orig = np.zeros((E+S, E+S))
-    OMEGA_orig[0, :] = ((1 - infmort_rate) * fert_rates +
-                  np.hstack((imm_rates_orig[0], np.zeros(E+S-1))))
-    OMEGA_orig[1:, :-1] += np.diag(1-mort_rates[:-1])
-    OMEGA_orig[1:, 1:] += np.diag(imm_rates_orig[1:])
+    OMEGA_orig = get_omega(fert_rates, mort_rates, infmort_rate,
+                           imm_rates_orig)
 
     # Solve for steady-state population growth rate and steady-state
-    # population distribution by age using eigenvalue and eigenvector
-    # decomposition
-    eigvalues, eigvectors = np.linalg.eig(OMEGA_orig)
-    g_n_SS = (eigvalues[np.isreal(eigvalues)].real).max() - 1
-    eigvec_raw = eigvectors[:,
-        (eigvalues[np.isreal(eigvalues)].real).argmax()].real
-    omega_SS_orig = eigvec_raw / eigvec_raw.sum()
+    # population distribution by age from the largest real eigenvalue
+    # of OMEGA and its eigenvector
+    g_n_SS, omega_SS_orig = get_omega_SS(fert_rates, mort_rates,
+                                         infmort_rate, imm_rates_orig)
 
     # Generate time path of the nonstationary population distribution
-    omega_path_lev = np.zeros((E+S, T+S))
     cur_path = os.path.split(os.path.abspath(__file__))[0]
     pop_file = utils.read_file(cur_path,
                 "data/demographic/pop_data.csv")
@@ -736,7 +964,7 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
     data_year = 2013
     for per in xrange(0, curr_year-data_year): # Age the data to
                                                # the current year
-        pop_next = np.dot(OMEGA_orig, pop_curr)
+        pop_next = OMEGA_orig.dot(pop_curr)
         g_n_curr = ((pop_next[-S:].sum() - pop_curr[-S:].sum())/
                     pop_curr[-S:].sum())
         pop_past = pop_curr
@@ -745,11 +973,7 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
                 pop_curr.copy() / pop_curr.sum()}
 
     # Generate time path of the population distribution
-    omega_path_lev[:,0] = pop_curr.copy()
-    for per in xrange(1, T+S):
-        pop_next = np.dot(OMEGA_orig, pop_curr)
-        omega_path_lev[:, per] = pop_next.copy()
-        pop_curr = pop_next.copy()
+    omega_path_lev = project_pop(OMEGA_orig, pop_curr, T+S)
 
     # Force the population distribution after 1.5*S periods to be the
     # steady-state distribution by adjusting immigration rates, holding
@@ -760,12 +984,10 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
                  omega_path_lev[:, fixper].sum())
     imm_objs = (fert_rates, mort_rates, infmort_rate,
                omega_path_lev[:, fixper], g_n_SS)
-    imm_fulloutput = opt.fsolve(immsolve, imm_rates_orig,
-        args=(imm_objs), full_output=True, xtol=imm_tol)
-    imm_rates_adj = imm_fulloutput[0]
+    imm_rates_adj = solve_imm_rates(*imm_objs)
     #imm_rates_adj = np.zeros(E+S)
     imm_rates_S_adj = imm_rates_adj[-S:]
-    imm_diagdict = imm_fulloutput[1]
+    imm_diagdict = {'fvec': immsolve(imm_rates_adj, *imm_objs)}
     omega_path_S = (omega_path_lev[-S:, :] /
         np.tile(omega_path_lev[-S:, :].sum(axis=0),(S, 1)))
     omega_path_S[:, fixper:] = \
@@ -880,13 +1102,10 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
         # Test whether the steady-state growth rates implied by the
         # adjusted OMEGA matrix equals the steady-state growth rate of
         # the original OMEGA matrix
-        OMEGA2 = np.zeros((E+S, E+S))
-        OMEGA2[0, :] = ((1 - infmort_rate) * fert_rates +
-                       np.hstack((imm_rates_adj[0], np.zeros(E+S-1))))
-        OMEGA2[1:, :-1] += np.diag(1-mort_rates[:-1])
-        OMEGA2[1:, 1:] += np.diag(imm_rates_adj[1:])
-        eigvalues2, eigvectors2 = np.linalg.eig(OMEGA2)
-        g_n_SS_adj = (eigvalues[np.isreal(eigvalues2)].real).max() - 1
+        OMEGA2 = get_omega(fert_rates, mort_rates, infmort_rate,
+                           imm_rates_adj)
+        g_n_SS_adj, _ = get_omega_SS(fert_rates, mort_rates,
+                                     infmort_rate, imm_rates_adj)
         if np.max(np.absolute(g_n_SS_adj - g_n_SS)) > 10 ** (-8):
             print("FAILURE: The steady-state population growth rate" +
                   " from adjusted OMEGA is different (diff is " +
@@ -905,7 +1124,7 @@ def get_pop_objs(E, S, T, min_yr, max_yr, curr_year, GraphDiag=True):
         # the adjusted steady-state population distribution. Hit is with
         # the new OMEGA transition matrix and it should return the new
         # steady-state population distribution
-        omega_new = np.dot(OMEGA2, omega_SSfx)
+        omega_new = OMEGA2.dot(omega_SSfx)
         omega_errs = np.absolute(omega_new - omega_SSfx)
         print("The maximum absolute difference between the adjusted " +
               "steady-state population distribution and the " +
@@ -4,7 +4,11 @@ This program extracts tax rate and income data from the microsimulation
 model (tax-calculator) and saves it in pickle files.
 
 This module defines the following functions:
+    get_calculator()
     get_data()
+    get_year_data()
+    iter_data()
+    cap_inc_mtr()
 
 
 This Python script calls the following functions:
@@ -25,10 +29,36 @@ import pandas as pd
 from pandas import DataFrame
 import numpy as np
 import copy
-import numba
 import pickle
 
 
+'''
+Set names of the variables of the micro data, in the order of the
+columns of the DataFrames from get_data()
+'''
+MICRO_DATA_COLS = ['MTR wage', 'MTR self-employed Wage',
+                   'MTR capital income', 'Age', 'Wage and Salaries',
+                   'Self-Employed Income', 'Wage + Self-Employed Income',
+                   'Adjusted Total income', 'Total Tax Liability', 'Year',
+                   'Weights']
+
+'''
+Set variables of the Records of the tax calculator for the variables of
+the micro data taken from it directly
+'''
+RECORDS_VARS = {'Age': 'age_head', 'Wage and Salaries': 'e00200',
+                'Self-Employed Income': 'sey',
+                'Adjusted Total income': 'expanded_income',
+                'Total Tax Liability': 'combined', 'Weights': 's006'}
+
+
+'''
+Set micro data file read by the Records of the tax calculator, when no
+data is given
+'''
+RECORDS_DATA = 'puf.csv'
+
+
 def get_calculator(baseline, calculator_start_year, reform=None, data=None, weights=None, records_start_year=None):
     '''
     --------------------------------------------------------------------
@@ -52,7 +82,7 @@ def get_calculator(baseline, calculator_start_year, reform=None, data=None, weig
     if data is not None:
         records1 = Records(data=data, weights=weights, start_year=records_start_year)
     else:
-        records1 = Records()
+        records1 = Records(data=RECORDS_DATA)
 
     if baseline:
         #Should not be a reform if baseline is True
@@ -83,7 +113,9 @@ def get_data(baseline=False, start_year=2016, reform={}):
     start_year      = integer, first year of budget window
     reform          = dictionary, reform parameters
 
-    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_calculator()
+        get_year_data()
 
     OBJECTS CREATED WITHIN FUNCTION:
     micro_data_dict = dictionary, contains pandas dataframe for each year
@@ -104,82 +136,131 @@ def get_data(baseline=False, start_year=2016, reform={}):
     # running all the functions and calculates taxes
     calc1.calc_all()
 
+    # dictionary of data frames to return
+    micro_data_dict = {}
+
+    micro_data_dict[str(start_year)] = DataFrame(get_year_data(calc1),
+                                                 columns=MICRO_DATA_COLS)
+
+    # repeat the process for each year
+    for i in range(1,10):
+        calc1.increment_year()
+
+        micro_data_dict[str(calc1.current_year)] = \
+            DataFrame(get_year_data(calc1), columns=MICRO_DATA_COLS)
+        print 'year: ', str(calc1.current_year)
+
+    if reform:
+        pkl_path = "micro_data_policy.pkl"
+    else:
+        pkl_path = "micro_data_baseline.pkl"
+    pickle.dump(micro_data_dict, open(pkl_path, "wb"))
+
+    return micro_data_dict
+
+
+def get_year_data(calc1, columns=None, dtype=np.float64):
+    '''
+    --------------------------------------------------------------------
+    This function gets the micro data of the current year of the tax
+    calculator
+    --------------------------------------------------------------------
+    INPUTS:
+    calc1   = Calculator object, at the year of the data
+    columns = list, names of the variables to get (from MICRO_DATA_COLS),
+              or None to get all of them
+    dtype   = numpy dtype, floating point type of the variables
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        cap_inc_mtr()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    length    = integer, number of records
+    year_data = dictionary, (length,) vector of each variable
+
+    RETURNS: year_data
+    --------------------------------------------------------------------
+    '''
+    if columns is None:
+        columns = MICRO_DATA_COLS
+    length = len(calc1.records.s006)
+    year_data = {}
+
     # running marginal tax rate function for wage and salaries of primary
     # three results returned for fica tax, iit tax, and combined
     # mtr_iit: marginal tax rate of individual income tax
     [mtr_fica, mtr_iit, mtr_combined] = calc1.mtr('e00200p')
+    year_data['MTR wage'] = mtr_combined
 
     # the sum of the two e-variables here are self-employed income
     [mtr_fica_sey, mtr_iit_sey, mtr_combined_sey] = calc1.mtr('e00900p')
+    year_data['MTR self-employed Wage'] = mtr_combined_sey
 
     # find mtr on capital income
-    mtr_combined_capinc = cap_inc_mtr(calc1)
-
-    # create a temporary array to save all variables we need
-    length = len(calc1.records.s006)
-    temp = np.empty([length, 11]) # 11 is b/c length of budget window is 10 years
+    year_data['MTR capital income'] = cap_inc_mtr(calc1)
 
     # most variables can be retrieved from calculator's Record class
     # by add the variable name after (calc.records._____)
     # most e-variable definition can be found here https://docs.google.com/spreadsheets/d/1WlgbgEAMwhjMI8s9eG117bBEKFioXUY0aUTfKwHwXdA/edit#gid=1029315862
     # e00200 - wage and salaries, _sey - self-employed income
-    temp[:,0] = mtr_combined
-    temp[:,1] = mtr_combined_sey
-    temp[:,2] = mtr_combined_capinc
-    temp[:,3] = calc1.records.age_head
-    temp[:,4] = calc1.records.e00200
-    temp[:,5] = calc1.records.sey
-    temp[:,6] = calc1.records.sey + calc1.records.e00200
-    temp[:,7] = calc1.records.expanded_income
-    temp[:,8] = calc1.records.combined
-    temp[:,9] = calc1.current_year * np.ones(length)
-    temp[:,10] = calc1.records.s006
+    records = calc1.records
+    for name in columns:
+        if name in year_data:
+            continue
+        elif name == 'Wage + Self-Employed Income':
+            year_data[name] = records.sey + records.e00200
+        elif name == 'Year':
+            year_data[name] = calc1.current_year * np.ones(length)
+        else:
+            year_data[name] = getattr(records, RECORDS_VARS[name])
 
-    # dictionary of data frames to return
-    micro_data_dict = {}
+    year_data = dict((name, np.asarray(year_data[name], dtype=dtype))
+                     for name in columns)
+
+    return year_data
+
+
+def iter_data(baseline=False, start_year=2016, reform={}, columns=None,
+              dtype=np.float64):
+    '''
+    --------------------------------------------------------------------
+    This function is a generator of the micro data of each year of the
+    budget window, which keeps only one year of data in memory rather
+    than all of them, as get_data() does
+    --------------------------------------------------------------------
+    INPUTS:
+    baseline   = boolean, =True if baseline tax policy, =False if reform
+    start_year = integer, first year of budget window
+    reform     = dictionary, reform parameters
+    columns    = list, names of the variables to get (from
+                 MICRO_DATA_COLS), or None to get all of them
+    dtype      = numpy dtype, floating point type of the variables
+                 (np.float32 halves the memory)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        get_calculator()
+        get_year_data()
 
-    micro_data_dict[str(start_year)] = DataFrame(data = temp,
-                      columns = ['MTR wage', 'MTR self-employed Wage', 'MTR capital income','Age',
-                                 'Wage and Salaries', 'Self-Employed Income','Wage + Self-Employed Income',
-                                 'Adjusted Total income', 'Total Tax Liability', 'Year', 'Weights'])
+    OBJECTS CREATED WITHIN FUNCTION:
+    calc1 = Calculator object
 
+    YIELDS: (year, dictionary of a vector of each variable) for each
+            year of the budget window
+    --------------------------------------------------------------------
+    '''
+    calc1 = get_calculator(baseline=baseline, calculator_start_year=start_year,
+                           reform=reform)
+
+    # running all the functions and calculates taxes
+    calc1.calc_all()
+    yield calc1.current_year, get_year_data(calc1, columns, dtype)
 
     # repeat the process for each year
     for i in range(1,10):
         calc1.increment_year()
-
-        [mtr_fica, mtr_iit, mtr_combined] = calc1.mtr('e00200p')
-        [mtr_fica_sey, mtr_iit_sey, mtr_combined_sey] = calc1.mtr('e00900p')
-        # find mtr on capital income
-        mtr_combined_capinc = cap_inc_mtr(calc1)
-
-
-        temp = np.empty([length, 11])
-        temp[:,0] = mtr_combined
-        temp[:,1] = mtr_combined_sey
-        temp[:,2] = mtr_combined_capinc
-        temp[:,3] = calc1.records.age_head
-        temp[:,4] = calc1.records.e00200
-        temp[:,5] = calc1.records.sey
-        temp[:,6] = calc1.records.sey + calc1.records.e00200
-        temp[:,7] = calc1.records.expanded_income
-        temp[:,8] = calc1.records.combined
-        temp[:,9] = calc1.current_year * np.ones(length)
-        temp[:,10] = calc1.records.s006
-
-        micro_data_dict[str(calc1.current_year)] = DataFrame(data = temp,
-                       columns = ['MTR wage', 'MTR self-employed Wage','MTR capital income','Age',
-                                  'Wage and Salaries', 'Self-Employed Income','Wage + Self-Employed Income',
-                                  'Adjusted Total income','Total Tax Liability','Year', 'Weights'])
+        yield calc1.current_year, get_year_data(calc1, columns, dtype)
         print 'year: ', str(calc1.current_year)
 
-    if reform:
-        pkl_path = "micro_data_policy.pkl"
-    else:
-        pkl_path = "micro_data_baseline.pkl"
-    pickle.dump(micro_data_dict, open(pkl_path, "wb"))
-
-    return micro_data_dict
 
 def cap_inc_mtr(calc1):
     # find mtr on capital income
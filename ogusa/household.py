@@ -107,7 +107,77 @@ def get_cons(r, w, b, b_splus1, n, BQ, net_tax, params):
     return cons
 
 
-def FOC_savings(r, w, b, b_splus1, b_splus2, n, BQ, factor, T_H, params):
+def shift_tax_params(tax_params):
+    '''
+    Shifts tax function parameters by age one period ahead, repeating
+    those for the oldest age, so that they line up with the household's
+    income next period.
+
+    Inputs:
+        tax_params = [L,#tax params] array or [#tax params,] vector,
+                     parameters of a tax function by age (or the same
+                     for all ages)
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: [L,#tax params] array or [#tax params,] vector, tax
+             function parameters one period ahead
+    '''
+    if tax_params.ndim == 1:
+        # tax functions do not vary by age, so no need to shift them
+        return tax_params
+    return np.append(tax_params[1:], tax_params[-1:], axis=0)
+
+
+def get_workspace(e, etr_params, mtry_params, b_first=0.0):
+    '''
+    Allocates the arrays used to evaluate the Euler equations for one
+    lifetime of length L (one lifetime income group, one cohort), so
+    that residual functions called many times by the household solvers
+    (SS.euler_equation_solver, TPI.twist_doughnut) fill them in place
+    rather than building them on every call.
+
+    Inputs:
+        e           = [L,] vector, effective labor units over the lifetime
+        etr_params  = [L,#tax params] array, parameters of effective
+                      income tax rate function
+        mtry_params = [L,#tax params] array, parameters of marginal tax
+                      rate on capital income function
+        b_first     = scalar, wealth the household enters the first
+                      period with
+
+    Functions called:
+        shift_tax_params
+
+    Objects in function:
+        workspace = dictionary, with
+            b_s                = [L,] vector, wealth entering each period,
+                                 b_s[1:] filled on each call
+            b_splus2           = [L,] vector, savings one period ahead,
+                                 b_splus2[:-1] filled on each call
+            n_splus1           = [L,] vector, labor supply one period
+                                 ahead, n_splus1[:-1] filled on each call
+            e_splus1           = [L,] vector, effective labor units one
+                                 period ahead
+            etr_params_splus1  = array, etr_params one period ahead
+            mtry_params_splus1 = array, mtry_params one period ahead
+
+    Returns: workspace
+    '''
+    length = e.shape[0]
+    workspace = {'b_s': np.zeros(length), 'b_splus2': np.zeros(length),
+                 'n_splus1': np.zeros(length),
+                 'e_splus1': np.append(e[1:], 0.0),
+                 'etr_params_splus1': shift_tax_params(etr_params),
+                 'mtry_params_splus1': shift_tax_params(mtry_params)}
+    workspace['b_s'][0] = b_first
+
+    return workspace
+
+
+def FOC_savings(r, w, b, b_splus1, b_splus2, n, BQ, factor, T_H, params, workspace=None):
     '''
     Computes Euler errors for the FOC for savings in the steady state.
     This function is usually looped through over J, so it does one lifetime income group at a time.
@@ -143,8 +213,11 @@ def FOC_savings(r, w, b, b_splus1, b_splus2, n, BQ, factor, T_H, params):
         m_wealth    = scalar, parameter in wealth tax function
         tau_payroll = scalar, payroll tax rate
         tau_bq      = scalar, bequest tax rate
+        workspace   = dictionary, arrays from get_workspace for this
+                      lifetime, if None they are allocated here
 
     Functions called:
+        get_workspace
         get_cons
         marg_ut_cons
         tax.total_taxes
@@ -170,15 +243,18 @@ def FOC_savings(r, w, b, b_splus1, b_splus2, n, BQ, factor, T_H, params):
     # since in the euler equation, the coefficient on the marginal utility of
     # consumption for this term will be zero (since rho is one).
     if method == 'TPI_scalar':
-        e_extended = np.array([e] + [0])
-        n_extended = np.array([n] + [0])
+        e_splus1 = np.array([0.])
+        n_splus1 = np.array([0.])
         etr_params_to_use = etr_params
         mtry_params_to_use = mtry_params
     else:
-        e_extended = np.array(list(e) + [0])
-        n_extended = np.array(list(n) + [0])
-        etr_params_to_use = np.append(etr_params,np.reshape(etr_params[-1,:],(1,etr_params.shape[1])),axis=0)[1:,:]
-        mtry_params_to_use = np.append(mtry_params,np.reshape(mtry_params[-1,:],(1,mtry_params.shape[1])),axis=0)[1:,:]
+        if workspace is None:
+            workspace = get_workspace(e, etr_params, mtry_params)
+        e_splus1 = workspace['e_splus1']
+        n_splus1 = workspace['n_splus1']
+        n_splus1[:-1] = n[1:]
+        etr_params_to_use = workspace['etr_params_splus1']
+        mtry_params_to_use = workspace['mtry_params_splus1']
 
     # tax1_params = (e, lambdas, method, retire, etr_params, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
     # tax1 = tax.total_taxes(r, w, b, n, BQ, factor, T_H, None, False, tax1_params)
@@ -197,17 +273,17 @@ def FOC_savings(r, w, b, b_splus1, b_splus2, n, BQ, factor, T_H, params):
 
     tax1_params = (e, lambdas, method, retire, etr_params, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
     tax1 = tax.total_taxes(r, w, b, n, BQ, factor, T_H, None, False, tax1_params)
-    tax2_params = (e_extended[1:], lambdas, method, retire,
+    tax2_params = (e_splus1, lambdas, method, retire,
                    etr_params_to_use, h_wealth, p_wealth, m_wealth, tau_payroll, theta, tau_bq, J, S)
-    tax2 = tax.total_taxes(r, w, b_splus1, n_extended[1:], BQ, factor, T_H, None, True, tax2_params)
+    tax2 = tax.total_taxes(r, w, b_splus1, n_splus1, BQ, factor, T_H, None, True, tax2_params)
     cons1_params = (e, lambdas, g_y)
     cons1 = get_cons(r, w, b, b_splus1, n, BQ, tax1, cons1_params)
-    cons2_params = (e_extended[1:], lambdas, g_y)
-    cons2 = get_cons(r, w, b_splus1, b_splus2, n_extended[1:], BQ, tax2, cons2_params)
+    cons2_params = (e_splus1, lambdas, g_y)
+    cons2 = get_cons(r, w, b_splus1, b_splus2, n_splus1, BQ, tax2, cons2_params)
 
-    mtr_cap_params = (e_extended[1:], etr_params_to_use,
+    mtr_cap_params = (e_splus1, etr_params_to_use,
                       mtry_params_to_use,analytical_mtrs)
-    deriv = (1+r) - r*(tax.MTR_capital(r, w, b_splus1, n_extended[1:], factor, mtr_cap_params))
+    deriv = (1+r) - r*(tax.MTR_capital(r, w, b_splus1, n_splus1, factor, mtr_cap_params))
 
     savings_ut = rho * np.exp(-sigma * g_y) * chi_b * b_splus1 ** (-sigma)
 
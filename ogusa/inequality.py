@@ -0,0 +1,397 @@
+'''
+------------------------------------------------------------------------
+Weighted statistics of distributions: percentiles, shares of the total,
+Gini coefficients, variances of logs and means by group.
+
+The functions work along one axis of their inputs, so the statistics of
+many distributions (e.g., one for each period of the time path, or one
+for each bootstrap replication, with the observations left out of a
+replication given zero weight) are computed with NumPy operations rather
+than a loop over the distributions.  Data that are used for several
+statistics can be sorted once with weighted_sort() and passed with
+presorted=True.
+
+This file calls the following files:
+    None
+------------------------------------------------------------------------
+'''
+
+# Packages
+import numpy as np
+
+
+def take_along_axis(arr, indices, axis):
+    '''
+    Takes values from arr at indices along axis, e.g., arr sorted along
+    axis with indices = np.argsort(arr, axis).  Uses
+    np.take_along_axis() if it is available (NumPy 1.15 or later).
+
+    Inputs:
+        arr     = array, values
+        indices = integer array, same number of dimensions as arr
+        axis    = integer, axis along which to take the values
+
+    Functions called: None
+
+    Objects in function:
+        index = list, index of arr for each dimension
+
+    Returns: array, same shape as indices
+    '''
+    if hasattr(np, 'take_along_axis'):
+        return np.take_along_axis(arr, indices, axis)
+    index = list(np.ogrid[tuple(slice(n) for n in indices.shape)])
+    index[axis] = indices
+
+    return arr[tuple(index)]
+
+
+def weighted_sort(x, weights, axis=-1):
+    '''
+    Sorts x along axis, and the weights with it.
+
+    Inputs:
+        x       = array, value per person in each group
+        weights = array, population of each group, broadcast to the
+                  shape of x
+        axis    = integer, axis over the groups of each distribution
+
+    Functions called:
+        take_along_axis()
+
+    Objects in function:
+        idx = integer array, order of the groups by x along axis
+
+    Returns: sort_x, sort_weights
+    '''
+    x, weights = np.broadcast_arrays(np.asarray(x, dtype=float),
+                                     np.asarray(weights, dtype=float))
+    idx = np.argsort(x, axis=axis, kind='mergesort')
+
+    return take_along_axis(x, idx, axis), take_along_axis(weights, idx, axis)
+
+
+def _sorted_last(x, weights, axis, presorted):
+    '''
+    Sorts x and the weights (unless presorted) and moves axis to the
+    end.
+    '''
+    if presorted:
+        x, weights = np.broadcast_arrays(np.asarray(x, dtype=float),
+                                         np.asarray(weights, dtype=float))
+    else:
+        x, weights = weighted_sort(x, weights, axis)
+    axis = axis % x.ndim
+
+    return np.rollaxis(x, axis, x.ndim), np.rollaxis(weights, axis, x.ndim)
+
+
+def _cutoff_index(sort_weights, q):
+    '''
+    Number of the sorted groups (along the last axis) whose cumulative
+    weight is less than the share q of the total weight.
+
+    Inputs:
+        sort_weights = [..., N] array, weights in the order of the values
+        q            = [Q,] vector, shares of the total weight
+
+    Functions called: None
+
+    Objects in function:
+        cum_weights = [M, N] array, cumulative weights of each distribution
+        cutoff      = [M, Q] array, cumulative weight at each share q
+
+    Returns: [..., Q] integer array
+    '''
+    n = sort_weights.shape[-1]
+    cum_weights = np.cumsum(sort_weights, axis=-1).reshape(-1, n)
+    cutoff = cum_weights[:, -1:] * q
+    k = np.empty(cutoff.shape, dtype=int)
+    for i in xrange(cum_weights.shape[0]):
+        k[i] = np.searchsorted(cum_weights[i], cutoff[i], side='left')
+
+    return k.reshape(sort_weights.shape[:-1] + (q.shape[0],))
+
+
+def percentiles(x, q, weights=None, axis=-1, presorted=False):
+    '''
+    Percentiles of distributions.  Without weights, these are the
+    percentiles of np.percentile() (linear interpolation between the
+    observations); with weights, the percentile q is the smallest value
+    at which the cumulative weight reaches the share q of the total.
+    Many percentiles are found with one sort.
+
+    Inputs:
+        x         = array, values
+        q         = scalar or [Q,] vector in [0,1], percentiles
+        weights   = array or None, weight of each value, broadcast to the
+                    shape of x
+        axis      = integer, axis over the values of each distribution
+        presorted = boolean, =True if x and the weights are sorted along
+                    axis (e.g., by weighted_sort())
+
+    Functions called:
+        _sorted_last()
+        _cutoff_index()
+        take_along_axis()
+
+    Objects in function:
+        k = integer array, index of each percentile along the sorted axis
+
+    Returns: array, the shape of x without axis, with a last axis over q
+             if q is a vector
+    '''
+    q_arr = np.atleast_1d(np.asarray(q, dtype=float))
+    if weights is None:
+        pctls = np.percentile(np.asarray(x), q_arr * 100, axis=axis)
+        pctls = np.rollaxis(pctls, 0, pctls.ndim)
+    else:
+        sort_x, sort_weights = _sorted_last(x, weights, axis, presorted)
+        k = np.minimum(_cutoff_index(sort_weights, q_arr),
+                       sort_x.shape[-1] - 1)
+        pctls = take_along_axis(sort_x, k, -1)
+
+    return pctls if np.ndim(q) else pctls[..., 0]
+
+
+def shares_below(x, weights, q, axis=-1, presorted=False):
+    '''
+    Shares of the total of x held by the bottom of the distributions:
+    the groups, in ascending order of x, whose cumulative weight is less
+    than the share q of the total weight.
+
+    Inputs:
+        x         = array, value per person in each group
+        weights   = array, population of each group, broadcast to the
+                    shape of x
+        q         = scalar or [Q,] vector in [0,1], shares of the
+                    population
+        axis      = integer, axis over the groups of each distribution
+        presorted = boolean, =True if x and the weights are sorted along
+                    axis (e.g., by weighted_sort())
+
+    Functions called:
+        _sorted_last()
+        _cutoff_index()
+        take_along_axis()
+
+    Objects in function:
+        k      = integer array, number of groups below each share q
+        cum_xw = [..., N+1] array, cumulative total of x, from zero
+
+    Returns: array, the shape of x without axis, with a last axis over q
+             if q is a vector
+    '''
+    q_arr = np.atleast_1d(np.asarray(q, dtype=float))
+    sort_x, sort_weights = _sorted_last(x, weights, axis, presorted)
+    k = _cutoff_index(sort_weights, q_arr)
+    cum_xw = np.cumsum(sort_x * sort_weights, axis=-1)
+    cum_xw = np.concatenate((np.zeros(cum_xw.shape[:-1] + (1,)), cum_xw),
+                            axis=-1)
+    shares = take_along_axis(cum_xw, k, -1) / cum_xw[..., -1:]
+
+    return shares if np.ndim(q) else shares[..., 0]
+
+
+def top_shares(x, weights, q, axis=-1, presorted=False):
+    '''
+    Shares of the total of x held by the top of the distributions: the
+    groups not in the bottom 1 - q of the population.
+
+    Inputs:
+        x         = array, value per person in each group
+        weights   = array, population of each group, broadcast to the
+                    shape of x
+        q         = scalar or [Q,] vector in [0,1], shares of the
+                    population at the top (e.g., 0.01 for the top 1%)
+        axis      = integer, axis over the groups of each distribution
+        presorted = boolean, =True if x and the weights are sorted along
+                    axis
+
+    Functions called:
+        shares_below()
+
+    Objects in function: None
+
+    Returns: array, the shape of x without axis, with a last axis over q
+             if q is a vector
+    '''
+    return 1 - shares_below(x, weights, 1 - np.asarray(q, dtype=float),
+                            axis, presorted)
+
+
+def lorenz_curve(x, weights, axis=-1, presorted=False):
+    '''
+    Lorenz curves of distributions of x over groups with population
+    weights.
+
+    Inputs:
+        x         = array, value per person in each group
+        weights   = array, population of each group, broadcast to the
+                    shape of x
+        axis      = integer, axis over the groups of each distribution
+        presorted = boolean, =True if x and the weights are sorted along
+                    axis
+
+    Functions called:
+        _sorted_last()
+
+    Objects in function: None
+
+    Returns: p, nu
+        p  = array, cumulative share of the population, with the groups
+             in ascending order of x along the last axis
+        nu = array, cumulative share of the total of x
+    '''
+    sort_x, sort_weights = _sorted_last(x, weights, axis, presorted)
+    p = np.cumsum(sort_weights, axis=-1)
+    nu = np.cumsum(sort_x * sort_weights, axis=-1)
+    p /= p[..., -1:]
+    nu /= nu[..., -1:]
+
+    return p, nu
+
+
+def gini(x, weights, axis=-1, presorted=False):
+    '''
+    Weighted Gini coefficients, from the area under the Lorenz curve by
+    the trapezoid rule.
+
+    Inputs:
+        x         = array, value per person in each group
+        weights   = array, population of each group, broadcast to the
+                    shape of x
+        axis      = integer, axis over the groups of each distribution
+        presorted = boolean, =True if x and the weights are sorted along
+                    axis
+
+    Functions called:
+        lorenz_curve()
+
+    Objects in function:
+        p  = array, cumulative share of the population
+        nu = array, cumulative share of the total of x
+
+    Returns: array, Gini coefficient of each distribution, the shape of
+             x without axis
+    '''
+    p, nu = lorenz_curve(x, weights, axis, presorted)
+
+    return ((nu[..., 1:] * p[..., :-1]).sum(-1) -
+            (nu[..., :-1] * p[..., 1:]).sum(-1))
+
+
+def share_gini(x, weights, axis=-1):
+    '''
+    Gini coefficients of the time path graphs (see TPI_graphs.py).  The
+    groups are ordered by their share of the total of x less their
+    weight, and the area under the Lorenz curve is the sum of the weights
+    times the shares of the groups before them.  Unlike gini(), x is the
+    total of each group rather than its value per person and the weights
+    are not normalized, so, e.g., J groups of equal total and weight have
+    a Gini of about 1/J rather than 0.
+
+    Inputs:
+        x       = array, total of each group
+        weights = array, population of each group, broadcast to the
+                  shape of x
+        axis    = integer, axis over the groups of each distribution
+
+    Functions called:
+        take_along_axis()
+
+    Objects in function:
+        shares       = array, share of each group in the total of x
+        idx          = integer array, order of the groups along axis
+        sort_shares  = array, shares in that order
+        sort_weights = array, weights in that order
+        cum_shares   = array, sum of the shares of the groups before each
+                       group
+
+    Returns: array, Gini coefficient of each distribution, the shape of
+             x without axis
+    '''
+    x, weights = np.broadcast_arrays(np.asarray(x, dtype=float),
+                                     np.asarray(weights, dtype=float))
+    # move the groups to the last axis
+    x = np.rollaxis(x, axis % x.ndim, x.ndim)
+    weights = np.rollaxis(weights, axis % weights.ndim, weights.ndim)
+    shares = x / x.sum(-1)[..., None]
+    idx = np.argsort(shares - weights, axis=-1)
+    sort_shares = take_along_axis(shares, idx, -1)
+    sort_weights = take_along_axis(weights, idx, -1)
+    cum_shares = np.zeros_like(sort_shares)
+    cum_shares[..., 1:] = np.cumsum(sort_shares[..., :-1], axis=-1)
+
+    return 2 * (.5 - (cum_shares * sort_weights).sum(-1))
+
+
+def var_log(x, weights, axis=-1, ddof=0):
+    '''
+    Weighted variances of the logs of distributions.  Values that are
+    not positive are left out.
+
+    Inputs:
+        x       = array, values
+        weights = array, weight of each value, broadcast to the shape of
+                  x
+        axis    = integer, axis over the values of each distribution
+        ddof    = scalar, the variance is divided by the total weight
+                  minus ddof
+
+    Functions called: None
+
+    Objects in function:
+        positive = boolean array, =True for the values that are kept
+        ln_x     = array, log of x, zero for the values left out
+        mean     = array, weighted mean of the logs
+
+    Returns: array, the shape of x without axis
+    '''
+    x, weights = np.broadcast_arrays(np.asarray(x, dtype=float),
+                                     np.asarray(weights, dtype=float))
+    positive = x > 0
+    weights = np.where(positive, weights, 0.0)
+    ln_x = np.log(np.where(positive, x, 1.0))
+    total = weights.sum(axis, keepdims=True)
+    mean = (ln_x * weights).sum(axis, keepdims=True) / total
+
+    return (((ln_x - mean) ** 2 * weights).sum(axis) /
+            (total.sum(axis) - ddof))
+
+
+def group_means(x, weights, groups, axis=-1):
+    '''
+    Weighted means of x in each group, e.g., by age.
+
+    Inputs:
+        x       = array, values
+        weights = array, weight of each value, broadcast to the shape of
+                  x
+        groups  = [N,] vector, group of each value along axis
+        axis    = integer, axis over the N values
+
+    Functions called: None
+
+    Objects in function:
+        order  = [N,] vector, order of the values by group
+        starts = [G,] vector, index of the first value of each group
+        xw     = array, x times the weights, in the order of the groups
+
+    Returns: labels, means
+        labels = [G,] vector, groups in ascending order
+        means  = array, the shape of x with G values along axis
+    '''
+    x, weights = np.broadcast_arrays(np.asarray(x, dtype=float),
+                                     np.asarray(weights, dtype=float))
+    groups = np.asarray(groups)
+    order = np.argsort(groups, kind='mergesort')
+    sort_groups = groups[order]
+    starts = np.flatnonzero(np.concatenate(
+        ([True], sort_groups[1:] != sort_groups[:-1])))
+    weights = np.take(weights, order, axis=axis)
+    xw = np.take(x, order, axis=axis) * weights
+    means = (np.add.reduceat(xw, starts, axis=axis) /
+             np.add.reduceat(weights, starts, axis=axis))
+
+    return sort_groups[starts], means
@@ -0,0 +1,319 @@
+'''
+------------------------------------------------------------------------
+Compiled versions of the household and tax functions used in the Euler
+equations of one lifetime.
+
+The NumPy versions in household.py and tax.py evaluate a chain of small
+array expressions on vectors of length S or less, so the time spent
+there is mostly the overhead of each NumPy call.  If numba is installed,
+the Euler errors of a lifetime are instead computed in one compiled loop
+over ages, which SS.euler_equation_solver and TPI.twist_doughnut use in
+place of the NumPy versions.  If numba is not installed, or USE_NUMBA is
+False, the NumPy versions are used.
+
+This file calls the following files:
+    None
+------------------------------------------------------------------------
+'''
+
+# Packages
+import numpy as np
+try:
+    import numba
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+'''
+Set to False to use the NumPy versions of the household and tax
+functions even if numba is installed
+'''
+USE_NUMBA = True
+
+
+def jit(func):
+    '''
+    Compiles a function with numba if it is installed, otherwise returns
+    the function unchanged (for the tests, which check the Python version
+    against household.py and tax.py).
+
+    Inputs:
+        func = function, to compile
+
+    Functions called:
+        numba.njit()
+
+    Objects in function: None
+
+    Returns: compiled function or func
+    '''
+    if HAVE_NUMBA:
+        # error_model='numpy' so division by zero gives inf or nan, as
+        # in the NumPy versions, rather than raising an exception
+        return numba.njit(cache=True, error_model='numpy')(func)
+    return func
+
+
+def enabled():
+    '''
+    Whether the compiled versions are used.
+
+    Inputs: None
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: boolean, =True if numba is installed and USE_NUMBA is True
+    '''
+    return HAVE_NUMBA and USE_NUMBA
+
+
+'''
+------------------------------------------------------------------------
+    Functions
+------------------------------------------------------------------------
+'''
+
+
+@jit
+def tax_func(X, Y, params):
+    '''
+    Tax function (ratio of polynomials in labor and capital income) for
+    one household.
+
+    Inputs:
+        X      = scalar, labor income
+        Y      = scalar, capital income
+        params = [12,] vector, parameters of the tax function (as in
+                 tax.tau_income)
+
+    Functions called: None
+
+    Objects in function:
+        tau_x = scalar, labor income portion of the function
+        tau_y = scalar, capital income portion of the function
+
+    Returns: tax rate (scalar)
+    '''
+    A = params[0]
+    B = params[1]
+    C = params[2]
+    D = params[3]
+    max_x = params[4]
+    min_x = params[5]
+    max_y = params[6]
+    min_y = params[7]
+    shift_x = params[8]
+    shift_y = params[9]
+    shift = params[10]
+    share = params[11]
+    X2 = X ** 2
+    Y2 = Y ** 2
+    tau_x = ((max_x - min_x) * (A * X2 + B * X) /
+             (A * X2 + B * X + 1) + min_x)
+    tau_y = ((max_y - min_y) * (C * Y2 + D * Y) /
+             (C * Y2 + D * Y + 1) + min_y)
+
+    return (((tau_x + shift_x) ** share) *
+            ((tau_y + shift_y) ** (1 - share))) + shift
+
+
+@jit
+def mtr_analytical(X, Y, params, labor):
+    '''
+    Marginal tax rate on labor income (labor=True) or capital income
+    (labor=False) implied by the effective tax rate function, as in
+    tax.MTR_labor and tax.MTR_capital with analytical_mtrs=True.
+
+    Inputs:
+        X      = scalar, labor income
+        Y      = scalar, capital income
+        params = [12,] vector, parameters of the effective tax rate
+                 function
+        labor  = boolean, =True for the marginal tax rate on labor income
+
+    Functions called: None
+
+    Objects in function:
+        tau_x   = scalar, labor income portion of the function
+        tau_y   = scalar, capital income portion of the function
+        tau_x_y = scalar, effective tax rate
+
+    Returns: marginal tax rate (scalar)
+    '''
+    A = params[0]
+    B = params[1]
+    C = params[2]
+    D = params[3]
+    max_x = params[4]
+    min_x = params[5]
+    max_y = params[6]
+    min_y = params[7]
+    shift_x = params[8]
+    shift_y = params[9]
+    shift = params[10]
+    share = params[11]
+    X2 = X ** 2
+    Y2 = Y ** 2
+    tau_x = ((max_x - min_x) * (A * X2 + B * X) /
+             (A * X2 + B * X + 1) + min_x)
+    tau_y = ((max_y - min_y) * (C * Y2 + D * Y) /
+             (C * Y2 + D * Y + 1) + min_y)
+    tau_x_y = (((tau_x + shift_x) ** share) *
+               ((tau_y + shift_y) ** (1 - share))) + shift
+    if labor:
+        return ((X + Y) * share * ((tau_x + shift_x) ** (share - 1)) *
+                (max_x - min_x) * ((2 * A * X + B) / ((A * X2 + B * X + 1) ** 2)) *
+                ((tau_y + shift_y) ** (1 - share)) + tau_x_y)
+    # as in tax.MTR_capital, which uses X in the derivative of tau_y
+    return ((X + Y) * ((tau_x + shift_x) ** share) * (1 - share) *
+            (max_y - min_y) * ((2 * C * X + D) / ((C * X2 + D * X + 1) ** 2)) *
+            ((tau_y + shift_y) ** (-share)) + tau_x_y)
+
+
+@jit
+def lifetime_euler_errors(r, w, BQ, T_H, r_splus1, w_splus1, BQ_splus1,
+                          T_H_splus1, b_s, b_splus1, b_splus2, n, n_splus1,
+                          e, e_splus1, rho, chi_n, etr_params, mtrx_params,
+                          etr_params_splus1, mtry_params_splus1,
+                          analytical_mtrs, retire, retire_splus1, scalars):
+    '''
+    Euler errors for savings and labor supply over one lifetime of
+    length L, as in household.FOC_savings and household.FOC_labor, in
+    one loop over ages.
+
+    Inputs:
+        r, w, BQ, T_H       = [L,] or [1,] vectors, interest rate, wage
+                              rate, bequests to the lifetime income group
+                              and lump sum transfers in each period of
+                              life (length 1 if the same in all periods)
+        r_splus1, w_splus1,
+        BQ_splus1,
+        T_H_splus1          = [L,] or [1,] vectors, the same one period
+                              ahead
+        b_s                 = [L,] vector, wealth entering each period
+        b_splus1            = [L,] vector, savings
+        b_splus2            = [L,] vector, savings one period ahead
+        n                   = [L,] vector, labor supply
+        n_splus1            = [L,] vector, labor supply one period ahead
+        e                   = [L,] vector, effective labor units
+        e_splus1            = [L,] vector, effective labor units one
+                              period ahead
+        rho                 = [L,] vector, mortality rates
+        chi_n               = [L,] vector, utility weights on disutility
+                              of labor
+        etr_params,
+        mtrx_params         = [L,12] or [1,12] arrays, tax function
+                              parameters (one row if the same for all
+                              ages)
+        etr_params_splus1,
+        mtry_params_splus1  = [L,12] or [1,12] arrays, tax function
+                              parameters one period ahead
+        analytical_mtrs     = boolean, =True if use analytical_mtrs
+        retire              = integer, first age that receives a
+                              pension
+        retire_splus1       = integer, first age that receives a
+                              pension one period ahead
+        scalars             = [15,] vector, (factor, sigma, beta, g_y,
+                              chi_b, theta, tau_bq, lambdas,
+                              tau_payroll, h_wealth, p_wealth, m_wealth,
+                              b_ellipse, upsilon, ltilde) for the
+                              lifetime income group
+
+    Functions called:
+        tax_func
+        mtr_analytical
+
+    Objects in function:
+        tax1     = scalar, net taxes in the current period
+        tax2     = scalar, net taxes one period ahead
+        deriv    = scalar, after-tax return on capital
+        deriv_n  = scalar, net of tax share of labor income
+        mu_labor = scalar, marginal disutility of labor supply
+
+    Returns: error1, error2, cons, cons_splus1 ([L,] vectors, Euler
+             errors for savings and labor supply, and consumption in the
+             current period and one period ahead)
+    '''
+    factor = scalars[0]
+    sigma = scalars[1]
+    beta = scalars[2]
+    g_y = scalars[3]
+    chi_b = scalars[4]
+    theta = scalars[5]
+    tau_bq = scalars[6]
+    lambdas = scalars[7]
+    tau_payroll = scalars[8]
+    h_wealth = scalars[9]
+    p_wealth = scalars[10]
+    m_wealth = scalars[11]
+    b_ellipse = scalars[12]
+    upsilon = scalars[13]
+    ltilde = scalars[14]
+
+    length = b_splus1.shape[0]
+    error1 = np.empty(length)
+    error2 = np.empty(length)
+    cons = np.empty(length)
+    cons_splus1 = np.empty(length)
+    discount = np.exp(-sigma * g_y)
+    growth = np.exp(g_y)
+    for s in range(length):
+        t = s if r.shape[0] > 1 else 0
+        t1 = s if r_splus1.shape[0] > 1 else 0
+        p = s if etr_params.shape[0] > 1 else 0
+        p1 = s if etr_params_splus1.shape[0] > 1 else 0
+
+        # net taxes and consumption in the current period
+        I = r[t] * b_s[s] + w[t] * e[s] * n[s]
+        X = (w[t] * e[s] * n[s]) * factor
+        Y = (r[t] * b_s[s]) * factor
+        T_P = tau_payroll * w[t] * e[s] * n[s]
+        if s >= retire:
+            T_P -= theta * w[t]
+        T_W = (p_wealth * h_wealth * b_s[s] / (h_wealth * b_s[s] + m_wealth)) * b_s[s]
+        tax1 = (tax_func(X, Y, etr_params[p]) * I + T_P +
+                tau_bq * BQ[t] / lambdas + T_W - T_H[t])
+        cons[s] = ((1 + r[t]) * b_s[s] + w[t] * e[s] * n[s] + BQ[t] /
+                   lambdas - b_splus1[s] * growth - tax1)
+
+        # net taxes and consumption one period ahead
+        I = r_splus1[t1] * b_splus1[s] + w_splus1[t1] * e_splus1[s] * n_splus1[s]
+        X1 = (w_splus1[t1] * e_splus1[s] * n_splus1[s]) * factor
+        Y1 = (r_splus1[t1] * b_splus1[s]) * factor
+        T_P = tau_payroll * w_splus1[t1] * e_splus1[s] * n_splus1[s]
+        if s >= retire_splus1:
+            T_P -= theta * w_splus1[t1]
+        T_W = (p_wealth * h_wealth * b_splus1[s] /
+               (h_wealth * b_splus1[s] + m_wealth)) * b_splus1[s]
+        tax2 = (tax_func(X1, Y1, etr_params_splus1[p1]) * I + T_P +
+                tau_bq * BQ_splus1[t1] / lambdas + T_W - T_H_splus1[t1])
+        cons_splus1[s] = ((1 + r_splus1[t1]) * b_splus1[s] + w_splus1[t1] *
+                          e_splus1[s] * n_splus1[s] + BQ_splus1[t1] / lambdas -
+                          b_splus2[s] * growth - tax2)
+
+        # savings Euler equation
+        if analytical_mtrs:
+            mtr_cap = mtr_analytical(X1, Y1, etr_params_splus1[p1], False)
+        else:
+            mtr_cap = tax_func(X1, Y1, mtry_params_splus1[p1])
+        deriv = (1 + r_splus1[t1]) - r_splus1[t1] * mtr_cap
+        savings_ut = rho[s] * discount * chi_b * b_splus1[s] ** (-sigma)
+        error1[s] = (cons[s] ** (-sigma) - beta * (1 - rho[s]) * deriv *
+                     cons_splus1[s] ** (-sigma) * discount - savings_ut)
+
+        # labor supply Euler equation
+        if analytical_mtrs:
+            mtr_lab = mtr_analytical(X, Y, etr_params[p], True)
+        else:
+            mtr_lab = tax_func(X, Y, mtrx_params[p])
+        deriv_n = 1 - tau_payroll - mtr_lab
+        mu_labor = chi_n[s] * (b_ellipse * (1.0 / ltilde) *
+                               ((1.0 - (n[s] / ltilde) ** upsilon) **
+                                ((1.0 / upsilon) - 1.0)) *
+                               (n[s] / ltilde) ** (upsilon - 1.0))
+        error2[s] = cons[s] ** (-sigma) * w[t] * deriv_n * e[s] - mu_labor
+
+    return error1, error2, cons, cons_splus1
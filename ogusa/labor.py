@@ -6,6 +6,7 @@ Computes the average labor participation rate for each age cohort.
 
 This py-file calls the following other file(s):
             data/labor/cps_hours_by_age_hourspct.txt
+            inequality.py
 
 This py-file creates the following other file(s):
     (make sure that an OUTPUT folder exists)
@@ -25,8 +26,13 @@ import numpy as np
 import pandas as pd
 import cPickle as pickle
 import utils
+import inequality
 import scipy.ndimage.filters as filter
 
+'''
+Set number of bootstrap replications computed at once in VCV_moments
+'''
+BOOT_CHUNK = 10
 
 '''
 ------------------------------------------------------------------------
@@ -85,6 +91,7 @@ def compute_labor_moments(cps, S):
     Inputs:
         cps         = pandas DF, raw data from SCF
     Objects created in the function:
+        avg_hours       = [60,] vector, weighted mean hours worked by age
         labor_dist_data = [S,] array of labor moments
 
     Returns:
@@ -93,34 +100,57 @@ def compute_labor_moments(cps, S):
     '''
 
     # Find fraction of total time people work on average by age
-    cps['hours_wgt'] = cps['hours']*cps['wtsupp']
-    columns = ['hours_wgt', 'wgt', 'avg_hours']
-    by_age = pd.DataFrame(columns=columns)
-    # by_age = by_age.fillna(0) # with 0s rather than NaNs
+    ages, avg_hours = inequality.group_means(cps['hours'].values,
+                                             cps['wtsupp'].values,
+                                             cps['age'].values)
+    labor_dist_out = labor_moments_by_age(avg_hours, S)
+
+    return labor_dist_out
 
-    by_age['hours_wgt'] = cps.groupby(['age'])['hours_wgt'].sum()
-    by_age['wgt'] = cps.groupby(['age'])['wtsupp'].sum()
-    by_age['avg_hours'] = by_age['hours_wgt']/by_age['wgt']
 
+def labor_moments_by_age(avg_hours, S):
+    '''
+    ------------------------------------------------------------------------
+    Computes the labor moments from average hours by age, for one or more
+    weightings of the data (e.g., bootstrap replications)
+    ------------------------------------------------------------------------
+    Inputs:
+        avg_hours = [60,] vector or [M,60] array, average hours worked by
+                    age in the data
+        S         = integer, number of model periods
+    Objects created in the function:
+        frac_work       = [60,] or [M,60] array, fraction of time endowment
+                          worked by age
+        slope           = scalar or [M,] vector, slope of frac_work over
+                          the last 15 ages
+        labor_dist_data = [80,] or [M,80] array, fraction of time endowment
+                          worked by age, extended to 80 ages
+
+    Returns:
+        [S,] or [M,S] array of labor moments
+    ------------------------------------------------------------------------
+    '''
     # get fraction of time endowment worked (assume time
     # endowment is 24 hours minus required time to sleep)
-    by_age['frac_work'] = by_age['avg_hours']/(365*16.)
+    frac_work = avg_hours/(365*16.)
 
     # Data have sufficient obs through age  80
     # Fit a line to the last few years of the average labor participation which extends from
     # ages 76 to 100.
-    slope = (by_age['frac_work'][-1] - by_age['frac_work'][-15]) / (15.)
+    slope = (frac_work[..., -1] - frac_work[..., -15]) / (15.)
     # intercept = by_age['frac_work'][-1] - slope*len(by_age['frac_work'])
     # extension = slope * (np.linspace(56, 80, 23)) + intercept
     # to_dot = slope * (np.linspace(45, 56, 11)) + intercept
 
-    labor_dist_data = np.zeros(80)
-    labor_dist_data[:60] = by_age['frac_work']
-    labor_dist_data[60:] = by_age['frac_work'][-1] + slope*xrange(20)
+    labor_dist_data = np.zeros(frac_work.shape[:-1] + (80,))
+    labor_dist_data[..., :60] = frac_work
+    labor_dist_data[..., 60:] = (frac_work[..., -1:] +
+                                 np.asarray(slope)[..., None]*np.arange(20))
 
     # the above computes moments if the model period is a year
     # the following adjusts those moments in case it is smaller
-    labor_dist_out = filter.uniform_filter(labor_dist_data,size=int(80/S))[::int(80/S)]
+    labor_dist_out = filter.uniform_filter1d(
+        labor_dist_data, size=int(80/S), axis=-1)[..., ::int(80/S)]
 
     return labor_dist_out
 
@@ -138,17 +168,23 @@ def VCV_moments(cps, n, bin_weights, S):
             J           = number of ability groups (scalar)
         Objects created in the function:
             labor_moments_boot = [n,S] array, bootstrapped labor moments
-            boot = pandas DF, boostrapped dataframe
+            boot = [chunk,N] boolean array, observations in each replication
             VCV  = [S,S] array, variance-covariance matrix of labor moments
         Output:
             VCV
 
     ------------------------------------------------------------------------
     '''
+    # each replication keeps the weights of the observations in it and
+    # gives the rest zero weight
     labor_moments_boot = np.zeros((n,S))
-    for i in range(n):
-        boot = cps[np.random.randint(2, size=len(cps.index)).astype(bool)]
-        labor_moments_boot[i,:] = compute_labor_moments(boot, S)
+    for i in range(0, n, BOOT_CHUNK):
+        chunk = min(BOOT_CHUNK, n - i)
+        boot = np.random.randint(2, size=(chunk, len(cps.index))).astype(bool)
+        ages, avg_hours = inequality.group_means(
+            cps['hours'].values, cps['wtsupp'].values * boot,
+            cps['age'].values)
+        labor_moments_boot[i:i+chunk,:] = labor_moments_by_age(avg_hours, S)
 
     VCV = np.cov(labor_moments_boot.T)
 
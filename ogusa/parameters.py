@@ -136,7 +136,7 @@ def get_parameters_from_file():
         return j
 
 
-def get_parameters(test=False, baseline=False, guid='', user_modifiable=False, metadata=False):
+def get_parameters(test=False, baseline=False, guid='', user_modifiable=False, metadata=False, S=None):
     '''
     --------------------------------------------------------------------
     This function returns the model parameters.
@@ -149,6 +149,10 @@ def get_parameters(test=False, baseline=False, guid='', user_modifiable=False, m
     user_modifiable = boolean, =True if allow user modifiable parameters
     metadata        = boolean, =True if use metadata file for parameter
                        values (rather than what is entered in parameters below)
+    S               = integer, number of economically active periods an
+                       individual lives, if None use 40 for test runs and
+                       80 otherwise (e.g., a smaller S gives the coarse grid
+                       in a coarse-to-fine solution)
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
     read_tax_func_estimate()
@@ -270,7 +274,8 @@ def get_parameters(test=False, baseline=False, guid='', user_modifiable=False, m
     # Model Parameters
     if test:
         # size of state space
-        S = int(40)
+        if S is None:
+            S = int(40)
         lambdas = np.array([0.6,0.4])
         J = lambdas.shape[0]
         # Simulation Parameters
@@ -283,7 +288,8 @@ def get_parameters(test=False, baseline=False, guid='', user_modifiable=False, m
         nu = .4
         flag_graphs = False
     else:
-        S = int(80)
+        if S is None:
+            S = int(80)
         lambdas = np.array([0.25, 0.25, 0.2, 0.1, 0.1, 0.09, 0.01])
         J = lambdas.shape[0]
         # Simulation Parameters
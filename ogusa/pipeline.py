@@ -0,0 +1,325 @@
+'''
+------------------------------------------------------------------------
+Stage-level artifact store for the runs in scripts/execute.py.
+
+A run of the model is a chain of stages: the estimation of the tax
+functions, the steady state and the transition path.  The output
+(artifact) of each stage is saved under a fingerprint of everything the
+stage depends on: its parameters, the artifacts of the stages before it
+(through the parameters they give), and the code.  A stage whose
+fingerprint already has an artifact is loaded rather than run again, so,
+for example, a change to the Frisch elasticity reuses the tax functions
+and only solves the SS and TPI again.
+
+Artifacts are saved in <artifact_dir>/<stage>/<fingerprint>.pkl.  The
+same directory can be shared by runs with different parameters.
+
+In a dry run, stages with an artifact are loaded as usual, and the run
+stops at the first stage that would be run.  The stages after it depend
+on its artifact, so they would also be run.
+
+A stage whose solver ran out of its wall-clock or evaluation budget
+(see records.SolverConfig) returns its best iterate, flagged as not
+converged.  That artifact is saved in <artifact_dir>/<stage>/
+<fingerprint>.partial.pkl, where it is not loaded as the artifact of
+the stage, and the run stops, so the stage can be run again with other
+settings of the solvers (which give another fingerprint).
+
+This file calls the following files:
+    utils.py
+------------------------------------------------------------------------
+'''
+
+# Packages
+import os
+import cPickle as pickle
+import numpy as np
+import scipy
+
+import utils
+
+
+'''
+Set version of the artifact format, increase to invalidate all saved
+artifacts
+'''
+PIPELINE_VERSION = 1
+
+'''
+Set status of a stage in the report of a run
+'''
+CACHED = 'cached'
+RUN = 'run'
+EXHAUSTED = 'budget exhausted'
+
+'''
+Set file name suffix of the artifacts of stages whose budget ran out
+'''
+PARTIAL_SUFFIX = '.partial.pkl'
+
+# fingerprint of the code, computed once per process
+_CODE_VERSION = None
+
+
+def code_version():
+    '''
+    Fingerprint of the code that computes the artifacts: the source of
+    the ogusa package (other than the tests) and the versions of the
+    packages it uses.
+
+    Inputs: None
+
+    Functions called:
+        utils.fingerprint()
+
+    Objects in function:
+        package_dir = string, directory of the ogusa package
+        sources     = list, (path, source) of each Python file
+
+    Returns: string, fingerprint of the code
+    '''
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        sources = []
+        for dir_path, dir_names, file_names in os.walk(package_dir):
+            dir_names[:] = sorted(d for d in dir_names if d != 'tests')
+            for file_name in sorted(file_names):
+                if file_name.endswith('.py'):
+                    path = os.path.join(dir_path, file_name)
+                    with open(path, 'rb') as f:
+                        sources.append((os.path.relpath(path, package_dir),
+                                        f.read()))
+        try:
+            import taxcalc
+            taxcalc_version = getattr(taxcalc, '__version__', None)
+        except ImportError:
+            taxcalc_version = None
+        _CODE_VERSION = utils.fingerprint(sources, np.__version__,
+                                          scipy.__version__,
+                                          taxcalc_version)
+
+    return _CODE_VERSION
+
+
+def new_pipeline(artifact_dir, label='', dry_run=False):
+    '''
+    Creates the record of the stages of one run.
+
+    Inputs:
+        artifact_dir = string, directory of the artifacts
+        label        = string, name of the run in the report (e.g., its
+                       output directory)
+        dry_run      = boolean, =True to stop at the first stage that
+                       would be run rather than running it
+
+    Functions called: None
+
+    Objects in function:
+        pipeline = dictionary, the inputs, the stages reported so far
+                   (stages, a list of (label, stage, fingerprint,
+                   status)), and whether the run has stopped
+
+    Returns: pipeline
+    '''
+    pipeline = {'artifact_dir': artifact_dir, 'label': label,
+                'dry_run': dry_run, 'stages': [], 'stopped': False}
+
+    return pipeline
+
+
+def stage_fingerprint(stage, inputs):
+    '''
+    Fingerprint of a stage, from its name, its inputs and the code.
+
+    Inputs:
+        stage  = string, name of the stage
+        inputs = tuple, everything the artifact of the stage depends on
+
+    Functions called:
+        code_version()
+        utils.fingerprint()
+
+    Objects in function: None
+
+    Returns: string, fingerprint
+    '''
+    return utils.fingerprint(PIPELINE_VERSION, code_version(), stage, inputs)
+
+
+def budget_exhausted(artifact):
+    '''
+    Whether the solver of a stage ran out of its budget, from the flag
+    in its output (the SS output, or the first output of TPI).
+
+    Inputs:
+        artifact = artifact of a stage
+
+    Functions called: None
+
+    Objects in function:
+        output = dictionary, output of the solver, if any
+
+    Returns: string, 'time' or 'evaluations' if the budget ran out,
+             otherwise None
+    '''
+    output = artifact[0] if isinstance(artifact, tuple) else artifact
+    if not isinstance(output, dict):
+        return None
+
+    return output.get('budget_exhausted')
+
+
+def run_stage(pipeline, stage, inputs, func):
+    '''
+    Loads the artifact of a stage if one was saved with the same
+    fingerprint, otherwise computes and saves it.  In a dry run, a stage
+    that would be computed is reported and the run is stopped.  If the
+    solver of the stage runs out of its budget, its artifact is saved
+    apart (see above), the stage is reported as EXHAUSTED and the run is
+    stopped.
+
+    Inputs:
+        pipeline = dictionary, from new_pipeline()
+        stage    = string, name of the stage
+        inputs   = tuple, everything the artifact of the stage depends on
+        func     = function, computes the artifact, func()
+
+    Functions called:
+        stage_fingerprint()
+        budget_exhausted()
+        utils.atomic_pickle_dump()
+
+    Objects in function:
+        key  = string, fingerprint of the stage
+        path = string, path of the artifact
+
+    Returns: artifact, or None if the run has stopped
+    '''
+    if pipeline['stopped']:
+        return None
+    key = stage_fingerprint(stage, inputs)
+    path = os.path.join(pipeline['artifact_dir'], stage, key + '.pkl')
+    if os.path.exists(path):
+        print 'Stage', stage, 'is up to date, loading', path
+        pipeline['stages'].append((pipeline['label'], stage, key, CACHED))
+        return pickle.load(open(path, 'rb'))
+
+    pipeline['stages'].append((pipeline['label'], stage, key, RUN))
+    if pipeline['dry_run']:
+        pipeline['stopped'] = True
+        return None
+    print 'Running stage', stage
+    artifact = func()
+    reason = budget_exhausted(artifact)
+    if reason is not None:
+        print 'Stage', stage, 'ran out of its', reason, 'budget, stopping'
+        path = os.path.join(pipeline['artifact_dir'], stage,
+                            key + PARTIAL_SUFFIX)
+        pipeline['stages'][-1] = (pipeline['label'], stage, key, EXHAUSTED)
+        pipeline['stopped'] = True
+    utils.atomic_pickle_dump(artifact, path)
+
+    return artifact
+
+
+def file_stamp(path):
+    '''
+    Identifies an input file that is read by a stage (e.g., the micro
+    data of the tax functions) by its path, size and time of last
+    modification, so its fingerprint changes with the file without
+    reading it.
+
+    Inputs:
+        path = string, path of the file
+
+    Functions called: None
+
+    Objects in function:
+        stat = stat result of the file
+
+    Returns: tuple, (absolute path, size, modification time), with size
+             and modification time None if the file does not exist
+    '''
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        return (path, None, None)
+    stat = os.stat(path)
+
+    return (path, stat.st_size, stat.st_mtime)
+
+
+def missing_input(pipeline, path):
+    '''
+    Checks, in a dry run, for a file that the next stage reads but
+    another run writes (e.g., the baseline SS of a reform).  If it is
+    not there yet, the run is stopped, so the stage and the ones after
+    it are reported as would run.
+
+    Inputs:
+        pipeline = dictionary, from new_pipeline()
+        path     = string, path of the file
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: boolean, =True if the run has stopped
+    '''
+    if pipeline['dry_run'] and not os.path.exists(path):
+        print 'Dry run stops before', path, 'is there'
+        pipeline['stopped'] = True
+
+    return pipeline['stopped']
+
+
+def add_stages(pipeline, stages):
+    '''
+    Adds the stages of another run (e.g., the coarse grid run before
+    the full one) to the report.  If that run stopped, so does this one.
+
+    Inputs:
+        pipeline = dictionary, from new_pipeline()
+        stages   = list, stages reported by the other run
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: N/A, pipeline is updated in place
+    '''
+    pipeline['stages'].extend(stages)
+    if pipeline['dry_run'] and any(status == RUN for _, _, _, status
+                                   in stages):
+        pipeline['stopped'] = True
+
+
+def finish(pipeline, planned_stages):
+    '''
+    Reports the stages of a run, including the stages that were not
+    reached because a dry run stopped before them.
+
+    Inputs:
+        pipeline       = dictionary, from new_pipeline()
+        planned_stages = list, names of all stages of the run, in order
+
+    Functions called: None
+
+    Objects in function:
+        reported = set, stages of this run already reported
+
+    Returns: list, (label, stage, fingerprint, status) of each stage,
+             with fingerprint None for the stages that were not reached
+    '''
+    reported = set(stage for label, stage, _, _ in pipeline['stages']
+                   if label == pipeline['label'])
+    for stage in planned_stages:
+        if stage not in reported:
+            pipeline['stages'].append((pipeline['label'], stage, None, RUN))
+    if pipeline['dry_run']:
+        print 'Dry run of', pipeline['label']
+        for label, stage, key, status in pipeline['stages']:
+            print '\t', label, stage, ':', ('would run' if status == RUN
+                                            else 'up to date'), key
+
+    return pipeline['stages']
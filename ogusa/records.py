@@ -0,0 +1,116 @@
+'''
+------------------------------------------------------------------------
+Named records for the parameters passed between the functions of SS.py
+and TPI.py, and for the settings of the solvers.
+
+The records are namedtuples, so they can still be unpacked by position
+as the plain tuples and lists they replace, but their fields can also
+be read by name.  Like tuples, they cannot be changed in place: use
+_replace() to make a copy with some fields changed.  This lets several
+solves with different settings run at once in one process.
+
+This file calls the following files:
+    None
+------------------------------------------------------------------------
+'''
+
+# Packages
+from collections import namedtuple
+
+
+'''
+------------------------------------------------------------------------
+    Field names, in the order they are unpacked in SS.py and TPI.py
+------------------------------------------------------------------------
+'''
+SS_PARAM_NAMES = ['J', 'S', 'T', 'BW', 'beta', 'sigma', 'alpha', 'gamma',
+                  'epsilon', 'Z', 'delta', 'ltilde', 'nu', 'g_y', 'g_n_ss',
+                  'tau_payroll', 'tau_bq', 'rho', 'omega_SS',
+                  'budget_balance', 'alpha_T', 'debt_ratio_ss', 'tau_b',
+                  'delta_tau', 'lambdas', 'imm_rates', 'e', 'retire',
+                  'mean_income_data', 'h_wealth', 'p_wealth', 'm_wealth',
+                  'b_ellipse', 'upsilon']
+TPI_PARAM_NAMES = ['J', 'S', 'T', 'BW', 'beta', 'sigma', 'alpha', 'gamma',
+                   'epsilon', 'Z', 'delta', 'ltilde', 'nu', 'g_y',
+                   'g_n_vector', 'tau_payroll', 'tau_bq', 'rho', 'omega',
+                   'N_tilde', 'lambdas', 'imm_rates', 'e', 'retire',
+                   'mean_income_data', 'factor', 'h_wealth', 'p_wealth',
+                   'm_wealth', 'b_ellipse', 'upsilon', 'chi_b', 'chi_n',
+                   'theta']
+INCOME_TAX_PARAM_NAMES = ['analytical_mtrs', 'etr_params', 'mtrx_params',
+                          'mtry_params']
+CHI_PARAM_NAMES = ['chi_b', 'chi_n']
+SS_SMALL_OPEN_PARAM_NAMES = ['small_open', 'ss_firm_r', 'ss_hh_r']
+TPI_SMALL_OPEN_PARAM_NAMES = ['small_open', 'tpi_firm_r', 'tpi_hh_r']
+SS_ITERATIVE_PARAM_NAMES = ['maxiter', 'mindist_SS']
+TPI_ITERATIVE_PARAM_NAMES = ['maxiter', 'mindist_SS', 'mindist_TPI']
+INITIAL_VALUE_NAMES = ['B0', 'b_sinit', 'b_splus1init', 'factor',
+                       'initial_b', 'initial_n', 'omega_S_preTP',
+                       'initial_debt']
+BIZ_TAX_PARAM_NAMES = ['tau_b', 'delta_tau']
+SOLVER_CONFIG_NAMES = ['enforce_solution_checks', 'minimizer_tol',
+                       'minimizer_tol_max', 'minimizer_tol_scale',
+                       'fsolve_num_workers', 'household_solver',
+                       'household_state_tol', 'max_seconds', 'max_evals']
+
+
+'''
+------------------------------------------------------------------------
+    Records
+------------------------------------------------------------------------
+SSParams           = parameters of the steady state (from
+                     SS.create_steady_state_parameters)
+TPIParams          = parameters of the time path (from
+                     TPI.create_tpi_params)
+IncomeTaxParams    = parameters of the income tax functions
+ChiParams          = utility weights on bequests and labor supply
+SSSmallOpenParams  = small open economy settings, with the interest
+                     rates faced by firms and households in the SS
+TPISmallOpenParams = small open economy settings, with the paths of the
+                     interest rates faced by firms and households
+SSIterativeParams  = maximum iterations and tolerance of the SS
+TPIIterativeParams = maximum iterations and tolerances of TPI
+InitialValues      = initial values of the time path
+BizTaxParams       = business tax parameters
+SolverConfig       = settings of the solvers (see SS.get_solver_config
+                     and TPI.get_solver_config):
+    enforce_solution_checks = boolean, =True to raise an error if a
+                              solution is not found or violates the
+                              resource constraint
+    minimizer_tol           = scalar, tolerance for the household
+                              problems once the outer loop has converged
+    minimizer_tol_max       = scalar, loosest tolerance for the
+                              household problems
+    minimizer_tol_scale     = scalar, ratio of the tolerance for the
+                              household problems to the distance of the
+                              outer loop
+    fsolve_num_workers      = integer, number of processes evaluating
+                              the Jacobian of the outer loop of the SS
+    household_solver        = string, 'fsolve' or 'banded', solver for
+                              the lifetimes of the household problems of
+                              TPI (see TPI.solve_lifetime)
+    household_state_tol     = scalar, largest Euler error for which
+                              household solutions are carried across
+                              evaluations of the SS outer loop
+    max_seconds             = scalar, wall-clock budget of a solve in
+                              seconds, None for no limit
+    max_evals               = integer, budget of evaluations of the
+                              outer loop (residuals of the SS, iterations
+                              of TPI), None for no limit.  When a budget
+                              runs out, the solve returns its best
+                              iterate so far, flagged as not converged
+------------------------------------------------------------------------
+'''
+SSParams = namedtuple('SSParams', SS_PARAM_NAMES)
+TPIParams = namedtuple('TPIParams', TPI_PARAM_NAMES)
+IncomeTaxParams = namedtuple('IncomeTaxParams', INCOME_TAX_PARAM_NAMES)
+ChiParams = namedtuple('ChiParams', CHI_PARAM_NAMES)
+SSSmallOpenParams = namedtuple('SSSmallOpenParams', SS_SMALL_OPEN_PARAM_NAMES)
+TPISmallOpenParams = namedtuple('TPISmallOpenParams',
+                                TPI_SMALL_OPEN_PARAM_NAMES)
+SSIterativeParams = namedtuple('SSIterativeParams', SS_ITERATIVE_PARAM_NAMES)
+TPIIterativeParams = namedtuple('TPIIterativeParams',
+                                TPI_ITERATIVE_PARAM_NAMES)
+InitialValues = namedtuple('InitialValues', INITIAL_VALUE_NAMES)
+BizTaxParams = namedtuple('BizTaxParams', BIZ_TAX_PARAM_NAMES)
+SolverConfig = namedtuple('SolverConfig', SOLVER_CONFIG_NAMES)
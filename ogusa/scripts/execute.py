@@ -15,11 +15,13 @@ ogusa.parameters.DATASET = 'REAL'
 
 def runner(output_base, baseline_dir, test=False, time_path=True, baseline=False,
   analytical_mtrs=False, age_specific=False, reform={}, user_params={},
-  guid='', run_micro=True, small_open=False, budget_balance=False, baseline_spending=False):
+  guid='', run_micro=True, small_open=False, budget_balance=False, baseline_spending=False,
+  warm_start_dir=None, S=None, coarse_S=None, linear_TPI=False, solver_config=None,
+  resume=False, artifact_dir=None, dry_run=False):
 
     #from ogusa import parameters, wealth, labor, demographics, income
     from ogusa import parameters, demographics, income, utils
-    from ogusa import txfunc
+    from ogusa import txfunc, get_micro_data
 
     tick = time.time()
     
@@ -43,11 +45,58 @@ def runner(output_base, baseline_dir, test=False, time_path=True, baseline=False
         except OSError as oe:
             pass
 
+    # If artifact_dir is given, the tax functions, SS and TPI are loaded
+    # from there when their inputs have not changed (see pipeline.py),
+    # and the stages of the run are returned
+    if artifact_dir is not None:
+        from ogusa import pipeline
+        artifacts = pipeline.new_pipeline(artifact_dir, output_base, dry_run)
+        planned_stages = ((['txfunc'] if run_micro else []) + ['SS'] +
+                          (['TPI'] if time_path else []))
+    else:
+        artifacts = None
+
     if run_micro:
-        txfunc.get_tax_func_estimate(baseline=baseline, analytical_mtrs=analytical_mtrs, age_specific=age_specific,
-                                     start_year=user_params['start_year'], reform=reform, guid=guid)
+        if artifacts is None:
+            txfunc.get_tax_func_estimate(baseline=baseline, analytical_mtrs=analytical_mtrs, age_specific=age_specific,
+                                         start_year=user_params['start_year'], reform=reform, guid=guid)
+        else:
+            start_year = user_params['start_year']
+            # the tax functions also depend on the micro data they are
+            # estimated from
+            micro_data = pipeline.file_stamp(get_micro_data.RECORDS_DATA)
+            dict_params = pipeline.run_stage(
+                artifacts, 'txfunc', (baseline, analytical_mtrs, age_specific, start_year, reform, micro_data),
+                lambda: txfunc.tax_func_estimate(start_year, baseline, analytical_mtrs, age_specific, reform))
+            if artifacts['stopped']:
+                return pipeline.finish(artifacts, planned_stages)
+            # parameters.get_parameters() reads the tax functions from here
+            pickle.dump(dict_params, open(txfunc.get_tax_func_path(baseline, guid), "wb"))
+    if coarse_S is not None:
+        # Solve the model on a coarser grid of ages first and use the
+        # interpolated solution as initial guesses on the full grid.
+        # For reforms, the coarse baseline should have been run the same way.
+        coarse_output_base = os.path.join(output_base, "COARSE")
+        coarse_baseline_dir = os.path.join(baseline_dir, "COARSE")
+        coarse_stages = runner(coarse_output_base, coarse_baseline_dir, test=test, time_path=time_path,
+               baseline=baseline, analytical_mtrs=analytical_mtrs,
+               age_specific=age_specific, reform=reform, user_params=user_params,
+               guid=guid, run_micro=False, small_open=small_open,
+               budget_balance=budget_balance, baseline_spending=baseline_spending,
+               S=coarse_S, solver_config=solver_config, resume=resume,
+               artifact_dir=artifact_dir, dry_run=dry_run)
+        if artifacts is not None:
+            pipeline.add_stages(artifacts, coarse_stages)
+            if artifacts['stopped']:
+                return pipeline.finish(artifacts, planned_stages)
+        if baseline:
+            coarse_ss_dir = os.path.join(coarse_baseline_dir, "SS/SS_vars.pkl")
+        else:
+            coarse_ss_dir = os.path.join(coarse_output_base, "SS/SS_vars.pkl")
+        ss_coarse = pickle.load(open(coarse_ss_dir, "rb"))
+
     print 'In runner, baseline is ', baseline
-    run_params = ogusa.parameters.get_parameters(test=test, baseline=baseline, guid=guid)
+    run_params = ogusa.parameters.get_parameters(test=test, baseline=baseline, guid=guid, S=S)
     run_params['analytical_mtrs'] = analytical_mtrs
     run_params['small_open'] = small_open
     run_params['budget_balance'] = budget_balance
@@ -85,7 +134,7 @@ def runner(output_base, baseline_dir, test=False, time_path=True, baseline=False
             G_shifts = np.concatenate((user_params['G_shifts'], np.zeros(run_params['ALPHA_G'].size - user_params['G_shifts'].size)), axis=0)
             run_params['ALPHA_G'] = run_params['ALPHA_G'] + G_shifts
 
-    from ogusa import SS, TPI
+    from ogusa import SS, TPI, TPI_linear
 
     calibrate_model = False
     # List of parameter names that will not be changing (unless we decide to
@@ -119,8 +168,31 @@ def runner(output_base, baseline_dir, test=False, time_path=True, baseline=False
     sim_params['run_params'] = run_params
     income_tax_params, ss_parameters, iterative_params, chi_params, small_open_params = SS.create_steady_state_parameters(**sim_params)
 
-    ss_outputs = SS.run_SS(income_tax_params, ss_parameters, iterative_params, chi_params, small_open_params, baseline, baseline_spending,
-                                     baseline_dir=baseline_dir)
+    ss_init_guesses = None
+    if coarse_S is not None:
+        ss_init_guesses = SS.interp_coarse_guesses(ss_coarse, run_params['S'])
+
+    def solve_ss():
+        return SS.run_SS(income_tax_params, ss_parameters, iterative_params, chi_params, small_open_params, baseline, baseline_spending,
+                         baseline_dir=baseline_dir, init_guesses=ss_init_guesses,
+                         solver_config=solver_config)
+
+    if artifacts is None:
+        ss_outputs = solve_ss()
+    else:
+        # a reform SS also depends on the baseline SS
+        baseline_ss = None
+        if not baseline:
+            baseline_ss_dir = os.path.join(baseline_dir, "SS/SS_vars.pkl")
+            if pipeline.missing_input(artifacts, baseline_ss_dir):
+                return pipeline.finish(artifacts, planned_stages)
+            baseline_ss = pickle.load(open(baseline_ss_dir, "rb"))
+        ss_inputs = (income_tax_params, ss_parameters, iterative_params, chi_params, small_open_params,
+                     baseline, baseline_spending, baseline_ss, ss_init_guesses,
+                     solver_config if solver_config is not None else SS.get_solver_config())
+        ss_outputs = pipeline.run_stage(artifacts, 'SS', ss_inputs, solve_ss)
+        if artifacts['stopped']:
+            return pipeline.finish(artifacts, planned_stages)
 
     '''
     ------------------------------------------------------------------------
@@ -136,6 +208,12 @@ def runner(output_base, baseline_dir, test=False, time_path=True, baseline=False
         ss_dir = os.path.join(output_base, "SS/SS_vars.pkl")
         pickle.dump(ss_outputs, open(ss_dir, "wb"))
 
+    if time_path and ss_outputs['budget_exhausted'] is not None:
+        # The SS is the best iterate of a solve that ran out of its
+        # budget, so it is saved to be rerun rather than used for TPI
+        print 'SS ran out of its', ss_outputs['budget_exhausted'], 'budget, not running TPI'
+        time_path = False
+
     if time_path:
         '''
         ------------------------------------------------------------------------
@@ -148,11 +226,57 @@ def runner(output_base, baseline_dir, test=False, time_path=True, baseline=False
         sim_params['input_dir'] = output_base
         sim_params['baseline_dir'] = baseline_dir
 
+        # with baseline spending, the TPI of a reform reads the baseline TPI
+        if (artifacts is not None and baseline_spending and
+                pipeline.missing_input(artifacts, os.path.join(baseline_dir, "TPI/TPI_vars.pkl"))):
+            return pipeline.finish(artifacts, planned_stages)
 
         income_tax_params, tpi_params, iterative_params, small_open_params, initial_values, SS_values, fiscal_params, biz_tax_params = TPI.create_tpi_params(**sim_params)
 
-        tpi_output, macro_output = TPI.run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params, initial_values, 
-                                               SS_values, fiscal_params, biz_tax_params, output_dir=output_base, baseline_spending=baseline_spending)
+        tpi_init_guesses = None
+        if coarse_S is not None and warm_start_dir is None and not linear_TPI:
+            coarse_tpi_dir = os.path.join(coarse_output_base, "TPI/TPI_vars.pkl")
+            tpi_coarse = pickle.load(open(coarse_tpi_dir, "rb"))
+            tpi_init_guesses = TPI.interp_coarse_guesses(tpi_coarse, ss_coarse, ss_outputs,
+                                                         run_params['T'], run_params['S'])
+
+        def solve_tpi():
+            init_guesses = tpi_init_guesses
+            tpi_linear_output = None
+            if linear_TPI:
+                # Solve for the linearized transition path, which is also
+                # used as the initial guess for the nonlinear solution
+                tpi_linear_output, tpi_linear_macro = TPI_linear.run_TPI_linear(
+                    income_tax_params, tpi_params, iterative_params, small_open_params,
+                    initial_values, SS_values, fiscal_params, biz_tax_params,
+                    baseline_spending=baseline_spending)
+                init_guesses = tpi_linear_output
+            tpi_output, macro_output = TPI.run_TPI(income_tax_params, tpi_params, iterative_params, small_open_params, initial_values,
+                                                   SS_values, fiscal_params, biz_tax_params, output_dir=output_base, baseline_spending=baseline_spending,
+                                                   warm_start_dir=warm_start_dir, init_guesses=init_guesses,
+                                                   solver_config=solver_config, resume=resume)
+            return tpi_output, macro_output, tpi_linear_output
+
+        if artifacts is None:
+            tpi_output, macro_output, tpi_linear_output = solve_tpi()
+        else:
+            warm_start = None
+            if warm_start_dir is not None:
+                warm_start = pickle.load(open(os.path.join(warm_start_dir, "TPI/TPI_vars.pkl"), "rb"))
+            tpi_inputs = (income_tax_params, tpi_params, iterative_params, small_open_params, initial_values,
+                          SS_values, fiscal_params, biz_tax_params, baseline_spending, linear_TPI,
+                          tpi_init_guesses, warm_start,
+                          solver_config if solver_config is not None else TPI.get_solver_config())
+            tpi_artifact = pipeline.run_stage(artifacts, 'TPI', tpi_inputs, solve_tpi)
+            if artifacts['stopped']:
+                return pipeline.finish(artifacts, planned_stages)
+            tpi_output, macro_output, tpi_linear_output = tpi_artifact
+
+        if tpi_linear_output is not None:
+            tpi_dir = os.path.join(output_base, "TPI")
+            utils.mkdirs(tpi_dir)
+            tpi_vars = os.path.join(tpi_dir, "TPI_linear_vars.pkl")
+            pickle.dump(tpi_linear_output, open(tpi_vars, "wb"))
 
         '''
         ------------------------------------------------------------------------
@@ -172,3 +296,6 @@ def runner(output_base, baseline_dir, test=False, time_path=True, baseline=False
 
         print "Time path iteration complete."
     print "It took {0} seconds to get that part done.".format(time.time() - tick)
+
+    if artifacts is not None:
+        return pipeline.finish(artifacts, planned_stages)
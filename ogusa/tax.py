@@ -60,6 +60,27 @@ def replacement_rate_vals(nssmat, wss, factor_ss, params):
     return theta
 
 
+def get_year_params(params):
+    '''
+    Collapses tax function parameters that do not vary by age (e.g., when
+    tax functions are estimated with age_specific=False, in which case
+    the same function is repeated for every age) into a table that varies
+    by year only.
+    Inputs:
+        params      = [S,BW,#tax params] array, tax function parameters
+    Functions called: None
+    Objects in function:
+        year_params = [BW,#tax params] array, tax function parameters by
+                      year, None if parameters vary by age
+    Returns: year_params
+    '''
+    if (params == params[:1, :, :]).all():
+        year_params = params[0, :, :]
+    else:
+        year_params = None
+    return year_params
+
+
 def tau_wealth(b, params):
     '''
     Calculates the effective tax rate on wealth.
@@ -0,0 +1,49 @@
+import os
+import pytest
+import cPickle as pickle
+from ogusa import parameters, SS, TPI
+
+
+# Parameters passed to the model, as in ogusa/scripts/execute.py
+PARAM_NAMES = ['S', 'J', 'T', 'BW', 'lambdas', 'starting_age', 'ending_age',
+               'beta', 'sigma', 'alpha', 'gamma', 'epsilon', 'nu', 'Z',
+               'delta', 'E', 'ltilde', 'g_y', 'maxiter', 'mindist_SS',
+               'mindist_TPI', 'analytical_mtrs', 'b_ellipse', 'k_ellipse',
+               'upsilon', 'small_open', 'budget_balance', 'ss_firm_r',
+               'ss_hh_r', 'tpi_firm_r', 'tpi_hh_r', 'tG1', 'tG2', 'alpha_T',
+               'alpha_G', 'ALPHA_T', 'ALPHA_G', 'rho_G', 'debt_ratio_ss',
+               'tau_b', 'delta_tau', 'chi_b_guess', 'chi_n_guess',
+               'etr_params', 'mtrx_params', 'mtry_params', 'tau_payroll',
+               'tau_bq', 'retire', 'mean_income_data', 'g_n_vector',
+               'h_wealth', 'p_wealth', 'm_wealth', 'omega', 'g_n_ss',
+               'omega_SS', 'surv_rate', 'imm_rates', 'e', 'rho',
+               'initial_debt', 'omega_S_preTP']
+
+
+@pytest.fixture
+def small_tpi_params(tmpdir):
+    """
+        Parameters of the transition path of the test-sized baseline,
+        whose steady state is solved and saved in tmpdir
+    """
+    output_dir = str(tmpdir)
+    run_params = parameters.get_parameters(test=True, baseline=True,
+                                           guid='')
+    run_params.update({'analytical_mtrs': False, 'small_open': False,
+                       'budget_balance': False})
+    sim_params = dict((key, run_params[key]) for key in PARAM_NAMES)
+    sim_params['output_dir'] = output_dir
+    sim_params['run_params'] = run_params
+    (income_tax_params, ss_params, iterative_params, chi_params,
+     small_open_params) = SS.create_steady_state_parameters(**sim_params)
+    ss_output = SS.run_SS(income_tax_params, ss_params, iterative_params,
+                          chi_params, small_open_params, True,
+                          solver_config=SS.get_solver_config(
+                              enforce_solution_checks=False))
+    os.mkdir(os.path.join(output_dir, 'SS'))
+    pickle.dump(ss_output, open(os.path.join(output_dir, 'SS',
+                                             'SS_vars.pkl'), 'wb'))
+
+    sim_params.update({'baseline': True, 'baseline_spending': False,
+                       'input_dir': output_dir, 'baseline_dir': output_dir})
+    return TPI.create_tpi_params(**sim_params)
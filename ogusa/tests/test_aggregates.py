@@ -296,3 +296,17 @@ def test_revenue():
               tau_b, delta_tau)
     res = aggr.revenue(r, w, b, n, BQ, Y, L, K, factor, params)
     assert(np.allclose(res, test))
+
+    # case where I.ndim == 3 and tax functions vary by year only, should
+    # match the tiled [T,S,J,#tax params] array
+    year_params = etr_params[:, 0, 0, :]
+    tiled_params = np.tile(year_params.reshape(T, 1, 1, dim4), (1, S, J, 1))
+    params = (e, lambdas, omega, method, tiled_params, theta, tau_bq,
+              tau_payroll, h_wealth, p_wealth, m_wealth, retire, T, S, J,
+              tau_b, delta_tau)
+    res_tiled = aggr.revenue(r, w, b, n, BQ, Y, L, K, factor, params)
+    params = (e, lambdas, omega, method, year_params, theta, tau_bq,
+              tau_payroll, h_wealth, p_wealth, m_wealth, retire, T, S, J,
+              tau_b, delta_tau)
+    res = aggr.revenue(r, w, b, n, BQ, Y, L, K, factor, params)
+    assert(np.allclose(res, res_tiled))
@@ -82,6 +82,22 @@ def test_run_small():
     runner(output_base=output_base, baseline_dir=input_dir, test=True, time_path=True, baseline=True, user_params=user_params, run_micro=False, small_open=False, budget_balance=False)
 
 
+def test_dry_run_reform_before_baseline(tmpdir):
+    from ogusa.scripts.execute import runner
+    from ogusa import pipeline
+    # the baseline has not been run, so the SS and TPI of the reform
+    # would run, rather than the baseline SS failing to load
+    output_base = os.path.join(str(tmpdir), "OUTPUT_REFORM")
+    baseline_dir = os.path.join(str(tmpdir), "OUTPUT_BASELINE")
+    stages = runner(output_base=output_base, baseline_dir=baseline_dir,
+                    test=True, time_path=True, baseline=False,
+                    user_params={}, run_micro=False,
+                    artifact_dir=os.path.join(str(tmpdir), "artifacts"),
+                    dry_run=True)
+    assert [(stage, status) for _, stage, _, status in stages] == [
+        ('SS', pipeline.RUN), ('TPI', pipeline.RUN)]
+
+
 def test_compare_pickle_file_bad(picklefile1, picklefile2):
     from ogusa.utils import pickle_file_compare
     assert not pickle_file_compare(picklefile1.name, picklefile2.name)
@@ -172,6 +188,191 @@ def test_compare_dict_diff_ndarrays_relative():
                         rhs, tol=1e-3, relative=True)
 
 
+def test_inner_tol():
+    from ogusa.utils import inner_tol
+    assert inner_tol(10, 1e-5, 1e-13, 1e-6, 1e-3) == 1e-6
+    assert np.allclose(inner_tol(1e-4, 1e-5, 1e-13, 1e-6, 1e-3), 1e-7)
+    assert inner_tol(1e-12, 1e-5, 1e-13, 1e-6, 1e-3) == 1e-13
+    # once the outer loop has converged, use the final tolerance
+    assert inner_tol(1e-5, 1e-5, 1e-13, 1e-6, 1e-3) == 1e-13
+
+
+def test_household_state():
+    random_state = np.random.RandomState(10)
+    b_guess = np.ones((4, 2)) * 0.05
+    n_guess = np.ones((4, 2)) * 0.4
+    household_state = SS.init_household_state(b_guess, n_guess)
+    assert not household_state['warm']
+    # solutions that converged are kept
+    bssmat, nssmat = random_state.rand(4, 2), random_state.rand(4, 2)
+    SS.update_household_state(household_state, np.zeros((8, 2)),
+                              bssmat, nssmat)
+    assert household_state['warm']
+    assert np.array_equal(household_state['bssmat'], bssmat)
+    assert household_state['bssmat'] is not bssmat
+    # a failure resets to the initial guesses
+    SS.update_household_state(household_state, np.ones((8, 2)) * 1e-2,
+                              random_state.rand(4, 2), nssmat)
+    assert not household_state['warm']
+    assert np.array_equal(household_state['bssmat'], b_guess)
+    assert np.array_equal(household_state['nssmat'], n_guess)
+    SS.update_household_state(household_state, np.zeros((8, 2)),
+                              bssmat * np.nan, nssmat)
+    assert not household_state['warm']
+    assert household_state['num_resets'] == 2
+    # the tolerance can be given with the solver settings
+    SS.update_household_state(household_state, np.ones((8, 2)) * 1e-2,
+                              bssmat, nssmat, tol=0.1)
+    assert household_state['warm']
+
+
+def test_get_solver_config(monkeypatch):
+    solver_config = SS.get_solver_config()
+    assert solver_config.minimizer_tol == SS.MINIMIZER_TOL
+    assert solver_config.enforce_solution_checks == SS.ENFORCE_SOLUTION_CHECKS
+    # settings not given are read from the module constants when called
+    monkeypatch.setattr(SS, 'ENFORCE_SOLUTION_CHECKS', False)
+    assert not SS.get_solver_config().enforce_solution_checks
+    solver_config = TPI.get_solver_config(enforce_solution_checks=False,
+                                          minimizer_tol=1e-10)
+    assert not solver_config.enforce_solution_checks
+    assert solver_config.minimizer_tol == 1e-10
+    assert solver_config.minimizer_tol_max == TPI.MINIMIZER_TOL_MAX
+    # the module constants are unchanged
+    assert TPI.MINIMIZER_TOL != 1e-10
+    with pytest.raises(ValueError):
+        SS.get_solver_config(minimiser_tol=1e-10)
+    # the budgets are unlimited unless they are set
+    assert solver_config.max_seconds is None
+    assert SS.get_solver_config(max_evals=10).max_evals == 10
+
+
+def test_fingerprint():
+    from ogusa.utils import fingerprint
+    a = np.arange(6.0).reshape(2, 3)
+    params = (a, [0.5, 'SS'], {'T': 3})
+    assert fingerprint(*params) == fingerprint(a.copy(), [0.5, 'SS'],
+                                               {'T': 3})
+    assert fingerprint(*params) != fingerprint(a.reshape(3, 2),
+                                               [0.5, 'SS'], {'T': 3})
+    assert fingerprint(*params) != fingerprint(a, [0.5 + 1e-15, 'SS'],
+                                               {'T': 3})
+
+
+def test_atomic_pickle_dump(tmpdir):
+    from ogusa.utils import atomic_pickle_dump
+    path = os.path.join(str(tmpdir), 'TPI', 'checkpoint.pkl')
+    atomic_pickle_dump({'r': np.ones(3)}, path)
+    atomic_pickle_dump({'r': np.zeros(3)}, path)
+    assert np.array_equal(pickle.load(open(path, 'rb'))['r'], np.zeros(3))
+    # no temporary files are left behind
+    assert os.listdir(os.path.dirname(path)) == ['checkpoint.pkl']
+
+
+def test_load_checkpoint(tmpdir):
+    output_dir = str(tmpdir)
+    assert TPI.load_checkpoint(output_dir, 'abc') is None
+    TPI.save_checkpoint({'config_hash': 'abc', 'TPIiter': 3}, output_dir)
+    assert TPI.load_checkpoint(output_dir, 'abc')['TPIiter'] == 3
+    # checkpoints of runs with other parameters are not used
+    assert TPI.load_checkpoint(output_dir, 'abd') is None
+
+
+def fsolve_test_func(x, a):
+    return [x[0] ** 2 + x[1] - a, x[0] - x[1] ** 3 + 1.0]
+
+
+def test_fsolve_parallel():
+    import scipy.optimize as opt
+    from ogusa.utils import fsolve_parallel
+    x, infodict, ier, message = fsolve_parallel(fsolve_test_func,
+                                                [1.0, 1.0], args=(3.0,),
+                                                xtol=1e-10, num_workers=2)
+    x_fsolve = opt.fsolve(fsolve_test_func, [1.0, 1.0], args=(3.0,),
+                          xtol=1e-10)
+    assert ier == 1
+    assert np.allclose(x, x_fsolve)
+    assert np.allclose(infodict['fvec'], 0.0)
+
+
+def banded_test_func(x, a):
+    # equation i depends on x[i - 1], x[i] and x[i + 2]
+    f = 4.0 * x + 0.1 * x ** 3 - a
+    f[1:] -= x[:-1]
+    f[:-2] -= 0.5 * x[2:]
+    return f
+
+
+def test_fsolve_banded():
+    import scipy.optimize as opt
+    from ogusa.utils import fsolve_banded
+    a = np.linspace(1.0, 3.0, 30)
+    x, infodict, ier, message = fsolve_banded(banded_test_func,
+                                              np.ones(30), 1, 2,
+                                              args=(a,), xtol=1e-12)
+    x_fsolve = opt.fsolve(banded_test_func, np.ones(30), args=(a,),
+                          xtol=1e-12)
+    assert ier == 1
+    assert np.allclose(x, x_fsolve, rtol=1e-10)
+    assert np.allclose(infodict['fvec'], 0.0)
+    # each Jacobian takes as many evaluations as there are bands
+    assert infodict['nfev'] <= infodict['njev'] * 5 + 1
+
+
+def test_budget():
+    from ogusa import utils
+    budget = utils.init_budget(max_evals=3)
+    for x in [[1.0, 1.0], [1.5, 1.2], [3.0, 3.0]]:
+        utils.budgeted_residual(np.array(x), fsolve_test_func, budget, 3.0)
+    assert budget['num_evals'] == 3
+    assert len(budget['dist_history']) == 3
+    assert np.array_equal(budget['best_x'], [1.5, 1.2])
+    assert budget['best_dist'] == min(budget['dist_history'])
+    with pytest.raises(utils.BudgetExhausted):
+        utils.budgeted_residual(np.ones(2), fsolve_test_func, budget, 3.0)
+    assert budget['exhausted'] == 'evaluations'
+    budget = utils.init_budget(max_seconds=0.0)
+    assert utils.check_budget(budget) == 'time'
+    assert utils.check_budget(utils.init_budget()) is None
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_outer_fsolve_budget(num_workers):
+    from ogusa import utils
+    # without a budget that runs out, the solution is the same
+    budget = utils.init_budget(max_evals=1000)
+    x, infodict, ier, message = SS.outer_fsolve(
+        fsolve_test_func, [1.0, 1.0], 3.0, 1e-10, num_workers, budget)
+    x_fsolve = SS.outer_fsolve(fsolve_test_func, [1.0, 1.0], 3.0, 1e-10,
+                               num_workers)[0]
+    assert ier == 1
+    assert np.array_equal(x, x_fsolve)
+    assert budget['exhausted'] is None
+    # otherwise the best guesses so far are returned
+    budget = utils.init_budget(max_evals=4)
+    x, infodict, ier, message = SS.outer_fsolve(
+        fsolve_test_func, [1.0, 1.0], 3.0, 1e-10, num_workers, budget)
+    assert ier == 0
+    assert budget['exhausted'] == 'evaluations'
+    assert infodict['nfev'] == budget['num_evals'] <= 4
+    assert np.array_equal(x, budget['best_x'])
+    assert (np.absolute(fsolve_test_func(x, 3.0)).max() ==
+            min(budget['dist_history']))
+
+
+def test_interp_periods():
+    from ogusa.utils import interp_periods
+    # linear functions of the period midpoint are interpolated exactly
+    midp = (np.arange(10) + 0.5) / 10
+    x = np.tile((2.0 + 3.0 * midp).reshape(10, 1), (1, 2))
+    x_new = interp_periods(x, 20)
+    midp_new = (np.arange(20) + 0.5) / 20
+    assert x_new.shape == (20, 2)
+    assert np.allclose(x_new[1:-1, 0], 2.0 + 3.0 * midp_new[1:-1])
+    assert np.allclose(interp_periods(x.T, 20, axis=1), x_new.T)
+    assert np.allclose(interp_periods(x_new, 10)[1:-1], x[1:-1])
+
+
 def test_get_micro_data_get_calculator():
 
     reform = {
@@ -205,3 +406,92 @@ def test_get_micro_data_get_calculator():
                            reform=reform, data=TAXDATA,
                            weights=WEIGHTS, records_start_year=2009)
     assert calc2.current_year == 2017
+
+
+def test_compare_arrays_chunked():
+    from ogusa.utils import compare_arrays
+    random_state = np.random.RandomState(10)
+    a = random_state.rand(7, 9)
+    b = a.copy()
+    b[4, 2] += 0.5
+    b[1, 3] += 1e-4
+    a[6, 0] = b[6, 0] = np.nan
+    # the same summary whether the arrays are compared whole or in chunks
+    for chunk_size in (5, 63, 1000):
+        summary = compare_arrays(a, b, 1e-3, 0.0, chunk_size)
+        assert np.isclose(summary['max_abs_diff'], 0.5)
+        assert summary['location'] == (4, 2)
+        assert summary['n_outside'] == 1
+        assert np.isclose(summary['max_rel_diff'], 0.5 / b[4, 2])
+    # NaN on only one side is a difference
+    b[0, 0] = np.nan
+    assert compare_arrays(a, b, 1e-3, 0.0, 5)['location'] == (0, 0)
+
+
+def test_compare_results_mmap(tmpdir):
+    from ogusa.utils import (save_result_arrays, load_results,
+                             compare_results, compare_many,
+                             write_comparison_summary)
+    random_state = np.random.RandomState(10)
+    results = {'Kss': 1.5, 'bssmat': random_state.rand(8, 3),
+               'rpath': random_state.rand(20), 'label': 'baseline'}
+    other = dict(results, bssmat=results['bssmat'] + 1e-2, Kss=1.5 + 1e-5)
+    pickle.dump(results, open(os.path.join(str(tmpdir), 'run1.pkl'), 'wb'))
+    pickle.dump(other, open(os.path.join(str(tmpdir), 'run2.pkl'), 'wb'))
+    path = os.path.join(str(tmpdir), 'run1')
+    save_result_arrays(results, path)
+    loaded = load_results(path)
+    assert isinstance(loaded['rpath'], np.memmap)
+    assert loaded['label'] == 'baseline'
+    rows = compare_results(loaded, results)
+    assert set(row['status'] for row in rows) == set(['ok'])
+    rows = dict((row['key'], row) for row in compare_results(loaded, other))
+    assert rows['bssmat']['status'] == 'diff'
+    assert rows['bssmat']['n_outside'] == 24
+    assert rows['Kss']['status'] == 'ok'
+    assert rows['rpath']['max_abs_diff'] == 0
+    # key-specific tolerances
+    rows = compare_results(loaded, other, exceptions={'bssmat': 0.1})
+    assert set(row['status'] for row in rows) == set(['ok'])
+    pairs = [(path, os.path.join(str(tmpdir), 'run2.pkl')),
+             (os.path.join(str(tmpdir), 'run1.pkl'), path),
+             (path, os.path.join(str(tmpdir), 'run3.pkl'))]
+    serial = compare_many(pairs, num_workers=1)
+    parallel = compare_many(pairs, num_workers=2)
+    assert [row['status'] for row in serial] == [row['status']
+                                                 for row in parallel]
+    assert serial[-1]['status'] == 'missing2'
+    fname = os.path.join(str(tmpdir), 'summary.csv')
+    write_comparison_summary(parallel, fname)
+    df = pd.read_csv(fname)
+    assert list(df['status']) == [row['status'] for row in parallel]
+
+
+def test_pickle_file_compare_result_arrays(tmpdir):
+    from ogusa.utils import (save_result_arrays, load_results,
+                             pickle_file_compare, compare_results,
+                             TABLE_COLUMNS_KEY)
+    results = {'rpath': np.array([100., 200., 300.]), 'Kss': 2.0,
+               'nested': {'b': np.ones(4)}}
+    other = {'rpath': np.array([100., 200., 300.1]), 'Kss': 2.0,
+             'nested': {'b': np.ones(4) + 1e-4}}
+    path = os.path.join(str(tmpdir), 'run1')
+    save_result_arrays(results, path)
+    fname = os.path.join(str(tmpdir), 'run2.pkl')
+    pickle.dump(other, open(fname, 'wb'))
+    # the arrays in the directory are compared from memory maps
+    assert pickle_file_compare(path, path)
+    assert not pickle_file_compare(path, fname)
+    assert pickle_file_compare(path, fname, relative=True)
+    assert pickle_file_compare(path, fname, exceptions={'rpath': 0.2})
+    rows = dict((row['key'], row) for row in
+                compare_results(results, other, relative=True))
+    assert rows['nested/b']['status'] == 'ok'
+    # CSV tables, as written by the regression reforms
+    table = os.path.join(str(tmpdir), 'results.csv')
+    with open(table, 'w') as f:
+        f.write(',2016,Steady State\nGDP,0.1,0.2\nHours Worked,0.3,0.4\n')
+    loaded = load_results(table)
+    assert np.array_equal(loaded['Hours Worked'], [0.3, 0.4])
+    assert loaded[TABLE_COLUMNS_KEY] == ['2016', 'Steady State']
+    assert pickle_file_compare(table, table)
@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+from ogusa import demographics
+
+
+def loop_rebin(x_sub, len_subbins, totpers, reduce_func):
+    # the loop over model periods the functions used before
+    x_new = np.zeros(totpers)
+    end_sub_bin = 0
+    for i in xrange(totpers):
+        beg_sub_bin = int(end_sub_bin)
+        end_sub_bin = int(np.rint((i + 1) * len_subbins))
+        x_new[i] = reduce_func(x_sub[beg_sub_bin:end_sub_bin])
+    return x_new
+
+
+@pytest.mark.parametrize('totpers', [7, 80, 100, 400])
+def test_rebin_sub_bins(totpers):
+    random_state = np.random.RandomState(10)
+    x_sub = random_state.rand(100 * 100)
+    len_subbins = 100.0 * 100 / totpers
+    assert np.allclose(demographics.rebin_sub_bins(x_sub, len_subbins,
+                                                   totpers),
+                       loop_rebin(x_sub, len_subbins, totpers, np.sum))
+    assert np.allclose(demographics.rebin_sub_bins(x_sub, len_subbins,
+                                                   totpers, np.multiply),
+                       loop_rebin(x_sub, len_subbins, totpers, np.prod))
+
+
+def test_pop_rebin():
+    pop = np.arange(1.0, 101.0)
+    for totpers in (40, 100, 400):
+        pop_new = demographics.pop_rebin(pop, totpers)
+        assert pop_new.shape == (totpers,)
+        assert np.allclose(pop_new.sum(), pop.sum())
+    assert np.allclose(demographics.pop_rebin(pop, 400)[:4], 0.25)
+
+
+def dense_omega(fert_rates, mort_rates, infmort_rate, imm_rates):
+    totpers = len(fert_rates)
+    OMEGA = np.zeros((totpers, totpers))
+    OMEGA[0, :] = ((1 - infmort_rate) * fert_rates +
+                   np.hstack((imm_rates[0], np.zeros(totpers - 1))))
+    OMEGA[1:, :-1] += np.diag(1 - mort_rates[:-1])
+    OMEGA[1:, 1:] += np.diag(imm_rates[1:])
+    return OMEGA
+
+
+def random_rates(random_state, totpers, fert_scale=0.2):
+    fert_rates = random_state.rand(totpers) * fert_scale
+    fert_rates[totpers // 2:] = 0.0
+    # small negative fertility rates, as from the interpolated data
+    fert_rates[totpers // 2 - 3:totpers // 2] = -1e-4
+    mort_rates = np.linspace(0.01, 0.3, totpers)
+    mort_rates[-1] = 1.0
+    imm_rates = random_state.rand(totpers) * 0.02 - 0.01
+    return fert_rates, mort_rates, 0.006, imm_rates
+
+
+# with the fertility rates of the first case, the population shrinks so
+# fast that the largest real eigenvalue is below some immigration rates
+# and is found by the dense eigenvalue decomposition
+@pytest.mark.parametrize('totpers,fert_scale,dense',
+                         [(10, 0.2, True), (10, 1.0, False),
+                          (60, 0.2, False)])
+def test_omega_SS(totpers, fert_scale, dense, monkeypatch):
+    rates = random_rates(np.random.RandomState(totpers), totpers,
+                         fert_scale)
+    OMEGA = dense_omega(*rates)
+    assert np.allclose(demographics.get_omega(*rates).toarray(), OMEGA,
+                       rtol=0.0, atol=1e-15)
+    eigvalues, eigvectors = np.linalg.eig(OMEGA)
+    real = np.flatnonzero(np.isreal(eigvalues))
+    eig_ind = real[eigvalues[real].real.argmax()]
+    eigvec = eigvectors[:, eig_ind].real
+
+    def no_eig(*args):
+        raise AssertionError('dense eigenvalue decomposition')
+    if not dense:
+        monkeypatch.setattr(np.linalg, 'eig', no_eig)
+    g_n_SS, omega_SS = demographics.get_omega_SS(*rates)
+    assert np.allclose(g_n_SS, eigvalues[eig_ind].real - 1, rtol=0.0,
+                       atol=1e-12)
+    assert np.allclose(omega_SS, eigvec / eigvec.sum(), rtol=0.0,
+                       atol=1e-10)
+
+
+def test_solve_imm_rates_and_project_pop():
+    random_state = np.random.RandomState(10)
+    fert_rates, mort_rates, infmort_rate, imm_rates = \
+        random_rates(random_state, 40)
+    omega_cur = random_state.rand(40)
+    imm_rates_adj = demographics.solve_imm_rates(
+        fert_rates, mort_rates, infmort_rate, omega_cur, 0.01)
+    errs = demographics.immsolve(imm_rates_adj, fert_rates, mort_rates,
+                                 infmort_rate, omega_cur, 0.01)
+    assert np.abs(errs).max() < 1e-14
+    OMEGA = demographics.get_omega(fert_rates, mort_rates, infmort_rate,
+                                   imm_rates)
+    pop_path = demographics.project_pop(OMEGA, omega_cur, 5)
+    expected = omega_cur.copy()
+    for per in xrange(5):
+        assert np.allclose(pop_path[:, per], expected)
+        expected = np.dot(OMEGA.toarray(), expected)
@@ -0,0 +1,62 @@
+import numpy as np
+from ogusa import get_micro_data
+
+
+CAPITAL_INCOME_VARS = ['e00300', 'e00400', 'e00600', 'e00650', 'e01400',
+                       'e01700', 'p22250', 'p23250', 'e26270', 'e02000']
+
+
+class FakeRecords(object):
+
+    def __init__(self, random_state, N):
+        for name in (['age_head', 'e00200', 'sey', 'expanded_income',
+                      'combined', 's006'] + CAPITAL_INCOME_VARS):
+            setattr(self, name, random_state.rand(N) * 1000)
+
+
+class FakeCalculator(object):
+    '''
+    The parts of a tax calculator used by get_micro_data, with marginal
+    tax rates that change with the year
+    '''
+
+    def __init__(self, start_year):
+        self.random_state = np.random.RandomState(10)
+        self.records = FakeRecords(self.random_state, 50)
+        self.current_year = start_year
+
+    def calc_all(self):
+        pass
+
+    def increment_year(self):
+        self.current_year += 1
+        self.records.e00200 = self.records.e00200 * 1.02
+
+    def mtr(self, income_source):
+        rate = (0.1 + 0.01 * (self.current_year - 2016) +
+                0.001 * len(income_source))
+        return [rate * np.ones(50), rate * np.ones(50),
+                rate + self.records.s006 * 1e-4]
+
+
+def test_iter_data(tmpdir, monkeypatch):
+    monkeypatch.setattr(get_micro_data, 'get_calculator',
+                        lambda baseline, calculator_start_year, reform:
+                        FakeCalculator(calculator_start_year))
+    monkeypatch.chdir(tmpdir)
+    micro_data = get_micro_data.get_data(baseline=True, start_year=2017)
+    columns = ['Age', 'MTR wage', 'MTR capital income', 'Weights']
+    years = []
+    for year, year_data in get_micro_data.iter_data(
+            baseline=True, start_year=2017, columns=columns,
+            dtype=np.float32):
+        years.append(year)
+        assert sorted(year_data) == sorted(columns)
+        for name in columns:
+            assert year_data[name].dtype == np.float32
+            assert np.allclose(year_data[name],
+                               micro_data[str(year)][name], rtol=1e-6)
+    assert years == range(2017, 2027)
+    assert (list(micro_data['2018'].columns) ==
+            get_micro_data.MICRO_DATA_COLS)
+    assert np.all(micro_data['2018']['Year'] == 2018)
@@ -0,0 +1,49 @@
+import numpy as np
+from ogusa import household
+
+
+def test_get_workspace():
+    random_state = np.random.RandomState(10)
+    e = random_state.rand(5)
+    etr_params = random_state.rand(5, 12)
+    workspace = household.get_workspace(e, etr_params, etr_params[0],
+                                        b_first=0.3)
+    assert workspace['b_s'][0] == 0.3
+    assert np.array_equal(workspace['e_splus1'], np.append(e[1:], 0.0))
+    assert np.array_equal(workspace['etr_params_splus1'][:-1],
+                          etr_params[1:])
+    assert np.array_equal(workspace['etr_params_splus1'][-1],
+                          etr_params[-1])
+    # tax functions that do not vary by age are not shifted
+    assert np.array_equal(workspace['mtry_params_splus1'], etr_params[0])
+
+
+def test_FOC_savings_workspace():
+    """
+        Reusing a workspace across calls gives the same Euler errors as
+        allocating the arrays on each call
+    """
+    random_state = np.random.RandomState(10)
+    S = 6
+    e = random_state.rand(S) + 0.5
+    tax_params = np.array([1e-9, 1e-5, 1e-9, 1e-5, 0.3, 0.0, 0.3, 0.0,
+                           0.01, 0.01, 0.0, 0.5])
+    etr_params = tax_params * (1 + 0.1 * random_state.rand(S, 12))
+    mtry_params = tax_params * (1 + 0.1 * random_state.rand(S, 12))
+    rho = np.append(random_state.rand(S - 1) * 0.1, 1.0)
+    params = (e, 3.0, 0.96, 0.03, 0.5, np.array([0.3]), 0.1, rho, 0.5, 2,
+              S, False, etr_params, mtry_params, 0.1, 0.01, 1.0, 0.15, 4,
+              'SS')
+    workspace = household.get_workspace(e, etr_params, mtry_params)
+    for i in xrange(3):
+        b = np.append(0.0, random_state.rand(S - 1) * 0.3 + 0.01)
+        b_splus1 = random_state.rand(S) * 0.3 + 0.01
+        b_splus2 = np.append(b_splus1[1:], 0.0)
+        n = random_state.rand(S) * 0.8
+        euler = household.FOC_savings(0.04, 1.2, b, b_splus1, b_splus2, n,
+                                      0.01, 7e4, 0.1, params)
+        euler_workspace = household.FOC_savings(0.04, 1.2, b, b_splus1,
+                                                b_splus2, n, 0.01, 7e4, 0.1,
+                                                params, workspace)
+        assert np.all(np.isfinite(euler))
+        assert np.array_equal(euler, euler_workspace)
@@ -0,0 +1,144 @@
+import numpy as np
+from ogusa import inequality
+
+
+def loop_gini(dist, weights):
+    # one distribution at a time, as in wealth.compute_wealth_moments
+    idx = np.argsort(dist)
+    p = np.cumsum(weights[idx]) / weights.sum()
+    nu = np.cumsum(dist[idx] * weights[idx])
+    nu = nu / nu[-1]
+    return (nu[1:] * p[:-1]).sum() - (nu[:-1] * p[1:]).sum()
+
+
+def test_take_along_axis(monkeypatch):
+    random_state = np.random.RandomState(10)
+    arr = random_state.rand(4, 5, 6)
+    monkeypatch.delattr(np, 'take_along_axis', raising=False)
+    for axis in [0, 1, -1]:
+        idx = np.argsort(arr, axis=axis)
+        assert np.array_equal(inequality.take_along_axis(arr, idx, axis),
+                              np.sort(arr, axis=axis))
+
+
+def test_gini():
+    random_state = np.random.RandomState(10)
+    T, S, J = 20, 80, 7
+    path = np.exp(random_state.randn(T, S, J))
+    omega = random_state.rand(T, S, 1) * np.array([.25, .25, .2, .1, .1,
+                                                   .09, .01])
+    G = inequality.gini(path.reshape(T, S * J), omega.reshape(T, S * J))
+    assert G.shape == (T,)
+    for t in xrange(T):
+        assert np.allclose(G[t], loop_gini(path[t].flatten(),
+                                           omega[t].flatten()))
+    # along another axis, with the weights broadcast
+    G_S = inequality.gini(path, omega, axis=1)
+    assert G_S.shape == (T, J)
+    assert np.allclose(G_S[3, 2], loop_gini(path[3, :, 2], omega[3, :, 0]))
+    # no inequality if all have the same value, whatever their weights
+    assert np.allclose(inequality.gini(np.ones((T, S)), omega[:, :, 0]), 0)
+    # all held by one of two equal groups
+    assert np.allclose(inequality.gini(np.array([0., 1.]), np.ones(2)), 0.5)
+
+
+def old_gini_path(path, omega, collapse):
+    # the time path Gini of TPI_graphs, before it used share_gini
+    T = path.shape[0]
+    path2 = np.copy(path)
+    path2[path2 < 0] = 0
+    if collapse is None:
+        collapsed = path2.reshape(T, -1)
+        omega1 = omega.reshape(T, -1)
+    else:
+        collapsed = path2.sum(collapse)
+        omega1 = omega.sum(collapse).reshape(collapsed.shape)
+    total = collapsed.sum(1)
+    collapsed /= total.reshape(T, 1)
+    idx = np.argsort(collapsed - omega1, axis=1)
+    collapsed2 = collapsed[:, idx][np.eye(T, T, dtype=bool)]
+    omega_sorted = omega1[:, idx][np.eye(T, T, dtype=bool)]
+    cum_levels = np.cumsum(collapsed2, axis=1)
+    cum_levels[:, 1:] = cum_levels[:, :-1]
+    cum_levels[:, 0] = 0
+    return 2 * (.5 - (cum_levels * omega_sorted).sum(1))
+
+
+def test_share_gini():
+    random_state = np.random.RandomState(10)
+    T, S, J = 12, 10, 4
+    path = random_state.randn(T, S, J) + 1
+    omega = random_state.rand(T, S, J)
+    omega /= omega.sum((1, 2)).reshape(T, 1, 1)
+    path2 = np.where(path < 0, 0, path)
+    # as in gini_cols, gini_colj and gini_nocol of TPI_graphs
+    assert np.array_equal(
+        inequality.share_gini(path2.sum(1), omega.sum(1), axis=1),
+        old_gini_path(path, omega, 1))
+    assert np.array_equal(
+        inequality.share_gini(path2.sum(2), omega.sum(2), axis=1),
+        old_gini_path(path, omega, 2))
+    assert np.array_equal(
+        inequality.share_gini(path2.reshape(T, S * J),
+                              omega.reshape(T, S * J), axis=1),
+        old_gini_path(path, omega, None))
+    # along another axis
+    assert np.allclose(inequality.share_gini(path2.sum(1).T,
+                                             omega.sum(1).T, axis=0),
+                       old_gini_path(path, omega, 1))
+    # the measure is kept: J groups of equal total and weight have a
+    # Gini of 1/J
+    assert np.allclose(inequality.share_gini(np.ones((T, J)),
+                                             np.ones((T, J)) / J), 1. / J)
+
+
+def test_percentiles_and_shares():
+    random_state = np.random.RandomState(10)
+    x = np.exp(random_state.randn(3, 500) * 2)
+    weights = random_state.rand(3, 500)
+    q = np.array([.1, .25, .5, .9, .99])
+    pctls = inequality.percentiles(x, q, weights)
+    shares = inequality.shares_below(x, weights, q)
+    assert pctls.shape == shares.shape == (3, 5)
+    for i in xrange(3):
+        idx = np.argsort(x[i])
+        cum_weights = np.cumsum(weights[i, idx])
+        for k in xrange(5):
+            cutoff = weights[i].sum() * q[k]
+            assert pctls[i, k] == x[i, idx][cum_weights >= cutoff][0]
+            assert np.allclose(shares[i, k],
+                               (x[i, idx] * weights[i, idx])
+                               [cum_weights < cutoff].sum() /
+                               (x[i] * weights[i]).sum())
+    assert np.allclose(inequality.top_shares(x, weights, .01),
+                       1 - inequality.shares_below(x, weights, .99))
+    # sorted once, the same answers
+    sort_x, sort_weights = inequality.weighted_sort(x, weights)
+    assert np.array_equal(inequality.percentiles(sort_x, q, sort_weights,
+                                                 presorted=True), pctls)
+    # without weights, the percentiles of NumPy
+    assert np.array_equal(inequality.percentiles(x[0], q),
+                          np.percentile(x[0], q * 100))
+
+
+def test_var_log_and_group_means():
+    random_state = np.random.RandomState(10)
+    x = random_state.randn(4, 300) + 2
+    weights = random_state.rand(4, 300)
+    var = inequality.var_log(x, weights, ddof=1)
+    for i in xrange(4):
+        keep = x[i] > 0
+        ln_x, w = np.log(x[i, keep]), weights[i, keep]
+        mean = (ln_x * w).sum() / w.sum()
+        assert np.allclose(var[i], ((ln_x - mean) ** 2 * w).sum() /
+                           (w.sum() - 1))
+    groups = random_state.randint(20, 30, 300)
+    labels, means = inequality.group_means(x, weights, groups)
+    assert np.array_equal(labels, np.unique(groups))
+    assert means.shape == (4, labels.shape[0])
+    for i in xrange(4):
+        for g, label in enumerate(labels):
+            in_group = groups == label
+            assert np.allclose(means[i, g],
+                               np.average(x[i, in_group],
+                                          weights=weights[i, in_group]))
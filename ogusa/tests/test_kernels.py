@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+from ogusa import kernels, SS, TPI
+
+
+TAX_PARAMS = np.array([1e-9, 1e-5, 1e-9, 1e-5, 0.3, 0.0, 0.3, 0.0, 0.01,
+                       0.01, 0.0, 0.5])
+
+
+@pytest.fixture(params=['numba', 'python'])
+def kernel(request, monkeypatch):
+    '''
+    Runs a test with the compiled kernel (skipped if numba is not
+    installed) and with the Python version of the same kernel
+    '''
+    if request.param == 'numba':
+        if not kernels.HAVE_NUMBA:
+            pytest.skip('numba is not installed')
+    else:
+        lifetime_euler_errors = getattr(kernels.lifetime_euler_errors,
+                                        'py_func',
+                                        kernels.lifetime_euler_errors)
+        monkeypatch.setattr(kernels, 'lifetime_euler_errors',
+                            lifetime_euler_errors)
+        monkeypatch.setattr(kernels, 'HAVE_NUMBA', True)
+    monkeypatch.setattr(kernels, 'USE_NUMBA', True)
+    return request.param
+
+
+def numpy_version(func, *args):
+    kernels.USE_NUMBA = False
+    try:
+        return np.asarray(func(*args))
+    finally:
+        kernels.USE_NUMBA = True
+
+
+def make_tax_params(random_state, shape):
+    return TAX_PARAMS * (1 + 0.1 * random_state.rand(*shape))
+
+
+@pytest.mark.parametrize('analytical_mtrs', [False, True])
+@pytest.mark.parametrize('tax_dims', [1, 2])
+def test_euler_equation_solver(kernel, analytical_mtrs, tax_dims):
+    random_state = np.random.RandomState(10)
+    S, J, j = 20, 2, 1
+    e = random_state.rand(S, J) + 0.5
+    shape = (12,) if tax_dims == 1 else (S, 12)
+    etr_params, mtrx_params, mtry_params = [
+        make_tax_params(random_state, shape) for i in xrange(3)]
+    rho = np.append(random_state.rand(S - 1) * 0.1, 1.0)
+    params = [0.04, 1.2, 0.1, 7e4, j, J, S, 0.96, 3.0, 1.0, 0.03, 0.01,
+              0.15, 15, 1.0, 0.1, 0.01, 1.0, 0.5, 1.5, j,
+              random_state.rand(J), random_state.rand(S),
+              random_state.rand(J) * 0.1, rho, np.array([0.5, 0.5]),
+              np.ones(S) / S, e, analytical_mtrs, etr_params, mtrx_params,
+              mtry_params]
+    guesses = np.append(random_state.rand(S) * 0.3 + 0.01,
+                        random_state.rand(S) * 0.8)
+    # constraint violations are penalized the same way
+    guesses[3] = -0.1
+    guesses[S + 5] = 1.5
+    errors = SS.euler_equation_solver(guesses, params)
+    errors_numpy = numpy_version(SS.euler_equation_solver, guesses, params)
+    assert np.all(np.isfinite(errors))
+    assert np.allclose(errors, errors_numpy, rtol=1e-12, atol=0.0)
+
+
+@pytest.mark.parametrize('analytical_mtrs', [False, True])
+@pytest.mark.parametrize('length', [3, 10])
+def test_twist_doughnut(kernel, analytical_mtrs, length):
+    random_state = np.random.RandomState(10)
+    S, J, T, j = 10, 2, 12, 1
+    e = random_state.rand(S, J) + 0.5
+    rho = np.append(random_state.rand(S - 1) * 0.1, 1.0)
+    tpi_params = (J, S, T, 0, 0.96, 3.0, 0.3, 0.3, 1.0, 1.0, 0.05, 1.0,
+                  2.0, 0.03, None, 0.15, random_state.rand(J) * 0.1, rho,
+                  None, None, np.array([0.5, 0.5]), None, e, 7, 1.0, 7e4,
+                  0.1, 0.01, 1.0, 0.5, 1.5, random_state.rand(J),
+                  random_state.rand(S), random_state.rand(J) * 0.2)
+    etr_params, mtrx_params, mtry_params = [
+        make_tax_params(random_state, (length, 12)) for i in xrange(3)]
+    income_tax_params = (analytical_mtrs, etr_params, mtrx_params,
+                         mtry_params)
+    params = (income_tax_params, tpi_params,
+              random_state.rand(S, J) * 0.3 + 0.01)
+    r = 0.04 + 0.01 * random_state.rand(T + S)
+    w = 1.2 + 0.1 * random_state.rand(T + S)
+    BQ = 0.01 * random_state.rand(T + S)
+    T_H = 0.1 * random_state.rand(T + S)
+    guesses = np.append(random_state.rand(length) * 0.3 + 0.01,
+                        random_state.rand(length) * 0.8)
+    guesses[1] = -0.1
+    s = length - 2
+    errors = TPI.twist_doughnut(guesses, r, w, BQ, T_H, j, s, 2, params)
+    errors_numpy = numpy_version(TPI.twist_doughnut, guesses, r, w, BQ,
+                                 T_H, j, s, 2, params)
+    assert np.all(np.isfinite(errors))
+    assert np.allclose(errors, errors_numpy, rtol=1e-10, atol=0.0)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import scipy.ndimage.filters as filter
+from ogusa import labor
+
+
+def make_cps(random_state, N):
+    return pd.DataFrame({'age': random_state.randint(21, 81, N),
+                         'hours': random_state.rand(N) * 3000,
+                         'wtsupp': random_state.rand(N) * 100})
+
+
+def pandas_labor_moments(cps, S):
+    # the labor moments computed with pandas, by age
+    hours_wgt = (cps['hours'] * cps['wtsupp']).groupby(cps['age']).sum()
+    frac_work = (hours_wgt / cps.groupby('age')['wtsupp'].sum() /
+                 (365 * 16.)).values
+    slope = (frac_work[-1] - frac_work[-15]) / 15.
+    labor_dist_data = np.zeros(80)
+    labor_dist_data[:60] = frac_work
+    labor_dist_data[60:] = frac_work[-1] + slope * np.arange(20)
+    return filter.uniform_filter(labor_dist_data,
+                                 size=int(80 / S))[::int(80 / S)]
+
+
+def test_compute_labor_moments():
+    random_state = np.random.RandomState(10)
+    cps = make_cps(random_state, 5000)
+    for S in [80, 40]:
+        moments = labor.compute_labor_moments(cps, S)
+        assert moments.shape == (S,)
+        assert np.allclose(moments, pandas_labor_moments(cps, S))
+
+
+def test_VCV_moments():
+    random_state = np.random.RandomState(10)
+    cps = make_cps(random_state, 3000)
+    np.random.seed(10)
+    VCV = labor.VCV_moments(cps, 25, None, 40)
+    np.random.seed(10)
+    moments_boot = np.zeros((25, 40))
+    for i in range(25):
+        boot = cps[np.random.randint(2, size=len(cps.index)).astype(bool)]
+        moments_boot[i] = pandas_labor_moments(boot, 40)
+    assert np.allclose(VCV, np.cov(moments_boot.T))
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+from ogusa import pipeline
+
+
+def make_counter():
+    calls = []
+
+    def func():
+        calls.append(1)
+        return {'r': np.ones(3) * len(calls)}
+    return func, calls
+
+
+def test_run_stage(tmpdir):
+    artifact_dir = str(tmpdir)
+    func, calls = make_counter()
+    inputs = (np.arange(4.0), {'frisch': 0.4}, True)
+    artifacts = pipeline.new_pipeline(artifact_dir, 'OUTPUT')
+    first = pipeline.run_stage(artifacts, 'SS', inputs, func)
+    # the same inputs load the saved artifact
+    second = pipeline.run_stage(artifacts, 'SS', (np.arange(4.0),
+                                                  {'frisch': 0.4}, True),
+                                func)
+    assert len(calls) == 1
+    assert np.array_equal(first['r'], second['r'])
+    # a change to any input runs the stage again
+    pipeline.run_stage(artifacts, 'SS', (np.arange(4.0), {'frisch': 0.5},
+                                         True), func)
+    assert len(calls) == 2
+    # so does the same input to another stage
+    pipeline.run_stage(artifacts, 'TPI', inputs, func)
+    assert len(calls) == 3
+    assert [status for _, _, _, status in artifacts['stages']] == [
+        pipeline.RUN, pipeline.CACHED, pipeline.RUN, pipeline.RUN]
+    assert len(os.listdir(os.path.join(artifact_dir, 'SS'))) == 2
+
+
+def test_dry_run(tmpdir):
+    artifact_dir = str(tmpdir)
+    func, calls = make_counter()
+    artifacts = pipeline.new_pipeline(artifact_dir, 'OUTPUT')
+    pipeline.run_stage(artifacts, 'txfunc', (2017,), func)
+    artifacts = pipeline.new_pipeline(artifact_dir, 'OUTPUT', dry_run=True)
+    assert pipeline.run_stage(artifacts, 'txfunc', (2017,), func) is not None
+    assert pipeline.run_stage(artifacts, 'SS', (0.4,), func) is None
+    assert artifacts['stopped']
+    # nothing is run after the first stage that would be run
+    assert pipeline.run_stage(artifacts, 'TPI', (0.4,), func) is None
+    assert len(calls) == 1
+    stages = pipeline.finish(artifacts, ['txfunc', 'SS', 'TPI'])
+    assert [(stage, status) for _, stage, _, status in stages] == [
+        ('txfunc', pipeline.CACHED), ('SS', pipeline.RUN),
+        ('TPI', pipeline.RUN)]
+    assert stages[-1][2] is None
+    assert not os.path.exists(os.path.join(artifact_dir, 'SS'))
+
+
+def test_add_stages(tmpdir):
+    artifacts = pipeline.new_pipeline(str(tmpdir), 'OUTPUT', dry_run=True)
+    pipeline.add_stages(artifacts, [('OUTPUT/COARSE', 'SS', 'abc',
+                                     pipeline.CACHED)])
+    assert not artifacts['stopped']
+    pipeline.add_stages(artifacts, [('OUTPUT/COARSE', 'TPI', None,
+                                     pipeline.RUN)])
+    assert artifacts['stopped']
+
+
+def test_budget_exhausted(tmpdir):
+    artifact_dir = str(tmpdir)
+    calls = []
+
+    def solve():
+        calls.append(1)
+        return ({'r': np.ones(3), 'converged': False,
+                 'budget_exhausted': 'time'}, {'Y': np.ones(3)})
+    artifacts = pipeline.new_pipeline(artifact_dir, 'OUTPUT')
+    artifact = pipeline.run_stage(artifacts, 'TPI', (0.4,), solve)
+    assert artifact[0]['budget_exhausted'] == 'time'
+    assert artifacts['stopped']
+    stages = pipeline.finish(artifacts, ['SS', 'TPI'])
+    assert [(stage, status) for _, stage, _, status in stages] == [
+        ('TPI', pipeline.EXHAUSTED), ('SS', pipeline.RUN)]
+    key = stages[0][2]
+    # the best iterate is kept, but not loaded as the artifact of the
+    # stage, so running the stage again solves it again
+    assert os.listdir(os.path.join(artifact_dir, 'TPI')) == [
+        key + pipeline.PARTIAL_SUFFIX]
+    artifacts = pipeline.new_pipeline(artifact_dir, 'OUTPUT')
+    pipeline.run_stage(artifacts, 'TPI', (0.4,), solve)
+    assert len(calls) == 2
+
+
+def test_file_stamp(tmpdir):
+    path = os.path.join(str(tmpdir), 'puf.csv')
+    assert pipeline.file_stamp(path) == (path, None, None)
+    with open(path, 'w') as f:
+        f.write('age_head\n40\n')
+    stamp = pipeline.file_stamp(path)
+    assert stamp[:2] == (path, 12)
+    # another micro data file gives another fingerprint of the stage
+    with open(path, 'a') as f:
+        f.write('41\n')
+    assert (pipeline.stage_fingerprint('txfunc', (2017, stamp)) !=
+            pipeline.stage_fingerprint('txfunc',
+                                       (2017, pipeline.file_stamp(path))))
+
+
+def test_missing_input(tmpdir):
+    path = os.path.join(str(tmpdir), 'SS_vars.pkl')
+    artifacts = pipeline.new_pipeline(str(tmpdir), 'OUTPUT')
+    # only a dry run stops
+    assert not pipeline.missing_input(artifacts, path)
+    artifacts = pipeline.new_pipeline(str(tmpdir), 'OUTPUT', dry_run=True)
+    open(path, 'w').close()
+    assert not pipeline.missing_input(artifacts, path)
+    assert pipeline.missing_input(artifacts, path + '.missing')
+    stages = pipeline.finish(artifacts, ['SS', 'TPI'])
+    assert [(stage, status) for _, stage, _, status in stages] == [
+        ('SS', pipeline.RUN), ('TPI', pipeline.RUN)]
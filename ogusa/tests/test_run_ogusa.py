@@ -11,6 +11,7 @@ from ogusa.utils import dict_compare
 from ogusa.get_micro_data import get_calculator
 from ogusa import SS
 from ogusa import TPI
+from ogusa import parameters
 import uuid
 import time
 
@@ -68,7 +69,12 @@ def run_micro_macro(reform, user_params, guid):
 
     return ans
 
-def test_run_micro_macro():
+def test_run_micro_macro(tmpdir, monkeypatch):
+    # run in tmpdir, so the outputs are not written in the repo, with the
+    # tax function estimates still read from where they are
+    monkeypatch.setattr(parameters, 'TAX_ESTIMATE_PATH',
+                        os.path.abspath(parameters.TAX_ESTIMATE_PATH))
+    monkeypatch.chdir(tmpdir)
 
     reform = {
     2017: {
@@ -0,0 +1,153 @@
+import pytest
+import numpy as np
+from ogusa import SS_sensitivity, SS, parameters
+
+
+def make_params(S, J):
+    random_state = np.random.RandomState(10)
+    ss_params = [0.0] * len(SS_sensitivity.SS_PARAM_NAMES)
+    ss_params[0], ss_params[1] = J, S
+    ss_params[15] = 0.15
+    ss_params[19] = False
+    ss_params[20] = 0.09
+    ss_params[16] = random_state.rand(J)
+    income_tax_params = (False, random_state.rand(S, 12),
+                         random_state.rand(S, 12), random_state.rand(S, 12))
+    chi_params = (random_state.rand(J), random_state.rand(S))
+    small_open_params = [False, 0.04, 0.04]
+    return (tuple(ss_params), income_tax_params, chi_params,
+            small_open_params)
+
+
+def small_ss_params():
+    """
+        Steady state parameters of the test-sized model, built the way
+        the runner in ogusa/scripts/execute.py builds them
+    """
+    run_params = parameters.get_parameters(test=True, baseline=True,
+                                           guid='')
+    run_params.update({'analytical_mtrs': False, 'small_open': False,
+                       'budget_balance': False})
+    param_names = ['S', 'J', 'T', 'BW', 'lambdas', 'starting_age',
+                   'ending_age', 'beta', 'sigma', 'alpha', 'gamma',
+                   'epsilon', 'nu', 'Z', 'delta', 'E', 'ltilde', 'g_y',
+                   'maxiter', 'mindist_SS', 'mindist_TPI',
+                   'analytical_mtrs', 'b_ellipse', 'k_ellipse', 'upsilon',
+                   'small_open', 'budget_balance', 'ss_firm_r', 'ss_hh_r',
+                   'tpi_firm_r', 'tpi_hh_r', 'tG1', 'tG2', 'alpha_T',
+                   'alpha_G', 'ALPHA_T', 'ALPHA_G', 'rho_G',
+                   'debt_ratio_ss', 'tau_b', 'delta_tau', 'chi_b_guess',
+                   'chi_n_guess', 'etr_params', 'mtrx_params',
+                   'mtry_params', 'tau_payroll', 'tau_bq', 'retire',
+                   'mean_income_data', 'g_n_vector', 'h_wealth',
+                   'p_wealth', 'm_wealth', 'omega', 'g_n_ss', 'omega_SS',
+                   'surv_rate', 'imm_rates', 'e', 'rho', 'initial_debt',
+                   'omega_S_preTP']
+    sim_params = dict((key, run_params[key]) for key in param_names)
+    sim_params['output_dir'] = '.'
+    sim_params['run_params'] = run_params
+    return SS.create_steady_state_parameters(**sim_params)
+
+
+def test_perturb_params():
+    """
+        Moving a parameter changes only that parameter, and leaves the
+        original parameters untouched
+    """
+    S, J = 4, 2
+    params = make_params(S, J)
+    new_params = SS_sensitivity.perturb_params(params, 'tau_payroll', 0.01)
+    assert new_params[0][15] == pytest.approx(0.16)
+    assert params[0][15] == 0.15
+    assert isinstance(new_params[0], tuple)
+    assert isinstance(new_params[3], list)
+
+    spec = ('etr_params', (Ellipsis, 10))
+    new_params = SS_sensitivity.perturb_params(params, spec, 0.01)
+    diff = new_params[1][1] - params[1][1]
+    assert np.allclose(diff[:, 10], 0.01)
+    assert np.all(np.delete(diff, 10, axis=1) == 0.0)
+
+    new_params = SS_sensitivity.perturb_params(params, ('tau_bq', 1), -0.5)
+    assert new_params[0][16][1] == pytest.approx(params[0][16][1] - 0.5)
+    assert new_params[0][16][0] == params[0][16][0]
+
+    run_params = {'g_y_annual': 0.03, 'starting_age': 20,
+                  'ending_age': 100, 'S': 80}
+    new_params = SS_sensitivity.perturb_params(params, 'g_y_annual', 0.01,
+                                               run_params)
+    assert new_params[0][13] == pytest.approx(0.04)
+
+    with pytest.raises(RuntimeError):
+        SS_sensitivity.perturb_params(params, 'not_a_parameter', 0.01)
+
+
+def test_stack_ss():
+    """
+        The unknowns of the steady state system are the savings and
+        labor supply of each group, followed by r, w, T_H (or Y with
+        baseline spending), and factor in the baseline
+    """
+    S, J = 4, 2
+    params = make_params(S, J)
+    random_state = np.random.RandomState(10)
+    ss_output = {'bssmat_splus1': random_state.rand(S, J),
+                 'nssmat': random_state.rand(S, J), 'rss': 0.05,
+                 'wss': 1.2, 'T_Hss': 0.03, 'Yss': 0.6,
+                 'factor_ss': 1e5}
+    z = SS_sensitivity.stack_ss(ss_output, True, False)
+    assert z.shape == (2 * S * J + 4,)
+    assert np.allclose(z[2 * S:3 * S], ss_output['bssmat_splus1'][:, 1])
+    bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars = \
+        SS_sensitivity.unstack_ss(z, (0.0, 0.0), params, True, False)
+    assert np.allclose(bssmat, ss_output['bssmat_splus1'])
+    assert np.allclose(nssmat, ss_output['nssmat'])
+    assert (r, w, T_H, factor) == (0.05, 1.2, 0.03, 1e5)
+    assert Y == pytest.approx(0.03 / 0.09)
+    assert len(outer_loop_vars) == 7
+
+    z = SS_sensitivity.stack_ss(ss_output, False, True)
+    assert z.shape == (2 * S * J + 3,)
+    bssmat, nssmat, r, w, T_H, Y, factor, outer_loop_vars = \
+        SS_sensitivity.unstack_ss(z, (0.03, 1e5), params, False, True)
+    assert (T_H, Y, factor) == (0.03, 0.6, 1e5)
+
+
+def test_ss_sensitivities_match_resolved_ss():
+    """
+        The implicit function derivatives of the steady state agree with
+        central differences of steady states re-solved at a perturbed
+        payroll tax rate, and approx_ss tracks a re-solved steady state
+    """
+    (income_tax_params, ss_params, iterative_params, chi_params,
+     small_open_params) = small_ss_params()
+    solver_config = SS.get_solver_config(enforce_solution_checks=False)
+    ss_output = SS.run_SS(income_tax_params, ss_params, iterative_params,
+                          chi_params, small_open_params, True,
+                          solver_config=solver_config)
+    sensitivities = SS_sensitivity.get_ss_sensitivities(
+        ss_output, ['tau_payroll'], income_tax_params, ss_params,
+        chi_params, small_open_params, True)
+
+    h = 1e-3
+    params = (ss_params, income_tax_params, chi_params, small_open_params)
+    resolved = {}
+    for sign in (1, -1):
+        new_params = SS_sensitivity.perturb_params(params, 'tau_payroll',
+                                                   sign * h)
+        resolved[sign] = SS.run_SS(new_params[1], new_params[0],
+                                   iterative_params, new_params[2],
+                                   new_params[3], True,
+                                   solver_config=solver_config)
+    for name in SS_sensitivity.OUTPUT_NAMES:
+        finite_diff = ((np.asarray(resolved[1][name]) -
+                        np.asarray(resolved[-1][name])) / (2 * h))
+        derivative = np.asarray(sensitivities['tau_payroll'][name])
+        assert np.allclose(derivative, finite_diff, rtol=1e-4,
+                           atol=1e-4 * np.abs(finite_diff).max())
+
+    approx = SS_sensitivity.approx_ss(ss_output, sensitivities,
+                                      {'tau_payroll': h})
+    for name in ['Yss', 'Kss', 'rss', 'wss', 'bssmat_splus1', 'nssmat']:
+        assert np.allclose(approx[name], resolved[1][name], rtol=1e-5,
+                           atol=1e-8)
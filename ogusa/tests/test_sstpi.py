@@ -54,6 +54,9 @@ def test_sstpi():
     from ogusa.utils import comp_scalar
     from ogusa.utils import dict_compare
     from ogusa.utils import pickle_file_compare
+    from ogusa.utils import compare_many
+    from ogusa.utils import write_comparison_summary
+    from ogusa.utils import check_comparison
 
     import ogusa.SS
     import ogusa.TPI
@@ -150,10 +153,9 @@ def test_sstpi():
     else:
         exceptions = {}
 
-    # compare results to test data
-    for old, new in zip(oldfiles, newfiles):
-        print "trying a pair"
-        print old, new
-        assert pickle_file_compare(
-            old, new, exceptions=exceptions, relative=True)
-        print "next pair"
+    # compare results to test data, all pairs at once
+    rows = compare_many(zip(oldfiles, newfiles), exceptions=exceptions,
+                        relative=True)
+    write_comparison_summary(rows, os.path.join(TEST_OUTPUT,
+                                                "comparison_summary.csv"))
+    assert check_comparison(rows)
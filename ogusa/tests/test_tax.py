@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+from ogusa import tax
+
+
+def test_get_year_params():
+    """
+        Parameters repeated across ages collapse to a table by year,
+        parameters that vary by age are left alone
+    """
+    S, BW, dim3 = 10, 5, 12
+    random_state = np.random.RandomState(10)
+    year_params = random_state.rand(BW, dim3)
+    params = np.tile(year_params.reshape(1, BW, dim3), (S, 1, 1))
+    assert np.array_equal(tax.get_year_params(params), year_params)
+
+    params[3, 2, 4] += 0.1
+    assert tax.get_year_params(params) is None
+
+
+def test_tau_income_year_params():
+    """
+        Broadcasting a table of parameters by year gives the same
+        effective tax rates as tiling it across ages and ability types
+    """
+    T, S, J, dim4 = 20, 10, 2, 12
+    random_state = np.random.RandomState(10)
+    r = 0.067 + (0.086 - 0.067) * random_state.rand(T, S, J)
+    w = 0.866 + (0.927 - 0.866) * random_state.rand(T, S, J)
+    b = 6.94 * random_state.rand(T, S, J)
+    n = 0.191 + (0.503 - 0.191) * random_state.rand(T, S, J)
+    e = 0.263 + (2.024 - 0.263) * random_state.rand(T, S, J)
+    factor = 140000.0
+    year_params = 0.22 * random_state.rand(T, dim4)
+
+    tiled_params = np.tile(year_params.reshape(T, 1, 1, dim4), (1, S, J, 1))
+    tau_tiled = tax.tau_income(r, w, b, n, factor, (e, tiled_params))
+    tau = tax.tau_income(r, w, b, n, factor,
+                         (e, year_params.reshape(T, 1, 1, dim4)))
+    assert np.allclose(tau, tau_tiled)
+
+    # steady state case, a single set of parameters for all ages
+    tiled_params = np.tile(year_params[-1].reshape(1, dim4), (S, 1))
+    tau_tiled = tax.tau_income(r[0, :, 0], w[0, :, 0], b[0, :, 0],
+                               n[0, :, 0], factor, (e[0, :, 0], tiled_params))
+    tau = tax.tau_income(r[0, :, 0], w[0, :, 0], b[0, :, 0], n[0, :, 0],
+                         factor, (e[0, :, 0], year_params[-1]))
+    assert np.allclose(tau, tau_tiled)
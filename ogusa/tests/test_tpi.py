@@ -0,0 +1,198 @@
+import pytest
+import os
+import cPickle as pickle
+import numpy as np
+from ogusa import TPI
+
+
+def test_warm_start_path():
+    """
+        Rescaled path keeps the first period, ends at the new steady
+        state and is held there for the last S periods
+    """
+    T, S, J = 20, 5, 2
+    random_state = np.random.RandomState(10)
+    x_prior = 1.0 + random_state.rand(T + S, J)
+    x_ss = np.array([2.5, 3.5])
+    x_path = TPI.warm_start_path(x_prior, x_ss, T, S)
+    assert x_path.shape == (T + S, J)
+    assert np.allclose(x_path[0], x_prior[0])
+    assert np.allclose(x_path[T - 1:], x_ss)
+    # same steady state leaves the path unchanged
+    x_path = TPI.warm_start_path(x_prior, x_prior[T - 1], T, S)
+    assert np.allclose(x_path[:T], x_prior[:T])
+
+
+def test_get_warm_start(tmpdir):
+    """
+        Paths from a prior TPI_vars.pkl are rescaled to the new steady
+        state
+    """
+    T, S, J = 20, 5, 2
+    random_state = np.random.RandomState(10)
+    tpi_prior = {'r': random_state.rand(T + S),
+                 'w': random_state.rand(T + S),
+                 'BQ': random_state.rand(T + S, J),
+                 'T_H': random_state.rand(T + S),
+                 'Y': random_state.rand(T),
+                 'b_mat': random_state.rand(T + S, S, J),
+                 'n_mat': random_state.rand(T + S, S, J)}
+    os.mkdir(os.path.join(str(tmpdir), "TPI"))
+    pickle.dump(tpi_prior, open(os.path.join(str(tmpdir),
+                                             "TPI/TPI_vars.pkl"), "wb"))
+    bssmat_splus1 = random_state.rand(S, J)
+    nssmat = random_state.rand(S, J)
+    BQss = random_state.rand(J)
+    SS_values = (1.0, 1.0, 1.0, 0.06, 1.2, BQss, 0.1, 0.2, bssmat_splus1,
+                 nssmat, 0.9, 0.2)
+    r, w, BQ, T_H, Y, guesses_b, guesses_n = TPI.get_warm_start(
+        str(tmpdir), SS_values, T, S, J)
+    assert np.allclose(r[0], tpi_prior['r'][0])
+    assert np.allclose(r[T - 1:], 0.06)
+    assert np.allclose(Y[T - 1:], 0.9)
+    assert np.allclose(BQ[T - 1:], BQss)
+    assert guesses_b.shape == (T + S, S, J)
+    assert np.allclose(guesses_b[T - 1:], bssmat_splus1)
+    assert np.allclose(guesses_n[0], tpi_prior['n_mat'][0])
+
+    with pytest.raises(RuntimeError):
+        TPI.get_warm_start(str(tmpdir), SS_values, T, S + 1, J)
+
+
+def test_interp_coarse_guesses():
+    """
+        Paths solved on a coarse grid are interpolated to the fine grid
+        and scaled to the fine grid steady state
+    """
+    T_c, S_c, T, S, J = 20, 5, 40, 10, 2
+    random_state = np.random.RandomState(10)
+    tpi_coarse = {'r': 0.05 * np.ones(T_c + S_c),
+                  'w': random_state.rand(T_c + S_c),
+                  'BQ': random_state.rand(T_c + S_c, J),
+                  'T_H': random_state.rand(T_c + S_c),
+                  'Y': random_state.rand(T_c),
+                  'b_mat': np.ones((T_c + S_c, S_c, J)),
+                  'n_mat': random_state.rand(T_c + S_c, S_c, J)}
+    ss_coarse = {'rss': 0.05, 'wss': 1.0, 'BQss': np.ones(J), 'T_Hss': 0.0,
+                 'Yss': 1.0, 'bssmat_splus1': np.ones((S_c, J)),
+                 'nssmat': np.ones((S_c, J))}
+    ss_fine = {'rss': 0.025, 'wss': 2.0, 'BQss': np.ones(J), 'T_Hss': 0.1,
+               'Yss': 1.0, 'bssmat_splus1': 3 * np.ones((S, J)),
+               'nssmat': np.ones((S, J))}
+    tpi_guess = TPI.interp_coarse_guesses(tpi_coarse, ss_coarse, ss_fine,
+                                          T, S)
+    assert tpi_guess['b_mat'].shape == (T, S, J)
+    assert tpi_guess['BQ'].shape == (T, J)
+    assert np.allclose(tpi_guess['r'], 0.025)
+    assert np.allclose(tpi_guess['b_mat'], 3.0)
+    assert np.allclose(tpi_guess['w'][0], 2.0 * tpi_coarse['w'][0])
+    assert np.allclose(tpi_guess['T_H'][0], tpi_coarse['T_H'][0] + 0.1)
+
+    # savings at the first age are zero in the steady state, and the
+    # guesses there stay finite
+    ss_coarse['bssmat_splus1'][0] = 0.0
+    tpi_coarse['b_mat'][:, 0] = 0.0
+    ss_fine['bssmat_splus1'][0] = 0.0
+    tpi_guess = TPI.interp_coarse_guesses(tpi_coarse, ss_coarse, ss_fine,
+                                          T, S)
+    assert np.all(np.isfinite(tpi_guess['b_mat']))
+    assert np.allclose(tpi_guess['b_mat'][:, 0], 0.0)
+    assert np.allclose(tpi_guess['b_mat'][:, -1], 3.0)
+
+    # aggregates with coarse steady states near zero, of the other sign,
+    # or zero are shifted rather than scaled, and end at the fine
+    # steady state
+    tpi_coarse['r'] = np.append(np.linspace(0.05, -0.01, T_c),
+                                -0.01 * np.ones(S_c))
+    ss_coarse['rss'] = -0.01
+    tpi_coarse['BQ'][:, 1] = np.append(np.linspace(0.5, 0.0, T_c),
+                                       np.zeros(S_c))
+    ss_coarse['BQss'] = np.array([1.0, 0.0])
+    tpi_coarse['Y'] = np.linspace(2.0, 1e-8, T_c)
+    ss_coarse['Yss'] = 1e-8
+    tpi_guess = TPI.interp_coarse_guesses(tpi_coarse, ss_coarse, ss_fine,
+                                          T, S)
+    for var in ('r', 'w', 'BQ', 'T_H', 'Y'):
+        assert np.all(np.isfinite(tpi_guess[var]))
+    assert np.allclose(tpi_guess['r'][-1], 0.025)
+    assert np.allclose(tpi_guess['r'][0], 0.05 + 0.035)
+    assert np.allclose(tpi_guess['BQ'][-1, 1], 1.0)
+    assert np.allclose(tpi_guess['BQ'][0, 1], 0.5 + 1.0)
+    assert np.allclose(tpi_guess['BQ'][0, 0], tpi_coarse['BQ'][0, 0])
+    assert np.allclose(tpi_guess['Y'][-1], 1.0)
+
+
+def test_inner_loop_banded(small_tpi_params):
+    """
+        The banded Newton solver for the lifetimes gives the fsolve
+        solution of the household problems
+    """
+    (income_tax_params, tpi_params, iterative_params, small_open_params,
+     initial_values, SS_values, fiscal_params, biz_tax_params) = small_tpi_params
+    J, S, T = tpi_params[:3]
+    Kss, Bss, Lss, rss, wss, BQss, T_Hss, revenue_ss, bssmat_splus1, \
+        nssmat, Yss, Gss = SS_values
+    # prices away from the steady state early in the path
+    decay = 1 + 0.05 * np.exp(-np.arange(T + S) / 10.0)
+    outer_loop_vars = (rss * decay, wss / decay, np.ones(T + S) * Kss,
+                       np.ones((T + S, J)) * BQss.reshape(1, J),
+                       np.ones(T + S) * T_Hss)
+    guesses = (np.tile(bssmat_splus1.reshape(1, S, J), (T + S, 1, 1)),
+               np.tile(nssmat.reshape(1, S, J), (T + S, 1, 1)))
+    params = (income_tax_params, tpi_params, initial_values, np.arange(S))
+    solutions = {}
+    for household_solver in ['fsolve', 'banded']:
+        solver_config = TPI.get_solver_config(
+            household_solver=household_solver)
+        solutions[household_solver] = TPI.inner_loop(
+            guesses, outer_loop_vars, params, solver_config=solver_config)
+    euler_errors, b_mat, n_mat = solutions['banded']
+    assert np.abs(euler_errors).max() < 1e-10
+    assert np.allclose(b_mat, solutions['fsolve'][1], rtol=0, atol=1e-10)
+    assert np.allclose(n_mat, solutions['fsolve'][2], rtol=0, atol=1e-10)
+
+
+def test_run_TPI_resume(small_tpi_params, tmpdir, capsys):
+    """
+        A run stopped after a few iterations and resumed from its
+        checkpoint gives the same path as a run that is not stopped
+    """
+    (income_tax_params, tpi_params, iterative_params, small_open_params,
+     initial_values, SS_values, fiscal_params, biz_tax_params) = small_tpi_params
+    solver_config = TPI.get_solver_config(enforce_solution_checks=False)
+    full_dir = os.path.join(str(tmpdir), "FULL")
+    resumed_dir = os.path.join(str(tmpdir), "RESUMED")
+    for output_dir in [full_dir, resumed_dir]:
+        os.makedirs(os.path.join(output_dir, "TPI"))
+    output, macro_output = TPI.run_TPI(*small_tpi_params,
+                                       output_dir=full_dir,
+                                       solver_config=solver_config,
+                                       checkpoint=False)
+    assert output['converged']
+
+    stopped_params = list(small_tpi_params)
+    stopped_params[2] = iterative_params._replace(maxiter=3)
+    stopped_output, _ = TPI.run_TPI(*stopped_params, output_dir=resumed_dir,
+                                    solver_config=solver_config)
+    assert not stopped_output['converged']
+    saved = pickle.load(open(os.path.join(resumed_dir, "TPI",
+                                          TPI.CHECKPOINT_FILE), "rb"))
+    assert saved['TPIiter'] == 3
+    # resumed with the maximum number of iterations of the full run
+    capsys.readouterr()
+    resumed_output, resumed_macro_output = TPI.run_TPI(
+        *small_tpi_params, output_dir=resumed_dir,
+        solver_config=solver_config, resume=True)
+    assert 'Resuming TPI from iteration  3' in capsys.readouterr()[0]
+    # the checkpoint of a converged path is removed
+    assert resumed_output['converged']
+    assert not os.path.exists(os.path.join(resumed_dir, "TPI",
+                                           TPI.CHECKPOINT_FILE))
+
+    assert set(resumed_output) == set(output)
+    for key in output:
+        assert np.array_equal(resumed_output[key], output[key]), key
+    assert set(resumed_macro_output) == set(macro_output)
+    for key in macro_output:
+        assert np.array_equal(resumed_macro_output[key],
+                              macro_output[key]), key
@@ -0,0 +1,143 @@
+import pytest
+import numpy as np
+from ogusa import TPI_linear, TPI
+
+
+def test_get_cohort_tax_params():
+    """
+        Tax parameters over the lifetime of a cohort are the diagonal of
+        the [S,T+S,#tax params] array, or the rows of the by year table
+    """
+    T, S = 10, 4
+    random_state = np.random.RandomState(10)
+    etr_params = random_state.rand(S, T + S, 12)
+    cohort_params = TPI_linear.get_cohort_tax_params(etr_params, 3, S)
+    assert cohort_params.shape == (S, 12)
+    for s in xrange(S):
+        assert np.allclose(cohort_params[s], etr_params[s, 3 + s])
+    etr_year_params = random_state.rand(T + S, 12)
+    cohort_params = TPI_linear.get_cohort_tax_params(etr_year_params, 3, S)
+    assert np.allclose(cohort_params, etr_year_params[3:3 + S])
+
+
+def test_household_response():
+    """
+        A price change at date tau reaches cohorts alive at tau, through
+        the response at the age they are at tau, with cohorts alive in
+        the first period using the Jacobian for their age at that time
+    """
+    T, S, J = 10, 4, 2
+    random_state = np.random.RandomState(10)
+    hh_jacs = [random_state.rand(S, 2, S, 4, S + 1) for j in xrange(J)]
+    tau = 5
+    db, dn = TPI_linear.household_response(hh_jacs, 1, tau, 0, T, S, J)
+    assert db.shape == (T + S, S, J)
+    for t in xrange(T + S):
+        for s in xrange(S):
+            c = t - s
+            u = tau - c
+            a0 = max(-c, 0)
+            if 0 <= u <= S:
+                assert db[t, s, 1] == hh_jacs[1][a0, 0, s, 1, u]
+                assert dn[t, s, 0] == hh_jacs[0][a0, 1, s, 1, u]
+            else:
+                assert db[t, s, 1] == 0.0
+    # bequests only change for the lifetime income group receiving them
+    db, dn = TPI_linear.household_response(hh_jacs, 2, tau, 1, T, S, J)
+    assert np.all(db[:, :, 0] == 0.0)
+    assert np.any(db[:, :, 1] != 0.0)
+
+
+def test_get_update_jacobian(small_tpi_params):
+    """
+        The Jacobian of the outer loop update chained from its blocks
+        matches finite differences of update_paths along the household
+        responses
+    """
+    (income_tax_params, tpi_params, iterative_params, small_open_params,
+     initial_values, SS_values, fiscal_params, biz_tax_params) = small_tpi_params
+    J, S, T = tpi_params[:3]
+    Kss, Bss, Lss, rss, wss, BQss, T_Hss, revenue_ss, bssmat_splus1, nssmat, \
+        Yss, Gss = SS_values
+    paths = {'r': np.ones(T + S) * rss, 'w': np.ones(T + S) * wss,
+             'BQ': np.ones((T + S, J)) * BQss.reshape(1, J),
+             'T_H': np.ones(T + S) * T_Hss, 'Y': np.ones(T + S) * Yss,
+             'K': np.ones(T + S) * Kss}
+    guesses = (np.tile(bssmat_splus1.reshape(1, S, J), (T + S, 1, 1)),
+               np.tile(nssmat.reshape(1, S, J), (T + S, 1, 1)))
+    euler_errors, b_mat, n_mat = TPI.inner_loop(
+        guesses, (paths['r'], paths['w'], paths['K'], paths['BQ'],
+                  paths['T_H']),
+        (income_tax_params, tpi_params, initial_values, np.arange(S)))
+    hh_jacs = [TPI_linear.get_household_jacobian(j, SS_values,
+                                                 income_tax_params, tpi_params)
+               for j in xrange(J)]
+    params = TPI_linear.get_update_params(
+        income_tax_params, tpi_params, small_open_params, initial_values,
+        fiscal_params, biz_tax_params, False)
+    active = ['r', 'w'] + [('BQ', j) for j in xrange(J)] + ['T_H', 'K']
+    path_vals = dict((name, paths[name][:T]) for name in paths)
+
+    def update(b_mat, n_mat, path_vals):
+        updated = dict(zip(['r', 'w', 'BQ', 'T_H', 'Y', 'K'],
+                           TPI_linear.update_paths(
+                               b_mat, n_mat, path_vals['r'], path_vals['w'],
+                               path_vals['BQ'], path_vals['T_H'],
+                               path_vals['Y'], path_vals['K'], params)))
+        return np.concatenate([updated['BQ'][:, name[1]]
+                               if isinstance(name, tuple) else updated[name]
+                               for name in active])
+
+    jac = TPI_linear.get_update_jacobian(
+        b_mat, n_mat, path_vals['r'], path_vals['w'], path_vals['BQ'],
+        path_vals['T_H'], path_vals['Y'], path_vals['K'], hh_jacs, active,
+        params)
+    assert jac.shape == (len(active) * T, len(active) * T)
+
+    x1 = update(b_mat, n_mat, path_vals)
+    for i, name, tau in [(0, 'r', 0), (1, 'w', 5), (3, ('BQ', 1), T - 1),
+                         (4, 'T_H', 10), (5, 'K', 3)]:
+        h = 1e-6
+        new_vals = dict((key, val.copy()) for key, val in path_vals.items())
+        if isinstance(name, tuple):
+            new_vals['BQ'][tau, name[1]] += h
+            price = TPI_linear.PRICE_INDEX['BQ']
+            db, dn = TPI_linear.household_response(hh_jacs, price, tau,
+                                                   name[1], T, S, J)
+        elif name in TPI_linear.PRICE_INDEX:
+            new_vals[name][tau] += h
+            price = TPI_linear.PRICE_INDEX[name]
+            db, dn = TPI_linear.household_response(hh_jacs, price, tau, 0,
+                                                   T, S, J)
+        else:
+            new_vals[name][tau] += h
+            db, dn = 0.0, 0.0
+        finite_diff = (update(b_mat + h * db, n_mat + h * dn, new_vals) -
+                       x1) / h
+        assert np.allclose(jac[:, i * T + tau], finite_diff, rtol=1e-4,
+                           atol=1e-5 * np.abs(finite_diff).max())
+
+
+def test_run_TPI_linear(small_tpi_params, tmpdir):
+    """
+        The linearized transition path has the same outputs as
+        TPI.run_TPI, and is close to the nonlinear transition path
+        compared to how far that path moves from the steady state
+    """
+    output, macro_output = TPI_linear.run_TPI_linear(*small_tpi_params)
+    solver_config = TPI.get_solver_config(enforce_solution_checks=False)
+    tpi_output, tpi_macro_output = TPI.run_TPI(
+        *small_tpi_params, output_dir=str(tmpdir),
+        solver_config=solver_config, checkpoint=False)
+    assert set(output) == set(tpi_output)
+    assert set(macro_output) == set(tpi_macro_output)
+    assert output['budget_exhausted'] is None
+
+    T = small_tpi_params[1][2]
+    for name in ['Y', 'K', 'L', 'C', 'r', 'w', 'BQ', 'T_H', 'b_mat',
+                 'n_mat']:
+        path = np.asarray(tpi_output[name])[:T]
+        error = np.abs(np.asarray(output[name])[:T] - path).max()
+        assert error < 5e-3 * np.abs(path).max()
+        if name in ['Y', 'K', 'r', 'w', 'BQ']:
+            assert error < 0.05 * np.abs(path - path[-1]).max()
@@ -0,0 +1,151 @@
+import pytest
+import numpy as np
+import pandas as pd
+from ogusa import txfunc
+
+
+def make_micro_data(random_state, N):
+    data = pd.DataFrame({
+        'Age': random_state.randint(20, 30, N),
+        'MTR Labor': random_state.rand(N) * 1.6 - 0.5,
+        'MTR capital income': random_state.rand(N) * 1.6 - 0.5,
+        'Total Labor Income': np.exp(random_state.rand(N) * 12),
+        'Total Capital Income': np.exp(random_state.rand(N) * 12),
+        'Effective Tax Rate': random_state.rand(N) * 0.9 - 0.2,
+        'Weights': random_state.rand(N) * 100})
+    data['Adjusted Total income'] = (data['Total Labor Income'] +
+                                     data['Total Capital Income'])
+    data.loc[random_state.rand(N) < 0.05, 'MTR Labor'] = np.nan
+    data.loc[random_state.rand(N) < 0.05, 'Effective Tax Rate'] = np.nan
+    data.loc[random_state.rand(N) < 0.05, 'Total Capital Income'] = 1.0
+    return data[txfunc.MICRO_DATA_COLS]
+
+
+def pandas_trunc(data, analytical_mtrs):
+    # the cuts applied one at a time, as tax_func_estimate did before
+    data_trnc = data.drop(data[data['Effective Tax Rate'] > 0.65].index)
+    data_trnc = data_trnc.drop(
+        data_trnc[data_trnc['Effective Tax Rate'] < -0.15].index)
+    data_trnc = data_trnc[(data_trnc['Adjusted Total income'] >= 5) &
+                          (data_trnc['Total Labor Income'] >= 5) &
+                          (data_trnc['Total Capital Income'] >= 5)]
+    if not analytical_mtrs:
+        for col in ['MTR capital income', 'MTR Labor']:
+            data_trnc = data_trnc.drop(data_trnc[data_trnc[col] >
+                                                 0.99].index)
+            data_trnc = data_trnc.drop(data_trnc[data_trnc[col] <
+                                                 -0.45].index)
+    return data_trnc
+
+
+@pytest.mark.parametrize('analytical_mtrs', [False, True])
+def test_trunc_and_group_by_age(analytical_mtrs):
+    random_state = np.random.RandomState(10)
+    data = make_micro_data(random_state, 2000)
+    expected = pandas_trunc(data, analytical_mtrs)
+    data_trnc = txfunc.trunc_micro_data(data, analytical_mtrs)
+    for col in txfunc.MICRO_DATA_COLS:
+        assert np.allclose(data_trnc[col], expected[col].values,
+                           rtol=0.0, atol=0.0, equal_nan=True)
+    ages_list = np.arange(18, 32)
+    data_sorted, starts, ends = txfunc.group_by_age(data_trnc, ages_list)
+    for s, start, end in zip(ages_list, starts, ends):
+        df = expected[expected['Age'] == s]
+        for col in txfunc.MICRO_DATA_COLS:
+            assert np.allclose(data_sorted[col][start:end], df[col].values,
+                               rtol=0.0, atol=0.0, equal_nan=True)
+
+
+def test_txfunc_est(tmpdir):
+    # the same estimates from a DataFrame and from a dictionary of arrays
+    random_state = np.random.RandomState(10)
+    data = pandas_trunc(make_micro_data(random_state, 1000), False)
+    df = data[txfunc.MTRX_COLS].dropna()
+    arrays = dict((col, df[col].values) for col in txfunc.MTRX_COLS)
+    params, wsse, obs = txfunc.txfunc_est(df, 25, 2017, 'mtrx',
+                                          str(tmpdir), False)
+    params_np, wsse_np, obs_np = txfunc.txfunc_est(arrays, 25, 2017, 'mtrx',
+                                                   str(tmpdir), False)
+    assert np.array_equal(params, params_np)
+    assert wsse == wsse_np
+    assert obs == obs_np == df.shape[0]
+
+
+def make_rate_data(random_state, N):
+    X = np.exp(random_state.rand(N) * 12 + 1.6)
+    Y = np.exp(random_state.rand(N) * 11 + 1.6)
+    params = np.array([1e-10, 1e-5, 5e-10, 1e-5, 0.35, -0.05, 0.3, -0.02,
+                       0.06, 0.03, -0.05, 0.6])
+    rates = (txfunc.gen_rate_grid(X, Y, params) +
+             random_state.randn(N) * 0.03)
+    return {'Total Labor Income': X, 'Total Capital Income': Y,
+            'Weights': random_state.rand(N) * 100,
+            'Effective Tax Rate': rates}
+
+
+def test_txfunc_est_warm_start(tmpdir, monkeypatch):
+    random_state = np.random.RandomState(10)
+    df = make_rate_data(random_state, 500)
+    fits = []
+    minimize = txfunc.opt.minimize
+
+    def count_fits(*args, **kwargs):
+        fits.append(minimize(*args, **kwargs))
+        return fits[-1]
+    monkeypatch.setattr(txfunc.opt, 'minimize', count_fits)
+    cold = txfunc.txfunc_est(df, 25, 2017, 'etr', str(tmpdir), False)
+    # starting from the function fitted to the same data is quicker and
+    # ends with a weighted SSE no larger
+    warm = txfunc.txfunc_est(df, 25, 2017, 'etr', str(tmpdir), False,
+                             cold)
+    assert len(fits) == 2
+    assert fits[1].nfev < fits[0].nfev
+    assert warm[1] <= cold[1]
+    assert warm[2] == cold[2]
+    # a warm-started fit much worse than its neighbor is done again from
+    # the default guess, and the better fit is kept
+    better_neighbor = (cold[0], 0.5 * cold[1], cold[2])
+    fallback = txfunc.txfunc_est(df, 25, 2017, 'etr', str(tmpdir), False,
+                                 better_neighbor)
+    assert len(fits) == 4
+    assert fallback[1] == min(fits[2].fun, fits[3].fun)
+
+
+def test_reduce_data():
+    random_state = np.random.RandomState(10)
+    df = make_rate_data(random_state, 5000)
+    X, Y = df['Total Labor Income'], df['Total Capital Income']
+    rates, wgts = df['Effective Tax Rate'], df['Weights']
+    reduced = txfunc.reduce_data(X, Y, rates, wgts, 20)
+    X_cell, Y_cell, rates_cell, wgts_cell, within_ss, box = reduced
+    assert X_cell.shape[0] <= 400
+    # the cells keep the total weight and the weighted means
+    assert np.allclose(wgts_cell.sum(), wgts.sum())
+    assert np.allclose((wgts_cell * X_cell).sum(), (wgts * X).sum())
+    assert np.allclose((wgts_cell * rates_cell).sum(), (wgts * rates).sum())
+    assert np.all((box[:, 0] <= X_cell) & (X_cell <= box[:, 1]))
+    assert np.all((box[:, 2] <= Y_cell) & (Y_cell <= box[:, 3]))
+    # the SSE over the full data is within the bound for any parameters
+    for i in xrange(10):
+        params = np.array([1e-10, 1e-5, 5e-10, 1e-5, 0.35, -0.05, 0.3,
+                           -0.02, 0.06, 0.03, -0.05, 0.6])
+        params[:4] *= np.exp(random_state.randn(4))
+        params[[4, 6, 11]] = random_state.rand(3) * 0.5 + 0.2
+        sse_full = (wgts * (txfunc.gen_rate_grid(X, Y, params) -
+                            rates) ** 2).sum()
+        sse_cells = (wgts_cell * (txfunc.gen_rate_grid(X_cell, Y_cell,
+                                                      params) -
+                                  rates_cell) ** 2).sum()
+        bound = txfunc.sse_error_bound(params, reduced)
+        assert abs(sse_full - sse_cells - within_ss.sum()) <= bound
+
+
+def test_check_data_reduction(tmpdir):
+    random_state = np.random.RandomState(10)
+    df = make_rate_data(random_state, 5000)
+    diagnostic = txfunc.check_data_reduction(df, 25, 2017, 'etr',
+                                             str(tmpdir), 30)
+    assert diagnostic['obs'] == 5000
+    assert diagnostic['cells'] <= 900
+    # the fit to the reduced data is about as good over the full data
+    assert diagnostic['wsse_red'] <= 1.05 * diagnostic['wsse_full']
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from ogusa import wealth
+
+
+def make_scf(random_state, N):
+    return pd.DataFrame({
+        'networth': np.exp(random_state.randn(N) * 2 + 10) -
+        random_state.rand(N) * 2e4,
+        'wgt': random_state.rand(N) * 1000})
+
+
+def pandas_wealth_moments(scf, bin_weights):
+    # the wealth moments computed as they were with pandas
+    scf = scf.sort_values(by='networth', ascending=True)
+    weight_networth = scf['wgt'] * scf['networth']
+    cumsum = scf.wgt.cumsum()
+    wealth = np.zeros((bin_weights.shape[0],))
+    cum_weights = bin_weights.cumsum()
+    for i in range(bin_weights.shape[0]):
+        cutoff = scf.wgt.sum() / (1. / cum_weights[i])
+        wealth[i] = (weight_networth[cumsum < cutoff].sum() /
+                     weight_networth.sum())
+    # all of the wealth is held by the whole population
+    wealth[-1] = 1.0
+    wealth_share = np.zeros((bin_weights.shape[0],))
+    wealth_share[0] = wealth[0]
+    wealth_share[1:] = wealth[1:] - wealth[0:-1]
+    p = (scf.wgt.cumsum() / scf.wgt.sum()).as_matrix()
+    nu = ((scf.wgt * scf.networth).cumsum()).as_matrix()
+    nu = nu / nu[-1]
+    gini_coeff = (nu[1:] * p[:-1]).sum() - (nu[:-1] * p[1:]).sum()
+    df = scf[scf['networth'] > 0]
+    ln_networth = np.log(df['networth'])
+    weight_mean = (ln_networth * df.wgt).sum() / df.wgt.sum()
+    var_ln_wealth = (((df.wgt * (ln_networth - weight_mean) ** 2).sum()) *
+                     (1. / (df.wgt.sum() - 1)))
+    return np.append([wealth_share], [gini_coeff, var_ln_wealth])
+
+
+def test_compute_wealth_moments():
+    random_state = np.random.RandomState(10)
+    scf = make_scf(random_state, 2000)
+    bin_weights = np.array([.25, .25, .2, .1, .1, .09, .01])
+    moments = wealth.compute_wealth_moments(scf, bin_weights, 7)
+    assert moments.shape == (9,)
+    assert np.allclose(moments, pandas_wealth_moments(scf, bin_weights))
+
+
+def test_VCV_moments():
+    # the replications computed at once are the subsamples drawn one at
+    # a time
+    random_state = np.random.RandomState(10)
+    scf = make_scf(random_state, 500)
+    bin_weights = np.array([.25, .25, .2, .1, .1, .09, .01])
+    np.random.seed(10)
+    VCV = wealth.VCV_moments(scf, 150, bin_weights, 7)
+    np.random.seed(10)
+    moments_boot = np.zeros((150, 9))
+    for i in range(150):
+        boot = scf[np.random.randint(2, size=len(scf.index)).astype(bool)]
+        moments_boot[i] = pandas_wealth_moments(boot, bin_weights)
+    assert np.allclose(VCV, np.cov(moments_boot.T))
@@ -0,0 +1,48 @@
+import numpy as np
+from scipy.stats import kde
+from ogusa import wealthinit
+
+
+def test_weighted_kde():
+    # the same density as gaussian_kde fitted to the points repeated in
+    # proportion to the weights
+    random_state = np.random.RandomState(10)
+    points = random_state.rand(2, 30) * 10
+    counts = random_state.randint(1, 50, 30)
+    coords = random_state.rand(2, 100) * 10
+    sample = np.repeat(points, counts, axis=1)
+    expected = kde.gaussian_kde(sample, bw_method=0.4)(coords)
+    density = wealthinit.weighted_kde(points, counts, coords, 0.4)
+    # gaussian_kde divides the covariance by the sample size less one
+    assert np.allclose(density, expected, rtol=2e-2)
+    assert np.allclose(density / density.sum(), expected / expected.sum(),
+                       rtol=2e-2)
+
+
+def test_sorted_pairs():
+    probs1 = np.array([0.5, 0.0, 0.2, 0.3])
+    probs2 = np.array([0.3, 0.7])
+    idx1, idx2, weights = wealthinit.sorted_pairs(probs1, probs2)
+    assert list(idx1) == [0, 0, 2, 3]
+    assert list(idx2) == [0, 1, 1, 1]
+    assert np.allclose(weights, [0.3, 0.2, 0.2, 0.3])
+
+
+def test_MVKDE():
+    # the estimator of the sample of the age and ability type distributions
+    # in ascending order, without drawing the sample
+    random_state = np.random.RandomState(10)
+    proportion_matrix = random_state.rand(78, 7) ** 3
+    proportion_matrix /= proportion_matrix.sum()
+    estimator = wealthinit.MVKDE(40, 7, proportion_matrix)
+    age, ability, weights = wealthinit.sorted_pairs(
+        proportion_matrix.sum(1), proportion_matrix.sum(0))
+    counts = np.round(weights * 1e5).astype(int)
+    sample = np.vstack((np.repeat(age + 18, counts),
+                        np.repeat(ability + 1, counts)))
+    agei, incomei = np.mgrid[18:95:40j, 1:7:7j]
+    expected = kde.gaussian_kde(sample, bw_method=0.25)(
+        np.vstack((agei.ravel(), incomei.ravel()))).reshape(agei.shape)
+    assert np.allclose(estimator.sum(), 1.0)
+    assert np.allclose(estimator, expected / expected.sum(), rtol=1e-3,
+                       atol=1e-6)
@@ -12,6 +12,14 @@ This module defines the following functions:
     wsumsq()
     find_outliers()
     replace_outliers()
+    derive_micro_data()
+    trunc_micro_data()
+    group_by_age()
+    select_obs()
+    reduce_data()
+    sse_error_bound()
+    txfunc_est()
+    check_data_reduction()
 
     tax_func_estimate()
     get_tax_func_estimate()
@@ -19,6 +27,7 @@ This module defines the following functions:
 This Python script calls the following modules:
     get_micro_data.py
     utils.py
+    inequality.py
 
 This Python script outputs the following:
     ./TAX_ESTIMATE_PATH/TxFuncEst_baseline{}.pkl
@@ -44,9 +53,55 @@ from matplotlib import cm
 
 import get_micro_data
 import utils
+import inequality
 
 TAX_ESTIMATE_PATH = os.environ.get("TAX_ESTIMATE_PATH", ".")
 
+'''
+Set names of the columns of the micro data from Tax-Calculator used
+here, of the columns derived from them to estimate the tax functions,
+and of the columns used for each tax rate
+'''
+TAXCALC_COLS = ['MTR wage', 'MTR self-employed Wage', 'MTR capital income',
+                'Age', 'Wage and Salaries', 'Self-Employed Income',
+                'Adjusted Total income', 'Total Tax Liability', 'Weights']
+MICRO_DATA_COLS = ['Age', 'MTR Labor', 'MTR capital income',
+                   'Total Labor Income', 'Total Capital Income',
+                   'Adjusted Total income', 'Effective Tax Rate', 'Weights']
+ETR_COLS = ['MTR Labor', 'MTR capital income', 'Total Labor Income',
+            'Total Capital Income', 'Effective Tax Rate', 'Weights']
+MTRX_COLS = ['MTR Labor', 'Total Labor Income', 'Total Capital Income',
+             'Weights']
+MTRY_COLS = ['MTR capital income', 'Total Labor Income',
+             'Total Capital Income', 'Weights']
+
+'''
+Set floating point type in which the micro data of each year are kept
+from Tax-Calculator (np.float32 halves their memory, the tax functions
+are still estimated in double precision)
+'''
+MICRO_DATA_DTYPE = np.float64
+
+'''
+Set to False to start every tax function fit from the default initial
+guess rather than from the fit of the previous age (or year)
+'''
+WARM_START = True
+
+'''
+Set how much larger (as a fraction) the weighted SSE per observation of
+a warm-started fit can be than that of the fit it started from before
+the fit is done again from the default initial guess
+'''
+WARM_START_TOL = 0.1
+
+'''
+Set number of quantile bins of labor income and of capital income that
+the data of each tax function fit are reduced to (see reduce_data), or
+None to fit the tax functions on the full data
+'''
+DATA_REDUCTION_BINS = None
+
 '''
 ------------------------------------------------------------------------
 Define Functions
@@ -127,7 +182,8 @@ def gen_3Dscatters_hist(df, s, t, output_dir):
     truncated data in the income dimension
     --------------------------------------------------------------------
     INPUTS:
-    df         = (N1, 11) DataFrame, 11 variables with N observations
+    df         = dictionary or DataFrame, (N1,) vector of each data
+                 variable indexed by variable name
     s          = integer >= 21, age of individual
     t          = integer >= 2016, year of analysis
     output_dir = string, output directory for saving plot files
@@ -135,7 +191,7 @@ def gen_3Dscatters_hist(df, s, t, output_dir):
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
 
     OBJECTS CREATED WITHIN FUNCTION:
-    df_trnc   = (N2 x 6) DataFrame, truncated data for 3D graph
+    trnc      = (N1,) boolean vector, =True for the data in 3D graph
     inc_lab   = (N2 x 1) vector, total labor income for 3D graph
     inc_cap   = (N2 x 1) vector, total capital income for 3D graph
     etr_data  = (N2 x 1) vector, effective tax rate data
@@ -170,15 +226,15 @@ def gen_3Dscatters_hist(df, s, t, output_dir):
     --------------------------------------------------------------------
     '''
     # Truncate the data
-    df_trnc = df[(df['Total Labor Income'] > 5) &
+    trnc = ((df['Total Labor Income'] > 5) &
         (df['Total Labor Income'] < 500000) &
         (df['Total Capital Income'] > 5) &
-        (df['Total Capital Income'] < 500000)]
-    inc_lab = df_trnc['Total Labor Income']
-    inc_cap = df_trnc['Total Capital Income']
-    etr_data = df_trnc['Effective Tax Rate']
-    mtrx_data = df_trnc['MTR Labor']
-    mtry_data = df_trnc['MTR capital income']
+        (df['Total Capital Income'] < 500000))
+    inc_lab = df['Total Labor Income'][trnc]
+    inc_cap = df['Total Capital Income'][trnc]
+    etr_data = df['Effective Tax Rate'][trnc]
+    mtrx_data = df['MTR Labor'][trnc]
+    mtry_data = df['MTR capital income'][trnc]
 
     # Plot 3D scatterplot of ETR data
     fig = plt.figure()
@@ -659,35 +715,335 @@ def replace_outliers(param_arr, sse_big_mat):
     return param_arr_adj
 
 
-def txfunc_est(df, s, t, rate_type, output_dir, graph):
+def derive_micro_data(year_data):
+    '''
+    --------------------------------------------------------------------
+    This function computes the variables used to estimate the tax
+    functions from the micro data of one year
+    --------------------------------------------------------------------
+    INPUTS:
+    year_data = dictionary or DataFrame, (N1,) vector of each variable
+                in TAXCALC_COLS
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    cols    = dictionary, (N1,) double precision vector of each variable
+              in TAXCALC_COLS
+    wages   = (N1,) vector, wages and salaries
+    se_inc  = (N1,) vector, self-employment income
+    abs_inc = (N1,) vector, sum of the absolute values of wages and
+              self-employment income
+    data    = dictionary, (N1,) vector of each variable in
+              MICRO_DATA_COLS
+
+    RETURNS: data
+    --------------------------------------------------------------------
+    '''
+    cols = dict((name, np.asarray(year_data[name], dtype=np.float64))
+                for name in TAXCALC_COLS)
+    wages = cols['Wage and Salaries']
+    se_inc = cols['Self-Employed Income']
+    data = {'Age': cols['Age'],
+            'MTR capital income': cols['MTR capital income'],
+            'Adjusted Total income': cols['Adjusted Total income'],
+            'Weights': cols['Weights']}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data['Total Labor Income'] = wages + se_inc
+        data['Effective Tax Rate'] = (cols['Total Tax Liability'] /
+                                      cols['Adjusted Total income'])
+        data['Total Capital Income'] = (cols['Adjusted Total income'] -
+                                        data['Total Labor Income'])
+        # use weighted avg for MTR labor - abs value because
+        # SE income may be negative
+        abs_inc = np.abs(wages) + np.abs(se_inc)
+        data['MTR Labor'] = (cols['MTR wage'] * (wages / abs_inc) +
+                             cols['MTR self-employed Wage'] *
+                             (np.abs(se_inc) / abs_inc))
+
+    return data
+
+
+def trunc_micro_data(data, analytical_mtrs):
+    '''
+    --------------------------------------------------------------------
+    This function drops the outliers from the micro data of one year
+    with one boolean mask over all the cuts
+    --------------------------------------------------------------------
+    INPUTS:
+    data            = dictionary or DataFrame, (N1,) vector of each
+                      variable in MICRO_DATA_COLS
+    analytical_mtrs = Boolean, =True if use analytical_mtrs, =False if
+                      use estimated MTRs (then the MTRs are also cut)
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    cols = dictionary, (N1,) vector of each column of data
+    keep = (N1,) boolean vector, =True for the observations kept
+
+    RETURNS: data_trnc (dictionary, (N2,) vector of each column of data)
+    --------------------------------------------------------------------
+    '''
+    cols = dict((name, np.asarray(data[name])) for name in MICRO_DATA_COLS)
+    # Observations are dropped where a rate is above or below the cut,
+    # which keeps missing rates (as DataFrame.drop() did), but the
+    # incomes must be at least $5
+    with np.errstate(invalid='ignore'):
+        keep = (~(cols['Effective Tax Rate'] > 0.65) &
+                ~(cols['Effective Tax Rate'] < -0.15) &
+                (cols['Adjusted Total income'] >= 5) &
+                (cols['Total Labor Income'] >= 5) &
+                (cols['Total Capital Income'] >= 5))
+        if analytical_mtrs==False:
+            keep &= (~(cols['MTR capital income'] > 0.99) &
+                     ~(cols['MTR capital income'] < -0.45) &
+                     ~(cols['MTR Labor'] > 0.99) &
+                     ~(cols['MTR Labor'] < -0.45))
+    data_trnc = dict((name, col[keep]) for name, col in cols.iteritems())
+
+    return data_trnc
+
+
+def group_by_age(data_trnc, ages_list):
+    '''
+    --------------------------------------------------------------------
+    This function sorts the truncated micro data by age so that the
+    observations of each age are one contiguous slice. The sort is
+    stable, so the observations of each age keep their order.
+    --------------------------------------------------------------------
+    INPUTS:
+    data_trnc = dictionary, (N2,) vector of each column of the data
+    ages_list = (A,) vector, ages
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    order       = (N2,) vector, indices that sort the data by age
+    data_sorted = dictionary, (N2,) vector of each column sorted by age
+    starts      = (A,) vector, first observation of each age
+    ends        = (A,) vector, one past the last observation of each age
+
+    RETURNS: data_sorted, starts, ends
+    --------------------------------------------------------------------
+    '''
+    order = np.argsort(data_trnc['Age'], kind='mergesort')
+    data_sorted = dict((name, col[order]) for name, col in
+                       data_trnc.iteritems())
+    starts = np.searchsorted(data_sorted['Age'], ages_list, side='left')
+    ends = np.searchsorted(data_sorted['Age'], ages_list, side='right')
+
+    return data_sorted, starts, ends
+
+
+def select_obs(df, columns, keep):
+    '''
+    --------------------------------------------------------------------
+    This function selects columns and observations of the micro data
+    --------------------------------------------------------------------
+    INPUTS:
+    df      = dictionary, (N,) vector of each column of the data
+    columns = list, names of the columns to select
+    keep    = (N,) boolean vector, =True for the observations selected
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION: None
+
+    RETURNS: dictionary, vector of each selected column (the same arrays
+             as in df if all observations are selected)
+    --------------------------------------------------------------------
+    '''
+    if keep.all():
+        return dict((name, df[name]) for name in columns)
+
+    return dict((name, df[name][keep]) for name in columns)
+
+
+def reduce_data(X, Y, txrates, wgts, bins):
+    '''
+    --------------------------------------------------------------------
+    This function reduces the data of one tax function fit to one
+    weighted observation per cell of a grid of quantile bins of labor
+    and capital income. The weight of each cell is the sum of the
+    weights of its observations, and its incomes and tax rate are their
+    weighted means.
+
+    For any parameters, the weighted sum of squared deviations (SSE) of
+    the tax function from the data is the SSE over the cells plus the
+    within-cell SSE of the tax rates (a constant), up to the error
+    bound from sse_error_bound(). The bound uses the range of incomes in
+    each cell, over which the tax function is increasing in both
+    incomes.
+    --------------------------------------------------------------------
+    INPUTS:
+    X       = (N,) vector, labor income data
+    Y       = (N,) vector, capital income data
+    txrates = (N,) vector, tax rate data (ETR, MTRx, or MTRy)
+    wgts    = (N,) vector, population weights for each observation
+    bins    = integer >= 1, number of quantile bins of each income
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION: None
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    keep       = (N,) boolean vector, =True for observations with
+                 positive weight (the others do not change the SSE)
+    x_edges    = (bins+1,) vector, quantiles of labor income
+    y_edges    = (bins+1,) vector, quantiles of capital income
+    cell       = (N,) vector, cell of each observation
+    cells      = (M,) vector, nonempty cells
+    inverse    = (N,) vector, index of the cell of each observation in
+                 the nonempty cells
+    ncells     = integer, number of nonempty cells (M)
+    order      = (N,) vector, observations sorted by cell
+    starts     = (M,) vector, first sorted observation of each cell
+    X_cell     = (M,) vector, weighted mean labor income of each cell
+    Y_cell     = (M,) vector, weighted mean capital income of each cell
+    rates_cell = (M,) vector, weighted mean tax rate of each cell
+    wgts_cell  = (M,) vector, sum of weights of each cell
+    within_ss  = (M,) vector, weighted sum of squared deviations of the
+                 tax rates from their mean in each cell
+    box        = (M, 4) matrix, smallest and largest labor income and
+                 smallest and largest capital income in each cell
+
+    RETURNS: X_cell, Y_cell, rates_cell, wgts_cell, within_ss, box
+    --------------------------------------------------------------------
+    '''
+    keep = np.asarray(wgts) > 0
+    X = np.asarray(X)[keep]
+    Y = np.asarray(Y)[keep]
+    txrates = np.asarray(txrates)[keep]
+    wgts = np.asarray(wgts)[keep]
+    x_edges = np.percentile(X, np.linspace(0, 100, bins + 1))
+    y_edges = np.percentile(Y, np.linspace(0, 100, bins + 1))
+    cell = (np.searchsorted(x_edges[1:-1], X, side='right') * bins +
+            np.searchsorted(y_edges[1:-1], Y, side='right'))
+    cells, inverse = np.unique(cell, return_inverse=True)
+    ncells = cells.shape[0]
+    wgts_cell = np.bincount(inverse, weights=wgts, minlength=ncells)
+    X_cell = np.bincount(inverse, weights=wgts * X,
+                         minlength=ncells) / wgts_cell
+    Y_cell = np.bincount(inverse, weights=wgts * Y,
+                         minlength=ncells) / wgts_cell
+    rates_cell = np.bincount(inverse, weights=wgts * txrates,
+                             minlength=ncells) / wgts_cell
+    within_ss = np.bincount(inverse, weights=wgts *
+                            (txrates - rates_cell[inverse]) ** 2,
+                            minlength=ncells)
+    order = np.argsort(inverse, kind='mergesort')
+    starts = np.searchsorted(inverse[order], np.arange(ncells))
+    box = np.column_stack([np.minimum.reduceat(X[order], starts),
+                           np.maximum.reduceat(X[order], starts),
+                           np.minimum.reduceat(Y[order], starts),
+                           np.maximum.reduceat(Y[order], starts)])
+
+    return X_cell, Y_cell, rates_cell, wgts_cell, within_ss, box
+
+
+def sse_error_bound(params, reduced):
+    '''
+    --------------------------------------------------------------------
+    This function bounds the difference between the weighted SSE of a
+    tax function over the full data and over the data reduced by
+    reduce_data() (plus the within-cell SSE). For an observation i in
+    cell b, the tax function differs from its value at the cell mean by
+    at most delta_b, the increase of the function over the cell. So,
+    by the Cauchy-Schwarz inequality,
+
+    |SSE_full - SSE_cells - sum(within_ss)| <=
+        sum_b (2 * delta_b * sqrt(W_b * (W_b * (f_b - r_b)^2 +
+                                          within_ss_b)) + W_b * delta_b^2)
+
+    where W_b is the weight of the cell, f_b the tax function at the
+    mean incomes of the cell and r_b the mean tax rate.
+    --------------------------------------------------------------------
+    INPUTS:
+    params  = (12,) vector, parameters of the tax function (as returned
+              by txfunc_est())
+    reduced = length 6 tuple, returned by reduce_data()
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        gen_rate_grid()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    rates_fit = (M,) vector, tax function at the mean incomes of each
+                cell
+    delta     = (M,) vector, increase of the tax function from the
+                smallest to the largest incomes of each cell
+
+    RETURNS: bound (scalar >= 0)
+    --------------------------------------------------------------------
+    '''
+    X_cell, Y_cell, rates_cell, wgts_cell, within_ss, box = reduced
+    rates_fit = gen_rate_grid(X_cell, Y_cell, params)
+    delta = (gen_rate_grid(box[:, 1], box[:, 3], params) -
+             gen_rate_grid(box[:, 0], box[:, 2], params))
+    bound = (2 * delta * np.sqrt(wgts_cell * (wgts_cell *
+             (rates_fit - rates_cell) ** 2 + within_ss)) +
+             wgts_cell * delta ** 2).sum()
+
+    return bound
+
+
+def txfunc_est(df, s, t, rate_type, output_dir, graph, warm_start=None,
+  reduction_bins=None):
     '''
     --------------------------------------------------------------------
     This function uses tax tax rate and income data for individuals of a
     particular age (s) and a particular year (t) to estimate the
     parameters of a Cobb-Douglas aggregation function of two ratios of
     polynomials in labor income and capital income, respectively.
+
+    With warm_start, the minimizer starts from the function estimated
+    for a neighboring age or year, which is usually close to the
+    minimum. If the weighted SSE per observation of that fit is more
+    than WARM_START_TOL larger than that of the neighbor, the minimizer
+    may have stopped at a worse local minimum, so the fit is done again
+    from the default initial guess and the better of the two is kept.
+
+    With reduction_bins, the function is fit to the data reduced to
+    weighted cell means by reduce_data(), so the cost of each evaluation
+    of the SSE depends on the number of cells rather than observations.
+    The calibrated parameters (min_x, min_y, shift and the initial
+    guesses) are still computed from the full data, and the weighted SSE
+    returned is that of the full data.
     --------------------------------------------------------------------
     INPUTS:
-    df         = (N, 11) DataFrame, data variables indexed by 11
-                 variable names
+    df         = dictionary or DataFrame, (N,) vector of each data
+                 variable indexed by variable name
     s          = integer >= 21, age
     t          = integer >= 2016, year
     rate_type  = string, either 'etr', 'mtrx', or 'mtry'
     output_dir = string, output directory in which to save plots
     graph      = Boolean, =True graphs the estimated functions compared
                  to the data
+    warm_start = length 3 tuple or None, (params, wsse, obs) returned by
+                 txfunc_est() for a neighboring age or year of the same
+                 rate type, or None to start from the default guess
+    reduction_bins = integer >= 1, number of quantile bins of each
+                 income in reduce_data(), or None to fit the full data
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
         wsumsq()
+        inequality.percentiles()
+        reduce_data()
         utils.mkdirs()
         gen_rate_grid()
 
     OBJECTS CREATED WITHIN FUNCTION:
-    X           = (N,) Series, labor income data
-    Y           = (N,) Series, capital income data
-    wgts        = (N,) Series, population weights on the data
-    X2          = (N,) Series, labor income squared (X^2)
-    Y2          = (N,) Series, capital income squared (Y^2)
+    X           = (N,) vector, labor income data
+    Y           = (N,) vector, capital income data
+    wgts        = (N,) vector, population weights on the data
+    fit_X       = (M,) vector, labor income data the function is fit to
+                  (X, or the cell means if reduction_bins)
+    fit_Y       = (M,) vector, capital income data the function is fit
+                  to
+    fit_rates   = (M,) vector, tax rates the function is fit to
+    fit_wgts    = (M,) vector, weights of fit_X, fit_Y and fit_rates
+    within_sse  = scalar >= 0, weighted SSE of the tax rates within the
+                  cells of the reduced data (0 for the full data)
+    X2          = (M,) vector, labor income squared (X^2)
+    Y2          = (M,) vector, capital income squared (Y^2)
     X2bar       = scalar > 0, population weighted mean of X2
     Xbar        = scalar > 0, population weighted mean of X
     Y2bar       = scalar > 0, population weighted mean of Y2
@@ -723,6 +1079,10 @@ def txfunc_est(df, s, t, rate_type, output_dir, graph):
     params_init = (7,) vector, parameters for minimization function
                   (Atil_init, Btil_init, Ctil_init, Dtil_init,
                   max_x_init, max_y_init, share_init)
+    warm_init   = (7,) vector, parameters for minimization function
+                  from the function in warm_start, within the bounds
+    params_cold = dictionary, output from minimization from params_init
+                  if the warm-started fit is rejected
     tx_objs     = length 7 tuple, arguments to be passed in to minimizer
                   (X, Y, min_x, min_y, shift, txrates, wgts)
     lb_max_x    = scalar > 0, lower bound for max_x. Must be greater
@@ -738,8 +1098,8 @@ def txfunc_est(df, s, t, rate_type, output_dir, graph):
     max_x       = scalar > 0, estimated value for max_x (labor income)
     max_y       = scalar > 0, estimated value for max_y (capital income)
     share       = scalar in [0, 1], estimated Cobb-Douglas share param
-    wsse        = scalar > 0, weighted sum of squared deviations from
-                  minimization
+    wsse        = scalar > 0, weighted sum of squared deviations of the
+                  estimated function from the (full) data
     obs         = integer > 600, number of obervations in the data (N)
     shift_x     = scalar, adds to tau(Y) to assure value in rate(X,Y)
                   term is strictly positive
@@ -756,51 +1116,71 @@ def txfunc_est(df, s, t, rate_type, output_dir, graph):
     X = df['Total Labor Income']
     Y = df['Total Capital Income']
     wgts = df['Weights']
-    X2 = X ** 2
-    Y2 = Y ** 2
-    X2bar = (X2 * wgts).sum() / wgts.sum()
-    Xbar = (X * wgts).sum() / wgts.sum()
-    Y2bar = (Y2 * wgts).sum() / wgts.sum()
-    Ybar = (Y * wgts).sum() / wgts.sum()
     if rate_type == 'etr':
         txrates = df['Effective Tax Rate']
     elif rate_type == 'mtrx':
         txrates = df['MTR Labor']
     elif rate_type == 'mtry':
         txrates = df['MTR capital income']
-    x_10pctl = df['Total Labor Income'].quantile(0.1)
-    y_10pctl = df['Total Capital Income'].quantile(0.1)
-    x_20pctl = df['Total Labor Income'].quantile(.2)
-    y_20pctl = df['Total Capital Income'].quantile(.2)
-    min_x = txrates[(df['Total Capital Income'] < y_10pctl)].min()
-    min_y = txrates[(df['Total Labor Income'] < x_10pctl)].min()
+    x_10pctl, x_20pctl = inequality.percentiles(X, [0.1, .2])
+    y_10pctl, y_20pctl = inequality.percentiles(Y, [0.1, .2])
+    min_x = txrates[(Y < y_10pctl)].min()
+    min_y = txrates[(X < x_10pctl)].min()
     Atil_init = 1.0
     Btil_init = 1.0
     Ctil_init = 1.0
     Dtil_init = 1.0
-    max_x_init = np.minimum(
-        txrates[(df['Total Capital Income'] < y_20pctl)].max(), 0.7)
-    max_y_init = np.minimum(
-        txrates[(df['Total Labor Income'] < x_20pctl)].max(), 0.7)
-    shift = txrates[(df['Total Labor Income'] < x_20pctl) |
-        (df['Total Capital Income'] < y_20pctl)].min()
+    max_x_init = np.minimum(txrates[(Y < y_20pctl)].max(), 0.7)
+    max_y_init = np.minimum(txrates[(X < x_20pctl)].max(), 0.7)
+    shift = txrates[(X < x_20pctl) | (Y < y_20pctl)].min()
+    if reduction_bins is None:
+        fit_X, fit_Y, fit_rates, fit_wgts = X, Y, txrates, wgts
+        within_sse = 0.0
+    else:
+        fit_X, fit_Y, fit_rates, fit_wgts, within_ss, box = \
+            reduce_data(X, Y, txrates, wgts, reduction_bins)
+        within_sse = within_ss.sum()
+    X2 = fit_X ** 2
+    Y2 = fit_Y ** 2
+    X2bar = (X2 * fit_wgts).sum() / fit_wgts.sum()
+    Xbar = (fit_X * fit_wgts).sum() / fit_wgts.sum()
+    Y2bar = (Y2 * fit_wgts).sum() / fit_wgts.sum()
+    Ybar = (fit_Y * fit_wgts).sum() / fit_wgts.sum()
     share_init = 0.5
     numparams = int(12)
     params_init = np.array([Atil_init, Btil_init, Ctil_init,
         Dtil_init, max_x_init, max_y_init, share_init])
-    tx_objs = (X, Y, min_x, min_y, shift, txrates, wgts)
+    tx_objs = (fit_X, fit_Y, min_x, min_y, shift, fit_rates, fit_wgts)
     lb_max_x = np.maximum(min_x, 0.0) + 1e-4
     lb_max_y = np.maximum(min_y, 0.0) + 1e-4
     bnds = ((1e-12, None), (1e-12, None), (1e-12, None), (1e-12, None),
         (lb_max_x, 0.8), (lb_max_y, 0.8), (0, 1))
-    params_til = opt.minimize(wsumsq, params_init,
-        args=(tx_objs), method="L-BFGS-B", bounds=bnds, tol=1e-15)
+    if warm_start is None:
+        params_til = opt.minimize(wsumsq, params_init,
+            args=(tx_objs), method="L-BFGS-B", bounds=bnds, tol=1e-15)
+    else:
+        # The same function of the levels of income as the neighbor
+        warm_params, warm_wsse, warm_obs = warm_start
+        warm_init = np.array([warm_params[0] * X2bar,
+            warm_params[1] * Xbar, warm_params[2] * Y2bar,
+            warm_params[3] * Ybar, warm_params[4], warm_params[6],
+            warm_params[11]])
+        warm_init = np.clip(warm_init, [bnd[0] for bnd in bnds],
+            [np.inf if bnd[1] is None else bnd[1] for bnd in bnds])
+        params_til = opt.minimize(wsumsq, warm_init,
+            args=(tx_objs), method="L-BFGS-B", bounds=bnds, tol=1e-15)
+        if ((params_til.fun + within_sse) / X.shape[0] >
+          (1 + WARM_START_TOL) * warm_wsse / warm_obs):
+            params_cold = opt.minimize(wsumsq, params_init,
+                args=(tx_objs), method="L-BFGS-B", bounds=bnds,
+                tol=1e-15)
+            if params_cold.fun < params_til.fun:
+                params_til = params_cold
     Atil, Btil, Ctil, Dtil, max_x, max_y, share = params_til.x
     # message = ("(max_x, min_x)=(" + str(max_x) + ", " + str(min_x) +
     #     "), (max_y, min_y)=(" + str(max_y) + ", " + str(min_y) + ")")
     # print message
-    wsse = params_til.fun
-    obs = df.shape[0]
+    obs = X.shape[0]
     shift_x = np.maximum(-min_x, 0.0) + 0.01 * (max_x - min_x)
     shift_y = np.maximum(-min_y, 0.0) + 0.01 * (max_y - min_y)
     params = np.zeros(numparams)
@@ -808,6 +1188,10 @@ def txfunc_est(df, s, t, rate_type, output_dir, graph):
         np.array([X2bar, Xbar, Y2bar, Ybar]))
     params[4:] = np.array([max_x, min_x, max_y, min_y, shift_x,
         shift_y, shift, share])
+    if reduction_bins is None:
+        wsse = params_til.fun
+    else:
+        wsse = (wgts * (gen_rate_grid(X, Y, params) - txrates) ** 2).sum()
 
     if graph:
         '''
@@ -823,10 +1207,10 @@ def txfunc_est(df, s, t, rate_type, output_dir, graph):
         txrate_grid = (gridpts, gridpts) matrix, ?
         filename    = string, name of plot to be saved
         fullpath    = string, full path name of file to be saved
-        df_trnc_gph = (Nb, 11) DataFrame, truncated data for plotting
-        X_gph       = (Nb,) Series, truncated labor income data
-        Y_gph       = (Nb,) Series, truncated capital income data
-        txrates_gph = (Nb,) Series, truncated tax rate (ETR, MTRx, or
+        trnc_gph    = (N,) boolean vector, =True for the data plotted
+        X_gph       = (Nb,) vector, truncated labor income data
+        Y_gph       = (Nb,) vector, truncated capital income data
+        txrates_gph = (Nb,) vector, truncated tax rate (ETR, MTRx, or
                       MTRy) data
         ----------------------------------------------------------------
         '''
@@ -862,18 +1246,10 @@ def txfunc_est(df, s, t, rate_type, output_dir, graph):
         plt.close()
 
         # Make comparison plot with truncated income domains
-        df_trnc_gph = df[(df['Total Labor Income'] > 5) &
-            (df['Total Labor Income'] < 800000) &
-            (df['Total Capital Income'] > 5) &
-            (df['Total Capital Income'] < 800000)]
-        X_gph = df_trnc_gph['Total Labor Income']
-        Y_gph = df_trnc_gph['Total Capital Income']
-        if rate_type == 'etr':
-            txrates_gph = df_trnc_gph['Effective Tax Rate']
-        elif rate_type == 'mtrx':
-            txrates_gph = df_trnc_gph['MTR Labor']
-        elif rate_type == 'mtry':
-            txrates_gph = df_trnc_gph['MTR capital income']
+        trnc_gph = ((X > 5) & (X < 800000) & (Y > 5) & (Y < 800000))
+        X_gph = X[trnc_gph]
+        Y_gph = Y[trnc_gph]
+        txrates_gph = txrates[trnc_gph]
 
         fig = plt.figure()
         ax = fig.add_subplot(111, projection ='3d')
@@ -902,6 +1278,78 @@ def txfunc_est(df, s, t, rate_type, output_dir, graph):
     return params, wsse, obs
 
 
+def check_data_reduction(df, s, t, rate_type, output_dir,
+  reduction_bins=None):
+    '''
+    --------------------------------------------------------------------
+    This function compares the tax function estimated on data reduced
+    with reduce_data() to the one estimated on the full data, to check
+    that a number of bins is fine enough for the data
+    --------------------------------------------------------------------
+    INPUTS:
+    df             = dictionary or DataFrame, (N,) vector of each data
+                     variable indexed by variable name
+    s              = integer >= 21, age
+    t              = integer >= 2016, year
+    rate_type      = string, either 'etr', 'mtrx', or 'mtry'
+    output_dir     = string, output directory in which to save plots
+    reduction_bins = integer >= 1, number of quantile bins of each
+                     income, or None to use DATA_REDUCTION_BINS
+
+    OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
+        txfunc_est()
+        reduce_data()
+        sse_error_bound()
+
+    OBJECTS CREATED WITHIN FUNCTION:
+    params_full = (12,) vector, parameters estimated on the full data
+    wsse_full   = scalar > 0, weighted SSE of params_full
+    params_red  = (12,) vector, parameters estimated on the reduced data
+    wsse_red    = scalar > 0, weighted SSE of params_red over the full
+                  data
+    reduced     = length 6 tuple, the reduced data
+    bound       = scalar >= 0, bound on the error of the weighted SSE of
+                  params_red computed from the reduced data
+    param_diff  = (12,) vector, differences of params_red from
+                  params_full, relative to params_full
+    diagnostic  = dictionary, objects above and the number of
+                  observations and of cells
+
+    RETURNS: diagnostic
+    --------------------------------------------------------------------
+    '''
+    if reduction_bins is None:
+        reduction_bins = DATA_REDUCTION_BINS
+    params_full, wsse_full, obs = txfunc_est(df, s, t, rate_type,
+        output_dir, False)
+    params_red, wsse_red, obs = txfunc_est(df, s, t, rate_type,
+        output_dir, False, reduction_bins=reduction_bins)
+    if rate_type == 'etr':
+        txrates = df['Effective Tax Rate']
+    elif rate_type == 'mtrx':
+        txrates = df['MTR Labor']
+    elif rate_type == 'mtry':
+        txrates = df['MTR capital income']
+    reduced = reduce_data(df['Total Labor Income'],
+        df['Total Capital Income'], txrates, df['Weights'],
+        reduction_bins)
+    bound = sse_error_bound(params_red, reduced)
+    param_diff = (params_red - params_full) / np.abs(params_full)
+    message = ("Data reduction for " + rate_type + " age=" + str(s) +
+        " year=" + str(t) + ": " + str(obs) + " obs. in " +
+        str(reduced[0].shape[0]) + " cells, weighted SSE " +
+        str(wsse_red) + " (full data fit " + str(wsse_full) +
+        ", bound on error " + str(bound) + "), largest relative " +
+        "parameter difference " + str(np.nanmax(np.abs(param_diff))))
+    print message
+    diagnostic = {'params_full': params_full, 'wsse_full': wsse_full,
+        'params_red': params_red, 'wsse_red': wsse_red, 'bound': bound,
+        'param_diff': param_diff, 'obs': obs,
+        'cells': reduced[0].shape[0]}
+
+    return diagnostic
+
+
 def tax_func_estimate(beg_yr=2016, baseline=True, analytical_mtrs=False,
   age_specific=True, reform={}):
     '''
@@ -920,11 +1368,16 @@ def tax_func_estimate(beg_yr=2016, baseline=True, analytical_mtrs=False,
     age_specific    = Boolean, =True calculates tax functions for each
                       age, =False calculates an average over all ages
     reform          = dictionary, Tax-Calculator reform values to be
-                      passed in to get_micro_data.get_data() function
+                      passed in to get_micro_data.iter_data() function
 
     OTHER FUNCTIONS AND FILES CALLED BY THIS FUNCTION:
         utils.mkdirs()
-        get_micro_data.get_data()
+        get_micro_data.iter_data()
+        derive_micro_data()
+        trunc_micro_data()
+        group_by_age()
+        select_obs()
+        txfunc_est()
 
     OBJECTS CREATED WITHIN FUNCTION:
     (See comments within this function)
@@ -1024,169 +1477,133 @@ def tax_func_estimate(beg_yr=2016, baseline=True, analytical_mtrs=False,
     --------------------------------------------------------------------
     start_time = scalar, current processor time in seconds (float)
     output_dir = string, directory to which plots will be saved
-    micro_data = dictionary, tpers (one for each year) DataFrames,
-                 each of which has variables with observations from
-                 Tax-Calculator
+    micro_data = generator, yields the year and a dictionary of a
+                 vector of each variable in TAXCALC_COLS with
+                 observations from Tax-Calculator, for one year at a
+                 time
     t          = integer >= beg_yr, index for year of analysis
+    year_data  = dictionary, micro data from Tax-Calculator for year t
+    last_fit   = dictionary, (params, wsse, obs) of the last fit of each
+                 rate type, from which the next fit of the same rate
+                 type starts if WARM_START
     --------------------------------------------------------------------
     '''
     start_time = time.clock()
     output_dir = "./OUTPUT/txfuncs"
     utils.mkdirs(output_dir)
 
-    # call tax caculator and get microdata
-    micro_data = get_micro_data.get_data(baseline=baseline,
-        start_year=beg_yr, reform=reform)
+    # call tax caculator and get microdata, one year at a time
+    micro_data = get_micro_data.iter_data(baseline=baseline,
+        start_year=beg_yr, reform=reform, columns=TAXCALC_COLS,
+        dtype=MICRO_DATA_DTYPE)
     # if reform:
     #     micro_data = pickle.load(open("micro_data_policy.pkl", "rb"))
     # else:
     #     micro_data = pickle.load(open("micro_data_baseline.pkl", "rb"))
+    last_fit = {'etr': None, 'mtrx': None, 'mtry': None}
 
-    for t in years_list: #for t in np.arange(2016, 2017):
+    for t, year_data in micro_data: #for t in np.arange(2016, 2017):
         '''
         ----------------------------------------------------------------
         Clean up the data
         ----------------------------------------------------------------
-        data_orig  = (N1, 11) DataFrame, original micro tax data from
-                     Tax-Calculator for particular year
-        data       = (N1, 8) DataFrame, new variables dataset
-        data_trnc  = (N2, 8) DataFrame, truncated observations dataset
+        data       = dictionary, (N1,) vector of each variable of the
+                     new variables dataset
+        data_trnc  = dictionary, (N2,) vector of each variable of the
+                     truncated observations dataset, sorted by age if
+                     age_specific
         min_age    = integer >= 1, minimum age in micro data that is
                      relevant to model
         max_age    = integer >= min_age, maximum age in micro data that
                      is relevant to model
+        age_starts = (ages,) vector, first observation of each age in
+                     data_trnc
+        age_ends   = (ages,) vector, one past the last observation of
+                     each age in data_trnc
         NoData_cnt = integer >= 0, number of consecutive ages with
                      insufficient data to estimate tax functions
         ----------------------------------------------------------------
         '''
-        data_orig = micro_data[str(t)]
-        data_orig['Total Labor Income'] = \
-            (data_orig['Wage and Salaries'] +
-            data_orig['Self-Employed Income'])
-        data_orig['Effective Tax Rate'] = \
-            (data_orig['Total Tax Liability'] /
-            data_orig["Adjusted Total income"])
-        data_orig["Total Capital Income"] = \
-            (data_orig['Adjusted Total income'] -
-            data_orig['Total Labor Income'])
-        # use weighted avg for MTR labor - abs value because
-        # SE income may be negative
-        data_orig['MTR Labor'] = \
-            (data_orig['MTR wage'] * (data_orig['Wage and Salaries'] /
-            (data_orig['Wage and Salaries'].abs() +
-            data_orig['Self-Employed Income'].abs())) +
-            data_orig['MTR self-employed Wage'] *
-            (data_orig['Self-Employed Income'].abs() /
-            (data_orig['Wage and Salaries'].abs() +
-            data_orig['Self-Employed Income'].abs())))
-        data = data_orig[['Age', 'MTR Labor', 'MTR capital income',
-            'Total Labor Income', 'Total Capital Income',
-            'Adjusted Total income', 'Effective Tax Rate', 'Weights']]
-
-        # Calculate average total income in each year
+        data = derive_micro_data(year_data)
+
+        # Calculate average total income in each year (the sums skip
+        # missing values, as pandas does)
         AvgInc[t-beg_yr] = \
-            (((data['Adjusted Total income'] * data['Weights']).sum())
-            / data['Weights'].sum())
+            ((np.nansum(data['Adjusted Total income'] * data['Weights']))
+            / np.nansum(data['Weights']))
 
         # Calculate average ETR and MTRs (weight by population weights
         #    and income) for each year
         AvgETR[t-beg_yr] = \
-            (((data['Effective Tax Rate']*data['Adjusted Total income']
-            * data['Weights']).sum()) /
-            (data['Adjusted Total income']*data['Weights']).sum())
+            ((np.nansum(data['Effective Tax Rate'] *
+            data['Adjusted Total income'] * data['Weights'])) /
+            np.nansum(data['Adjusted Total income']*data['Weights']))
 
         AvgMTRx[t-beg_yr] = \
-            (((data['MTR Labor']*data['Adjusted Total income'] *
-            data['Weights']).sum()) /
-            (data['Adjusted Total income']*data['Weights']).sum())
+            ((np.nansum(data['MTR Labor']*data['Adjusted Total income'] *
+            data['Weights'])) /
+            np.nansum(data['Adjusted Total income']*data['Weights']))
 
         AvgMTRy[t-beg_yr] = \
-            (((data['MTR capital income'] *
-            data['Adjusted Total income'] * data['Weights']).sum()) /
-            (data['Adjusted Total income']*data['Weights']).sum())
+            ((np.nansum(data['MTR capital income'] *
+            data['Adjusted Total income'] * data['Weights'])) /
+            np.nansum(data['Adjusted Total income']*data['Weights']))
 
         # Calculate total population in each year
-        TotPop_yr[t-beg_yr] = data['Weights'].sum()
-
-        # Clean up the data by dropping outliers
-        # drop all obs with ETR > 0.65
-        data_trnc = \
-            data.drop(data[data['Effective Tax Rate'] >0.65].index)
-        # drop all obs with ETR < -0.15
-        data_trnc = \
-            data_trnc.drop(data_trnc[data_trnc['Effective Tax Rate']
-            < -0.15].index)
-        # drop all obs with ATI, TLI, TCI < $5
-        data_trnc = data_trnc[(data_trnc['Adjusted Total income'] >= 5)
-            & (data_trnc['Total Labor Income'] >= 5) &
-            (data_trnc['Total Capital Income'] >= 5)]
+        TotPop_yr[t-beg_yr] = np.nansum(data['Weights'])
 
-        if analytical_mtrs==False:
-            # drop all obs with MTR on capital income > 10.99
-            data_trnc = \
-                data_trnc.drop(data_trnc[data_trnc['MTR capital income']
-                > 0.99].index)
-            # drop all obs with MTR on capital income < -0.45
-            data_trnc = \
-                data_trnc.drop(data_trnc[data_trnc['MTR capital income']
-                < -0.45].index)
-            # drop all obs with MTR on labor income > 10.99
-            data_trnc = data_trnc.drop(data_trnc[data_trnc['MTR Labor']
-                        > 0.99].index)
-            # drop all obs with MTR on labor income < -0.45
-            data_trnc = data_trnc.drop(data_trnc[data_trnc['MTR Labor']
-                        < -0.45].index)
+        # Clean up the data by dropping outliers: all obs with ETR > 0.65
+        # or ETR < -0.15, with ATI, TLI or TCI < $5 and, if not
+        # analytical_mtrs, with MTRs on labor or capital income > 0.99
+        # or < -0.45
+        data_trnc = trunc_micro_data(data, analytical_mtrs)
 
         # Create an array of the different ages in the data
         min_age = int(np.maximum(data_trnc['Age'].min(), s_min))
         max_age = int(np.minimum(data_trnc['Age'].max(), s_max))
         if age_specific:
             ages_list = np.arange(min_age, max_age+1)
+            data_trnc, age_starts, age_ends = \
+                group_by_age(data_trnc, ages_list)
         else:
             ages_list = np.arange(0,1)
+            age_starts = np.array([0])
+            age_ends = np.array([data_trnc['Age'].shape[0]])
 
         NoData_cnt = np.min(min_age - s_min, 0)
 
+        if age_specific:
+            # The chains of warm-started fits run along the ages of each
+            # year, so that the years stay independent
+            last_fit = {'etr': None, 'mtrx': None, 'mtry': None}
+
         # Each age s must be done in serial, but each year can be done
         # in parallel
 
-        for s in ages_list: # for s in np.array([23, 24, 60, 63, 64, 65, 66, 67, 70, 71, 74, 79]):
+        for s, start, end in zip(ages_list, age_starts, age_ends):
+            df = dict((name, col[start:end]) for name, col in
+                      data_trnc.iteritems())
             if age_specific:
                 print "year=", t, "Age=", s
-                df = data_trnc[data_trnc['Age'] == s]
                 PopPct_age[s-min_age, t-beg_yr] = \
                     df['Weights'].sum() / TotPop_yr[t-beg_yr]
 
             else:
                 print "year=", t, "Age= all ages"
-                df = data_trnc
                 PopPct_age[0, t-beg_yr] = \
                     df['Weights'].sum() / TotPop_yr[t-beg_yr]
 
-            df_etr = df[['MTR Labor', 'MTR capital income',
-                'Total Labor Income', 'Total Capital Income',
-                'Effective Tax Rate', 'Weights']]
-            df_etr = df_etr[
-                (np.isfinite(df_etr['Effective Tax Rate'])) &
-                (np.isfinite(df_etr['Total Labor Income'])) &
-                (np.isfinite(df_etr['Total Capital Income'])) &
-                (np.isfinite(df_etr['Weights']))]
-            df_mtrx = df[['MTR Labor', 'Total Labor Income',
-                'Total Capital Income', 'Weights']]
-            df_mtrx = df_mtrx[
-                (np.isfinite(df_etr['MTR Labor'])) &
-                (np.isfinite(df_etr['Total Labor Income'])) &
-                (np.isfinite(df_etr['Total Capital Income'])) &
-                (np.isfinite(df_etr['Weights']))]
-            df_mtry = df[['MTR capital income', 'Total Labor Income',
-                'Total Capital Income', 'Weights']]
-            df_mtry = df_mtry[
-                (np.isfinite(df_etr['MTR capital income'])) &
-                (np.isfinite(df_etr['Total Labor Income'])) &
-                (np.isfinite(df_etr['Total Capital Income'])) &
-                (np.isfinite(df_etr['Weights']))]
-            df_minobs = np.min([df_etr.shape[0], df_mtrx.shape[0],
-                df_mtry.shape[0]])
+            finite_etr = (np.isfinite(df['Effective Tax Rate']) &
+                np.isfinite(df['Total Labor Income']) &
+                np.isfinite(df['Total Capital Income']) &
+                np.isfinite(df['Weights']))
+            df_etr = select_obs(df, ETR_COLS, finite_etr)
+            df_mtrx = select_obs(df, MTRX_COLS,
+                finite_etr & np.isfinite(df['MTR Labor']))
+            df_mtry = select_obs(df, MTRY_COLS,
+                finite_etr & np.isfinite(df['MTR capital income']))
+            df_minobs = np.min([df_etr['Weights'].shape[0],
+                df_mtrx['Weights'].shape[0], df_mtry['Weights'].shape[0]])
 
             # 240 is 8 parameters to estimate times 30 obs per parameter
             if df_minobs < 240 and s < max_age:
@@ -1250,42 +1667,46 @@ def tax_func_estimate(beg_yr=2016, baseline=True, analytical_mtrs=False,
                     message = ("Descriptive ETR statistics for age=" +
                         str(s) + " in year " + str(t))
                     print message
-                    print df_etr.describe()
+                    print pd.DataFrame(df_etr).describe()
                     message = ("Descriptive MTRx statistics for age=" +
                         str(s) + " in year " + str(t))
                     print message
-                    print df_mtrx.describe()
+                    print pd.DataFrame(df_mtrx).describe()
                     message = ("Descriptive MTRy statistics for age=" +
                         str(s) + " in year " + str(t))
                     print message
-                    print df_mtry.describe()
+                    print pd.DataFrame(df_mtry).describe()
 
                 if graph_data:
                     gen_3Dscatters_hist(df, s, t, output_dir)
 
                 # Estimate effective tax rate function ETR(x,y)
+                etr_fit = txfunc_est(df_etr, s, t, 'etr', output_dir,
+                    graph_est, last_fit['etr'], DATA_REDUCTION_BINS)
                 (etrparams, etr_wsumsq_arr[s-s_min, t-beg_yr],
-                    etr_obs_arr[s-s_min, t-beg_yr]) = \
-                    txfunc_est(df_etr, s, t, 'etr', output_dir,
-                        graph_est)
+                    etr_obs_arr[s-s_min, t-beg_yr]) = etr_fit
                 etrparam_arr[s-s_min, t-beg_yr, :] = etrparams
 
                 # Estimate marginal tax rate of labor income function
                 # MTRx(x,y)
+                mtrx_fit = txfunc_est(df_mtrx, s, t, 'mtrx', output_dir,
+                    graph_est, last_fit['mtrx'], DATA_REDUCTION_BINS)
                 (mtrxparams, mtrx_wsumsq_arr[s-s_min, t-beg_yr],
-                    mtrx_obs_arr[s-s_min, t-beg_yr]) = \
-                    txfunc_est(df_mtrx, s, t, 'mtrx', output_dir,
-                        graph_est)
+                    mtrx_obs_arr[s-s_min, t-beg_yr]) = mtrx_fit
                 mtrxparam_arr[s-s_min, t-beg_yr, :] = mtrxparams
 
                 # Estimate marginal tax rate of capital income function
                 # MTRy(x,y)
+                mtry_fit = txfunc_est(df_mtry, s, t, 'mtry', output_dir,
+                    graph_est, last_fit['mtry'], DATA_REDUCTION_BINS)
                 (mtryparams, mtry_wsumsq_arr[s-s_min, t-beg_yr],
-                    mtry_obs_arr[s-s_min, t-beg_yr]) = \
-                    txfunc_est(df_mtry, s, t, 'mtry', output_dir,
-                        graph_est)
+                    mtry_obs_arr[s-s_min, t-beg_yr]) = mtry_fit
                 mtryparam_arr[s-s_min, t-beg_yr, :] = mtryparams
 
+                if WARM_START:
+                    last_fit = {'etr': etr_fit, 'mtrx': mtrx_fit,
+                        'mtry': mtry_fit}
+
                 if NoData_cnt > 0 & NoData_cnt == s-s_min:
                     '''
                     ----------------------------------------------------
@@ -1393,6 +1814,11 @@ def tax_func_estimate(beg_yr=2016, baseline=True, analytical_mtrs=False,
                         np.tile(mtryparams.reshape((1, numparams)),
                         (s_max-max_age, 1))
 
+        # Release the data of this year (the samples of each age are
+        # views of data_trnc) before the next year is computed
+        year_data = data = data_trnc = None
+        df = df_etr = df_mtrx = df_mtry = None
+
     message = ("Finished tax function loop through " +
         str(len(years_list)) + " years and " + str(len(ages_list)) +
         " ages per year.")
@@ -1564,6 +1990,23 @@ def get_tax_func_estimate(baseline=False, analytical_mtrs=False,
     # Code to run manually from here:
     dict_params = tax_func_estimate(start_year, baseline,
         analytical_mtrs, age_specific, reform)
+    pickle.dump(dict_params, open(get_tax_func_path(baseline, guid), "wb"))
+
+
+def get_tax_func_path(baseline=False, guid=''):
+    '''
+    --------------------------------------------------------------------
+    Path of the pickle file with the estimated tax functions, which
+    parameters.get_parameters() reads.
+    --------------------------------------------------------------------
+
+    INPUTS:
+    baseline = boolean, =True if baseline tax policy, =False if reform
+    guid     = string, id for reform run
+
+    RETURNS: pkl_path, string
+    --------------------------------------------------------------------
+    '''
     if baseline:
         baseline_pckl = "TxFuncEst_baseline{}.pkl".format(guid)
         pkl_path = os.path.join(TAX_ESTIMATE_PATH, baseline_pckl)
@@ -1571,4 +2014,4 @@ def get_tax_func_estimate(baseline=False, analytical_mtrs=False,
         policy_pckl = "TxFuncEst_policy{}.pkl".format(guid)
         pkl_path = os.path.join(TAX_ESTIMATE_PATH, policy_pckl)
 
-    pickle.dump(dict_params, open(pkl_path, "wb"))
+    return pkl_path
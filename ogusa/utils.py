@@ -12,13 +12,28 @@ This python files calls:
 
 # Packages
 import os
+import csv
+import hashlib
+import tempfile
+import time
 from io import StringIO
+import multiprocessing
 import numpy as np
+import scipy.optimize as opt
+import scipy.linalg
 import cPickle as pickle
 from pkg_resources import resource_stream, Requirement
 
 EPSILON = 1e-10
 PATH_EXISTS_ERRNO = 17
+# Euler errors at least this large are penalties for violated constraints
+MAX_EULER_ERROR = 1e10
+# Number of elements of each array compared at a time by compare_arrays()
+COMPARE_CHUNK = 2 ** 20
+# File of the values other than arrays in a directory of result arrays
+RESULT_OTHER_FILE = '_other.pkl'
+# Key of the header of a CSV table of results in load_results()
+TABLE_COLUMNS_KEY = '_columns'
 
 REFORM_DIR = "./OUTPUT_REFORM"
 BASELINE_DIR = "./OUTPUT_BASELINE"
@@ -93,6 +108,522 @@ def convex_combo(var1, var2, nu):
     return combo
 
 
+def inner_tol(dist, mindist, tol_min, tol_max, scale):
+    '''
+    Gives the tolerance for the household problems in the inner loop,
+    given the distance in the outer loop.  The household problems are
+    solved loosely while factor prices are far from their equilibrium
+    values, and the tolerance tightens as the outer loop converges,
+    reaching tol_min once the outer loop distance is within mindist.
+
+    Inputs:
+        dist    = scalar, distance in the outer loop
+        mindist = scalar, tolerance for the outer loop
+        tol_min = scalar, tightest tolerance for the inner loop
+        tol_max = scalar, loosest tolerance for the inner loop
+        scale   = scalar, tolerance for the inner loop relative to the
+                  outer loop distance
+
+    Functions called: None
+
+    Objects in function:
+        tol = scalar, tolerance for the inner loop
+
+    Returns: tol
+    '''
+
+    if dist <= mindist:
+        tol = tol_min
+    else:
+        tol = min(tol_max, max(tol_min, scale * dist))
+
+    return tol
+
+
+class BudgetExhausted(RuntimeError):
+    '''
+    Raised by budgeted_residual() when the budget of a solve has run
+    out, to stop the root finder that is calling it.
+    '''
+    pass
+
+
+def init_budget(max_seconds=None, max_evals=None):
+    '''
+    Creates the record of the wall-clock and evaluation budgets of a
+    solve (e.g., from the max_seconds and max_evals of a
+    records.SolverConfig), with the distances of the evaluations so far
+    and the best iterate.
+
+    Inputs:
+        max_seconds = scalar, wall-clock budget in seconds, None for no
+                      limit
+        max_evals   = integer, budget of evaluations, None for no limit
+
+    Functions called: None
+
+    Objects in function:
+        budget = dictionary, the budgets, the start time, the number of
+                 evaluations (num_evals), their distances
+                 (dist_history), the smallest distance (best_dist) and
+                 the iterate at which it was reached (best_x, set by the
+                 caller), and why the budget ran out (exhausted, None
+                 while it has not)
+
+    Returns: budget
+    '''
+    budget = {'max_seconds': max_seconds, 'max_evals': max_evals,
+              'start': time.time(), 'num_evals': 0, 'dist_history': [],
+              'best_dist': np.inf, 'best_x': None, 'exhausted': None}
+
+    return budget
+
+
+def check_budget(budget):
+    '''
+    Checks whether the wall-clock or evaluation budget has run out, and
+    records why in budget['exhausted'].
+
+    Inputs:
+        budget = dictionary, from init_budget()
+
+    Functions called: None
+
+    Objects in function: None
+
+    Returns: string, 'time' or 'evaluations' if the budget has run out,
+             otherwise None
+    '''
+    if budget['exhausted'] is None:
+        if (budget['max_evals'] is not None and
+                budget['num_evals'] >= budget['max_evals']):
+            budget['exhausted'] = 'evaluations'
+        elif (budget['max_seconds'] is not None and
+                time.time() - budget['start'] >= budget['max_seconds']):
+            budget['exhausted'] = 'time'
+
+    return budget['exhausted']
+
+
+def record_evaluation(budget, dist):
+    '''
+    Counts an evaluation against the budget and records its distance
+    from the solution.
+
+    Inputs:
+        budget = dictionary, from init_budget()
+        dist   = scalar, distance of the evaluation (e.g., largest
+                 absolute residual)
+
+    Functions called: None
+
+    Objects in function:
+        is_best = boolean, =True if dist is the smallest distance so far
+
+    Returns: is_best, budget is updated in place
+    '''
+    budget['num_evals'] += 1
+    budget['dist_history'].append(dist)
+    is_best = bool(dist < budget['best_dist'])
+    if is_best:
+        budget['best_dist'] = dist
+
+    return is_best
+
+
+def budgeted_residual(x, func, budget, *args):
+    '''
+    Evaluates a residual function within a budget, keeping the point
+    with the smallest residuals in budget['best_x'].  Passed to a root
+    finder in place of func, with func and budget as its first extra
+    arguments.  In the processes of fsolve_parallel(), the evaluations
+    are counted against a copy of the budget, so only the wall-clock
+    budget is shared with the calling process.
+
+    Inputs:
+        x      = [N,] vector, point at which to evaluate func
+        func   = function, residual function, func(x, *args)
+        budget = dictionary, from init_budget()
+        args   = other arguments to func
+
+    Functions called:
+        check_budget()
+        record_evaluation()
+
+    Objects in function:
+        resid = [N,] vector, residuals at x
+
+    Returns: resid, or raises BudgetExhausted if the budget has run out
+    '''
+    reason = check_budget(budget)
+    if reason is not None:
+        raise BudgetExhausted('The {} budget of the solve ran out after '
+                              '{} evaluations.'.format(reason,
+                                                       budget['num_evals']))
+    resid = np.asarray(func(x, *args), dtype=float)
+    if record_evaluation(budget, np.absolute(resid).max()):
+        budget['best_x'] = np.array(x, dtype=float)
+
+    return resid
+
+
+def interp_periods(var, num_new, axis=0):
+    '''
+    Linearly interpolates a variable defined over evenly spaced periods
+    (e.g., S ages or T years) onto num_new evenly spaced periods covering
+    the same span, matching the midpoints of the periods.  Used to move
+    solutions from a coarse grid of ages or years to a finer one.
+
+    Inputs:
+        var     = any shape, variable with periods along axis
+        num_new = integer, number of periods on the new grid
+        axis    = integer, axis of var that indexes periods
+
+    Functions called: None
+
+    Objects in function:
+        num_old  = integer, number of periods on the original grid
+        midp_old = [num_old,] vector, period midpoints on the original
+                   grid, as a fraction of the total span
+        midp_new = [num_new,] vector, period midpoints on the new grid
+        var_cols = [num_old, N] array, var with periods along the first
+                   axis and all other axes flattened
+        var_new  = same shape as var except num_new periods along axis,
+                   interpolated variable
+
+    Returns: var_new
+    '''
+
+    var = np.asarray(var, dtype=float)
+    var = np.rollaxis(var, axis)
+    num_old = var.shape[0]
+    midp_old = (np.arange(num_old) + 0.5) / num_old
+    midp_new = (np.arange(num_new) + 0.5) / num_new
+    var_cols = var.reshape(num_old, -1)
+    var_new = np.zeros((num_new, var_cols.shape[1]))
+    for i in xrange(var_cols.shape[1]):
+        var_new[:, i] = np.interp(midp_new, midp_old, var_cols[:, i])
+    var_new = np.rollaxis(var_new.reshape((num_new,) + var.shape[1:]),
+                          0, axis + 1)
+
+    return var_new
+
+
+def _fd_residual(task):
+    '''
+    Evaluates a residual function at a perturbed point, so the columns
+    of a finite difference Jacobian can be computed in separate
+    processes in fsolve_parallel().
+
+    Inputs:
+        task = length 3 tuple, (func, x, args)
+        func = function, residual function
+        x    = [N,] vector, point at which to evaluate func
+        args = tuple, other arguments to func
+
+    Functions called: func
+
+    Objects in function: None
+
+    Returns: residuals at x
+    '''
+    func, x, args = task
+    return np.asarray(func(x, *args), dtype=float)
+
+
+def fsolve_parallel(func, x0, args=(), xtol=1.49012e-08, maxiter=100,
+                    num_workers=None):
+    '''
+    Finds the roots of func with Newton steps, using a finite difference
+    Jacobian whose columns are evaluated in parallel processes.  Between
+    full Jacobian evaluations, the Jacobian is updated with Broyden's
+    method, so each iteration costs one residual evaluation.  The full
+    Jacobian is only recomputed if a Broyden step fails to reduce the
+    residuals.  Meant for a small number of unknowns, each evaluation of
+    which is expensive (e.g., the outer loop of the SS).
+
+    Inputs:
+        func        = function, residual function, func(x, *args)
+        x0          = [N,] vector, initial guess
+        args        = tuple, other arguments to func (a single argument
+                      that is not a tuple is wrapped in one, as in
+                      scipy.optimize.fsolve)
+        xtol        = scalar, convergence is reached when the change in
+                      each element of x is within xtol relative to
+                      max(|x|, 1)
+        maxiter     = integer, maximum number of Newton steps
+        num_workers = integer, number of processes, if None use N
+
+    Functions called:
+        _fd_residual()
+
+    Objects in function:
+        pool      = multiprocessing Pool, processes for the Jacobian
+        x         = [N,] vector, current guess
+        f         = [N,] vector, residuals at x
+        jac       = [N,N] array, Jacobian of func at x
+        need_jac  = boolean, =True if the finite difference Jacobian is
+                    to be computed at x
+        jac_fresh = boolean, =True if jac is a finite difference
+                    Jacobian at x (rather than a Broyden update)
+        step      = [N,] vector, Newton step
+        infodict  = dictionary, number of function evaluations (nfev),
+                    number of Jacobian evaluations (njev), and residuals
+                    at the solution (fvec)
+        ier       = integer, =1 if solution found
+        mesg      = string, description of the outcome
+
+    Returns: x, infodict, ier, mesg
+    '''
+    if not isinstance(args, tuple):
+        args = (args,)
+    x = np.array(x0, dtype=float).flatten()
+    N = x.shape[0]
+    if num_workers is None:
+        num_workers = N
+    pool = multiprocessing.Pool(num_workers)
+    nfev = 0
+    njev = 0
+    ier = 5
+    mesg = "The iteration is not making good progress."
+    try:
+        f = _fd_residual((func, x, args))
+        nfev += 1
+        need_jac = True
+        for iteration in xrange(maxiter):
+            if need_jac:
+                # Evaluate the perturbed residuals in parallel
+                h = np.sqrt(np.finfo(float).eps) * np.maximum(np.abs(x), 1.0)
+                tasks = [(func, x + h[i] * np.eye(N)[i], args) for i in xrange(N)]
+                f_pert = pool.map(_fd_residual, tasks)
+                nfev += N
+                njev += 1
+                jac = np.column_stack([(f_pert[i] - f) / h[i] for i in xrange(N)])
+                jac_fresh = True
+                need_jac = False
+            try:
+                step = -np.linalg.solve(jac, f)
+            except np.linalg.LinAlgError:
+                mesg = "The Jacobian is singular."
+                break
+            # Backtrack until the residuals fall
+            for halving in xrange(5):
+                f_new = _fd_residual((func, x + step, args))
+                nfev += 1
+                if np.linalg.norm(f_new) < np.linalg.norm(f):
+                    break
+                step = step / 2.0
+            if np.linalg.norm(f_new) >= np.linalg.norm(f):
+                if jac_fresh:
+                    break
+                # Broyden updated Jacobian is too far off, so recompute
+                need_jac = True
+                continue
+            jac = jac + np.outer(f_new - f - jac.dot(step), step) / step.dot(step)
+            jac_fresh = False
+            x = x + step
+            f = f_new
+            if np.all(np.abs(step) <= xtol * np.maximum(np.abs(x), 1.0)):
+                ier = 1
+                mesg = "The solution converged."
+                break
+        else:
+            ier = 2
+            mesg = "The number of iterations has reached maxiter."
+    finally:
+        pool.close()
+        pool.join()
+
+    infodict = {'nfev': nfev, 'njev': njev, 'fvec': f}
+
+    return x, infodict, ier, mesg
+
+
+def fsolve_banded(func, x0, lower, upper, args=(), xtol=1.49012e-08,
+                  maxiter=100):
+    '''
+    Finds the roots of func with Newton steps, for a system whose
+    Jacobian is banded: equation i only depends on the unknowns i - lower
+    through i + upper (e.g., the Euler equations of one lifetime, which
+    only link adjacent ages).  Unknowns more than lower + upper apart do
+    not enter the same equation, so each finite difference Jacobian takes
+    lower + upper + 1 evaluations of func, however many unknowns there
+    are, and each Newton step is a banded solve.
+
+    Inputs:
+        func    = function, residual function, func(x, *args)
+        x0      = [N,] vector, initial guess
+        lower   = integer, number of bands below the diagonal
+        upper   = integer, number of bands above the diagonal
+        args    = tuple, other arguments to func
+        xtol    = scalar, convergence is reached when the change in each
+                  element of x is within xtol relative to max(|x|, 1)
+        maxiter = integer, maximum number of Newton steps
+
+    Functions called: func
+
+    Objects in function:
+        x        = [N,] vector, current guess
+        f        = [N,] vector, residuals at x
+        width    = integer, number of bands of the Jacobian
+        ab       = [width,N] array, Jacobian of func at x, in the banded
+                   form of scipy.linalg.solve_banded
+        step     = [N,] vector, Newton step
+        infodict = dictionary, number of function evaluations (nfev),
+                   number of Jacobian evaluations (njev), and residuals
+                   at the solution (fvec)
+        ier      = integer, =1 if solution found
+        mesg     = string, description of the outcome
+
+    Returns: x, infodict, ier, mesg
+    '''
+    x = np.array(x0, dtype=float).flatten()
+    N = x.shape[0]
+    width = lower + upper + 1
+    offsets = np.arange(-upper, lower + 1)
+    f = np.asarray(func(x, *args), dtype=float)
+    nfev = 1
+    njev = 0
+    ier = 5
+    mesg = "The iteration is not making good progress."
+    for iteration in xrange(maxiter):
+        # perturb every width-th unknown at once and assign the change in
+        # each equation to the one unknown in its band
+        h = np.sqrt(np.finfo(float).eps) * np.maximum(np.abs(x), 1.0)
+        ab = np.zeros((width, N))
+        for first in xrange(min(width, N)):
+            cols = np.arange(first, N, width)
+            x_pert = x.copy()
+            x_pert[cols] += h[cols]
+            df = np.asarray(func(x_pert, *args), dtype=float) - f
+            rows = cols.reshape(1, -1) + offsets.reshape(-1, 1)
+            valid = (rows >= 0) & (rows < N)
+            band = np.tile(np.arange(width).reshape(-1, 1), (1, len(cols)))
+            ab[band[valid], np.tile(cols, (width, 1))[valid]] = (
+                df[rows[valid]] / np.tile(h[cols], (width, 1))[valid])
+        nfev += min(width, N)
+        njev += 1
+        try:
+            step = -scipy.linalg.solve_banded((lower, upper), ab, f)
+        except np.linalg.LinAlgError:
+            mesg = "The Jacobian is singular."
+            break
+        # Backtrack until the residuals fall
+        for halving in xrange(5):
+            f_new = np.asarray(func(x + step, *args), dtype=float)
+            nfev += 1
+            if np.linalg.norm(f_new) < np.linalg.norm(f):
+                break
+            step = step / 2.0
+        if not np.linalg.norm(f_new) < np.linalg.norm(f):
+            break
+        x = x + step
+        f = f_new
+        if np.all(np.abs(step) <= xtol * np.maximum(np.abs(x), 1.0)):
+            ier = 1
+            mesg = "The solution converged."
+            break
+    else:
+        ier = 2
+        mesg = "The number of iterations has reached maxiter."
+
+    infodict = {'nfev': nfev, 'njev': njev, 'fvec': f}
+
+    return x, infodict, ier, mesg
+
+
+def _update_fingerprint(sha, obj):
+    '''
+    Adds an object to a running hash, for fingerprint().
+
+    Inputs:
+        sha = hashlib hash object
+        obj = object to add: array, list, tuple, dictionary or scalar
+
+    Functions called:
+        _update_fingerprint()
+
+    Objects in function: None
+
+    Returns: N/A, sha is updated in place
+    '''
+    if isinstance(obj, np.ndarray):
+        sha.update('array' + str(obj.dtype) + str(obj.shape))
+        sha.update(np.ascontiguousarray(obj).tostring())
+    elif isinstance(obj, (list, tuple)):
+        sha.update('sequence' + str(len(obj)))
+        for item in obj:
+            _update_fingerprint(sha, item)
+    elif isinstance(obj, dict):
+        sha.update('dict' + str(len(obj)))
+        for key in sorted(obj):
+            _update_fingerprint(sha, key)
+            _update_fingerprint(sha, obj[key])
+    else:
+        sha.update(repr(obj))
+
+
+def fingerprint(*objs):
+    '''
+    Hash of the contents of some parameters, used to check that saved
+    results were computed with the same parameters.  Arrays are hashed
+    by dtype, shape and data, so the same values give the same hash
+    across processes and runs.
+
+    Inputs:
+        objs = arrays, lists, tuples, dictionaries or scalars
+
+    Functions called:
+        _update_fingerprint()
+
+    Objects in function:
+        sha = hashlib hash object
+
+    Returns: string, hexadecimal SHA-1 hash
+    '''
+    sha = hashlib.sha1()
+    _update_fingerprint(sha, objs)
+
+    return sha.hexdigest()
+
+
+def atomic_pickle_dump(obj, path):
+    '''
+    Pickles an object to a file, writing it to a temporary file in the
+    same directory and renaming it, so the file at path is always
+    either the old or the new version, never a partial one.
+
+    Inputs:
+        obj  = object to pickle
+        path = string, path of the file
+
+    Functions called:
+        mkdirs()
+
+    Objects in function:
+        fd       = integer, file descriptor of the temporary file
+        tmp_path = string, path of the temporary file
+
+    Returns: N/A
+    '''
+    dir_name = os.path.dirname(os.path.abspath(path))
+    mkdirs(dir_name)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, 0o644)
+        if os.name == 'nt' and os.path.exists(path):
+            # os.rename does not replace an existing file on Windows
+            os.remove(path)
+        os.rename(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def read_file(path, fname):
@@ -125,163 +656,451 @@ def read_file(path, fname):
 
 def pickle_file_compare(fname1, fname2, tol=1e-3, exceptions={}, relative=False):
     '''
-    Read two pickle files and unpickle each. We assume that each resulting
-    object is a dictionary. The values of each dict are either numpy arrays
-    or else types that are comparable with the == operator.
+    Compares the results in two files, pickles of dictionaries or
+    directories from save_result_arrays() (whose arrays are compared from
+    memory maps), key by key with compare_results().
 
     Inputs:
-        fname1  = string, file name of file 1
-        fname2  = string, file name of file 2
-        tol     = scalar, tolerance
-        exceptions = dictionary, exceptions
-        relative = boolean,
+        fname1     = string, file name of file 1
+        fname2     = string, file name of file 2
+        tol        = scalar, tolerance
+        exceptions = dictionary, tolerance by key, in place of tol
+        relative   = boolean, =True if the tolerances are relative to the
+                     mean of the values in file 2
 
     Functions called:
-        dict_compare
+        load_results()
+        dict_compare()
 
     Objects in function:
-        pkl1 =  dictionary, from first pickle file
-        pkl2 = dictionary, from second pickle file
+        pkl1 = dictionary, results in file 1
+        pkl2 = dictionary, results in file 2
 
-    Returns: difference between dictionaries
+    Returns: boolean, =True if all keys are within the tolerances
     '''
 
-    pkl1 = pickle.load(open(fname1, 'rb'))
-    pkl2 = pickle.load(open(fname2, 'rb'))
+    pkl1 = load_results(fname1)
+    pkl2 = load_results(fname2)
 
     return dict_compare(fname1, pkl1, fname2, pkl2, tol=tol,
                         exceptions=exceptions, relative=relative)
 
 
+def check_comparison(rows, unequal=None, fname1='', fname2=''):
+    '''
+    Prints the keys of a summary from compare_results() or compare_many()
+    and whether they are within the tolerances.
+
+    Inputs:
+        rows    = list, summary of each key
+        unequal = list, to which the name and summary of each key outside
+                  the tolerances are added, if not None
+        fname1  = string, name of the first results, for keys missing
+                  from them
+        fname2  = string, name of the second results
+
+    Functions called: None
+
+    Objects in function:
+        check = boolean, =True if all keys so far are within the
+                tolerances
+
+    Returns: check
+    '''
+    check = True
+    for row in rows:
+        name = row['key']
+        if row['status'] == 'ok':
+            print "err for {0} is {1} which is OK".format(
+                name, row['max_abs_diff'])
+            continue
+        check = False
+        if row['status'] == 'missing1':
+            print "{0} is missing from {1}".format(name, fname1)
+        elif row['status'] == 'missing2':
+            print "{0} is missing from {1}".format(name, fname2)
+        elif row['status'] == 'shape':
+            print "unequal shapes for {0} comparison".format(name)
+        else:
+            print "diff for {0} is {1} which is NOT OK".format(
+                name, row['max_abs_diff'])
+        if unequal is not None:
+            unequal.append((name, row))
+
+    return check
+
+
 def comp_array(name, a, b, tol, unequal, exceptions={}, relative=False):
     '''
-    Compare two arrays in the L inifinity norm
-    Return True if | a - b | < tol, False otherwise
-    If not equal, add items to the unequal list
-    name: the name of the value being compared
+    Compares two arrays in the L infinity norm, with compare_results().
 
     Inputs:
+        name       = string, name of the value being compared
+        a, b       = arrays
+        tol        = scalar, tolerance
+        unequal    = list, to which the name and summary of the
+                     comparison are added if the arrays are not equal
+        exceptions = dictionary, tolerance by name, in place of tol
+        relative   = boolean, =True if tol is relative to the mean of b
+
+    Functions called:
+        compare_results()
+        check_comparison()
+
+    Objects in function: None
+
+    Returns: boolean, =True if |a - b| is within tol
+    '''
+    return check_comparison(compare_results({name: a}, {name: b}, atol=tol,
+                                            exceptions=exceptions,
+                                            relative=relative), unequal)
+
+
+def comp_scalar(name, a, b, tol, unequal, exceptions={}, relative=False):
+    '''
+    Compares two scalars, with compare_results().
 
+    Inputs:
+        name       = string, name of the value being compared
+        a, b       = scalars
+        tol        = scalar, tolerance
+        unequal    = list, to which the name and summary of the
+                     comparison are added if the scalars are not equal
+        exceptions = dictionary, tolerance by name, in place of tol
+        relative   = boolean, =True if tol is relative to b
 
     Functions called:
+        comp_array()
 
+    Objects in function: None
 
-    Objects in function:
+    Returns: boolean, =True if |a - b| is within tol
+    '''
+    return comp_array(name, a, b, tol, unequal, exceptions, relative)
 
 
-    Returns: Boolean
+def dict_compare(fname1, pkl1, fname2, pkl2, tol, verbose=False, exceptions={}, relative=False):
+    '''
+    Compares two dictionaries of results key by key, with
+    compare_results(), so arrays are compared in chunks.
 
+    Inputs:
+        fname1, fname2 = strings, names of the dictionaries
+        pkl1, pkl2     = dictionaries, results
+        tol            = scalar, tolerance
+        verbose        = boolean, =True to print the keys outside the
+                         tolerances at the end
+        exceptions     = dictionary, tolerance by key, in place of tol
+        relative       = boolean, =True if the tolerances are relative to
+                         the mean of the values in pkl2
 
+    Functions called:
+        compare_results()
+        check_comparison()
+
+    Objects in function:
+        unequal_items = list, name and summary of each key outside the
+                        tolerances
+
+    Returns: boolean, =True if all keys are within the tolerances
     '''
+    unequal_items = []
+    check = check_comparison(compare_results(pkl1, pkl2, atol=tol,
+                                             exceptions=exceptions,
+                                             relative=relative),
+                             unequal_items, fname1, fname2)
+    if verbose == True and unequal_items:
+        print "Different arrays: ", ["Name {0}".format(x[0])
+                                     for x in unequal_items]
 
-    if name in exceptions:
-        tol = exceptions[name]
+    return check
 
-    if not a.shape == b.shape:
-        print "unequal shpaes for {0} comparison ".format(str(name))
-        unequal.append((str(name), a, b))
-        return False
 
-    else:
+def save_result_arrays(results, path):
+    '''
+    Saves a dictionary of results as a directory with one .npy file for
+    each array, which load_results() opens as memory maps, and a pickle
+    of the other values.
 
-        if np.all(a < EPSILON) and np.all(b < EPSILON):
-            return True
+    Inputs:
+        results = dictionary, results (e.g., the SS or TPI output)
+        path    = string, directory
 
-        if relative:
-            err = abs(a - b)
-            mn = np.mean(b)
-            err = np.max(err / mn)
-        else:
-            err = np.max(abs(a - b))
+    Functions called:
+        mkdirs()
+        atomic_pickle_dump()
+
+    Objects in function:
+        other = dictionary, values in results that are not arrays
 
-        if not err < tol:
-            print "diff for {0} is {1} which is NOT OK".format(str(name), err)
-            unequal.append((str(name), a, b))
-            return False
+    Returns: N/A
+    '''
+    mkdirs(path)
+    other = {}
+    for key, value in results.items():
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            np.save(os.path.join(path, str(key) + '.npy'), value)
         else:
-            print "err is {0} which is OK".format(err)
-            return True
+            other[key] = value
+    atomic_pickle_dump(other, os.path.join(path, RESULT_OTHER_FILE))
 
 
-def comp_scalar(name, a, b, tol, unequal, exceptions={}, relative=False):
-    '''
-    Compare two scalars in the L inifinity norm
-    Return True if abs(a - b) < tol, False otherwise
-    If not equal, add items to the unequal list
+def load_results(path):
     '''
+    Loads results saved as a pickle, as a directory by
+    save_result_arrays() with the arrays opened as read-only memory maps,
+    or as a CSV table with a header row and labels in the first column
+    (e.g., the results of the regression reforms), with the values of
+    each row under its label and the header under TABLE_COLUMNS_KEY.
 
-    if name in exceptions:
-        tol = exceptions[name]
+    Inputs:
+        path = string, pickle file, directory of result arrays or CSV
+               file
 
-    if (a < EPSILON) and (b < EPSILON):
-        return True
+    Functions called: None
 
-    if relative:
-        err = float(abs(a - b)) / float(b)
-    else:
-        err = abs(a - b)
+    Objects in function:
+        results = dictionary, results
 
-    if not err < tol:
-        print "err for {0} is {1} which is NOT OK".format(str(name), err)
-        unequal.append((str(name), str(a), str(b)))
-        return False
-    else:
-        print "err is {0} which is OK".format(err)
-        return True
+    Returns: results
+    '''
+    if path.endswith('.csv'):
+        with open(path, 'rb') as f:
+            table = list(csv.reader(f))
+        results = {TABLE_COLUMNS_KEY: table[0][1:]}
+        for row in table[1:]:
+            results[row[0]] = np.array(row[1:], dtype=float)
+        return results
+    if not os.path.isdir(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    results = {}
+    other_file = os.path.join(path, RESULT_OTHER_FILE)
+    if os.path.exists(other_file):
+        with open(other_file, 'rb') as f:
+            results.update(pickle.load(f))
+    for fname in os.listdir(path):
+        if fname.endswith('.npy'):
+            results[fname[:-4]] = np.load(os.path.join(path, fname),
+                                          mmap_mode='r')
+
+    return results
+
+
+def compare_arrays(a, b, atol, rtol, chunk_size=COMPARE_CHUNK):
+    '''
+    Compares two numeric arrays of the same shape element by element,
+    chunk_size elements at a time, so memory mapped arrays are not read
+    into memory all at once.  Elements are outside the tolerances if
+    |a - b| > atol + rtol * |b|, as in np.isclose(); two NaNs are equal.
 
+    Inputs:
+        a, b       = arrays, same shape
+        atol       = scalar, absolute tolerance
+        rtol       = scalar, relative tolerance
+        chunk_size = integer, number of elements compared at a time
 
-def dict_compare(fname1, pkl1, fname2, pkl2, tol, verbose=False, exceptions={}, relative=False):
+    Functions called: None
+
+    Objects in function:
+        diff    = [chunk_size,] vector, absolute differences, inf if one
+                  element is NaN
+        rel     = [chunk_size,] vector, absolute differences relative to
+                  |b|
+        outside = [chunk_size,] boolean vector, =True if outside the
+                  tolerances
+
+    Returns: dictionary, largest absolute difference (max_abs_diff),
+             largest relative difference (max_rel_diff), index of the
+             largest absolute difference (location), and number of
+             elements outside the tolerances (n_outside)
     '''
-    Compare two dictionaries. The values of each dict are either
-    numpy arrays
-    or else types that are comparable with the == operator.
-    For arrays, they are considered the same if |x - y| < tol in
-    the L_inf norm.
-    For scalars, they are considered the same if x - y < tol
+    a_flat = np.ravel(a)
+    b_flat = np.ravel(b)
+    summary = {'max_abs_diff': 0.0, 'max_rel_diff': 0.0, 'location': None,
+               'n_outside': 0}
+    for start in xrange(0, a_flat.shape[0], chunk_size):
+        x = np.asarray(a_flat[start:start + chunk_size], dtype=float)
+        y = np.asarray(b_flat[start:start + chunk_size], dtype=float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            diff = np.abs(x - y)
+            diff[(x == y) | (np.isnan(x) & np.isnan(y))] = 0.0
+            diff[np.isnan(diff)] = np.inf
+            scale = np.abs(y)
+            rel = np.where(diff > 0, diff / scale, 0.0)
+            outside = diff > atol + rtol * scale
+        i = np.argmax(diff)
+        if summary['location'] is None or diff[i] > summary['max_abs_diff']:
+            summary['max_abs_diff'] = float(diff[i])
+            summary['location'] = tuple(
+                int(j) for j in np.unravel_index(start + i, np.shape(a) or
+                                                 (1,))[:np.ndim(a)])
+        summary['max_rel_diff'] = max(summary['max_rel_diff'],
+                                      float(rel.max()))
+        summary['n_outside'] += int(outside.sum())
+
+    return summary
+
+
+def compare_results(results1, results2, atol=1e-3, rtol=0.0,
+                    exceptions={}, chunk_size=COMPARE_CHUNK, prefix='',
+                    relative=False):
     '''
+    Compares two dictionaries of results key by key, with the numeric
+    values (arrays, lists and scalars) compared by compare_arrays() and
+    the other values with ==.  Dictionaries within the results are
+    compared key by key, with names prefix/key.
 
-    keys1 = set(pkl1.keys())
-    keys2 = set(pkl2.keys())
-    check = True
-    if keys1 != keys2:
-        if len(keys1) == len(keys2):
-            extra1 = keys1 - keys2
-            extra2 = keys2 - keys1
-            msg1 = "extra items in {0}: {1}"
-            print msg1.format(fname1, extra1)
-            print msg1.format(fname2, extra2)
-            return False
-        elif len(keys1) > len(keys2):
-            bigger = keys1
-            bigger_file = fname1
-            smaller = keys2
+    Inputs:
+        results1, results2 = dictionaries, results
+        atol               = scalar, absolute tolerance
+        rtol               = scalar, relative tolerance
+        exceptions         = dictionary, absolute tolerance by key, in
+                             place of atol
+        chunk_size         = integer, number of elements compared at a time
+        prefix             = string, name of the dictionaries
+        relative           = boolean, =True if atol (or the exception) is
+                             relative to the mean of the values in
+                             results2 of each key, unless that mean is
+                             within EPSILON of zero
+
+    Functions called:
+        compare_arrays()
+
+    Objects in function:
+        row = dictionary, summary of one key
+
+    Returns: list, summary of each key: the key, its status ('ok',
+             'diff', 'shape' if the shapes differ, or 'missing1' or
+             'missing2' if it is missing from results1 or results2),
+             max_abs_diff, max_rel_diff, location and n_outside
+    '''
+    rows = []
+    for key in sorted(set(results1) | set(results2), key=str):
+        name = prefix + str(key)
+        row = {'key': name, 'status': 'ok', 'max_abs_diff': np.nan,
+               'max_rel_diff': np.nan, 'location': None, 'n_outside': 0}
+        if key not in results1 or key not in results2:
+            row['status'] = 'missing1' if key not in results1 else 'missing2'
+            rows.append(row)
+            continue
+        v1, v2 = results1[key], results2[key]
+        if isinstance(v1, dict) and isinstance(v2, dict):
+            rows.extend(compare_results(v1, v2, atol, rtol, exceptions,
+                                        chunk_size, name + '/', relative))
+            continue
+        a, b = np.asarray(v1), np.asarray(v2)
+        numeric = all(x.dtype.kind in 'biuf' for x in (a, b))
+        if numeric and a.shape != b.shape:
+            row['status'] = 'shape'
+        elif numeric:
+            tol = exceptions.get(name, atol)
+            if relative and b.size > 0:
+                scale = abs(float(np.mean(b)))
+                if scale > EPSILON:
+                    tol = tol * scale
+            row.update(compare_arrays(a, b, tol, rtol, chunk_size))
+            if row['n_outside'] > 0:
+                row['status'] = 'diff'
         else:
-            bigger = keys2
-            bigger_file = fname2
-            smaller = keys1
-        res = bigger - smaller
-        msg = "more items in {0}: {1}"
-        print msg.format(bigger_file, res)
-        return False
+            try:
+                equal = bool(np.all(v1 == v2))
+            except (TypeError, ValueError):
+                equal = False
+            if not equal:
+                row['status'] = 'diff'
+                row['n_outside'] = 1
+        rows.append(row)
+
+    return rows
+
+
+def _compare_files(task):
+    '''
+    Compares the results in two files, for compare_many().
+    '''
+    fname1, fname2, atol, rtol, exceptions, chunk_size, relative = task
+    missing = [f for f in (fname1, fname2) if not os.path.exists(f)]
+    if missing:
+        rows = [{'key': '', 'status': 'missing' + str(1 + (fname1 not in
+                                                        missing)),
+                 'max_abs_diff': np.nan, 'max_rel_diff': np.nan,
+                 'location': None, 'n_outside': 0}]
     else:
-        unequal_items = []
-        for k, v in pkl1.items():
-            if type(v) == np.ndarray:
-                check &= comp_array(k, v, pkl2[k], tol, unequal_items,
-                                    exceptions=exceptions, relative=relative)
-            else:
-                try:
-                    check &= comp_scalar(k, v, pkl2[k], tol, unequal_items,
-                                         exceptions=exceptions, relative=relative)
-                except TypeError:
-                    check &= comp_array(k, np.array(v), np.array(pkl2[k]), tol,
-                                        unequal_items, exceptions=exceptions,
-                                        relative=relative)
-
-        if verbose == True and unequal_items:
-            frmt = "Name {0}"
-            res = [frmt.format(x[0]) for x in unequal_items]
-            print "Different arrays: ", res
-            return False
+        rows = compare_results(load_results(fname1), load_results(fname2),
+                               atol, rtol, exceptions, chunk_size,
+                               relative=relative)
+    for row in rows:
+        row['file1'] = fname1
+        row['file2'] = fname2
 
-    return check
+    return rows
+
+
+def compare_many(pairs, atol=1e-3, rtol=0.0, exceptions={},
+                 num_workers=None, chunk_size=COMPARE_CHUNK, relative=False):
+    '''
+    Compares many pairs of result files (pickles, directories from
+    save_result_arrays() or CSV tables, see load_results()), num_workers
+    pairs at a time, e.g., the outputs of many runs against their
+    standards.
+
+    Inputs:
+        pairs       = list, (file1, file2) of each comparison
+        atol        = scalar, absolute tolerance
+        rtol        = scalar, relative tolerance
+        exceptions  = dictionary, absolute tolerance by key
+        num_workers = integer, number of processes, if None the number of
+                      CPUs, if 1 the pairs are compared in this process
+        chunk_size  = integer, number of elements compared at a time
+        relative    = boolean, =True if atol is relative to the mean of
+                      the values in file2 (see compare_results())
+
+    Functions called:
+        _compare_files()
+
+    Objects in function:
+        tasks = list, arguments of _compare_files() for each pair
+        pool  = multiprocessing Pool, processes for the comparisons
+
+    Returns: list, summary of each key of each pair, as from
+             compare_results(), with the files (file1, file2)
+    '''
+    tasks = [(fname1, fname2, atol, rtol, exceptions, chunk_size, relative)
+             for fname1, fname2 in pairs]
+    if num_workers == 1:
+        results = [_compare_files(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            results = pool.map(_compare_files, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    return [row for rows in results for row in rows]
+
+
+def write_comparison_summary(rows, fname):
+    '''
+    Writes the summary from compare_results() or compare_many() as a CSV
+    file with one row for each key.
+
+    Inputs:
+        rows  = list, summary of each key
+        fname = string, path of the CSV file
+
+    Functions called: None
+
+    Objects in function:
+        columns = list, columns of the file
+
+    Returns: N/A
+    '''
+    columns = ['file1', 'file2', 'key', 'status', 'max_abs_diff',
+               'max_rel_diff', 'location', 'n_outside']
+    with open(fname, 'wb') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([row.get(c, '') for c in columns])
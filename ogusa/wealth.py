@@ -7,6 +7,7 @@ Returns the wealth for all ages of a certain percentile.
 This py-file calls the following other file(s):
             data/wealth/scf2007to2013_wealth_age_all_percentiles.csv
             utils.py
+            inequality.py
 
 This py-file creates the following other file(s):
     (make sure that an OUTPUT folder exists)
@@ -25,6 +26,7 @@ This py-file creates the following other file(s):
 import numpy as np
 import pandas as pd
 import utils
+import inequality
 import os
 from scipy import stats
 import cPickle as pickle
@@ -32,6 +34,11 @@ import cPickle as pickle
 cur_path = os.path.split(os.path.abspath(__file__))[0]
 WEALTH_DIR = os.path.join(cur_path, "data", "wealth")
 
+'''
+Set number of bootstrap replications computed at once in VCV_moments
+'''
+BOOT_CHUNK = 100
+
 '''
 ------------------------------------------------------------------------
     Import Data
@@ -109,25 +116,35 @@ def VCV_moments(scf, n, bin_weights, J):
             bin_weights = ability weights (Jx1 array)
             J           = number of ability groups (scalar)
         Objects created in the function:
-            wealth_moments_boot = [n,S] array, bootstrapped wealth moments
-            boot = pandas DF, boostrapped dataframe
+            wealth_moments_boot = [n,J+2] array, bootstrapped wealth moments
+            networth    = [N,] vector, net worth, sorted
+            wgt         = [N,] vector, weights, in the order of networth
+            idx         = [N,] vector, order of the observations by net worth
+            boot        = [chunk,N] boolean array, observations in each
+                          replication
             VCV  = [J+2,J+2] array, variance-covariance matrix of wealth moments
         Output:
             VCV
 
     ------------------------------------------------------------------------
     '''
+    # the data are sorted once, and each replication keeps the weights
+    # of the observations in it and gives the rest zero weight
+    idx = np.argsort(scf['networth'].values, kind='mergesort')
+    networth = scf['networth'].values[idx].astype(float)
+    wgt = scf['wgt'].values[idx].astype(float)
     wealth_moments_boot = np.zeros((n,J+2))
-    for i in range(n):
-        boot = scf[np.random.randint(2, size=len(scf.index)).astype(bool)]
-        wealth_moments_boot[i,:] = compute_wealth_moments(boot, bin_weights, J)
+    for i in range(0, n, BOOT_CHUNK):
+        chunk = min(BOOT_CHUNK, n - i)
+        boot = np.random.randint(2, size=(chunk, len(scf.index))).astype(bool)
+        wealth_moments_boot[i:i+chunk,:] = wealth_moments_sorted(
+            networth, wgt * boot[:, idx], bin_weights)
 
     VCV = np.cov(wealth_moments_boot.T)
 
     return VCV
 
 
-
 '''
 ------------------------------------------------------------------------
     Get wealth moments
@@ -140,64 +157,64 @@ def compute_wealth_moments(scf, bin_weights, J):
         scf         = pandas DF, raw data from SCF
         bin_weights = ability weights (Jx1 array)
         J = number of ability groups (scalar)
-        flag_graphs = whether or not to graph distribution (bool)
     Objects created in the function:
+        networth = [N,] vector, net worth, sorted
+        wgt      = [N,] vector, weights, in the order of networth
 
     Returns:
         [J+2,] array of wealth moments
     ------------------------------------------------------------------------
     '''
+    networth, wgt = inequality.weighted_sort(scf['networth'].values,
+                                             scf['wgt'].values)
+    wealth_moments = wealth_moments_sorted(networth, wgt, bin_weights)
 
+    return wealth_moments
 
-    # calculate percentile shares (percentiles based on lambdas input)
-    scf.sort_values(by='networth', ascending=True, inplace=True)
-    scf['weight_networth'] = scf['wgt']*scf['networth']
-    total_weight_wealth = scf.weight_networth.sum()
-    cumsum = scf.wgt.cumsum()
-    pct_wealth = np.zeros((bin_weights.shape[0],))
-    top_pct_wealth = np.zeros((bin_weights.shape[0],))
-    wealth = np.zeros((bin_weights.shape[0],))
-    cum_weights = bin_weights.cumsum()
-    for i in range(bin_weights.shape[0]):
-        cutoff = scf.wgt.sum() / (1./cum_weights[i])
-        pct_wealth[i] = scf.networth[cumsum >= cutoff].iloc[0]
-        top_pct_wealth[i] = 1 - ((scf.weight_networth[cumsum < cutoff].sum())/total_weight_wealth)
-        wealth[i] = ((scf.weight_networth[cumsum < cutoff].sum())/total_weight_wealth)
-
-
-    wealth_share = np.zeros((bin_weights.shape[0],))
-    wealth_share[0] = wealth[0]
-    wealth_share[1:] = wealth[1:]-wealth[0:-1]
-
-    # compute 90/10 ratio, top 10% share, top 1% share
-    cutoff = scf.wgt.sum() / (1./.1)
-    pct_10 = scf.networth[cumsum >= cutoff].iloc[0]
-    cutoff = scf.wgt.sum() / (1./.9)
-    pct_90 = scf.networth[cumsum >= cutoff].iloc[0]
-    top_10_share = 1 - ((scf.weight_networth[cumsum < cutoff].sum())/total_weight_wealth)
-    ratio_90_10 = pct_90/pct_10
-    cutoff = scf.wgt.sum() / (1./.99)
-    pct_99 = scf.networth[cumsum >= cutoff].iloc[0]
-    top_1_share = 1 - ((scf.weight_networth[cumsum < cutoff].sum())/total_weight_wealth)
 
+def wealth_moments_sorted(networth, wgt, bin_weights):
+    '''
+    ------------------------------------------------------------------------
+    Computes the wealth moments of one or more weightings of the data
+    (e.g., bootstrap replications, with zero weight for the observations
+    left out of a replication)
+    ------------------------------------------------------------------------
+    Inputs:
+        networth    = [N,] vector, net worth, sorted in ascending order
+        wgt         = [N,] vector or [M,N] array, weights of the
+                      observations
+        bin_weights = ability weights (Jx1 array)
+    Objects created in the function:
+        wealth       = [J,] or [M,J] array, share of wealth held by the
+                       population below each cumulative ability weight
+        wealth_share = [J,] or [M,J] array, share of wealth held by each
+                       ability group
+        gini_coeff   = scalar or [M,] vector, Gini coefficient
+        var_ln_wealth = scalar or [M,] vector, variance of log net worth
+                        (positive net worth only)
+
+    Returns:
+        [J+2,] or [M,J+2] array of wealth moments
+    ------------------------------------------------------------------------
+    '''
+    # calculate percentile shares (percentiles based on lambdas input),
+    # with all of the wealth held by the whole population rather than
+    # leaving out the top observations when the cumulative ability
+    # weights sum to slightly less than one
+    wealth = np.ones(np.shape(wgt)[:-1] + bin_weights.shape)
+    wealth[..., :-1] = inequality.shares_below(
+        networth, wgt, bin_weights.cumsum()[:-1], presorted=True)
+    wealth_share = np.copy(wealth)
+    wealth_share[..., 1:] = wealth[..., 1:] - wealth[..., :-1]
 
     # compute gini coeff
-    scf.sort_values(by='networth', ascending=True, inplace=True)
-    p = (scf.wgt.cumsum()/scf.wgt.sum()).as_matrix()
-    nu = ((scf.wgt*scf.networth).cumsum()).as_matrix()
-    nu = nu/nu[-1]
-    gini_coeff = (nu[1:]*p[:-1]).sum() - (nu[:-1] * p[1:]).sum()
-
+    gini_coeff = inequality.gini(networth, wgt, presorted=True)
 
     # compute variance in logs
-    df = scf.drop(scf[scf['networth'] <=0.0].index)
-    df['ln_networth'] = np.log(df['networth'])
-    df.sort_values(by='ln_networth', ascending=True, inplace=True)
-    weight_mean = ((df.ln_networth*df.wgt).sum())/(df.wgt.sum())
-    var_ln_wealth = ((df.wgt*((df.ln_networth-weight_mean)**2)).sum())*(1./(df.wgt.sum()-1))
-
-
-    wealth_moments = np.append([wealth_share], [gini_coeff,var_ln_wealth])
+    var_ln_wealth = inequality.var_log(networth, wgt, ddof=1)
 
+    wealth_moments = np.concatenate(
+        (wealth_share, np.asarray(gini_coeff)[..., None],
+         np.asarray(var_ln_wealth)[..., None]), axis=-1)
 
     return wealth_moments
@@ -32,32 +32,27 @@ def MVKDE(S, J ,proportion_matrix = None, filename = None, plot = False,  bandwi
         						groups.
        
     Functions called: 
-    	kde.gaussian_kde      = scipy function that generates a Kernel 
-    							Density Estimator from given data
+    	sorted_pairs          = pairs the age and ability type distributions
+
+    	weighted_kde          = evaluates a weighted Gaussian Kernel Density 
+    	                        Estimator, as kde.gaussian_kde would from a sample
 
     Objects in function:
         proportion_matrix     = [78, 7], array containing the proportion (0 < x < 1) of 
                                 the total bequests that each age-income category receives. 
                                 Derived in SCFExtract.py
 
-    	age_probs             = [78,], array containing the frequency, or how many times, 
-                                that random drawn numbers fell into the 78 different age bins
-
-    	income_probs          = [7,], array containing the frequency, or how many times, 
-                                that random drawn numbers fell into the 7 different ability 
-                                type bins
+    	age_cells, income_cells = [N,] arrays, age and ability type 
+                                indices of the pairs in a sample with the ages and 
+                                the ability types in ascending order
 
-    	age_frequency         = [70000,], array containing repeated age values for each 
-                                age number at the frequency given by the age_probs vector 
+    	cell_weights          = [N,] array, share of the sample in each pair
 
     	xmesh                 = complex number, the number of age values that will be 
                                 evaluated in the Kernel Density Estimator.
 
-    	freq_mat              = [70000, 2], array containing age_frequency and 
-                                income_frequency stacked
-
-    	density               = object, class given by scipy.stats.gaussian_kde. 
-                                The Multivariate Kernel Density Estimator for the given data set.
+    	cell_points           = [2, N], array containing the ages and ability types 
+                                of the pairs
 
     	age_min, age_max      = scalars, the minimum and maximum age values and minimum 
         income_min, income_max  and maximum income values 
@@ -87,36 +82,20 @@ def MVKDE(S, J ,proportion_matrix = None, filename = None, plot = False,  bandwi
 	       proportion_matrix = np.loadtxt(filename, delimiter = ',')
 	proportion_matrix_income = np.sum(proportion_matrix, axis = 0)
 	proportion_matrix_age = np.sum(proportion_matrix, axis = 1)
-	age_probs = np.random.multinomial(70000,proportion_matrix_age)
-	income_probs = np.random.multinomial(70000, proportion_matrix_income)
-	age_frequency = np.array([])
-	income_frequency = np.array([])
 	age_mesh = complex(str(S)+'j')
 	income_mesh = complex(str(J)+'j')
 
-	j = 18
-	'''creating a distribution of age values'''
-	for i in age_probs:
-		listit = np.ones(i)
-		listit *= j
-		age_frequency = np.append(age_frequency, listit)
-		j+=1
-
-	k = 1
-	'''creating a distribution of ability type values'''
-	for i in income_probs:
-		listit2 = np.ones(i)
-		listit2 *= k
-		income_frequency = np.append(income_frequency, listit2)
-		k+=1
-
-	freq_mat = np.vstack((age_frequency, income_frequency)).T
-	density = kde.gaussian_kde(freq_mat.T, bw_method=bandwidth)
-	age_min, income_min = freq_mat.min(axis=0)
-	age_max, income_max = freq_mat.max(axis=0)
+	'''pairing the age and ability type distributions, as a sample with
+	the ages and the ability types in ascending order'''
+	age_cells, income_cells, cell_weights = sorted_pairs(
+		proportion_matrix_age, proportion_matrix_income)
+	cell_points = np.vstack((age_cells + 18, income_cells + 1))
+
+	age_min, income_min = cell_points.min(axis=1)
+	age_max, income_max = cell_points.max(axis=1)
 	agei, incomei = np.mgrid[age_min:age_max:age_mesh, income_min:income_max:income_mesh]
 	coords = np.vstack([item.ravel() for item in [agei, incomei]])
-	estimator = density(coords).reshape(agei.shape)
+	estimator = weighted_kde(cell_points, cell_weights, coords, bandwidth).reshape(agei.shape)
 	estimator_scaled = estimator/float(np.sum(estimator))
 	if plot == True:
 		fig = plt.figure()
@@ -128,6 +107,84 @@ def MVKDE(S, J ,proportion_matrix = None, filename = None, plot = False,  bandwi
 		plt.show()
 	return estimator_scaled
 
+
+def sorted_pairs(probs1, probs2):
+    '''
+    Pairs two discrete distributions as a sample of each, sorted in
+    ascending order, would be paired, without drawing the sample: the
+    share of the pairs in each cell (i, j) is the overlap of the
+    cumulative shares of value i of the first distribution and value j of
+    the second.
+
+    Inputs:
+        probs1 = [N1,] vector, shares of the values of the first
+                 distribution
+        probs2 = [N2,] vector, shares of the values of the second
+                 distribution
+
+    Functions called: None
+
+    Objects in function:
+        cuts = vector, cumulative shares at which the value of either
+               distribution changes
+        mid  = vector, midpoint of each interval between the cuts
+
+    Returns: idx1, idx2, weights
+        idx1, idx2 = [N,] vectors, values of the pairs (indices of probs1
+                     and probs2)
+        weights    = [N,] vector, share of the pairs in each cell
+    '''
+    cum1 = np.cumsum(probs1, dtype=float) / np.sum(probs1)
+    cum2 = np.cumsum(probs2, dtype=float) / np.sum(probs2)
+    cuts = np.unique(np.concatenate(([0.0], cum1[:-1], cum2[:-1], [1.0])))
+    weights = np.diff(cuts)
+    mid = cuts[:-1] + weights / 2.0
+    idx1 = np.minimum(np.searchsorted(cum1, mid), len(cum1) - 1)
+    idx2 = np.minimum(np.searchsorted(cum2, mid), len(cum2) - 1)
+
+    return idx1, idx2, weights
+
+
+def weighted_kde(points, weights, coords, bandwidth):
+    '''
+    Evaluates a Gaussian Kernel Density Estimator of weighted data, the
+    estimator kde.gaussian_kde(points, bw_method=bandwidth) fits to a
+    sample with the points repeated in proportion to the weights, at a
+    cost proportional to the number of distinct points rather than the
+    size of the sample.
+
+    Inputs:
+        points    = [D, N] array, distinct data points
+        weights   = [N,] vector, weight of each point
+        coords    = [D, M] array, points at which the density is evaluated
+        bandwidth = scalar, bandwidth factor (bw_method of gaussian_kde)
+
+    Functions called: None
+
+    Objects in function:
+        kernel_cov = [D, D] array, covariance of the kernel, the weighted
+                     covariance of the data times bandwidth squared
+        whiten     = [D, D] array, transforms the points so the kernel
+                     covariance is the identity
+        dist2      = [N, M] array, squared distance of each coordinate
+                     from each point, in the whitened space
+
+    Returns: [M,] vector, density at each coordinate
+    '''
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    coords = np.atleast_2d(np.asarray(coords, dtype=float))
+    weights = np.asarray(weights, dtype=float) / np.sum(weights)
+    kernel_cov = (np.atleast_2d(np.cov(points, aweights=weights, bias=True)) *
+                  bandwidth ** 2)
+    whiten = np.linalg.cholesky(np.linalg.inv(kernel_cov)).T
+    points_w = whiten.dot(points)
+    coords_w = whiten.dot(coords)
+    dist2 = ((points_w[:, :, None] - coords_w[:, None, :]) ** 2).sum(0)
+    norm = np.sqrt(np.linalg.det(2 * np.pi * kernel_cov))
+
+    return weights.dot(np.exp(-0.5 * dist2)) / norm
+
+
 def wealth_dist(year_start, year_end, S, J, path):
     '''
     FROM THE SURVEY OF CONSUMER FINANCES
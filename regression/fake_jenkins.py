@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+'''
+A stand-in for the Jenkins server that polling_jobs.py polls, serving the
+outputs of run_local.py.  Each reform is served as build 1 of the job
+ci-mode-simple-<reform>:
+
+    /job/ci-mode-simple-<reform>/lastBuild/           build number
+    /job/ci-mode-simple-<reform>/<build>/consoleText  console log
+    /job/ci-mode-simple-<reform>/ws/OG-USA/regression/[file]
+                                                      results and diffs
+    /job/ci-mode-simple-<reform>/buildWithParameters  accepted, no-op
+
+The console log of a reform that is still running has no "Finished"
+line, so the polling client waits for it as it would for Jenkins.
+
+Usage:
+    python run_local.py &
+    python fake_jenkins.py --port 8080 &
+    JENKINS_DOMAIN=http://localhost:8080 OSPC_API_KEY=x \
+        BUILD_CAUSE=local python polling_jobs.py reform0 reform1
+'''
+from __future__ import print_function
+import argparse
+import os
+import re
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+REGRESSION_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_PATTERN = re.compile(r'^/job/ci-mode-simple-([^/]+)/(.*)$')
+# polling_jobs.py takes a build to be finished only after 500 lines
+MIN_LOG_LINES = 501
+
+
+class FakeJenkinsHandler(BaseHTTPRequestHandler):
+
+    artifacts_dir = os.path.join(REGRESSION_DIR, 'artifacts')
+    build_cause = os.environ.get('BUILD_CAUSE', 'local')
+
+    def send(self, content, status=200, content_type='text/plain'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def console_text(self, reform):
+        log_file = os.path.join(self.artifacts_dir, reform,
+                                'console_raw_log.txt')
+        if not os.path.exists(log_file):
+            return None
+        with open(log_file) as f:
+            lines = f.read().splitlines()
+        started = ['Started by {}'.format(self.build_cause)]
+        finished = [l for l in lines if l.startswith('Finished:')]
+        lines = [l for l in lines if not l.startswith('Finished:')]
+        if finished:
+            # pad the log to the length polling_jobs.py expects (it skips
+            # empty lines)
+            lines += ['.'] * (MIN_LOG_LINES - len(lines))
+            lines.append(finished[-1])
+        return '\n'.join(started + lines) + '\n'
+
+    def workspace(self, reform, fname):
+        work_dir = os.path.join(self.artifacts_dir, reform)
+        if not os.path.isdir(work_dir):
+            return None, None
+        if fname:
+            path = os.path.join(work_dir, os.path.basename(fname))
+            if not os.path.isfile(path):
+                return None, None
+            with open(path, 'rb') as f:
+                return f.read(), 'text/plain'
+        links = ['<a href="{0}">{0}</a>'.format(f)
+                 for f in sorted(os.listdir(work_dir))
+                 if f.startswith(('results', 'diff'))]
+        return ('<html><body>\n{}\n</body></html>\n'.format('\n'.join(links)),
+                'text/html')
+
+    def do_GET(self):
+        mat = JOB_PATTERN.match(self.path.split('?')[0])
+        if not mat:
+            return self.send('Not found', 404)
+        reform, rest = mat.groups()
+        rest = rest.strip('/')
+        if rest.startswith('buildWithParameters'):
+            return self.send('', 201)
+        if rest == 'lastBuild':
+            if not os.path.isdir(os.path.join(self.artifacts_dir, reform)):
+                return self.send('Not found', 404)
+            return self.send('<html><body><h1>Build #1 ({})</h1>'
+                             '</body></html>'.format(reform),
+                             content_type='text/html')
+        if rest.endswith('consoleText'):
+            content = self.console_text(reform)
+            if content is None:
+                return self.send('Not found', 404)
+            return self.send(content)
+        if rest.startswith('ws/OG-USA/regression'):
+            content, content_type = self.workspace(
+                reform, rest[len('ws/OG-USA/regression'):].strip('/'))
+            if content is None:
+                return self.send('Not found', 404)
+            return self.send(content, content_type=content_type)
+        return self.send('Not found', 404)
+
+    do_POST = do_GET
+
+
+def serve(port, artifacts_dir):
+    FakeJenkinsHandler.artifacts_dir = os.path.abspath(artifacts_dir)
+    server = HTTPServer(('', port), FakeJenkinsHandler)
+    print('Serving {} on port {}'.format(FakeJenkinsHandler.artifacts_dir,
+                                         port))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the outputs of run_local.py to polling_jobs.py')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--artifacts', default=os.path.join(REGRESSION_DIR, 'artifacts'))
+    args = parser.parse_args()
+    serve(args.port, args.artifacts)
@@ -53,7 +53,7 @@ def get_diff_files(reform):
             if href.startswith(('results', 'diff')):
                 url = workspace_url(reform) + href
                 content = request(url)
-                dirr = os.path.join(artifacts, reform)
+                dirr = os.path.join('artifacts', reform)
                 if not os.path.exists(dirr):
                     os.mkdir(dirr)
                 fname = os.path.join(dirr, href)
@@ -152,13 +152,13 @@ def get_results():
                 with open(f) as f2:
                     content = f2.read()
                 print('From artifact {}:\n\n{}\n\n'.format(f, content))
-            if f.startswith('results_data') and f.endswith('.csv'):
+            if os.path.basename(f).startswith('results_data') and f.endswith('.csv'):
                 results_data_files.append(f)
     if not os.path.exists('artifacts'):
         os.mkdir('artifacts')
     if results_data_files:
         dataframes = [pd.read_csv(d, index_col=0) for d in results_data_files]
-        keys = [os.path.basename(d).replace('results_data_', '').replace('.csv', '') for di in ds]
+        keys = [os.path.basename(d).replace('results_data_', '').replace('.csv', '') for d in results_data_files]
         df = pd.concat(dataframes, keys=keys)
         df.index.names = 'reform', 'category'
         df.to_csv('artifacts/results_data_concat.csv')
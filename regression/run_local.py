@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+'''
+Runs the regression reforms on one machine, several at a time, in place
+of one Jenkins job per reform.
+
+Each reform is run by run_reforms.py in its own process and in its own
+directory, artifacts/<reform>, where it writes results_data_<reform>.csv,
+results_pprint_<reform>.txt, the diff against the standard and its
+console log.  When all reforms have finished, their results are compared
+with the standards in standards/tc<taxcalc>_og<ogusa> (versions from
+.regression.txt) within the tolerances, and the differences and the run
+time of each reform are written to artifacts/regression_report.csv.
+With --compare-to, the SS and TPI results of each reform (saved by
+run_reforms.py as memory-mappable arrays) are also compared with those
+of the same reform in another artifacts directory (e.g., of the master
+branch).  The comparisons are made several at a time, in chunks, by
+ogusa.utils.compare_many, and the differences in each key of each
+comparison are written to artifacts/comparison_summary.csv.
+
+fake_jenkins.py serves the artifacts to polling_jobs.py in the form of
+the Jenkins jobs.
+
+Usage:
+    python run_local.py [reform [reform ...]] [--processes N]
+                        [--reform-specs reforms.json]
+                        [--compare-to other_artifacts]
+'''
+from __future__ import print_function
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import run_reforms
+from ogusa import utils
+
+REGRESSION_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACTS_DIR = os.path.join(REGRESSION_DIR, 'artifacts')
+ATOL = 1e-4
+RTOL = 1e-2
+POLL_INTERVAL = 5 # seconds
+RUN_REFORMS = os.path.join(REGRESSION_DIR, 'run_reforms.py')
+FINISHED = 'Finished: {}'
+
+
+def cli():
+    parser = argparse.ArgumentParser(description='Run the regression reforms locally, in parallel')
+    parser.add_argument('reforms', nargs='*',
+                        help='Reforms to run, all reforms in the reform specs if none')
+    parser.add_argument('--reform-specs', default=run_reforms.REGRESSION_CONFIG['reform_specs_json'],
+                        help='JSON file of reforms, relative to the regression directory. ' + run_reforms.REFORM_SPEC_HELP)
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                        help='Number of reforms run at a time')
+    parser.add_argument('--atol', type=float, default=ATOL,
+                        help='Absolute tolerance of the differences from the standards')
+    parser.add_argument('--rtol', type=float, default=RTOL,
+                        help='Relative tolerance of the differences from the standards')
+    parser.add_argument('--artifacts', default=ARTIFACTS_DIR,
+                        help='Directory of the outputs')
+    parser.add_argument('--compare-to', default=None,
+                        help='Artifacts directory of another run of the reforms, whose SS and TPI results are compared with these')
+    parser.add_argument('--branch', default='local',
+                        help='Name of the OG-USA version in the logs')
+    return parser.parse_args()
+
+
+def standards_dir():
+    config = run_reforms.REGRESSION_CONFIG
+    return os.path.join(REGRESSION_DIR, 'standards',
+                        'tc{}_og{}'.format(config['compare_taxcalc_version'],
+                                           config['compare_ogusa_version']))
+
+
+def run_all(reforms, reform_specs, processes, artifacts_dir, branch):
+    '''
+    Runs the reforms, at most processes of them at a time, each with
+    run_reforms.py in artifacts_dir/<reform>.  Returns a dict of
+    (returncode, runtime in seconds) by reform.
+    '''
+    pending = list(reforms)
+    running = {}
+    finished = {}
+    while pending or running:
+        while pending and len(running) < processes:
+            reform = pending.pop(0)
+            work_dir = os.path.join(artifacts_dir, reform)
+            if not os.path.exists(work_dir):
+                os.makedirs(work_dir)
+            log = open(os.path.join(work_dir, 'console_raw_log.txt'), 'w')
+            log.write('Started by run_local.py, {} {}\n'.format(reform, branch))
+            log.flush()
+            cmd = [sys.executable, RUN_REFORMS, reform, branch,
+                   '--reform-specs', reform_specs]
+            proc = subprocess.Popen(cmd, cwd=work_dir, stdout=log,
+                                    stderr=subprocess.STDOUT)
+            running[reform] = (proc, log, time.time())
+            print('Started {}'.format(reform))
+        for reform, (proc, log, start) in list(running.items()):
+            if proc.poll() is None:
+                continue
+            runtime = time.time() - start
+            log.close()
+            with open(log.name, 'a') as f:
+                f.write(FINISHED.format('SUCCESS' if proc.returncode == 0
+                                        else 'FAILURE') + '\n')
+            del running[reform]
+            finished[reform] = (proc.returncode, runtime)
+            print('REFORM FINISHED: {} in {:.1f}s with return code {}'.format(
+                reform, runtime, proc.returncode))
+        if running:
+            time.sleep(POLL_INTERVAL)
+    return finished
+
+
+def comparison_pairs(reform, work_dir, standards, compare_to):
+    '''
+    Returns the (results, standard) file pairs to compare for a reform:
+    its results table and the standard one, and, if compare_to is given,
+    each of its result arrays and those of the reform in compare_to
+    (where either run has them).
+    '''
+    pairs = [(os.path.join(work_dir, 'results_data_{}.csv'.format(reform)),
+              os.path.join(standards, 'results_data_{}.csv'.format(reform)))]
+    if compare_to is not None:
+        for run in ['baseline', 'reform']:
+            for stage in sorted(run_reforms.RESULT_FILES):
+                path = os.path.join(run_reforms.RESULT_ARRAYS_DIR, run, stage)
+                pair = (os.path.join(work_dir, path),
+                        os.path.join(compare_to, reform, path))
+                if any(os.path.exists(fname) for fname in pair):
+                    pairs.append(pair)
+    return pairs
+
+
+def comparison_status(rows):
+    '''
+    Returns the status of a reform ('pass', 'fail', 'no results' or 'no
+    standard', from its results table), the largest absolute difference
+    and the number of results outside the tolerances, from the summary of
+    its comparisons.
+    '''
+    table = rows[0]['file1']
+    missing = [row['status'] for row in rows
+               if row['file1'] == table and row['key'] == '']
+    if missing == ['missing1']:
+        status = 'no results'
+    elif missing == ['missing2']:
+        status = 'no standard'
+    else:
+        status = 'pass'
+    if any(row['status'] != 'ok' and not (row['file1'] == table and row['key'] == '')
+           for row in rows):
+        status = 'fail'
+    diffs = [row['max_abs_diff'] for row in rows
+             if not np.isnan(row['max_abs_diff'])]
+    max_diff = max(diffs) if diffs else np.nan
+    n_outside = sum(row['n_outside'] for row in rows)
+    return status, max_diff, n_outside
+
+
+def report(finished, artifacts_dir, atol, rtol, processes, compare_to=None):
+    '''
+    Writes artifacts_dir/regression_report.csv, with the run time and the
+    comparison with the standard of each reform,
+    artifacts_dir/comparison_summary.csv, with the differences in each
+    key of each comparison, and artifacts_dir/results_data_concat.csv,
+    with the results of all reforms.  Returns the report.
+    '''
+    standards = standards_dir()
+    pairs = dict((reform, comparison_pairs(reform, os.path.join(artifacts_dir, reform),
+                                           standards, compare_to))
+                 for reform in finished)
+    summary = utils.compare_many([pair for reform in sorted(pairs)
+                                  for pair in pairs[reform]],
+                                 atol=atol, rtol=rtol, num_workers=processes)
+    utils.write_comparison_summary(summary, os.path.join(artifacts_dir,
+                                                         'comparison_summary.csv'))
+    rows = []
+    for reform in sorted(finished):
+        returncode, runtime = finished[reform]
+        files = set(pairs[reform])
+        status, max_diff, n_outside = comparison_status(
+            [row for row in summary if (row['file1'], row['file2']) in files])
+        if returncode != 0:
+            status = 'fail'
+        rows.append((reform, returncode, runtime, status, max_diff, n_outside))
+    df_report = pd.DataFrame(rows, columns=['reform', 'returncode', 'runtime',
+                                            'status', 'max_abs_diff',
+                                            'n_outside_tolerance'])
+    df_report.to_csv(os.path.join(artifacts_dir, 'regression_report.csv'),
+                     index=False)
+
+    results = []
+    keys = []
+    for reform in sorted(finished):
+        fname = os.path.join(artifacts_dir, reform,
+                             'results_data_{}.csv'.format(reform))
+        if os.path.exists(fname):
+            results.append(pd.read_csv(fname, index_col=0))
+            keys.append(reform)
+    if results:
+        df = pd.concat(results, keys=keys)
+        df.index.names = 'reform', 'category'
+        df.to_csv(os.path.join(artifacts_dir, 'results_data_concat.csv'))
+    return df_report
+
+
+def main():
+    args = cli()
+    reform_specs = os.path.join(REGRESSION_DIR, args.reform_specs)
+    with open(reform_specs, 'r') as f:
+        reforms = args.reforms or sorted(json.loads(f.read()))
+    artifacts_dir = os.path.abspath(args.artifacts)
+    if not os.path.exists(artifacts_dir):
+        os.makedirs(artifacts_dir)
+    print('Run {} with {} processes, standards {}'.format(
+        ' '.join(reforms), args.processes, standards_dir()))
+    start = time.time()
+    finished = run_all(reforms, args.reform_specs, args.processes,
+                       artifacts_dir, args.branch)
+    compare_to = (os.path.abspath(args.compare_to)
+                  if args.compare_to is not None else None)
+    df_report = report(finished, artifacts_dir, args.atol, args.rtol,
+                       args.processes, compare_to)
+    print(df_report.to_string(index=False))
+    print('total time was {:.1f}s'.format(time.time() - start))
+    if (df_report['status'] == 'fail').any():
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,9 @@ try:
     import sys
     import time
     import uuid
-    sys.path.append("../")
+    # the repo, whatever the working directory (e.g., one directory per
+    # reform in run_local.py)
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     import matplotlib
     matplotlib.use('Agg')
     import pandas as pd
@@ -24,6 +26,7 @@ try:
     from ogusa.scripts import postprocess
     from ogusa.scripts.execute import runner # change here for small jobs
     from ogusa.utils import REFORM_DIR, BASELINE_DIR
+    from ogusa import utils
 except Exception as e:
     pref = sys.prefix
     exc = traceback.format_exc()
@@ -32,6 +35,11 @@ except Exception as e:
 
 VERSION = "0.5.5"
 QUICK_RUN = False
+# Directory, in the working directory of a reform, of the SS and TPI
+# results of its baseline and reform runs, saved as memory-mappable
+# arrays (utils.save_result_arrays) for the comparisons of run_local.py
+RESULT_ARRAYS_DIR = "result_arrays"
+RESULT_FILES = {'SS': 'SS/SS_vars.pkl', 'TPI': 'TPI/TPI_vars.pkl'}
 
 REFORM_SPEC_HELP = '''Over time, code renaming and API changes have
 required what was "reforms.json" to change
@@ -64,9 +72,9 @@ if missing:
 
 def run_micro_macro(reform, user_params, guid, solution_checks, run_micro):
 
-    # Turn off checks for now
-    SS.ENFORCE_SOLUTION_CHECKS = solution_checks
-    TPI.ENFORCE_SOLUTION_CHECKS = solution_checks
+    # Turn off checks for now, for these runs only
+    solver_config = SS.get_solver_config(
+        enforce_solution_checks=solution_checks)
 
     start_time = time.time()
 
@@ -81,7 +89,8 @@ def run_micro_macro(reform, user_params, guid, solution_checks, run_micro):
 
     kwargs={'output_base':baseline_dir, 'baseline_dir':baseline_dir,
             'baseline':True, 'analytical_mtrs':False, 'age_specific':False,
-            'user_params':user_params, 'guid':guid, 'run_micro':run_micro}
+            'user_params':user_params, 'guid':guid, 'run_micro':run_micro,
+            'solver_config':solver_config}
 
     #p1 = Process(target=runner, kwargs=kwargs)
     #p1.start()
@@ -89,7 +98,8 @@ def run_micro_macro(reform, user_params, guid, solution_checks, run_micro):
 
     kwargs={'output_base':reform_dir, 'baseline_dir':baseline_dir,
              'baseline':False, 'analytical_mtrs':False, 'user_params':user_params,
-             'reform':reform, 'age_specific':False, 'guid':guid,'run_micro':run_micro}
+             'reform':reform, 'age_specific':False, 'guid':guid,'run_micro':run_micro,
+             'solver_config':solver_config}
 
     #p2 = Process(target=runner, kwargs=kwargs)
     #p2.start()
@@ -102,19 +112,38 @@ def run_micro_macro(reform, user_params, guid, solution_checks, run_micro):
     #time.sleep(0.5)
 
     ans = postprocess.create_diff(baseline_dir=baseline_dir, policy_dir=reform_dir)
+    save_result_arrays(baseline_dir, reform_dir)
 
     print("total time was ", (time.time() - start_time))
     print(ans)
 
     return ans
 
+def save_result_arrays(baseline_dir, reform_dir):
+    '''
+    Saves the SS and TPI results of the baseline and reform runs in
+    RESULT_ARRAYS_DIR/<run>/<stage>, so they can be compared with those
+    of other runs from memory maps (see run_local.py).
+    '''
+    for run, output_dir in [('baseline', baseline_dir), ('reform', reform_dir)]:
+        for stage, fname in sorted(RESULT_FILES.items()):
+            path = os.path.join(output_dir, fname)
+            if os.path.exists(path):
+                utils.save_result_arrays(utils.load_results(path),
+                                         os.path.join(RESULT_ARRAYS_DIR, run, stage))
+
+
 def make_args_from_regression_config():
     parser = argparse.ArgumentParser(description='Take reform id, branch from command line and .regression.yml config from top level of repo')
     parser.add_argument('reform', help='Reform such as "reform0", "reform1", "t1", or "t2"')
     parser.add_argument('ogusabranch', help='Git branch to install')
+    parser.add_argument('--reform-specs', default=None,
+                        help='JSON file of reforms, relative to the regression directory, in place of reform_specs_json. ' + REFORM_SPEC_HELP)
     args = argparse.Namespace(**REGRESSION_CONFIG)
     args2 = parser.parse_args()
     args.reform = args2.reform
+    if args2.reform_specs is not None:
+        args.reform_specs_json = args2.reform_specs
     args.install_ogusa_version = args2.ogusabranch
     args.folder = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                'standards',
@@ -137,7 +166,10 @@ def main():
     if bool(getattr(args, 'dry_run_imports_installs_only', False)):
         print("DRY_RUN_IMPORTS_INSTALLS_ONLY OK")
         return
-    with open(args.reform_specs_json, "r") as f:
+    # reform_specs_json is relative to the regression directory
+    reform_specs_json = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     args.reform_specs_json)
+    with open(reform_specs_json, "r") as f:
         reforms = json.loads(f.read())
 
     reform_num = args.reform
@@ -170,7 +202,9 @@ def main():
     # Dump the actual data
     df.to_csv("results_data_{}.csv".format(reform_num))
 
-    if args.diff:
+    if args.diff and not os.path.exists(args.standard):
+        print("No standard {} to diff against".format(args.standard))
+    elif args.diff:
         df_released = pd.read_csv(args.standard, index_col=0)
         df_diff = df_released - df
         # Dump the diff data
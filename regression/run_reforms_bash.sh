@@ -34,6 +34,9 @@ setup_miniconda(){
 poll(){
     echo Begin Polling && python polling_jobs.py ${REFORMS_TO_RUN} && echo End Polling;
 }
+run_local(){
+    echo Run reforms locally && python run_local.py ${REFORMS_TO_RUN} && echo End local run;
+}
 push_artifacts(){
     echo Push artifacts;
     export org=opensourcepolicycenter;
@@ -48,5 +51,11 @@ export VERSION=$(echo $VERSION | sed 's/:/_/g' | sed 's/ /_/g');
 
 echo Submit REFORMS_TO_RUN: $REFORMS_TO_RUN
 set +x
-rm -rf artifacts && submit_jobs && setup_miniconda && poll && push_artifacts
+if [ "$REGRESSION_MODE" = "local" ];then
+    # all reforms on this machine, in parallel, rather than one Jenkins job each
+    export REFORMS_TO_RUN=$(cat ../.regression.txt | grep reforms_to_run | sed 's/reforms_to_run//');
+    rm -rf artifacts && run_local && push_artifacts
+else
+    rm -rf artifacts && submit_jobs && setup_miniconda && poll && push_artifacts
+fi
 set -x